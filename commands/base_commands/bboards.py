@@ -12,6 +12,7 @@ from server.utils import prettytable
 from server.utils.arx_utils import inform_staff
 from commands.base import ArxCommand, ArxPlayerCommand
 from typeclasses.bulletin_board.bboard import BBoard
+from typeclasses.bulletin_board.unread import get_unread_counts
 
 # limit symbol import for API
 __all__ = (
@@ -46,6 +47,9 @@ def list_bboards(caller, old=False):
     # just display the subscribed bboards with no extra info
     if old:
         caller.msg("{cDisplaying only archived posts.{n")
+    else:
+        # fills the unread cache of every board with one query
+        get_unread_counts(caller, bb_list)
     bbtable = prettytable.PrettyTable(
         ["{wbb #", "{wName", "{wPosts{n", "{wSubscribed{n"]
     )
@@ -54,12 +58,12 @@ def list_bboards(caller, old=False):
         bb_name = bboard.key
         unread_num = bboard.num_of_unread_posts(caller, old)
         subbed = bboard in my_subs
-        posts = bboard.archived_posts if old else bboard.posts
+        num_posts = bboard.post_index.count(old)
         if unread_num:
             unread_str = " {w(%s new){n" % unread_num
         else:
             unread_str = ""
-        bbtable.add_row([bb_number, bb_name, "%s%s" % (len(posts), unread_str), subbed])
+        bbtable.add_row([bb_number, bb_name, "%s%s" % (num_posts, unread_str), subbed])
     caller.msg("\n{w" + "=" * 60 + "{n\n%s" % bbtable)
 
 
@@ -145,13 +149,8 @@ def get_unread_posts(caller):
         return
     my_subs = [bb for bb in bb_list if bb.has_subscriber(caller)]
     msg = "{wNew posts on bulletin boards:{n "
-    unread = []
-    for bb in my_subs:
-        post = bb.get_latest_post()
-        if not post:
-            continue
-        if not post.check_read(caller):
-            unread.append(bb)
+    counts = get_unread_counts(caller, my_subs)
+    unread = [bb for bb in my_subs if counts[bb.id]]
     if unread:
         msg += ", ".join(bb.key.capitalize() for bb in unread)
         caller.msg(msg)
@@ -212,18 +211,19 @@ class CmdBBNew(ArxPlayerCommand):
             if not posts:
                 continue
             caller.msg("{wBoard {c%s{n:" % bb.key)
-            posts_on_board = 0
+            if noread:
+                posts = list(posts[: num_posts - found_posts])
+                bb.mark_posts_read(caller, posts)
+                found_posts += len(posts)
+                self.msg("You have marked %s posts as read." % len(posts))
+                if found_posts >= num_posts:
+                    return
+                continue
             for post in posts:
-                if noread:
-                    bb.mark_read(caller, post)
-                else:
-                    bb.read_post(caller, post)
+                bb.read_post(caller, post)
                 found_posts += 1
-                posts_on_board += 1
                 if found_posts >= num_posts:
                     return
-            if noread:
-                self.msg("You have marked %s posts as read." % posts_on_board)
         if not found_posts:
             self.msg(
                 "No new posts found on boards: %s."
@@ -333,16 +333,13 @@ class CmdBBReadOrPost(ArxPlayerCommand):
                 return
             num_read = 0
             try:
-                for post_num in range(int(postrange[0]), int(postrange[1]) + 1):
-                    try:
-                        post = board.get_post(caller, int(post_num))
-                        board.read_post(caller, post, old)
-                        num_read += 1
-                    except (TypeError, ValueError, AttributeError):
-                        continue
+                posts = board.get_post_range(int(postrange[0]), int(postrange[1]), old)
             except (TypeError, ValueError, IndexError):
                 caller.msg("Posts in the range must be numbers.")
                 return
+            for _, post in posts:
+                board.read_post(caller, post, old)
+                num_read += 1
             if not num_read:
                 caller.msg("No posts in range.")
             return
@@ -11,9 +11,8 @@ from evennia.utils.utils import fill, dedent
 from evennia.commands.command import Command
 from evennia.help.models import HelpEntry
 from evennia.utils import create
-from evennia.utils.utils import string_suggestions
 from commands.base import ArxCommand
-from commands.cmdsets.situational import SituationalCmdSet
+from commands.base_commands.help_index import HELP_INDEX
 
 # limit symbol import for API
 __all__ = ("CmdHelp", "CmdSetHelp")
@@ -38,12 +37,7 @@ def format_help_entry(
     if help_text:
         string += "\n%s" % dedent(help_text.rstrip())
     if related_tags:
-        entries = (
-            HelpEntry.objects.exclude(db_key=title)
-            .filter(db_tags__db_key__in=related_tags)
-            .distinct()
-            .values_list("db_key", flat=True)
-        )
+        entries = HELP_INDEX.get_related(title, related_tags)
         string += "\n\n{CRelated help entries: {w%s" % ", ".join(entries)
     if suggested:
         string += "\n\n{CSuggested:{n "
@@ -132,67 +126,59 @@ class CmdHelp(Command):
         cmdset.make_unique(caller)
 
         # retrieve all available commands and database topics
-        all_cmds = [cmd for cmd in cmdset if cmd.auto_help and cmd.access(caller)]
+        cmds = [cmd for cmd in cmdset if cmd.auto_help]
         player = caller
         if not hasattr(caller, "character"):
             player = caller.player
 
         if not player.character:
             try:
-                char_cmds = [
-                    cmd
-                    for cmd in player.char_ob.cmdset.all()[0]
-                    if cmd.auto_help and cmd.access(caller)
-                ]
-                all_cmds += char_cmds
+                cmds += [cmd for cmd in player.char_ob.cmdset.all()[0] if cmd.auto_help]
             except Exception:
                 pass
-        all_topics = [
-            topic
-            for topic in HelpEntry.objects.all()
-            if topic.access(caller, "view", default=True)
-        ]
-        all_categories = list(
-            set(
-                [cmd.help_category.lower() for cmd in all_cmds]
-                + [topic.help_category.lower() for topic in all_topics]
-            )
+        listing = HELP_INDEX.get_listing(caller, cmds)
+        all_cmds = HELP_INDEX.get_commands(caller, cmds, listing)
+        all_topics = HELP_INDEX.get_topics(caller, listing)
+        # commands and topics with locks we check on every call, which aren't in the listing
+        other_cmds = [cmd for cmd in all_cmds if cmd.key not in listing.cmd_keys]
+        other_topics = [ob for ob in all_topics if ob.id not in listing.topic_ids]
+        all_categories = listing.categories.union(
+            [cmd.help_category.lower() for cmd in other_cmds]
+            + [topic.help_category.lower() for topic in other_topics]
         )
 
         if query in ("list", "all"):
+            if not other_cmds and not other_topics and listing.brief_list:
+                self.msg(listing.brief_list)
+                return
             # we want to list all available help entries, grouped by category
             hdict_cmd = defaultdict(list)
             hdict_topic = defaultdict(list)
             # create the dictionaries {category:[topic, topic ...]} required by format_help_list
             [hdict_cmd[cmd.help_category].append(cmd.key) for cmd in all_cmds]
             [hdict_topic[topic.help_category].append(topic.key) for topic in all_topics]
+            brief_list = format_help_list(hdict_cmd, hdict_topic, brief=True)
+            if not other_cmds and not other_topics:
+                listing.brief_list = brief_list
             # report back
-            self.msg(format_help_list(hdict_cmd, hdict_topic, brief=True))
+            self.msg(brief_list)
             return
 
         # Try to access a particular command
 
-        # build vocabulary of suggestions and rate them by string similarity.
-        vocabulary = (
-            [cmd.key for cmd in all_cmds if cmd]
-            + [topic.key for topic in all_topics]
-            + all_categories
+        # suggestions rated by string similarity, from words only this caller has and our listing
+        extra_words = (
+            [cmd.key for cmd in other_cmds]
+            + [topic.key for topic in other_topics]
+            + list(all_categories - listing.categories)
+        )
+        [extra_words.extend(cmd.aliases) for cmd in other_cmds]
+        suggestions = listing.get_suggestions(
+            query,
+            extra_words,
+            cutoff=suggestion_cutoff,
+            maxnum=suggestion_maxnum,
         )
-        [vocabulary.extend(cmd.aliases) for cmd in all_cmds]
-        suggestions = [
-            sugg
-            for sugg in string_suggestions(
-                query,
-                set(vocabulary),
-                cutoff=suggestion_cutoff,
-                maxnum=suggestion_maxnum,
-            )
-            if sugg != query
-        ]
-        if not suggestions:
-            suggestions = [
-                sugg for sugg in vocabulary if sugg != query and sugg.startswith(query)
-            ]
 
         found_match = False
 
@@ -221,7 +207,7 @@ class CmdHelp(Command):
                 ]
 
         if not match:
-            match = [cmd for cmd in SituationalCmdSet() if cmd == query]
+            match = [cmd for cmd in HELP_INDEX.get_situational_cmds() if cmd == query]
             unavailable = True
 
         if len(match) == 1:
@@ -245,8 +231,8 @@ class CmdHelp(Command):
             found_match = True
 
         # try an exact database help entry match
-        match = list(HelpEntry.objects.find_topicmatch(query, exact=True))
-        match = [topic for topic in match if topic.access(caller, "view", default=True)]
+        match = [HELP_INDEX.find_topic(query)]
+        match = [topic for topic in match if topic and topic in all_topics]
         if len(match) == 1:
             self.msg(
                 format_help_entry(
@@ -0,0 +1,289 @@
+"""
+An index for the help command. Every call to help used to check access to
+every command and help entry, load every HelpEntry, build a
+SituationalCmdSet, and score every command, alias, topic and category
+against the query for suggestions, and showing an entry ran a tag query for
+related entries.
+
+HelpIndex loads help entries and their tags once, until an entry or its tags
+change, and keeps a HelpListing for each combination of a caller's
+permissions and the commands in their cmdset. Access to commands and entries
+whose locks only depend on permissions is checked once per listing; anything
+with other lock functions is still checked on each call. A listing holds the
+categories, the formatted 'help all' text, a prefix index of its words, and
+each word's letter counts, so suggestions are scored without recounting
+letters, and are remembered for queries we've seen before. HELP_INDEX is the
+shared instance.
+"""
+import math
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.db.models import signals
+from evennia.help.models import HelpEntry
+
+# lock functions whose results depend only on the permissions of who's checking
+STATIC_LOCKFUNCS = frozenset(
+    (
+        "all",
+        "true",
+        "false",
+        "none",
+        "perm",
+        "pperm",
+        "perm_above",
+        "pperm_above",
+        "superuser",
+    )
+)
+_RE_LOCKFUNC = re.compile(r"(\w+)\s*\(")
+
+
+def get_lock_signature(caller):
+    """
+    Gets what the static lock functions of a caller depend on: whether they're
+    an account or character, and their own and their account's permissions.
+    """
+    account = caller if hasattr(caller, "character") else caller.account
+    signature = [caller.__class__.__name__]
+    if account:
+        signature += [
+            account.is_superuser,
+            tuple(sorted(account.permissions.all())),
+            bool(account.attributes.has("_quell")),
+        ]
+    if account is not caller:
+        signature.append(tuple(sorted(caller.permissions.all())))
+    return tuple(signature)
+
+
+class Vocabulary(object):
+    """Words for suggestions, with a prefix index and each word's letter counts"""
+
+    def __init__(self, words):
+        self.words = sorted(set(words))
+        self.letters = [Counter(word) for word in self.words]
+        self.norms = [
+            math.sqrt(sum(count**2 for count in letters.values()))
+            for letters in self.letters
+        ]
+
+    def similarity(self, query_letters, query_norm, index):
+        """
+        The cosine similarity of a query's letter counts and a word's, the
+        same measure as evennia's string_similarity.
+        """
+        letters = self.letters[index]
+        dot = sum(count * letters.get(char, 0) for char, count in query_letters.items())
+        try:
+            return float(dot) / (query_norm * self.norms[index])
+        except ZeroDivisionError:
+            return 0
+
+    def suggest(self, query, cutoff=0.6, maxnum=5):
+        """Gets the words most similar to a query, best first"""
+        query_letters = Counter(query)
+        query_norm = math.sqrt(sum(count**2 for count in query_letters.values()))
+        scores = []
+        for index, word in enumerate(self.words):
+            score = self.similarity(query_letters, query_norm, index)
+            if score >= cutoff:
+                scores.append((score, word))
+        scores.sort(key=lambda tup: tup[0], reverse=True)
+        return [word for _, word in scores[:maxnum]]
+
+    def startswith(self, prefix):
+        """Gets the words that start with a prefix, in order"""
+        found = []
+        for word in self.words[bisect_left(self.words, prefix) :]:
+            if not word.startswith(prefix):
+                break
+            found.append(word)
+        return found
+
+
+class HelpListing(object):
+    """What a caller with a given lock signature and cmdset can see"""
+
+    MAX_REMEMBERED = 500
+
+    def __init__(self, cmds, topics, caller):
+        self.cmd_keys = set(cmd.key for cmd in cmds if cmd.access(caller))
+        self.topic_ids = set(
+            ob.id for ob in topics if ob.access(caller, "view", default=True)
+        )
+        allowed_cmds = [cmd for cmd in cmds if cmd.key in self.cmd_keys]
+        allowed_topics = [ob for ob in topics if ob.id in self.topic_ids]
+        self.categories = set(cmd.help_category.lower() for cmd in allowed_cmds)
+        self.categories.update(ob.help_category.lower() for ob in allowed_topics)
+        words = [cmd.key for cmd in allowed_cmds]
+        words += [ob.key for ob in allowed_topics]
+        words += list(self.categories)
+        for cmd in allowed_cmds:
+            words.extend(cmd.aliases)
+        self.vocabulary = Vocabulary(words)
+        self.suggestions = {}
+        self.brief_list = None
+
+    def get_suggestions(self, query, extra_words=(), cutoff=0.6, maxnum=5):
+        """
+        Gets suggestions for a query from our vocabulary and any extra words
+        available to this caller alone, falling back to words starting with
+        the query if none are similar enough.
+        """
+        if extra_words:
+            vocabulary = Vocabulary(list(self.vocabulary.words) + list(extra_words))
+        elif query in self.suggestions:
+            return self.suggestions[query]
+        else:
+            vocabulary = self.vocabulary
+        suggestions = [
+            ob for ob in vocabulary.suggest(query, cutoff, maxnum) if ob != query
+        ]
+        if not suggestions:
+            suggestions = [ob for ob in vocabulary.startswith(query) if ob != query]
+        if not extra_words:
+            if len(self.suggestions) >= self.MAX_REMEMBERED:
+                self.suggestions = {}
+            self.suggestions[query] = suggestions
+        return suggestions
+
+
+class HelpIndex(object):
+    """Help entries, their tags, and listings by lock signature"""
+
+    MAX_LISTINGS = 200
+
+    def __init__(self):
+        self.situational_cmdset = None
+        self._static_locks = {}
+        self.clear()
+
+    def clear(self):
+        """Discards the help entries and listings, to be loaded again when needed"""
+        self.built = False
+        self.topics = []
+        self.topics_by_key = {}
+        # tag key to the keys of help entries with that tag
+        self.tagged = defaultdict(set)
+        self.listings = {}
+
+    def ensure_built(self):
+        """Loads the help entries if we haven't already"""
+        if not self.built:
+            self.rebuild()
+
+    def rebuild(self):
+        """Loads every help entry and their tags"""
+        self.clear()
+        self.topics = list(HelpEntry.objects.all())
+        self.topics_by_key = {ob.key.lower(): ob for ob in self.topics}
+        for key, tag in HelpEntry.objects.filter(
+            db_tags__db_key__isnull=False
+        ).values_list("db_key", "db_tags__db_key"):
+            self.tagged[tag].add(key)
+        self.built = True
+
+    def is_static(self, lockstring):
+        """Whether a lockstring only uses lock functions that check permissions"""
+        lockstring = lockstring or ""
+        try:
+            return self._static_locks[lockstring]
+        except KeyError:
+            funcs = _RE_LOCKFUNC.findall(lockstring)
+            static = all(func in STATIC_LOCKFUNCS for func in funcs)
+            self._static_locks[lockstring] = static
+            return static
+
+    def get_situational_cmds(self):
+        """The commands of SituationalCmdSet, built once"""
+        if self.situational_cmdset is None:
+            from commands.cmdsets.situational import SituationalCmdSet
+
+            self.situational_cmdset = SituationalCmdSet()
+        return self.situational_cmdset
+
+    def get_listing(self, caller, cmds):
+        """
+        Gets the listing for a caller and the commands in their cmdset.
+
+            Args:
+                caller: The account or character using help
+                cmds: The auto_help commands of their cmdset
+
+            Returns:
+                A HelpListing.
+        """
+        self.ensure_built()
+        static_cmds = [cmd for cmd in cmds if self.is_static(cmd.locks)]
+        key = (
+            get_lock_signature(caller),
+            frozenset(cmd.key for cmd in static_cmds),
+        )
+        listing = self.listings.get(key)
+        if listing is None:
+            if len(self.listings) >= self.MAX_LISTINGS:
+                self.listings = {}
+            static_topics = [
+                ob for ob in self.topics if self.is_static(ob.db_lock_storage)
+            ]
+            listing = HelpListing(static_cmds, static_topics, caller)
+            self.listings[key] = listing
+        return listing
+
+    def get_commands(self, caller, cmds, listing):
+        """Gets the commands a caller has access to, using their listing"""
+        return [
+            cmd
+            for cmd in cmds
+            if cmd.key in listing.cmd_keys
+            or (not self.is_static(cmd.locks) and cmd.access(caller))
+        ]
+
+    def get_topics(self, caller, listing):
+        """Gets the help entries a caller may view, using their listing"""
+        return [
+            ob
+            for ob in self.topics
+            if ob.id in listing.topic_ids
+            or (
+                not self.is_static(ob.db_lock_storage)
+                and ob.access(caller, "view", default=True)
+            )
+        ]
+
+    def find_topic(self, query):
+        """Gets the help entry with exactly the given key, or None"""
+        self.ensure_built()
+        return self.topics_by_key.get(query.lower())
+
+    def get_related(self, title, tags):
+        """Gets the keys of the help entries with any of the tags, other than title"""
+        self.ensure_built()
+        related = set()
+        for tag in tags:
+            related |= self.tagged.get(tag, set())
+        related.discard(title)
+        return sorted(related)
+
+
+HELP_INDEX = HelpIndex()
+
+
+def clear_help_index(*args, **kwargs):
+    """Discards the help index when a help entry or its tags change"""
+    HELP_INDEX.clear()
+
+
+signals.post_save.connect(
+    clear_help_index, sender=HelpEntry, dispatch_uid="clear_help_index"
+)
+signals.post_delete.connect(
+    clear_help_index, sender=HelpEntry, dispatch_uid="clear_help_index"
+)
+signals.m2m_changed.connect(
+    clear_help_index,
+    sender=HelpEntry.db_tags.through,
+    dispatch_uid="clear_help_index",
+)
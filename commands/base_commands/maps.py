@@ -21,7 +21,8 @@ class CmdMap(ArxCommand):
     Usage:
        @map
 
-    Brings up a map of the area, if it's available.
+    Brings up a map of the area, if it's available. If you're heading
+    somewhere with @directions, the squares along the way are marked.
     """
 
     key = "@map"
@@ -38,10 +39,12 @@ class CmdMap(ArxCommand):
             caller.msg("There is no map available at your current location.")
             return
         caller.msg("Map of {c%s{n." % map.key)
-        from typeclasses.map import _CALLER_ICON
+        from typeclasses.map import _CALLER_ICON, _ROUTE_ICON
 
         caller.msg("Your location displayed as %s." % _CALLER_ICON)
         directions = caller.ndb.waypoint
+        if directions:
+            caller.msg("Your route displayed as %s." % _ROUTE_ICON)
         caller.msg(map.draw_map(room, destination=directions))
 
 
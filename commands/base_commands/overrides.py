@@ -48,6 +48,7 @@ from evennia.utils.utils import (
 from server.utils import arx_utils, prettytable
 from server.utils.exceptions import CommandError
 from commands.base import ArxCommand, ArxPlayerCommand
+from typeclasses.presence import PRESENCE
 from world.dominion.models import RPEvent
 
 AT_SEARCH_RESULT = variable_from_module(*settings.SEARCH_AT_RESULT.rsplit(".", 1))
@@ -516,7 +517,7 @@ class CmdEmit(ArxCommand):
         ):
             caller.msg("Those options are restricted to GMs only.")
             return
-        self.caller.posecount += 1
+        self.caller.add_pose()
         if cmdstring == "remit":
             rooms_only = True
             send_to_contents = True
@@ -703,7 +704,7 @@ class CmdPose(ArxCommand):
             self.caller.location.msg_action(
                 self.caller, self.args, options={"is_pose": True}
             )
-            self.caller.posecount += 1
+            self.caller.add_pose()
 
 
 class CmdArxSay(CmdSay):
@@ -744,7 +745,7 @@ class CmdArxSay(CmdSay):
         self.caller.location.msg_action(
             self.caller, pre_name_emit_string, exclude=[self.caller], options=options
         )
-        self.caller.posecount += 1
+        self.caller.add_pose()
 
 
 # Changed to display room dbref number rather than room name
@@ -782,11 +783,12 @@ class CmdWho(ArxPlayerCommand):
             char = player.char_ob
             if char:
                 base = char.item_data.longname or base
-        if player.db.afk:
+        presence = PRESENCE.get_account(player)
+        if presence.afk:
             base += " {w(AFK){n"
-        if player.db.lookingforrp:
+        if presence.lrp:
             base += " {w(LRP){n"
-        if player.is_staff:
+        if presence.staff:
             base += " {c(Staff){n"
         return base
 
@@ -844,7 +846,7 @@ class CmdWho(ArxPlayerCommand):
             ) or player.check_permstring("Wizards")
         total_players = len(set(ob.account for ob in session_list))
         number_displayed = 0
-        already_counted = []
+        already_counted = set()
         public_members = []
         if "org" in self.switches:
             from world.dominion.models import Organization
@@ -869,29 +871,26 @@ class CmdWho(ArxPlayerCommand):
                 if pc in already_counted:
                     continue
                 if not session.logged_in:
-                    already_counted.append(pc)
+                    already_counted.add(pc)
                     continue
                 delta_cmd = pc.idle_time
                 if "active" in self.switches and delta_cmd > 1200:
-                    already_counted.append(pc)
+                    already_counted.add(pc)
                     continue
                 if "org" in self.switches and pc not in public_members:
                     continue
                 delta_conn = time.time() - session.conn_time
                 plr_pobject = session.get_puppet()
                 plr_pobject = plr_pobject or pc
-                base = str(session.get_account())
-                pname = self.format_pname(session.get_account())
+                base = str(pc)
+                pname = self.format_pname(pc)
                 char = pc.char_ob
                 if "watch" in self.switches and char not in watch_list:
-                    already_counted.append(pc)
+                    already_counted.add(pc)
                     continue
-                if not char or not char.item_data.fealty:
-                    fealty = "---"
-                else:
-                    fealty = char.item_data.fealty
+                fealty = PRESENCE.get_account(pc).fealty
                 if not self.check_filters(pname, base, fealty):
-                    already_counted.append(pc)
+                    already_counted.add(pc)
                     continue
                 pname = crop(pname, width=18)
                 if (
@@ -927,7 +926,7 @@ class CmdWho(ArxPlayerCommand):
                         or session.address,
                     ]
                 )
-                already_counted.append(pc)
+                already_counted.add(pc)
                 number_displayed += 1
         else:
             if not sparse:
@@ -940,27 +939,25 @@ class CmdWho(ArxPlayerCommand):
                 if pc in already_counted:
                     continue
                 if not session.logged_in:
-                    already_counted.append(pc)
+                    already_counted.add(pc)
                     continue
                 if "org" in self.switches and pc not in public_members:
                     continue
                 delta_cmd = pc.idle_time
                 if "active" in self.switches and delta_cmd > 1200:
-                    already_counted.append(pc)
+                    already_counted.add(pc)
                     continue
-                if not pc.db.hide_from_watch:
+                presence = PRESENCE.get_account(pc)
+                if not presence.hidden:
                     base = str(pc)
                     pname = self.format_pname(pc, lname=True, sparse=sparse)
                     char = pc.char_ob
                     if "watch" in self.switches and char not in watch_list:
-                        already_counted.append(pc)
+                        already_counted.add(pc)
                         continue
-                    if not char or not char.item_data.fealty:
-                        fealty = "---"
-                    else:
-                        fealty = str(char.item_data.fealty)
+                    fealty = presence.fealty
                     if not self.check_filters(pname, base, fealty):
-                        already_counted.append(pc)
+                        already_counted.add(pc)
                         continue
                     idlestr = self.get_idlestr(delta_cmd)
                     if sparse:
@@ -972,10 +969,10 @@ class CmdWho(ArxPlayerCommand):
                         table.add_row([pname, fealty, idlestr])
                     else:
                         table.add_row([pname, idlestr])
-                    already_counted.append(pc)
+                    already_counted.add(pc)
                     number_displayed += 1
                 else:
-                    already_counted.append(pc)
+                    already_counted.add(pc)
         is_one = number_displayed == 1
         if number_displayed == total_players:
             string = "{wPlayers:{n\n%s\n%s unique account%s logged in." % (
@@ -14,6 +14,9 @@ from django.db.models import Q
 import evennia_extensions.object_extensions.validators
 from commands.base import ArxCommand, ArxPlayerCommand
 from commands.base_commands.jobs import get_apps_manager
+from evennia_extensions.character_extensions.roster_projection import (
+    get_character_rows,
+)
 from evennia.utils import utils
 from server.utils import arx_more
 from server.utils import prettytable
@@ -92,6 +95,15 @@ def list_characters(
             table = prettytable.PrettyTable(
                 ["{wName #", "{wSex", "{wAge", "{wFealty{n", "{wConcept{n", "{wSR{n"]
             )
+        character_list = list(character_list)
+        # fetch the item_data of every character we might list together
+        rows = {
+            row.id: row
+            for row in get_character_rows(
+                [ob for ob in character_list if hasattr(ob, "item_data")]
+                + [ob for ob in (hidden_chars or []) if hasattr(ob, "item_data")]
+            )
+        }
         for char in character_list:
             try:
                 if use_keys:
@@ -127,7 +139,8 @@ def list_characters(
                 if match_list:
                     charob = match_list[0]
                     hide = True
-            if charob:
+            row = rows.get(charob.id) if charob else None
+            if row:
                 if (
                     not use_keys
                     and charob.name
@@ -136,25 +149,25 @@ def list_characters(
                 ):
                     name += "{w(%s){n" % charob.name
                 if titles:
-                    title = charob.item_data.longname
+                    title = row.longname
                     if title and not hide:
                         name = "{n" + title.replace(char, "{c" + char + "{n")
                 # yes, yes, I know they're not the same thing.
                 # sex is only 3 characters and gender is 5.
-                sex = charob.item_data.gender
+                sex = row.gender
                 if not sex or hide:
                     sex = "-"
                 sex = sex[0].capitalize()
-                age = charob.item_data.age
+                age = row.age
                 if not age or hide:
                     age = "-"
-                house = str(charob.item_data.fealty)
+                house = str(row.fealty)
                 if not house or hide:
                     house = "-"
-                concept = charob.item_data.concept
+                concept = row.concept
                 if not concept or hide:
                     concept = "-"
-                srank = charob.item_data.social_rank
+                srank = row.social_rank
                 if not srank or hide:
                     srank = "-"
                 if not titles or hide:
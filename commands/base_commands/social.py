@@ -5,7 +5,6 @@ will be character commands, since they'll deal with the grid.
 import time
 import random
 from datetime import datetime, timedelta
-from functools import reduce
 
 from django.conf import settings
 from django.db.models import Q
@@ -16,7 +15,6 @@ from evennia.objects.models import ObjectDB
 from evennia.typeclasses.tags import Tag
 from evennia.utils.evtable import EvTable
 from evennia.utils.utils import make_iter
-from evennia.scripts.models import ScriptDB
 
 from commands.base_commands.roster import format_header
 from commands.mixins import RewardRPToolUseMixin
@@ -31,7 +29,9 @@ from server.utils.arx_utils import (
     get_full_url,
 )
 from typeclasses.characters import Character
+from typeclasses.presence import PRESENCE
 from typeclasses.rooms import ArxRoom
+from typeclasses.scripts.event_manager import get_event_manager
 from web.character.models import AccountHistory, FirstContact
 from world.crafting.models import (
     CraftingMaterialType,
@@ -75,7 +75,7 @@ def char_name(character_object, verbose_where=False, watch_list=None):
     cname = character_object.name
     if character_object in watch_list:
         cname += "{c*{n"
-    if character_object.player_ob and character_object.player_ob.db.lookingforrp:
+    if character_object.player_ob and PRESENCE.is_lrp(character_object.player_ob):
         cname += "|R+|n"
     if not verbose_where:
         return cname
@@ -102,7 +102,7 @@ def get_char_names(charlist, caller):
         char_name(char, verbose_where, watch_list)
         for char in charlist
         if char.player
-        and (not char.player.db.hide_from_watch or caller.check_permstring("builders"))
+        and (not PRESENCE.is_hidden(char.player) or caller.check_permstring("builders"))
     )
 
 
@@ -126,19 +126,21 @@ class CmdHangouts(ArxCommand):
     def func(self):
         """Execute command."""
         caller = self.caller
-        oblist = ArxRoom.objects.filter(db_tags__db_key="hangouts")
-        if "all" not in self.switches:
-            oblist = oblist.filter(
-                locations_set__db_typeclass_path=settings.BASE_CHARACTER_TYPECLASS
-            )
-        oblist = oblist.distinct()
+        if "all" in self.switches:
+            oblist = ArxRoom.objects.filter(db_tags__db_key="hangouts").distinct()
+        else:
+            oblist = [
+                ob for ob in PRESENCE.get_occupied_rooms() if ob.tags.get("hangouts")
+            ]
         caller.msg(format_header("Hangouts"))
         self.msg("Players who are currently LRP have a |R+|n by their name.")
         if not oblist:
             caller.msg("No hangouts are currently occupied.")
             return
         for room in oblist:
-            char_names = get_char_names(room.get_visible_characters(caller), caller)
+            char_names = get_char_names(
+                PRESENCE.get_visible_characters(room.id, caller), caller
+            )
             if char_names or "all" in self.switches:
                 name = room.name
                 if room.db.x_coord is not None and room.db.y_coord is not None:
@@ -183,6 +185,41 @@ class CmdWhere(ArxPlayerCommand):
             name = "%s %s" % (name, str(pos))
         return name
 
+    @staticmethod
+    def is_locatable(character, names=None):
+        """
+        Whether a character's room can be shown by +where: they must be on the
+        active roster and not disguised. If we're looking for characters by
+        name, they must have one of the names and not be hiding.
+
+            Args:
+                character: A puppeted character
+                names: Optional list of lowercase names we're looking for
+        """
+        try:
+            if character.roster.roster.name != "Active":
+                return False
+        except AttributeError:
+            return False
+        if character.tags.get("disguised"):
+            return False
+        if names is None:
+            return True
+        if character.key.lower() not in names:
+            return False
+        return character.player_ob and not PRESENCE.is_hidden(character.player_ob)
+
+    @staticmethod
+    def get_listed_characters(room, caller):
+        """Gets the characters in a room that caller sees, who aren't hiding or disguised"""
+        return [
+            ob
+            for ob in PRESENCE.get_visible_characters(room.id, caller)
+            if ob.player_ob
+            and not PRESENCE.is_hidden(ob.player_ob)
+            and not ob.is_disguised
+        ]
+
     def list_shops(self):
         """Sends msg of list of shops to caller"""
         rooms = ArxRoom.objects.filter(db_tags__db_key__iexact="shop").order_by(
@@ -213,23 +250,17 @@ class CmdWhere(ArxPlayerCommand):
         if "shops" in self.switches:
             self.list_shops()
             return
-        characters = Character.objects.filter(Q(roster__roster__name="Active")).exclude(
-            db_tags__db_key__iexact="disguised"
-        )
-        if self.args:
-            name_list = map(lambda n: Q(db_key__iexact=n), self.lhslist)
-            name_list = reduce(lambda a, b: a | b, name_list)
-            characters = [
-                ob.id
-                for ob in characters.filter(name_list)
-                if not ob.player_ob.db.hide_from_watch
-            ]
-        rooms = (
-            ArxRoom.objects.exclude(db_tags__db_key__iexact="private")
-            .filter(locations_set__in=characters)
-            .distinct()
-            .order_by("db_key")
-        )
+        rooms = [
+            ob for ob in PRESENCE.get_occupied_rooms() if not ob.tags.get("private")
+        ]
+        names = [ob.lower() for ob in self.lhslist] if self.args else None
+        rooms = [
+            room
+            for room in rooms
+            if any(
+                self.is_locatable(ob, names) for ob in PRESENCE.get_characters(room.id)
+            )
+        ]
         if not rooms:
             self.msg("No visible characters found.")
             return
@@ -249,21 +280,7 @@ class CmdWhere(ArxPlayerCommand):
                 for ob in AccountHistory.objects.unclaimed_impressions(caller.roster)
             ]
         for room in rooms:
-            # somehow can get Character in queryset rather than ArxRoom
-            if not hasattr(room, "get_visible_characters"):
-                from evennia.utils.logger import log_err
-
-                log_err(
-                    "Object ID: %s is not a room despite being from ArxRoom queryset."
-                    % room.id
-                )
-                continue
-            charlist = sorted(room.get_visible_characters(caller), key=lambda x: x.name)
-            charlist = [
-                ob
-                for ob in charlist
-                if not ob.player_ob.db.hide_from_watch and not ob.is_disguised
-            ]
+            charlist = self.get_listed_characters(room, caller)
             if self.check_switches(self.filter_switches):
                 charlist = [ob for ob in charlist if ob in applicable_chars]
             elif "watch" in self.switches:
@@ -332,6 +349,7 @@ class CmdWatch(ArxPlayerCommand):
             hide = not hide
             caller.msg("Hiding set to %s." % str(hide))
             caller.db.hide_from_watch = hide
+            PRESENCE.update_account(caller)
             return
         player = caller.search(self.args)
         if not player:
@@ -950,6 +968,7 @@ class CmdPosebreak(ArxCommand):
             caller.db.posebreak = False
         else:
             caller.db.posebreak = True
+        caller.invalidate_delivery_profile()
         caller.msg("Pose break set to %s." % caller.db.posebreak)
         return
 
@@ -1578,7 +1597,7 @@ class CmdCalendar(ArxPlayerCommand):
     @property
     def event_manager(self):
         """Returns the script for tracking/updating events"""
-        return ScriptDB.objects.get(db_key="Event Manager")
+        return get_event_manager()
 
     def func(self):
         """Execute command."""
@@ -2456,9 +2475,11 @@ class CmdAFK(ArxPlayerCommand):
         caller = self.caller
         if caller.db.afk:
             caller.db.afk = ""
+            PRESENCE.update_account(caller)
             caller.msg("You are no longer AFK.")
             return
         caller.db.afk = self.args or "Sorry, I am AFK(away from keyboard) right now."
+        PRESENCE.update_account(caller)
         caller.msg("{wYou are now AFK with the following message{n: %s" % caller.db.afk)
         return
 
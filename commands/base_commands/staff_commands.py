@@ -47,6 +47,7 @@ from world.dominion.models import (
     PrestigeCategory,
 )
 from world.dominion.plots.models import Plot, PlotAction
+from world.dominion.prestige_graph import PRESTIGE_GRAPH
 from typeclasses.accounts import Account
 from typeclasses.rooms import ArxRoom
 from typeclasses.characters import Character
@@ -2269,6 +2270,9 @@ class CmdAdminPropriety(ArxPlayerCommand):
         else:
             tag.owners.remove(*owners)
             self.msg("Removed from %s: %s" % (tag, ", ".join(str(ob) for ob in owners)))
+        for owner in owners:
+            owner.clear_cached_properties()
+            PRESTIGE_GRAPH.refresh_owner(owner, proprieties=True)
 
 
 class CmdAdjustFame(ArxPlayerCommand):
@@ -28,6 +28,7 @@ from typeclasses.readable.readable_commands import CmdWrite
 from world.traits.models import Trait
 
 from commands.base_commands import (
+    bboards,
     story_actions,
     overrides,
     social,
@@ -834,6 +835,74 @@ class GeneralTests(TestEquipmentMixins, ArxCommandTest):
         self.assertEqual(self.char1.db.currency, 25.0)
         self.assertEqual(self.obj1.location, self.purse1)
 
+    def test_get_directions(self):
+        from evennia.utils.create import create_object
+        from typeclasses.exits import Exit
+        from typeclasses.rooms import ArxRoom
+
+        room3 = create_object(ArxRoom, key="Room3")
+        create_object(Exit, key="north", location=self.room2, destination=room3)
+        shortcut = create_object(
+            Exit,
+            key="shortcut",
+            location=self.room1,
+            destination=room3,
+            tags=["secret"],
+        )
+        self.assertEqual(self.char1.get_directions(room3), "{cout{n")
+        shortcut.tags.remove("secret")
+        self.assertEqual(self.char1.get_directions(room3), "{cshortcut{n")
+        self.char1.ndb.traversed = [room3.id, self.room2.id]
+        self.assertEqual(self.char1.get_directions(room3), "{cshortcut{n")
+        shortcut.delete()
+        self.assertEqual(self.char1.get_directions(room3), "{cout{n")
+        self.exit.delete()
+        self.room1.db.x_coord, self.room1.db.y_coord = 0, 0
+        room3.db.x_coord, room3.db.y_coord = 0, 1
+        self.assertEqual(
+            self.char1.get_directions(room3),
+            "{cnorth{n roughly. Please use '{w@map{n' to determine an exact route",
+        )
+
+    def test_get_directions_secret_and_locked_exits(self):
+        from evennia.utils.create import create_object
+        from typeclasses.exits import Exit
+        from typeclasses.rooms import ArxRoom
+        from typeclasses.room_graph import ROOM_GRAPH
+
+        ROOM_GRAPH.ensure_built()
+        room3 = create_object(ArxRoom, key="Room3")
+        room4 = create_object(ArxRoom, key="Room4")
+        east = create_object(Exit, key="east", location=self.room2, destination=room3)
+        north = create_object(Exit, key="north", location=room3, destination=room4)
+        secret = create_object(
+            Exit,
+            key="crawlspace",
+            location=self.room2,
+            destination=room4,
+            tags=["secret"],
+        )
+        # the secret exit is neither in the room we start from nor the one we
+        # look for, so only its tags can keep it off the route
+        self.assertEqual(
+            ROOM_GRAPH.find_path(self.room1.id, room4.id),
+            [self.exit.id, east.id, north.id],
+        )
+        secret.tags.remove("secret")
+        self.assertEqual(
+            ROOM_GRAPH.find_path(self.room1.id, room4.id), [self.exit.id, secret.id]
+        )
+        secret.tags.add("secret")
+        gate = create_object(Exit, key="gate", location=self.room1, destination=room4)
+        self.assertEqual(self.char1.get_directions(room4), "{cgate{n")
+        gate.lock()
+        self.assertEqual(self.char1.get_directions(room4), "{cout{n")
+        east.lock()
+        # with no other way there, we're sent through a locked door
+        self.assertEqual(self.char1.get_directions(room4), "{cgate{n")
+        gate.unlock()
+        self.assertEqual(self.char1.get_directions(room4), "{cgate{n")
+
 
 class OverridesTests(TestEquipmentMixins, ArxCommandTest):
     def test_cmd_get(self):
@@ -924,6 +993,29 @@ class OverridesTests(TestEquipmentMixins, ArxCommandTest):
             from_obj=self.char1,
         )
 
+    def test_pose_count(self):
+        from server.utils.counters import COUNTERS
+        from web.character.models import RosterEntry
+
+        saved = RosterEntry.objects.filter(id=self.char1.roster.id)
+        self.setup_cmd(overrides.CmdArxSay, self.char1)
+        self.call_cmd("testing", 'You say, "testing"')
+        self.call_cmd("testing", 'You say, "testing"')
+        self.assertEqual(self.char1.posecount, 2)
+        self.assertEqual(saved.values_list("pose_count", flat=True)[0], 0)
+        COUNTERS.flush()
+        self.assertEqual(saved.values_list("pose_count", flat=True)[0], 2)
+        self.assertEqual(self.char1.posecount, 2)
+        self.char1.add_pose()
+        self.char1.posecount = 0
+        COUNTERS.flush()
+        self.assertEqual(saved.values_list("pose_count", flat=True)[0], 0)
+        self.char1.messages.add_flashback()
+        self.assertEqual(self.char1.messages.num_weekly_journals, 1)
+        self.assertEqual(self.char1.db.num_flashbacks, None)
+        COUNTERS.flush_object(self.char1)
+        self.assertEqual(self.char1.db.num_flashbacks, 1)
+
     def test_cmd_who(self):
         self.setup_cmd(overrides.CmdWho, self.account2)
         self.call_cmd(
@@ -931,6 +1023,20 @@ class OverridesTests(TestEquipmentMixins, ArxCommandTest):
             "Players:\n\nPlayer name Fealty Idle \n\nShowing 0 out of 1 unique account logged in.",
         )
 
+    def test_cmd_who_fealty_changes(self):
+        from world.dominion.models import Fealty
+
+        self.setup_cmd(overrides.CmdWho, self.account2)
+        self.call_cmd(
+            "grayson",
+            "Players:\n\nPlayer name Fealty Idle \n\nShowing 0 out of 1 unique account logged in.",
+        )
+        # fealty changes on the sheet while they're still logged in
+        self.char1.item_data.fealty = Fealty.objects.create(name="Grayson")
+        returned = self.call_cmd("grayson", None)
+        self.assertIn("Grayson", returned)
+        self.assertIn("Showing 1 out of 1 unique account logged in.", returned)
+
     def test_cmd_set(self):
         self.setup_cmd(overrides.CmdArxSetAttribute, self.char)
         self.call_cmd(f" here/capacity=200", "Set item data Room/capacity = 200")
@@ -1142,6 +1248,97 @@ class RosterTests(ArxCommandTest):
         )
 
 
+class BBoardTests(ArxCommandTest):
+    def setUp(self):
+        from typeclasses.bulletin_board.bboard import BBoard
+        from evennia.utils.create import create_object
+
+        super(BBoardTests, self).setUp()
+        self.bboard = create_object(typeclass=BBoard, key="Test Board")
+
+    def test_post_index(self):
+        posts = [
+            self.bboard.bb_post(self.account, "text %s" % num, announce=False)
+            for num in range(4)
+        ]
+        index = self.bboard.post_index
+        self.assertEqual(index.count(), 4)
+        self.assertEqual(self.bboard.get_post(self.account, 2), posts[1])
+        self.bboard.archive_post(posts[1])
+        self.bboard.sticky_post(posts[0])
+        self.assertEqual(self.bboard.get_post(self.account, 2), posts[2])
+        self.assertEqual(self.bboard.get_post(self.account, 1, old=True), posts[1])
+        self.assertEqual(index.get_number(posts[3]), 3)
+        self.assertEqual(index.first_unstickied(), posts[2].id)
+        self.bboard.mark_unarchived(posts[1])
+        self.assertEqual(index.get_number(posts[1]), 2)
+        self.assertEqual(index.count(old=True), 0)
+        self.assertTrue(self.bboard.delete_post(posts[2]))
+        self.assertEqual(
+            self.bboard.get_post_range(2, 5), [(2, posts[1]), (3, posts[3])]
+        )
+        # the incrementally maintained index matches one built from scratch
+        ids = list(index._ids[False])
+        index.clear()
+        self.assertEqual(index.page(1, 10), list(enumerate(ids, 1)))
+        self.assertEqual(index.sticky, {posts[0].id})
+        self.assertIsNone(self.bboard.get_post(self.account, 4))
+
+    def test_read_after_post_deleted_elsewhere(self):
+        posts = [
+            self.bboard.bb_post(self.account, "text %s" % num, announce=False)
+            for num in range(4)
+        ]
+        self.assertEqual(self.bboard.post_index.count(), 4)
+        # like an event's post being removed when the event finishes
+        posts[1].delete()
+        self.bboard.locks.add("read:all()")
+        self.bboard.subscribe_bboard(self.account)
+        self.setup_cmd(bboards.CmdBBReadOrPost, self.account)
+        for num, post in ((2, posts[2]), (3, posts[3])):
+            returned = self.call_cmd("test board/%s" % num, None)
+            self.assertIn("Post Number: %s" % num, returned)
+            self.assertIn(post.db_message, returned)
+        self.call_cmd("test board/4", "Invalid message number specified.")
+        self.assertEqual(
+            self.bboard.get_post_range(1, 4),
+            [(1, posts[0]), (2, posts[2]), (3, posts[3])],
+        )
+        listed = self.call_cmd("test board", None)
+        self.assertIn("Test board/3", listed)
+        self.assertNotIn("Test board/4", listed)
+
+    def test_unread_counts(self):
+        from typeclasses.bulletin_board.bboard import BBoard
+        from typeclasses.bulletin_board.unread import get_unread_counts, get_watermark
+        from evennia.utils.create import create_object
+
+        board2 = create_object(typeclass=BBoard, key="Other Board")
+        posts = [
+            self.bboard.bb_post(None, "text", poster_name="Staff", announce=False)
+            for _ in range(3)
+        ]
+        board2.bb_post(self.account2, "text", announce=False)
+        counts = get_unread_counts(self.account, [self.bboard, board2])
+        self.assertEqual(counts, {self.bboard.id: 3, board2.id: 1})
+        self.assertEqual(get_unread_counts(self.account2, [board2]), {board2.id: 0})
+        self.bboard.mark_posts_read(self.account, posts[:2])
+        self.assertEqual(self.bboard.num_of_unread_posts(self.account), 1)
+        self.assertEqual(
+            get_unread_counts(self.account, [self.bboard])[self.bboard.id], 1
+        )
+        self.assertEqual(get_watermark(self.account, self.bboard), posts[1].id)
+        self.bboard.archive_post(posts[0])
+        self.bboard.mark_all_read(self.account)
+        self.assertEqual(
+            get_unread_counts(self.account, [self.bboard])[self.bboard.id], 0
+        )
+        self.assertEqual(get_watermark(self.account, self.bboard), posts[2].id)
+        self.bboard.mark_unarchived(posts[0])
+        self.assertEqual(get_watermark(self.account, self.bboard), 0)
+        self.assertEqual(self.bboard.num_of_unread_posts(self.account), 0)
+
+
 # noinspection PyUnresolvedReferences
 class SocialTests(ArxCommandTest):
     def test_cmd_where(self):
@@ -1169,6 +1366,33 @@ class SocialTests(ArxCommandTest):
         )
         self.room1.tags.add("private")
         self.call_cmd("", "No visible characters found.")
+        self.room1.tags.remove("private")
+        self.char1.move_to(self.room2, quiet=True)
+        self.call_cmd(
+            "",
+            "Locations of players:\nPlayers who are currently LRP have a + by their name, "
+            "and players who are on your watch list have a * by their name.\nRoom2: Char",
+        )
+        self.call_cmd("char2", "No visible characters found.")
+
+    def test_journal_search(self):
+        from world.msgs.models import Journal, SearchTerm
+
+        handler = self.char1.messages
+        ball = handler.add_journal("The masque ball was lovely. A ball for the ages!")
+        masque = handler.add_journal("|wMasque|n of the Velenosa, at a ball.")
+        other = handler.add_relationship("Ball? What ball?", self.char2)
+        handler.add_journal("Nothing to see here.", white=False)
+        self.assertEqual(SearchTerm.objects.get(msg=masque, term="masque").weight, 1)
+        # only journals older than a few hours are visible
+        Journal.objects.update(db_date_created=datetime.now() - timedelta(days=1))
+        self.assertEqual(handler.search_journal("masque BALL"), [ball, masque])
+        self.assertEqual(handler.search_journal("char2"), [other])
+        ball.db_message = "Nothing much happened."
+        ball.save()
+        self.assertEqual(handler.search_journal("ball"), [other, masque])
+        handler.delete_journal(masque)
+        self.assertEqual(handler.search_journal("velenosa"), [])
 
     def test_cmd_watch(self):
         self.setup_cmd(social.CmdWatch, self.account)
@@ -1483,6 +1707,21 @@ class SocialTests(ArxCommandTest):
         self.call_cmd("", "Old mood was: this is a test mood|Mood erased.")
         self.assertEqual(self.room1.db.room_mood, None)
 
+    def test_cmd_posebreak(self):
+        from typeclasses.delivery import get_delivery_profile
+
+        self.char2.db.pose_quote_color = "|r"
+        profile = get_delivery_profile(self.char2)
+        self.assertFalse(profile.posebreak)
+        self.assertEqual(
+            profile.namex.sub(profile.name_quote_sub, '"Hi Char2{n."'),
+            '"Hi Char2|r."',
+        )
+        self.assertIs(get_delivery_profile(self.char2), profile)
+        self.setup_cmd(social.CmdPosebreak, self.char2)
+        self.call_cmd("", "Pose break set to True.")
+        self.assertTrue(get_delivery_profile(self.char2).posebreak)
+
     @patch.object(social, "inform_staff")
     def test_cmd_favor(self, mock_inform_staff):
         from world.dominion.models import Organization, AssetOwner
@@ -1819,6 +2058,25 @@ class StaffCommandTests(ArxCommandTest):
         self.assertEqual(self.assetowner.legend, 200)
         self.assertEqual(self.assetowner2.legend, 1200)
 
+    @patch("commands.base_commands.staff_commands.inform_staff")
+    def test_cmd_view_log(self, mock_inform_staff):
+        with self.settings(MESSAGE_LOG_LENGTH=2):
+            self.account.current_log = []
+            for text in ("First pose", "Second pose", "Second pose", "Third pose"):
+                self.account.log_message(self.char2, text)
+        # our own poses aren't logged
+        self.account.log_message(self.char1, "My pose")
+        self.assertEqual(
+            list(self.account.current_log),
+            [(self.char2, "Second pose"), (self.char2, "Third pose")],
+        )
+        self.setup_cmd(staff_commands.CmdViewLog, self.account)
+        self.call_cmd("/report testaccount2", "Flagging that log for review.")
+        self.assertEqual(
+            list(self.account.flagged_log),
+            [(self.char2, "Second pose"), (self.char2, "Third pose")],
+        )
+
 
 class StaffCommandTestsPlus(ArxCommandTest):
     num_additional_characters = 1
@@ -2308,6 +2566,89 @@ class HelpCommandTests(ArxCommandTest):
         expected_return += "Suggested: +plots, +plot, @gmplots, support, globalscript"
         self.call_cmd("plots", expected_return, cmdset=CharacterCmdSet())
 
+    def test_help_index_listing_cache(self):
+        from commands.base_commands.help_index import HELP_INDEX
+        from commands.default_cmdsets import CharacterCmdSet
+
+        cmds = [cmd for cmd in CharacterCmdSet() if cmd.auto_help]
+        listing = HELP_INDEX.get_listing(self.char2, cmds)
+        self.assertIs(HELP_INDEX.get_listing(self.char2, cmds), listing)
+        # different commands or permissions need a listing of their own
+        self.assertIsNot(HELP_INDEX.get_listing(self.char2, []), listing)
+        self.account2.permissions.add("builders")
+        builder_listing = HELP_INDEX.get_listing(self.char2, cmds)
+        self.assertIsNot(builder_listing, listing)
+        self.assertIs(HELP_INDEX.get_listing(self.char2, cmds), builder_listing)
+
+    def test_help_index_invalidation(self):
+        from evennia.help.models import HelpEntry
+        from commands.base_commands.help_index import HELP_INDEX
+
+        entry = HelpEntry.objects.create(db_key="old topic")
+        listing = HELP_INDEX.get_listing(self.char2, [])
+        self.assertEqual(HELP_INDEX.find_topic("Old Topic"), entry)
+        self.assertIn(entry.id, listing.topic_ids)
+        entry.db_key = "new topic"
+        entry.save()
+        self.assertIsNone(HELP_INDEX.find_topic("old topic"))
+        self.assertEqual(HELP_INDEX.find_topic("new topic"), entry)
+        self.assertIsNot(HELP_INDEX.get_listing(self.char2, []), listing)
+        listing = HELP_INDEX.get_listing(self.char2, [])
+        entry.delete()
+        self.assertIsNone(HELP_INDEX.find_topic("new topic"))
+        self.assertEqual(HELP_INDEX.get_listing(self.char2, []).topic_ids, set())
+        self.assertIsNot(HELP_INDEX.get_listing(self.char2, []), listing)
+
+    def test_help_index_suggestions(self):
+        from evennia.utils.utils import string_suggestions
+        from commands.base_commands.help_index import Vocabulary
+
+        words = [
+            "+plots",
+            "+plot",
+            "@gmplots",
+            "support",
+            "globalscript",
+            "look",
+            "@look",
+            "lockout",
+            "information",
+            "sheet",
+            "@sheet",
+            "shout",
+            "",
+        ]
+        vocabulary = Vocabulary(words)
+        for query in ("plots", "look", "she", "info", "xyz", "lo", "sheet"):
+            # the old path scored the same words with string_similarity
+            old = string_suggestions(query, sorted(set(words)), cutoff=0.6, maxnum=5)
+            self.assertEqual(vocabulary.suggest(query, cutoff=0.6, maxnum=5), old)
+        self.assertEqual(vocabulary.startswith("@"), ["@gmplots", "@look", "@sheet"])
+        self.assertEqual(vocabulary.startswith("z"), [])
+
+    def test_help_index_related(self):
+        from evennia.help.models import HelpEntry
+        from commands.base_commands.help_index import HELP_INDEX
+
+        plots = HelpEntry.objects.create(db_key="plots guide")
+        plots.tags.add("plots")
+        crisis = HelpEntry.objects.create(db_key="crises")
+        crisis.tags.add("plots")
+        crisis.tags.add("crisis")
+        HelpEntry.objects.create(db_key="untagged")
+        self.assertEqual(
+            HELP_INDEX.get_related("+plots", ["plots"]), ["crises", "plots guide"]
+        )
+        self.assertEqual(HELP_INDEX.get_related("crises", ["plots"]), ["plots guide"])
+        self.assertEqual(
+            HELP_INDEX.get_related("+crisis", ["crisis", "missing"]), ["crises"]
+        )
+        # adding a tag discards the index, so the new entry shows up
+        plots.tags.add("crisis")
+        self.assertEqual(
+            HELP_INDEX.get_related("+crisis", ["crisis"]), ["crises", "plots guide"]
+        )
+
 
 class AdjustCommandTests(ArxCommandTest):
     def setUp(self):
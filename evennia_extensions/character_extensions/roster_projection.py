@@ -0,0 +1,133 @@
+"""
+A projection of the item_data of many characters at once, for rosters. Each
+item_data value is read by a StorageWrapper from a table related to the
+character, so listing characters with their gender, age, fealty and so on
+made a query for every value of every character that wasn't already cached.
+
+get_character_rows fetches the character sheets, sheet values, display
+names, roster entries, combat and messenger settings, dimensions and
+permanence of every character in a list with one query per table, priming
+the same related object caches the wrappers read from, and returns a
+CharacterRow of the values for each one. Since the rows are read through
+item_data, they have the same defaults and values as reading a single
+character would.
+"""
+from django.db.models import prefetch_related_objects
+
+# the related objects behind the values of CharacterDataHandler
+PREFETCH_LOOKUPS = (
+    "charactersheet__fealty",
+    "charactersheet__race",
+    "charactersheet__religion",
+    "charactersheet__values__characteristic",
+    "charactersheet__values__characteristic_value",
+    "display_names",
+    "roster__roster",
+    "charactercombatsettings",
+    "charactermessengersettings",
+    "dimensions",
+    "permanence",
+)
+
+# the item_data values in a CharacterRow. Those pointing to other objects,
+# like guarding or custom_messenger, aren't included.
+ROW_FIELDS = (
+    "longname",
+    "false_name",
+    "colored_name",
+    "action_points",
+    "pose_count",
+    "previous_pose_count",
+    "portrait_height",
+    "portrait_width",
+    "dice_string",
+    "brief_mode",
+    "age",
+    "real_age",
+    "race",
+    "breed",
+    "gender",
+    "hair_color",
+    "eye_color",
+    "height",
+    "skin_tone",
+    "concept",
+    "religion",
+    "real_concept",
+    "marital_status",
+    "family",
+    "fealty",
+    "vocation",
+    "birthday",
+    "social_rank",
+    "quote",
+    "personality",
+    "background",
+    "obituary",
+    "additional_desc",
+    "xp",
+    "total_xp",
+    "combat_stance",
+    "autoattack",
+    "size",
+    "weight",
+    "capacity",
+    "quantity",
+    "is_locked",
+    "put_time",
+    "deleted_time",
+)
+
+
+class CharacterRow(object):
+    """The item_data values of a character, along with the character"""
+
+    __slots__ = ("character", "id", "key", "roster_name") + ROW_FIELDS
+
+    def __init__(self, character):
+        self.character = character
+        self.id = character.id
+        self.key = character.key
+        try:
+            self.roster_name = character.roster.roster.name
+        except AttributeError:
+            self.roster_name = None
+        handler = character.item_data
+        for field in ROW_FIELDS:
+            try:
+                value = getattr(handler, field)
+            except AttributeError:
+                # storage for the value is missing and there's no default
+                value = None
+            setattr(self, field, value)
+
+    @property
+    def name(self):
+        return self.character.name
+
+    def get_absolute_url(self):
+        return self.character.get_absolute_url()
+
+    def __str__(self):
+        return self.key
+
+
+def prefetch_character_data(characters):
+    """Fetches the related objects behind item_data for characters in bulk"""
+    characters = [ob for ob in characters if ob]
+    if characters:
+        prefetch_related_objects(characters, *PREFETCH_LOOKUPS)
+    return characters
+
+
+def get_character_rows(characters):
+    """
+    Gets the item_data of characters, fetched together.
+
+        Args:
+            characters: A list or queryset of characters
+
+        Returns:
+            A list of CharacterRows in the same order.
+    """
+    return [CharacterRow(ob) for ob in prefetch_character_data(list(characters))]
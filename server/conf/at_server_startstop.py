@@ -22,7 +22,9 @@ def at_server_start():
     This is called every time the server starts up, regardless of
     how it was shut down.
     """
-    pass
+    from server.utils.counters import start_flushing
+
+    start_flushing()
 
 
 def at_server_stop():
@@ -30,7 +32,9 @@ def at_server_stop():
     This is called just before the server is shut down, regardless
     of it is for a reload, reset or shutdown.
     """
-    pass
+    from server.utils.counters import COUNTERS
+
+    COUNTERS.flush()
 
 
 def at_server_reload_start():
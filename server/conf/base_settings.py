@@ -62,6 +62,8 @@ EMAIL_USE_TLS = config("EMAIL_USE_TLS", default=True, cast=bool)
 IN_GAME_ERRORS = config("IN_GAME_ERRORS", default=False, cast=bool)
 IDLE_TIMEOUT = config("IDLE_TIMEOUT", default=-1, cast=int)
 MAX_CHAR_LIMIT = config("MAX_CHAR_LIMIT", default=8000, cast=int)
+# how many received messages an account's log keeps, for reporting players
+MESSAGE_LOG_LENGTH = config("MESSAGE_LOG_LENGTH", default=500, cast=int)
 DEBUG = config("DEBUG", default=False, cast=bool)
 CHANNEL_COMMAND_CLASS = "commands.base_commands.channels.ArxChannelCommand"
 BASE_ROOM_TYPECLASS = "typeclasses.rooms.ArxRoom"
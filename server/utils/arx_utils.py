@@ -255,13 +255,14 @@ def broadcast(txt, format_announcement=True):
     """Broadcasting a message to the server"""
     from evennia.server.sessionhandler import SESSION_HANDLER
     from evennia.scripts.models import ScriptDB
+    from typeclasses.scripts.event_manager import get_event_manager
 
     if format_announcement:
         txt = "{wServer Announcement{n: %s" % txt
     txt = sub_old_ansi(txt)
     SESSION_HANDLER.announce_all(txt)
     try:
-        events = ScriptDB.objects.get(db_key="Event Manager")
+        events = get_event_manager()
         events.add_gemit(txt)
     except ScriptDB.DoesNotExist:
         pass
@@ -421,6 +422,8 @@ def post_roster_dompc_cleanup(player):
     """
     Removes patron/protege relationships and sets any 'Voice' rankings to rank 3.
     """
+    from world.dominion.prestige_graph import PRESTIGE_GRAPH
+
     try:
         dompc = player.Dominion
     except AttributeError:
@@ -430,6 +433,7 @@ def post_roster_dompc_cleanup(player):
     dompc.proteges.clear()
     dompc.patron = None
     dompc.save()
+    PRESTIGE_GRAPH.refresh_player(dompc)
     for member in dompc.memberships.filter(rank=2):
         member.rank = 3
         member.save()
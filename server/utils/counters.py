@@ -0,0 +1,162 @@
+"""
+Counters that are bumped on every line of RP, like pose counts, used to save
+on every increment: a pose meant a full save of the character's RosterEntry,
+and a journal or flashback post re-pickled an Attribute.
+
+COUNTERS gathers increments in memory instead, per object, and writes them
+out together: model fields with one UPDATE ... SET field = field + n per
+model, field and amount, and Attributes once per object and name however many
+times they were bumped. A ticker flushes them every FLUSH_INTERVAL seconds,
+and they're also flushed when a character goes offline, before the weekly
+events tally them, and when the server stops or reloads. Anything reading a
+counter should use get_field or get_attribute so that it sees the pending
+increments as well as what's saved.
+"""
+from collections import defaultdict
+
+from django.db.models import F
+
+
+class CounterBuffer(object):
+    """Pending increments to integer fields and Attributes"""
+
+    FLUSH_INTERVAL = 60
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Discards every pending increment without saving it"""
+        # (model class, pk) to [instance, {field name: amount}]
+        self.fields = {}
+        # object ID to [object, {attribute name: amount}]
+        self.attributes = {}
+
+    def __len__(self):
+        return len(self.fields) + len(self.attributes)
+
+    # ---- model fields ---------------------------------------------------
+
+    def add_to_field(self, instance, field, amount=1):
+        """
+        Adds to an integer field of a saved model instance, to be written later.
+
+            Args:
+                instance: The model instance, such as a RosterEntry
+                field (str): The name of the field
+                amount (int): How much to add to it
+        """
+        key = (instance.__class__, instance.pk)
+        if key not in self.fields:
+            self.fields[key] = [instance, defaultdict(int)]
+        self.fields[key][1][field] += amount
+
+    def get_field(self, instance, field):
+        """Gets the value of a field plus any increments we haven't saved"""
+        value = getattr(instance, field) or 0
+        pending = self.fields.get((instance.__class__, instance.pk))
+        if pending:
+            value += pending[1].get(field, 0)
+        return value
+
+    def set_field(self, instance, field, value):
+        """Sets a field outright, discarding its pending increments, and saves it"""
+        pending = self.fields.get((instance.__class__, instance.pk))
+        if pending:
+            pending[1].pop(field, None)
+        setattr(instance, field, value)
+        instance.save(update_fields=[field])
+
+    # ---- Attributes -----------------------------------------------------
+
+    def add_to_attribute(self, obj, name, amount=1):
+        """
+        Adds to an integer Attribute of a typeclassed object, to be written later.
+
+            Args:
+                obj: The object with the Attribute
+                name (str): The Attribute's key
+                amount (int): How much to add to it
+        """
+        if obj.id not in self.attributes:
+            self.attributes[obj.id] = [obj, defaultdict(int)]
+        self.attributes[obj.id][1][name] += amount
+
+    def get_attribute(self, obj, name):
+        """Gets the value of an Attribute plus any increments we haven't saved"""
+        value = obj.attributes.get(name) or 0
+        pending = self.attributes.get(obj.id)
+        if pending:
+            value += pending[1].get(name, 0)
+        return value
+
+    def set_attribute(self, obj, name, value):
+        """Sets an Attribute outright, discarding its pending increments"""
+        pending = self.attributes.get(obj.id)
+        if pending:
+            pending[1].pop(name, None)
+        obj.attributes.add(name, value)
+
+    # ---- writing them out -----------------------------------------------
+
+    def flush(self):
+        """Saves every pending increment"""
+        fields, self.fields = self.fields, {}
+        attributes, self.attributes = self.attributes, {}
+        self._save_fields(fields.values())
+        self._save_attributes(attributes.values())
+
+    def flush_object(self, obj):
+        """Saves the pending increments of a character and its roster entry"""
+        pending = self.attributes.pop(obj.id, None)
+        if pending:
+            self._save_attributes([pending])
+        roster = getattr(obj, "roster", None)
+        if roster is not None:
+            pending = self.fields.pop((roster.__class__, roster.pk), None)
+            if pending:
+                self._save_fields([pending])
+
+    @staticmethod
+    def _save_fields(pending):
+        """Saves field increments, with one UPDATE per model, field and amount"""
+        groups = defaultdict(list)
+        for instance, amounts in pending:
+            for field, amount in amounts.items():
+                if amount:
+                    groups[(instance.__class__, field, amount)].append(instance)
+        for (model, field, amount), instances in groups.items():
+            model.objects.filter(pk__in=[ob.pk for ob in instances]).update(
+                **{field: F(field) + amount}
+            )
+            # keep the instances in memory in step so their next save doesn't undo it
+            for instance in instances:
+                setattr(instance, field, (getattr(instance, field) or 0) + amount)
+
+    @staticmethod
+    def _save_attributes(pending):
+        """Saves Attribute increments, with one write per object and Attribute"""
+        for obj, amounts in pending:
+            for name, amount in amounts.items():
+                if amount:
+                    obj.attributes.add(name, (obj.attributes.get(name) or 0) + amount)
+
+
+COUNTERS = CounterBuffer()
+
+
+def flush_counters(*args, **kwargs):
+    """Called by the ticker to save pending increments"""
+    COUNTERS.flush()
+
+
+def start_flushing():
+    """Starts the ticker that saves pending increments every FLUSH_INTERVAL"""
+    from evennia import TICKER_HANDLER
+
+    TICKER_HANDLER.add(
+        CounterBuffer.FLUSH_INTERVAL,
+        flush_counters,
+        idstring="counters",
+        persistent=False,
+    )
@@ -0,0 +1,246 @@
+"""
+Streamed JSON exports for our APIs. The journal and character APIs used to
+serialize everything into one string that was kept forever: the first call
+after a restart made several queries per object, and every call after that
+sent the whole thing whether or not anything had changed.
+
+JsonExport pages through a queryset by (db_date_created, id), so each page
+is an indexed range rather than an offset, and streams the JSON list out a
+chunk at a time with each chunk's objects fetched together. The JSON for
+each object is kept as a fragment until that object is invalidated, so
+unchanged objects are never serialized twice. Passing 'limit' returns a
+single page, with a Link header holding the cursor for the next one in
+'after'. Responses carry an ETag and Last-Modified, so a client that sends
+them back gets a 304 if nothing has changed. Fragments are discarded once a
+day in case something changed that we weren't told about.
+"""
+import hashlib
+import json
+from calendar import timegm
+from datetime import datetime
+
+from django.db.models import Count, Max, Q
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import (
+    http_date,
+    quote_etag,
+    urlsafe_base64_decode,
+    urlsafe_base64_encode,
+)
+
+from server.utils.periodic import PeriodicallyRebuilt
+
+
+def encode_cursor(date, obj_id):
+    """Gets the opaque cursor for the object at a position in an export"""
+    return urlsafe_base64_encode(force_bytes("%s|%s" % (date.isoformat(), obj_id)))
+
+
+def decode_cursor(cursor):
+    """
+    Gets the (date, id) position from a cursor.
+
+        Raises:
+            ValueError if the cursor isn't one of ours.
+    """
+    date, obj_id = force_str(urlsafe_base64_decode(cursor)).split("|")
+    return datetime.fromisoformat(date), int(obj_id)
+
+
+class JsonExport(PeriodicallyRebuilt):
+    """A streamed, keyset-paginated JSON list of objects with cached fragments"""
+
+    CHUNK_SIZE = 200
+    MAX_LIMIT = 1000
+    MAX_FRAGMENTS = 50000
+    # whether we list the newest objects first
+    descending = False
+
+    def __init__(self):
+        self.version = 0
+        super().__init__()
+
+    def clear(self):
+        """Discards every fragment"""
+        super().clear()
+        # object ID to its serialized JSON
+        self.fragments = {}
+        self.version += 1
+        self.last_changed = timezone.now()
+
+    def invalidate(self, *obj_ids):
+        """Discards the fragments of objects that have changed"""
+        for obj_id in obj_ids:
+            self.fragments.pop(obj_id, None)
+        self.version += 1
+        self.last_changed = timezone.now()
+
+    def rebuild(self):
+        """Discards every fragment so each object is serialized afresh"""
+        self.clear()
+        self.mark_built()
+
+    # ---- what subclasses provide ----------------------------------------
+
+    def get_queryset(self, request):
+        """The objects to list for a request"""
+        raise NotImplementedError
+
+    def prefetch(self, queryset):
+        """Adds the select_related/prefetch_related that serialize needs"""
+        return queryset
+
+    def serialize(self, obj):
+        """Gets the dict for an object"""
+        raise NotImplementedError
+
+    def serialize_many(self, objs):
+        """
+        Gets the dicts for a chunk of objects. Override this to fetch things
+        for them all at once.
+        """
+        return [self.serialize(ob) for ob in objs]
+
+    # ---- paging ---------------------------------------------------------
+
+    @property
+    def ordering(self):
+        if self.descending:
+            return "-db_date_created", "-id"
+        return "db_date_created", "id"
+
+    def get_keys(self, queryset, cursor, size):
+        """Gets the (date, id) of up to size objects after cursor, in order"""
+        if cursor:
+            date, obj_id = cursor
+            if self.descending:
+                queryset = queryset.filter(
+                    Q(db_date_created__lt=date) | Q(db_date_created=date, id__lt=obj_id)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(db_date_created__gt=date) | Q(db_date_created=date, id__gt=obj_id)
+                )
+        return list(
+            queryset.order_by(*self.ordering).values_list("db_date_created", "id")[
+                :size
+            ]
+        )
+
+    def iter_chunks(self, queryset, cursor):
+        """Gets the keys of every object after cursor, a chunk at a time"""
+        while True:
+            keys = self.get_keys(queryset, cursor, self.CHUNK_SIZE)
+            if keys:
+                yield keys
+            if len(keys) < self.CHUNK_SIZE:
+                return
+            cursor = keys[-1]
+
+    def get_fragments(self, queryset, obj_ids):
+        """Gets the JSON of objects by ID, serializing those we don't have"""
+        missing = [ob for ob in obj_ids if ob not in self.fragments]
+        if missing:
+            if len(self.fragments) + len(missing) > self.MAX_FRAGMENTS:
+                # make room by starting over, which includes the IDs we had
+                self.fragments = {}
+                missing = list(obj_ids)
+            objs = list(self.prefetch(queryset.filter(id__in=missing)))
+            for obj, data in zip(objs, self.serialize_many(objs)):
+                self.fragments[obj.id] = json_dumps(data)
+        return self.fragments
+
+    def stream(self, queryset, chunks):
+        """Yields the JSON list of every object in chunks"""
+        yield "["
+        first = True
+        for keys in chunks:
+            fragments = self.get_fragments(queryset, [obj_id for _, obj_id in keys])
+            text = ",".join(
+                fragments[obj_id] for _, obj_id in keys if obj_id in fragments
+            )
+            if text:
+                yield text if first else "," + text
+                first = False
+        yield "]"
+
+    # ---- responses ------------------------------------------------------
+
+    def get_validators(self, queryset, request):
+        """Gets the ETag and Last-Modified timestamp for a request"""
+        stats = queryset.aggregate(
+            latest=Max("db_date_created"), last_id=Max("id"), total=Count("id")
+        )
+        key = "%s-%s-%s-%s-%s" % (
+            self.version,
+            stats["total"],
+            stats["last_id"],
+            stats["latest"],
+            request.GET.urlencode(),
+        )
+        etag = quote_etag(hashlib.md5(force_bytes(key)).hexdigest())
+        last_modified = self.last_changed
+        if stats["latest"] and stats["latest"] > last_modified:
+            last_modified = stats["latest"]
+        return etag, timegm(last_modified.utctimetuple())
+
+    def get_response(self, request):
+        """
+        Gets the response for an API request.
+
+            Args:
+                request: The HttpRequest, which may have 'after' and 'limit'
+
+            Returns:
+                A StreamingHttpResponse of the JSON list, a 304 if the
+                client's ETag or If-Modified-Since is still good, or a 400 for
+                a bad cursor or limit.
+        """
+        try:
+            cursor = request.GET.get("after")
+            cursor = decode_cursor(cursor) if cursor else None
+            limit = request.GET.get("limit")
+            limit = min(max(int(limit), 1), self.MAX_LIMIT) if limit else None
+        except (TypeError, ValueError):
+            return HttpResponseBadRequest("Invalid cursor or limit.")
+        self.ensure_built()
+        queryset = self.get_queryset(request)
+        etag, last_modified = self.get_validators(queryset, request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            next_key = None
+            if limit:
+                keys = self.get_keys(queryset, cursor, limit + 1)
+                if len(keys) > limit:
+                    keys = keys[:limit]
+                    next_key = keys[-1]
+                chunks = [
+                    keys[num : num + self.CHUNK_SIZE]
+                    for num in range(0, len(keys), self.CHUNK_SIZE)
+                ]
+            else:
+                chunks = self.iter_chunks(queryset, cursor)
+            response = StreamingHttpResponse(
+                self.stream(queryset, chunks), content_type="application/json"
+            )
+            if next_key:
+                params = request.GET.copy()
+                params["after"] = encode_cursor(*next_key)
+                params["limit"] = limit
+                response["Link"] = '<%s?%s>; rel="next"' % (
+                    request.path,
+                    params.urlencode(),
+                )
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+def json_dumps(data):
+    """Serializes a dict for a fragment, falling back to str for odd values"""
+    return json.dumps(data, default=str)
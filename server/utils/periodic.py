@@ -0,0 +1,47 @@
+"""
+In-memory indexes that are kept up to date by hooks and signals as things
+change, but are also rebuilt from scratch every so often in case something
+changed that they weren't told about, such as a direct update or a change
+made from the shell.
+
+PeriodicallyRebuilt holds the bookkeeping they share: when the index was
+last built, whether it's due to be rebuilt, and rebuilding it lazily on its
+next use. Subclasses reset their own data in clear(), load it in rebuild(),
+and call mark_built() once they're done.
+"""
+from datetime import datetime, timedelta
+
+
+class PeriodicallyRebuilt(object):
+    """An index that's built on its first use and rebuilt every REFRESH_INTERVAL"""
+
+    REFRESH_INTERVAL = timedelta(days=1)
+
+    def __init__(self):
+        self.last_built = None
+        self.clear()
+
+    def clear(self):
+        """Discards the index, which will be rebuilt on its next use"""
+        self.last_built = None
+
+    @property
+    def is_stale(self):
+        """Whether the index is due to be rebuilt from scratch"""
+        return (
+            not self.last_built
+            or datetime.now() - self.last_built >= self.REFRESH_INTERVAL
+        )
+
+    def ensure_built(self):
+        """Rebuilds the index if it's never been built or has gone stale"""
+        if self.is_stale:
+            self.rebuild()
+
+    def mark_built(self):
+        """Records that the index was just built from scratch"""
+        self.last_built = datetime.now()
+
+    def rebuild(self):
+        """Loads the index from scratch, ending with a call to mark_built"""
+        raise NotImplementedError
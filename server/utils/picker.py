@@ -1,55 +1,401 @@
+"""
+Weighted random choices. WeightedPicker used to rebuild a dict of running
+totals, sort it, and scan it from the start for every pick, and callers built
+a fresh picker for every request even when the options never changed.
+
+There are two pickers here, both with the add_option/pick interface that the
+old one had:
+
+    WeightedPicker keeps the running totals of its weights, which a pick
+    bisects in O(log n). If weights change, the totals move into a Fenwick
+    tree so that each change is O(log n) as well, rather than O(n) to redo
+    every total after it. It suits option sets that are built up or adjusted
+    as we go, and one-off picks, since it's the cheaper of the two to build.
+
+    AliasPicker uses Vose's alias method: building its tables is O(n), after
+    which every pick is O(1). It suits option sets that are drawn from over
+    and over, and any change just rebuilds the tables on the next pick.
+
+Either can be kept and reused. PickerCache holds pickers for option sets that
+are loaded from the database and rarely change, like weather emits or loot
+tables, until whatever they were built from is edited.
+
+Weights are integers, and all the arithmetic is done with them, so an option
+is picked with exactly its share of the total weight. Negative weights count
+as 0, and an option with no weight is never picked unless no option has any
+weight, in which case the most recently added option is picked, as before.
+Either picker takes an optional random.Random instance to draw from, for
+reproducible picks.
+"""
 import random
+from bisect import bisect_right
+from itertools import accumulate
+
+
+class BasePicker(object):
+    """The options and weights of a picker"""
+
+    def __init__(self, options=None, rng=None):
+        """
+        Creates the picker.
+
+            Args:
+                options: Optional iterable of (option, weight) tuples to add
+                rng: Optional random.Random instance that we draw from
+        """
+        self.options = []
+        self.weights = []
+        self.total = 0
+        self.rng = rng or random
+        if options:
+            self.add_options(options)
 
+    def __len__(self):
+        return len(self.options)
 
-class WeightedPicker(object):
-    def __init__(self):
-        self.choices = []
+    @property
+    def choices(self):
+        """The (option, weight) tuples in the order they were added"""
+        return list(zip(self.options, self.weights))
+
+    @staticmethod
+    def clean_weight(weight):
+        """Converts a weight to a non-negative integer"""
+        try:
+            weight = int(weight)
+        except (TypeError, ValueError):
+            raise ValueError("Weight must be an integer value.")
+        return max(weight, 0)
 
     def add_option(self, option, weight):
         """
         Adds a option to this weighted picker.
-        :param option: The option to add to the picker, any valid Python object.
-        :param weight: An integer value to use as the weight for this option.
+
+            Args:
+                option: The option to add to the picker, any valid Python object.
+                weight: An integer value to use as the weight for this option.
+
+            Returns:
+                The index of the option, for changing its weight later.
+        """
+        weight = self.clean_weight(weight)
+        self.options.append(option)
+        self.weights.append(weight)
+        self.total += weight
+        return len(self.options) - 1
+
+    def add_options(self, options):
+        """
+        Adds a number of options to this picker at once.
+
+            Args:
+                options: Iterable of (option, weight) tuples
         """
+        options = list(options)
         try:
-            weight = int(weight)
-        except ValueError:
+            weights = [int(weight) for _, weight in options]
+        except (TypeError, ValueError):
             raise ValueError("Weight must be an integer value.")
+        weights = [weight if weight > 0 else 0 for weight in weights]
+        self.options.extend(option for option, _ in options)
+        self.weights.extend(weights)
+        self.total += sum(weights)
+
+    def index(self, option):
+        """Gets the index of the first time an option was added"""
+        return self.options.index(option)
+
+    def set_weight(self, index, weight):
+        """
+        Changes the weight of an option.
+
+            Args:
+                index (int): The index of the option, as returned by add_option
+                weight: Its new integer weight, or 0 to stop it being picked
+        """
+        weight = self.clean_weight(weight)
+        self.total += weight - self.weights[index]
+        self.weights[index] = weight
 
-        self.choices.append((option, weight))
+    def pick_index(self):
+        """Picks the index of an option, or None if we have no options"""
+        raise NotImplementedError
 
     def pick(self):
         """
-        Picks an option from those given to this WeightedPicker.
+        Picks an option from those given to this picker.
+        """
+        index = self.pick_index()
+        if index is None:
+            return None
+        return self.options[index]
+
+
+class WeightedPicker(BasePicker):
+    """
+    A picker that finds options by their running totals. While we're only
+    adding options, the running totals are a plain list that picks bisect
+    into. Once a weight changes, they move into a Fenwick tree, where each
+    node holds the total weight of a run of options, so that changing a
+    weight and picking only visit O(log n) nodes. Either is built in O(n)
+    the first time it's needed and kept up to date from then on.
+    """
+
+    def __init__(self, options=None, rng=None):
+        self.totals = None
+        # 1-based Fenwick tree: node i holds the weights of options (i - lowbit(i), i]
+        self.tree = None
+        super(WeightedPicker, self).__init__(options, rng)
+
+    def build_totals(self):
+        """Builds the list of running totals of our weights"""
+        self.totals = list(accumulate(self.weights))
+
+    def build_tree(self):
+        """Builds the Fenwick tree from the running totals of our weights"""
+        totals = [0]
+        totals.extend(accumulate(self.weights))
+        # node & (node - 1) clears the lowest bit, the start of the node's run
+        self.tree = [
+            totals[node] - totals[node & (node - 1)] for node in range(len(totals))
+        ]
+        self.totals = None
+
+    def add_option(self, option, weight):
+        """
+        Adds a option to this weighted picker.
+
+            Args:
+                option: The option to add to the picker, any valid Python object.
+                weight: An integer value to use as the weight for this option.
+
+            Returns:
+                The index of the option, for changing its weight later.
+        """
+        index = super(WeightedPicker, self).add_option(option, weight)
+        if self.tree is not None:
+            node = index + 1
+            value = self.weights[index]
+            # the new node covers itself plus the nodes of the runs just below it
+            step = 1
+            while step < node & -node:
+                value += self.tree[node - step]
+                step <<= 1
+            self.tree.append(value)
+        elif self.totals is not None:
+            self.totals.append(self.total)
+        return index
+
+    def add_options(self, options):
+        """
+        Adds a number of options to this picker at once.
+
+            Args:
+                options: Iterable of (option, weight) tuples
         """
+        super(WeightedPicker, self).add_options(options)
+        # rebuilt on next use, which is cheaper than adding each one
+        if self.tree is not None:
+            self.build_tree()
+        else:
+            self.totals = None
 
-        pickerdict = {}
-        current_value = 0
+    def set_weight(self, index, weight):
+        """
+        Changes the weight of an option.
+
+            Args:
+                index (int): The index of the option, as returned by add_option
+                weight: Its new integer weight, or 0 to stop it being picked
+        """
+        old_weight = self.weights[index]
+        super(WeightedPicker, self).set_weight(index, weight)
+        if self.tree is None:
+            self.build_tree()
+            return
+        delta = self.weights[index] - old_weight
+        node = index + 1
+        while node < len(self.tree):
+            self.tree[node] += delta
+            node += node & -node
 
-        if len(self.choices) == 0:
+    def running_total(self, index):
+        """Gets the total weight of the options up to and including index"""
+        if self.tree is None:
+            if self.totals is None:
+                self.build_totals()
+            return self.totals[index]
+        total = 0
+        node = index + 1
+        while node > 0:
+            total += self.tree[node]
+            node -= node & -node
+        return total
+
+    def find(self, value):
+        """
+        Gets the index of the option that a value falls into, the first option
+        whose running total is greater than the value.
+
+            Args:
+                value (int): Between 0 and one less than our total weight
+
+            Returns:
+                The index of the option.
+        """
+        if self.tree is None:
+            if self.totals is None:
+                self.build_totals()
+            return bisect_right(self.totals, value)
+        tree = self.tree
+        size = len(tree)
+        position = 0
+        step = 1 << (size - 1).bit_length()
+        while step:
+            node = position + step
+            if node < size and tree[node] <= value:
+                position = node
+                value -= tree[node]
+            step >>= 1
+        return position
+
+    def pick_index(self):
+        """Picks the index of an option, or None if we have no options"""
+        if not self.options:
             return None
+        if self.total <= 0:
+            return len(self.options) - 1
+        return self.find(self.rng.randrange(self.total))
+
+
+class AliasPicker(BasePicker):
+    """
+    A picker using Vose's alias method. Every option gets a column that's
+    partly its own and partly an alias to one other option, so a pick is one
+    random column and one random cut into it.
+    """
+
+    def __init__(self, options=None, rng=None):
+        self.cutoffs = []
+        self.aliases = []
+        self.built = False
+        super(AliasPicker, self).__init__(options, rng)
+
+    def add_option(self, option, weight):
+        """
+        Adds a option to this weighted picker.
 
-        if len(self.choices) == 1:
-            return self.choices[0][0]
+            Args:
+                option: The option to add to the picker, any valid Python object.
+                weight: An integer value to use as the weight for this option.
 
-        for option in self.choices:
-            pickerdict[current_value] = option[0]
-            current_value += option[1]
+            Returns:
+                The index of the option, for changing its weight later.
+        """
+        self.built = False
+        return super(AliasPicker, self).add_option(option, weight)
 
-        picker = random.randint(0, current_value)
-        last_value = 0
-        result = None
-        sorted_keys = sorted(pickerdict.keys())
+    def add_options(self, options):
+        """
+        Adds a number of options to this picker at once.
 
-        found = False
-        for key in sorted_keys:
-            if key >= picker:
-                result = pickerdict[last_value]
-                found = True
-                continue
-            last_value = key
+            Args:
+                options: Iterable of (option, weight) tuples
+        """
+        self.built = False
+        super(AliasPicker, self).add_options(options)
+
+    def set_weight(self, index, weight):
+        """
+        Changes the weight of an option. The tables are rebuilt on the next pick.
+
+            Args:
+                index (int): The index of the option, as returned by add_option
+                weight: Its new integer weight, or 0 to stop it being picked
+        """
+        self.built = False
+        super(AliasPicker, self).set_weight(index, weight)
+
+    def build(self):
+        """
+        Builds the alias tables. Every column is the total weight tall, and
+        weights are scaled by the number of options, so everything stays in
+        integers.
+        """
+        count = len(self.weights)
+        scaled = [weight * count for weight in self.weights]
+        self.cutoffs = [self.total] * count
+        self.aliases = list(range(count))
+        small = [index for index, weight in enumerate(scaled) if weight < self.total]
+        large = [index for index, weight in enumerate(scaled) if weight >= self.total]
+        while small and large:
+            short, tall = small.pop(), large.pop()
+            self.cutoffs[short] = scaled[short]
+            self.aliases[short] = tall
+            # the tall option fills the rest of the short one's column
+            scaled[tall] -= self.total - scaled[short]
+            if scaled[tall] < self.total:
+                small.append(tall)
+            else:
+                large.append(tall)
+        self.built = True
+
+    def pick_index(self):
+        """Picks the index of an option, or None if we have no options"""
+        if not self.options:
+            return None
+        if self.total <= 0:
+            return len(self.options) - 1
+        if not self.built:
+            self.build()
+        column = self.rng.randrange(len(self.options))
+        if self.rng.randrange(self.total) < self.cutoffs[column]:
+            return column
+        return self.aliases[column]
+
+
+class PickerCache(object):
+    """
+    Pickers for option sets loaded from the database, built the first time
+    they're needed and kept until cleared. Whatever the options are built from
+    should clear the cache when it's saved or deleted.
+    """
+
+    # every cache, so that tests can start from a clean slate
+    caches = []
+
+    def __init__(self, picker_class=AliasPicker):
+        self.picker_class = picker_class
+        self.pickers = {}
+        PickerCache.caches.append(self)
+
+    def get(self, key, get_options):
+        """
+        Gets the picker for a key, building it if needed.
+
+            Args:
+                key: Any hashable key for the option set
+                get_options: Callable returning an iterable of (option, weight)
+
+            Returns:
+                A picker, which may have no options.
+        """
+        try:
+            return self.pickers[key]
+        except KeyError:
+            picker = self.picker_class(get_options())
+            self.pickers[key] = picker
+            return picker
 
-        if not found:
-            result = pickerdict[sorted_keys[-1]]
+    def clear(self, key=None):
+        """Discards the picker for a key, or every picker if no key is given"""
+        if key is None:
+            self.pickers = {}
+        else:
+            self.pickers.pop(key, None)
 
-        return result
+    @classmethod
+    def clear_all(cls):
+        """Discards the pickers in every cache"""
+        for cache in cls.caches:
+            cache.clear()
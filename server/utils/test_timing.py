@@ -43,3 +43,181 @@ def time_all_at_once():
 def time_filters():
     t = Timer("by_filtering()", "from world.msgs.test_timing import by_filtering")
     print("Time is %s" % t.timeit(number=1))
+
+
+def time_pose_delivery(recipients, number=100):
+    """
+    Times sending a pose to each of a list of characters, like a pose in a
+    crowded room of 50. Sending to sessions is patched out, so this only times
+    what MsgMixins.msg does for each recipient.
+    """
+    from unittest.mock import patch
+    from evennia.objects.objects import DefaultObject, ObjectSessionHandler
+
+    def pose():
+        for ob in recipients:
+            ob.msg(
+                'Bob smiles. "Hello there, everyone."',
+                options={"is_pose": True},
+            )
+
+    with patch.object(DefaultObject, "msg"), patch.object(
+        ObjectSessionHandler, "all", return_value=[True]
+    ):
+        t = Timer(pose)
+        print(
+            "Time for %s recipients is %s"
+            % (len(recipients), t.timeit(number=number) / number)
+        )
+
+
+def linear_stat_check(level, value, roll):
+    """
+    The rules lookups of a stat check as they were made before RULES_TABLE:
+    walking sorted weights, ranks, tables and results for every check.
+    """
+    from world.stat_checks.models import (
+        StatWeight,
+        CheckRank,
+        DifficultyTable,
+        RollResult,
+    )
+
+    weights = sorted(StatWeight.get_all_instances(), key=lambda x: x.level)
+    matches = [
+        ob for ob in weights if ob.stat_type == StatWeight.STAT and ob.level <= level
+    ]
+    total = 0
+    for index, stat_weight in enumerate(matches):
+        if (index + 1) == len(matches):
+            total += ((level - stat_weight.level) + 1) * stat_weight.weight
+        else:
+            total += (matches[index + 1].level - stat_weight.level) * stat_weight.weight
+    ranks = sorted(CheckRank.get_all_instances(), key=lambda x: x.value)
+    rank = max([ob for ob in ranks if ob.value <= value], key=lambda x: x.value)
+    CheckRank.objects.filter(id=rank.id + 1).first()
+    tables = sorted(DifficultyTable.get_all_instances(), key=lambda x: x.value)
+    table = max([ob for ob in tables if ob.value <= 0], key=lambda x: x.value)
+    ranges = table.cached_ranges
+    max([ob for ob in ranges if ob.value <= roll], key=lambda x: x.value)
+    results = sorted(RollResult.get_all_instances(), key=lambda x: x.value)
+    max([ob for ob in results if ob.value <= roll], key=lambda x: x.value)
+    return total
+
+
+def compiled_stat_check(level, value, roll):
+    """The same lookups as linear_stat_check, made with RULES_TABLE"""
+    from world.stat_checks.models import StatWeight, CheckRank, RollResult
+    from world.stat_checks.rules_table import RULES_TABLE
+
+    total = StatWeight.get_weighted_value_for_type(level, StatWeight.STAT)
+    rank = CheckRank.get_base_rank_for_value(value)
+    RULES_TABLE.get_rank_by_id(rank.id + 1)
+    table = RULES_TABLE.get_difficulty_for_value(0)
+    RULES_TABLE.get_result_for_table(table, roll)
+    RollResult.get_instance_for_roll(roll)
+    return total
+
+
+def time_stat_checks(number=10000):
+    """
+    Compares how many stat checks per second can have their rules looked up
+    the old way and with the compiled tables, against the rules in the
+    database. Needs at least one of each StatWeight (of the STAT type),
+    CheckRank, DifficultyTable with a value of 0 or less, and RollResult.
+    """
+    from random import randint
+
+    args = [(randint(1, 10), randint(0, 200), randint(1, 100)) for _ in range(number)]
+    for func in (linear_stat_check, compiled_stat_check):
+        t = Timer(lambda: [func(*ob) for ob in args])
+        print("%s: %d checks per second" % (func.__name__, number / t.timeit(number=1)))
+
+
+def old_pick(choices):
+    """The pick of the old WeightedPicker, for a list of (option, weight) tuples"""
+    import random
+
+    pickerdict = {}
+    current_value = 0
+
+    if len(choices) == 0:
+        return None
+
+    if len(choices) == 1:
+        return choices[0][0]
+
+    for option in choices:
+        pickerdict[current_value] = option[0]
+        current_value += option[1]
+
+    picker = random.randint(0, current_value)
+    last_value = 0
+    result = None
+    sorted_keys = sorted(pickerdict.keys())
+
+    found = False
+    for key in sorted_keys:
+        if key >= picker:
+            result = pickerdict[last_value]
+            found = True
+            continue
+        last_value = key
+
+    if not found:
+        result = pickerdict[sorted_keys[-1]]
+
+    return result
+
+
+def time_picker_size(size, picks):
+    """
+    Times picking from a set of options with random weights the given number
+    of times, with the old WeightedPicker and those in server.utils.picker.
+
+        Args:
+            size (int): The number of options
+            picks (int): How many picks we make
+
+        Returns:
+            A dict of the name of each approach to the seconds it took.
+    """
+    import random
+    from server.utils.picker import AliasPicker, WeightedPicker
+
+    choices = [(num, random.randint(1, 100)) for num in range(size)]
+    weighted = WeightedPicker(choices)
+    weighted.build_totals()
+    updated = WeightedPicker(choices)
+    updated.build_tree()
+    alias = AliasPicker(choices)
+    alias.build()
+    timings = {
+        "old picker": Timer(lambda: old_pick(choices)).timeit(number=picks),
+        "old picker with build": Timer(
+            lambda: old_pick([(option, int(weight)) for option, weight in choices])
+        ).timeit(number=picks),
+        "weighted picker": Timer(weighted.pick).timeit(number=picks),
+        "weighted picker after updates": Timer(updated.pick).timeit(number=picks),
+        "alias picker": Timer(alias.pick).timeit(number=picks),
+        "weighted picker with build": Timer(
+            lambda: WeightedPicker(choices).pick()
+        ).timeit(number=picks),
+        "alias picker with build": Timer(lambda: AliasPicker(choices).pick()).timeit(
+            number=picks
+        ),
+        "weighted picker weight update": Timer(
+            lambda: updated.set_weight(random.randrange(size), random.randint(1, 100))
+        ).timeit(number=picks),
+    }
+    return timings
+
+
+def time_pickers(sizes=(10, 1000, 100000)):
+    """Prints how long each picker takes per pick at each number of options"""
+    for size in sizes:
+        # fewer picks as the options grow, since the old picker is O(n log n) per pick
+        picks = max(10, 100000 // size)
+        print("%s options, %s picks:" % (size, picks))
+        for name, seconds in time_picker_size(size, picks).items():
+            print("    %s: %.2f microseconds per pick" % (name, seconds * 1e6 / picks))
@@ -11,11 +11,22 @@ from evennia.commands.default.tests import CommandTest
 from evennia.server.sessionhandler import SESSIONS
 from evennia.utils import ansi, utils
 from evennia.utils.test_resources import EvenniaTest
+from commands.base_commands.help_index import HELP_INDEX
 from typeclasses.accounts import Account
 from typeclasses.characters import Character
 from typeclasses.exits import Exit
 from typeclasses.objects import Object
+from typeclasses.presence import PRESENCE
+from typeclasses.room_graph import ROOM_GRAPH
 from typeclasses.rooms import ArxRoom
+from typeclasses.wearable.loadout import MODIFIER_INDEX
+from server.utils.counters import COUNTERS
+from server.utils.picker import PickerCache
+from web.character.clue_index import CLUE_INDEX
+from web.character.exports import CHARACTER_EXPORT
+from world.dominion.genealogy import GENEALOGY
+from world.dominion.prestige_graph import PRESTIGE_GRAPH
+from world.msgs.exports import JOURNAL_EXPORT
 from world.stat_checks.models import (
     DifficultyRating,
     RollResult,
@@ -31,6 +42,8 @@ from world.stat_checks.models import (
     CheckRank,
     DifficultyTable,
 )
+from world.stat_checks.rules_table import RULES_TABLE
+from world.templates.renderer import TEMPLATE_RENDERER
 from world.traits.models import Trait
 
 # set up signal here since we are not starting the server
@@ -88,6 +101,19 @@ class ArxTestConfigMixin(object):
         NaturalRollType._cache_set = False
         CheckRank._cache_set = False
         DifficultyTable._cache_set = False
+        PRESTIGE_GRAPH.clear()
+        CLUE_INDEX.clear()
+        GENEALOGY.clear()
+        ROOM_GRAPH.clear()
+        PRESENCE.clear()
+        COUNTERS.clear()
+        PickerCache.clear_all()
+        HELP_INDEX.clear()
+        CHARACTER_EXPORT.clear()
+        JOURNAL_EXPORT.clear()
+        TEMPLATE_RENDERER.clear()
+        MODIFIER_INDEX.clear()
+        RULES_TABLE.clear()
 
     def setup_arx_characters(self):
         """
@@ -0,0 +1,155 @@
+"""
+Tests for the weighted pickers and periodically rebuilt indexes.
+"""
+import random
+from datetime import datetime
+from itertools import accumulate
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from server.utils.periodic import PeriodicallyRebuilt
+from server.utils.picker import AliasPicker, WeightedPicker
+
+
+class WeightedPickerTests(TestCase):
+    def assert_totals(self, picker):
+        """Checks the picker's running totals and lookups against its weights"""
+        totals = list(accumulate(picker.weights))
+        self.assertEqual(picker.total, totals[-1])
+        for index, total in enumerate(totals):
+            self.assertEqual(picker.running_total(index), total)
+        expected = [
+            index for index, weight in enumerate(picker.weights) for _ in range(weight)
+        ]
+        self.assertEqual(
+            [picker.find(value) for value in range(picker.total)], expected
+        )
+
+    def test_totals(self):
+        picker = WeightedPicker([("a", 3), ("b", 0), ("c", 5), ("d", 2)])
+        self.assertIsNone(picker.tree)
+        self.assertEqual(picker.find(2), 0)
+        self.assertEqual(picker.find(3), 2)
+        self.assert_totals(picker)
+        # options added after the totals are built are appended to them
+        picker.add_option("e", 4)
+        self.assert_totals(picker)
+
+    def test_set_weight(self):
+        picker = WeightedPicker([("a", 3), ("b", 0), ("c", 5), ("d", 2)])
+        picker.set_weight(1, 4)
+        self.assertIsNotNone(picker.tree)
+        self.assertEqual(picker.weights, [3, 4, 5, 2])
+        self.assertEqual(picker.find(3), 1)
+        self.assert_totals(picker)
+        # a weight of 0 is never picked
+        picker.set_weight(2, 0)
+        self.assertEqual(picker.total, 9)
+        self.assertEqual(picker.find(7), 3)
+        self.assert_totals(picker)
+        picker.set_weight(0, -5)
+        self.assertEqual(picker.weights[0], 0)
+        self.assert_totals(picker)
+        picker.add_option("e", 6)
+        self.assert_totals(picker)
+        picker.add_options([("f", 1), ("g", 0), ("h", 2)])
+        self.assert_totals(picker)
+        with self.assertRaises(ValueError):
+            picker.set_weight(1, "heavy")
+
+    def test_set_weight_many(self):
+        rng = random.Random(1)
+        picker = WeightedPicker(
+            [(num, rng.randint(0, 20)) for num in range(37)], rng=rng
+        )
+        for _ in range(100):
+            picker.set_weight(rng.randrange(len(picker)), rng.randint(0, 20))
+            self.assertEqual(
+                [picker.running_total(num) for num in range(len(picker))],
+                list(accumulate(picker.weights)),
+            )
+        self.assert_totals(picker)
+        for _ in range(100):
+            self.assertNotEqual(picker.weights[picker.pick()], 0)
+
+    def test_all_weights_zero(self):
+        self.assertIsNone(WeightedPicker().pick())
+        picker = WeightedPicker([("a", 0), ("b", 0), ("c", 0)])
+        self.assertEqual(picker.pick(), "c")
+        picker.set_weight(0, 2)
+        self.assertEqual(picker.pick(), "a")
+        picker.set_weight(0, 0)
+        self.assertEqual(picker.total, 0)
+        self.assertEqual(picker.pick(), "c")
+
+
+class AliasPickerTests(TestCase):
+    def assert_shares(self, picker):
+        """
+        Checks that every option gets exactly its share of the alias tables:
+        each of the columns and cuts into them is an equally likely pick.
+        """
+        picker.build()
+        counts = [0] * len(picker)
+        for column in range(len(picker)):
+            counts[column] += picker.cutoffs[column]
+            counts[picker.aliases[column]] += picker.total - picker.cutoffs[column]
+        self.assertEqual(counts, [weight * len(picker) for weight in picker.weights])
+
+    def test_tables(self):
+        picker = AliasPicker([("a", 3), ("b", 0), ("c", 5), ("d", 2), ("e", 7)])
+        self.assert_shares(picker)
+        picker.set_weight(2, 0)
+        self.assertFalse(picker.built)
+        self.assert_shares(picker)
+        picker.add_option("f", 11)
+        self.assertFalse(picker.built)
+        self.assert_shares(picker)
+        rng = random.Random(3)
+        picker = AliasPicker([(num, rng.randint(0, 50)) for num in range(61)], rng=rng)
+        self.assert_shares(picker)
+
+    def test_pick(self):
+        picker = AliasPicker([("a", 1), ("b", 0), ("c", 1)], rng=random.Random(5))
+        picks = set(picker.pick() for _ in range(100))
+        self.assertEqual(picks, {"a", "c"})
+        picker.set_weight(0, 0)
+        self.assertEqual(set(picker.pick() for _ in range(20)), {"c"})
+
+    def test_all_weights_zero(self):
+        self.assertIsNone(AliasPicker().pick())
+        picker = AliasPicker([("a", 0), ("b", 0)])
+        self.assertEqual(picker.pick(), "b")
+        picker.set_weight(0, 1)
+        self.assertEqual(picker.pick(), "a")
+
+
+class PeriodicallyRebuiltTests(TestCase):
+    class CountingIndex(PeriodicallyRebuilt):
+        def clear(self):
+            super().clear()
+            self.builds = getattr(self, "builds", 0)
+
+        def rebuild(self):
+            self.clear()
+            self.builds += 1
+            self.mark_built()
+
+    def test_rebuilt_when_stale(self):
+        index = self.CountingIndex()
+        self.assertTrue(index.is_stale)
+        index.ensure_built()
+        index.ensure_built()
+        self.assertEqual(index.builds, 1)
+        later = datetime.now() + index.REFRESH_INTERVAL
+        with patch("server.utils.periodic.datetime") as mock_datetime:
+            mock_datetime.now.return_value = later
+            self.assertTrue(index.is_stale)
+            index.ensure_built()
+        self.assertEqual(index.builds, 2)
+        self.assertEqual(index.last_built, later)
+        index.clear()
+        self.assertIsNone(index.last_built)
+        index.ensure_built()
+        self.assertEqual(index.builds, 3)
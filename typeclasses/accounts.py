@@ -22,7 +22,9 @@ several more options for customizing the Guest account system.
 
 """
 from evennia import DefaultAccount
+from typeclasses.message_log import MessageLog
 from typeclasses.mixins import MsgMixins, InformMixin
+from typeclasses.presence import PRESENCE
 from web.character.models import PlayerSiteEntry
 
 
@@ -184,6 +186,7 @@ class Account(InformMixin, MsgMixins, DefaultAccount):
                 self.db.afk = ""
         except AttributeError:
             pass
+        PRESENCE.update_account(self)
 
     # noinspection PyBroadException
     def announce_informs(self):
@@ -446,9 +449,11 @@ class Account(InformMixin, MsgMixins, DefaultAccount):
                         "{wA player you are watching, {c%s{w, has disconnected.{n"
                         % self.key.capitalize()
                     )
-            self.previous_log = self.current_log
+            if self.current_log or self.db.previous_log:
+                self.previous_log = self.current_log.to_list()
             self.current_log = []
             self.db.lookingforrp = False
+            PRESENCE.remove_account(self)
             temp_muted = self.db.temp_mute_list or []
             for channel in temp_muted:
                 channel.unmute(self)
@@ -466,24 +471,19 @@ class Account(InformMixin, MsgMixins, DefaultAccount):
         if not self.tags.get("private_mode"):
             text = text.strip()
             from_obj = make_iter(from_obj)[0]
-            tup = (from_obj, text)
-            if (
-                tup not in self.current_log
-                and from_obj != self
-                and from_obj != self.char_ob
-            ):
-                self.current_log.append((from_obj, text))
+            if from_obj != self and from_obj != self.char_ob:
+                self.current_log.add(from_obj, text)
 
     @property
     def current_log(self):
-        """Temporary messages for this session"""
+        """Temporary messages for this session, as a MessageLog"""
         if self.ndb.current_log is None:
-            self.ndb.current_log = []
+            self.ndb.current_log = MessageLog()
         return self.ndb.current_log
 
     @current_log.setter
     def current_log(self, val):
-        self.ndb.current_log = val
+        self.ndb.current_log = MessageLog(val or ())
 
     @property
     def previous_log(self):
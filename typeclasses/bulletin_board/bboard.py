@@ -4,6 +4,8 @@ Default Typeclass for Bulletin Boards, based loosely on bboards.
 See objects.objects for more information on Typeclassing.
 """
 from server.utils.arx_utils import get_full_url
+from typeclasses.bulletin_board.post_index import BoardPostIndex
+from typeclasses.bulletin_board import unread
 from typeclasses.objects import Object
 from world.msgs.models import Post
 from world.msgs.managers import POST_TAG, TAG_CATEGORY
@@ -53,15 +55,18 @@ class BBoard(Object):
         if event:
             event.tag_obj(post)
         self.receiver_object_set.add(post)
-        if self.max_posts and self.posts.count() > self.max_posts:
-            posts = self.posts.exclude(db_tags__db_key="sticky_post")
-            if "archive_posts" in self.tags.all():
-                self.archive_post(posts.first())
-            else:
-                posts.first().delete()
+        self.post_index.add(post.id)
+        if self.max_posts and self.post_index.count() > self.max_posts:
+            oldest = self.get_post_by_id(self.post_index.first_unstickied())
+            if oldest:
+                if "archive_posts" in self.tags.all():
+                    self.archive_post(oldest)
+                else:
+                    oldest.delete()
+                    self.post_index.remove(oldest.id)
             self.flush_unread_cache()
         if announce:
-            post_num = self.posts.count()
+            post_num = self.post_index.count()
             from django.urls import reverse
 
             post_url = get_full_url(
@@ -169,7 +174,9 @@ class BBoard(Object):
             queryset of posts unread by pobj
         """
         if not old:
-            return self.posts.all_unread_by(pobj)
+            return self.posts.all_unread_by(pobj).filter(
+                id__gt=unread.get_watermark(pobj, self)
+            )
         return self.archived_posts.all_unread_by(pobj)
 
     def num_of_unread_posts(self, pobj, old=False):
@@ -177,21 +184,46 @@ class BBoard(Object):
             return self.get_unread_posts(pobj, old).count()
         if pobj in self.num_unread_cache:
             return self.num_unread_cache[pobj]
-        num_unread = self.get_unread_posts(pobj, old).count()
-        self.num_unread_cache[pobj] = num_unread
-        return num_unread
+        return unread.get_unread_counts(pobj, [self])[self.id]
 
     def get_post(self, pobj, postnum, old=False):
         # pobj is a player.
-        postnum -= 1
-        if old:
-            posts = self.archived_posts
-        else:
-            posts = self.posts
-        if (postnum < 0) or (postnum >= len(posts)):
+        post = self.get_post_by_id(self.post_index.get_id(postnum, old))
+        if not post:
             pobj.msg("Invalid message number specified.")
-        else:
-            return list(posts)[postnum]
+        return post
+
+    def get_post_by_id(self, post_id):
+        """
+        Gets a post on this board by its ID. If the post has gone missing from
+        under the index, such as being deleted from outside the board, the index
+        is discarded so it's rebuilt from the database on its next use.
+        """
+        if post_id is None:
+            return None
+        try:
+            return Post.objects.get(id=post_id)
+        except Post.DoesNotExist:
+            self.post_index.clear()
+            return None
+
+    def get_post_range(self, start, end, old=False):
+        """
+        Gets the posts numbered start through end, inclusive, in a single query.
+
+            Returns:
+                A list of (post number, post) tuples.
+        """
+        page = self.post_index.page(start, end - start + 1, old)
+        posts = Post.objects.in_bulk([post_id for _, post_id in page])
+        return [(num, posts[post_id]) for num, post_id in page if post_id in posts]
+
+    @property
+    def post_index(self):
+        """The BoardPostIndex for looking up our posts by number"""
+        if self.ndb.post_index is None:
+            self.ndb.post_index = BoardPostIndex(self)
+        return self.ndb.post_index
 
     def get_latest_post(self):
         try:
@@ -237,18 +269,16 @@ class BBoard(Object):
         Remove post if it's inside the bulletin board.
         """
         retval = False
-        if post in self.posts:
-            post.delete()
-            retval = True
-        if post in self.archived_posts:
+        if post in self.post_index:
+            self.post_index.remove(post.id)
             post.delete()
             retval = True
         self.flush_unread_cache()
         return retval
 
-    @staticmethod
-    def sticky_post(post):
+    def sticky_post(self, post):
         post.tags.add("sticky_post")
+        self.post_index.set_sticky(post.id)
         return True
 
     @staticmethod
@@ -262,26 +292,30 @@ class BBoard(Object):
 
     @property
     def posts(self):
-        return Post.objects.for_board(self).exclude(db_tags__db_key="archived")
+        return (
+            Post.objects.for_board(self)
+            .exclude(db_tags__db_key="archived")
+            .order_by("id")
+        )
 
     @property
     def archived_posts(self):
-        return Post.objects.for_board(self).filter(db_tags__db_key="archived")
+        return (
+            Post.objects.for_board(self)
+            .filter(db_tags__db_key="archived")
+            .order_by("id")
+        )
 
     def read_post(self, caller, post, old=False):
         """
         Helper function to read a single post.
         """
-        if old:
-            posts = self.archived_posts
-        else:
-            posts = self.posts
         # format post
         sender = self.get_poster(post)
         message = "\n{w" + "-" * 60 + "{n\n"
         message += "{wBoard:{n %s, {wPost Number:{n %s\n" % (
             self.key,
-            list(posts).index(post) + 1,
+            self.post_index.get_number(post, old),
         )
         message += "{wPoster:{n %s\n" % sender
         message += "{wSubject:{n %s\n" % post.db_header
@@ -295,43 +329,59 @@ class BBoard(Object):
         # mark it read
         self.mark_read(caller, post)
 
-    @staticmethod
-    def archive_post(post):
+    def archive_post(self, post):
         post.tags.add("archived")
+        self.post_index.set_archived(post.id)
         return True
 
-    @staticmethod
-    def mark_unarchived(post):
+    def mark_unarchived(self, post):
         post.tags.remove("archived")
+        self.post_index.set_archived(post.id, archived=False)
+        # the post may be older than posts people have read up to
+        unread.reset_watermarks(self)
+        self.flush_unread_cache()
 
-    def mark_read_if_cache(self, caller):
+    def mark_read_if_cache(self, caller, num_read=1):
         num_unread = self.num_unread_cache.get(caller, -1)
-        if num_unread > 0:
-            num_unread = num_unread - 1
+        if num_unread >= num_read:
+            self.num_unread_cache[caller] = num_unread - num_read
         else:
-            # We didn't have a cache and we'll already be marked read,
-            # just take the value directly
-            num_unread = self.get_unread_posts(caller, old=False).count()
-
-        self.num_unread_cache[caller] = num_unread
+            # We didn't have a usable cache, so it'll be counted on next use
+            self.num_unread_cache.pop(caller, None)
 
     def mark_read(self, caller, post):
-        if not post.db_receivers_accounts.filter(id=caller.id).exists():
-            # Mark our post read
-            post.db_receivers_accounts.add(caller)
-            self.mark_read_if_cache(caller)
-
-        if caller.db.bbaltread:
-            try:
-                for alt in (ob.player for ob in caller.roster.alts):
-                    # Let's check this first, so we don't erroneously subtract
-                    # from the cache a second time.
-                    if not post.db_receivers_accounts.filter(id=alt.id).exists():
-                        post.db_receivers_accounts.add(alt)
-                        self.mark_read_if_cache(alt)
-
-            except AttributeError:
-                pass
+        self.mark_posts_read(caller, [post])
+
+    def mark_posts_read(self, caller, posts):
+        """
+        Marks posts read by caller, and by their alts if they've set bbaltread,
+        with bulk inserts rather than a check and add for each post and alt.
+
+            Returns:
+                A dict of account to the IDs of the posts they hadn't yet read.
+        """
+        newly_read = unread.mark_posts_read(unread.get_readers(caller), posts)
+        for account, post_ids in newly_read.items():
+            # only current posts count toward the unread cache
+            num_read = len([ob for ob in post_ids if self.post_index.get_number(ob)])
+            if num_read:
+                self.mark_read_if_cache(account, num_read)
+        return newly_read
+
+    def mark_all_read(self, caller):
+        """Marks every current post on the board read by caller and their alts"""
+        readers = unread.get_readers(caller)
+        watermark = min(unread.get_watermark(ob, self) for ob in readers)
+        post_ids = [
+            post_id
+            for _, post_id in self.post_index.page(1, self.post_index.count())
+            if post_id > watermark
+        ]
+        unread.mark_posts_read(readers, post_ids)
+        for account in readers:
+            if post_ids:
+                unread.set_watermark(account, self, post_ids[-1])
+            self.zero_unread_cache(account)
 
     @property
     def num_unread_cache(self):
@@ -0,0 +1,198 @@
+"""
+An index of the posts on a bulletin board. Post numbers on a board are just
+positions in its ordered list of posts, so finding post 5 or working out the
+number of a post we're reading used to mean loading every post on the board
+through the tag joins that separate archived posts from current ones. The
+BoardPostIndex keeps the ordered IDs of a board's current and archived posts
+along with which of them are sticky, so those lookups are done in memory.
+
+The index is built with a few values_list queries the first time it's used,
+and the board keeps it in sync as posts are made, archived, unarchived, made
+sticky or deleted. Posts deleted without going through the board, like the
+posts of events that have finished, are removed by a pre_delete signal.
+Both the index and the board's querysets of posts are ordered by ID, so the
+numbers in a board's listing are the ones the index looks up.
+"""
+from bisect import bisect_left
+
+from django.db.models import signals
+
+from world.msgs.models import Post
+
+
+class BoardPostIndex(object):
+    """
+    Ordered post IDs for a single board. Posts are numbered from 1 in the
+    order they were made, separately for current and archived posts.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.built = False
+        self._ids = {False: [], True: []}
+        self._positions = {False: {}, True: {}}
+        self.sticky = set()
+
+    def __contains__(self, post):
+        self.ensure_built()
+        post_id = getattr(post, "id", post)
+        return post_id in self._positions[False] or post_id in self._positions[True]
+
+    def build(self):
+        """Loads the IDs and flags of every post on the board"""
+        board_posts = Post.objects.for_board(self.board)
+        archived = set(
+            board_posts.filter(db_tags__db_key="archived").values_list("id", flat=True)
+        )
+        self.sticky = set(
+            board_posts.filter(db_tags__db_key="sticky_post").values_list(
+                "id", flat=True
+            )
+        )
+        self._ids = {False: [], True: []}
+        for post_id in sorted(set(board_posts.values_list("id", flat=True))):
+            self._ids[post_id in archived].append(post_id)
+        for old in (False, True):
+            self._reindex(old)
+        self.built = True
+
+    def ensure_built(self):
+        """Builds the index if it hasn't been built yet"""
+        if not self.built:
+            self.build()
+
+    def clear(self):
+        """Discards the index, which will be rebuilt on its next use"""
+        self.built = False
+        self._ids = {False: [], True: []}
+        self._positions = {False: {}, True: {}}
+        self.sticky = set()
+
+    def _reindex(self, old, start=0):
+        """Renumbers posts from a position onward after the list changed"""
+        ids = self._ids[old]
+        positions = self._positions[old] if start else {}
+        for position in range(start, len(ids)):
+            positions[ids[position]] = position
+        self._positions[old] = positions
+
+    def count(self, old=False):
+        """Number of current posts, or archived posts if old is True"""
+        self.ensure_built()
+        return len(self._ids[old])
+
+    def get_id(self, post_num, old=False):
+        """
+        Gets the ID of a post from its number.
+
+            Args:
+                post_num (int): The 1-based number of the post
+                old (bool): Whether we're numbering archived posts
+
+            Returns:
+                The post ID, or None if there's no post with that number.
+        """
+        self.ensure_built()
+        ids = self._ids[old]
+        if post_num < 1 or post_num > len(ids):
+            return None
+        return ids[post_num - 1]
+
+    def get_number(self, post, old=False):
+        """Gets the 1-based number of a post or post ID, or None if it's not present"""
+        self.ensure_built()
+        position = self._positions[old].get(getattr(post, "id", post))
+        if position is None:
+            return None
+        return position + 1
+
+    def page(self, start, count, old=False):
+        """
+        Gets the IDs of a run of posts.
+
+            Args:
+                start (int): The 1-based number of the first post
+                count (int): The most posts to return
+                old (bool): Whether we're paging through archived posts
+
+            Returns:
+                A list of (post number, post ID) tuples.
+        """
+        self.ensure_built()
+        start = max(start, 1)
+        ids = self._ids[old][start - 1 : start - 1 + max(count, 0)]
+        return list(enumerate(ids, start))
+
+    def first_unstickied(self):
+        """Gets the ID of the oldest current post that isn't sticky, or None"""
+        self.ensure_built()
+        for post_id in self._ids[False]:
+            if post_id not in self.sticky:
+                return post_id
+
+    def add(self, post_id, old=False, sticky=False):
+        """Adds a new post to the index"""
+        if not self.built:
+            # the post will be picked up when we're built
+            return
+        self._insert(post_id, old)
+        if sticky:
+            self.sticky.add(post_id)
+
+    def _insert(self, post_id, old):
+        ids = self._ids[old]
+        if post_id in self._positions[old]:
+            return
+        if not ids or post_id > ids[-1]:
+            self._positions[old][post_id] = len(ids)
+            ids.append(post_id)
+            return
+        position = bisect_left(ids, post_id)
+        ids.insert(position, post_id)
+        self._reindex(old, position)
+
+    def _discard(self, post_id, old):
+        position = self._positions[old].pop(post_id, None)
+        if position is None:
+            return
+        del self._ids[old][position]
+        self._reindex(old, position)
+
+    def remove(self, post_id):
+        """Removes a deleted post from the index"""
+        if not self.built:
+            return
+        for old in (False, True):
+            self._discard(post_id, old)
+        self.sticky.discard(post_id)
+
+    def set_archived(self, post_id, archived=True):
+        """Moves a post between the current and archived posts"""
+        if not self.built:
+            return
+        if post_id not in self._positions[not archived]:
+            return
+        self._discard(post_id, not archived)
+        self._insert(post_id, archived)
+
+    def set_sticky(self, post_id, sticky=True):
+        """Flags or unflags a post as sticky"""
+        if not self.built:
+            return
+        if sticky:
+            self.sticky.add(post_id)
+        else:
+            self.sticky.discard(post_id)
+
+
+def remove_deleted_post(sender, instance, **kwargs):
+    """Removes a post from the indexes of its boards, however it's deleted"""
+    for board in instance.db_receivers_objects.all():
+        post_index = board.ndb.post_index
+        if post_index is not None:
+            post_index.remove(instance.id)
+
+
+signals.pre_delete.connect(
+    remove_deleted_post, sender=Post, dispatch_uid="remove_deleted_post"
+)
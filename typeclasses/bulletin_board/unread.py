@@ -0,0 +1,143 @@
+"""
+Unread tracking for bulletin boards. Whether an account has read a post is
+recorded by the account being one of the post's receivers, and working out
+how many posts are unread used to be a separate count query for each board
+an account could see.
+
+get_unread_counts does that for any number of boards in one aggregated query.
+To keep that query from having to check an account against every post a board
+has ever had, each account has a persistent read watermark per board: the ID
+of a post that they've read everything up to. Posts at or below the watermark
+aren't counted. Watermarks only ever move forward as counts show everything
+below them has been read, and a board invalidates all of them by bumping its
+watermark epoch if an old post could become unread again, such as by being
+unarchived.
+
+mark_posts_read marks posts read for a set of accounts, such as an account
+and their alts, with bulk inserts into the receivers table.
+"""
+from django.db.models import Count, Min, Q
+
+# most rows/parameters we'll send in a single query
+BATCH_SIZE = 500
+
+
+def get_readers(account):
+    """
+    Gets the accounts that read a post when the account does: the account
+    itself, and their alts if they've set @settings/bbaltread.
+    """
+    accounts = [account]
+    if account.db.bbaltread:
+        try:
+            accounts.extend(ob.player for ob in account.roster.alts)
+        except AttributeError:
+            pass
+    return accounts
+
+
+def get_watermark(account, board):
+    """Gets the ID of the post that account has read everything on board up to"""
+    watermarks = account.db.bboard_watermarks or {}
+    epoch, post_id = watermarks.get(board.id, (None, 0))
+    if epoch != (board.db.watermark_epoch or 0):
+        return 0
+    return post_id
+
+
+def set_watermark(account, board, post_id):
+    """Moves an account's watermark for a board forward to post_id"""
+    if not post_id or post_id <= get_watermark(account, board):
+        return
+    if account.db.bboard_watermarks is None:
+        account.db.bboard_watermarks = {}
+    account.db.bboard_watermarks[board.id] = (board.db.watermark_epoch or 0, post_id)
+
+
+def reset_watermarks(board):
+    """Invalidates every account's watermark for a board"""
+    board.db.watermark_epoch = (board.db.watermark_epoch or 0) + 1
+
+
+def get_unread_counts(account, boards):
+    """
+    Counts the current posts unread by an account on each of the boards in a
+    single query, advancing the account's watermarks and filling each board's
+    unread cache as we go.
+
+        Args:
+            account: The AccountDB whose posts we're counting
+            boards: The BBoards to count
+
+        Returns:
+            A dict of board ID to the number of unread posts.
+    """
+    from world.msgs.models import Post
+
+    boards = list(boards)
+    if not boards:
+        return {}
+    # the board filter and its watermark must be in the same filter() so that
+    # they share a join, which values_list then groups by
+    query = Q()
+    for board in boards:
+        query |= Q(db_receivers_objects=board, id__gt=get_watermark(account, board))
+    rows = (
+        Post.objects.filter(query)
+        .exclude(db_tags__db_key="archived")
+        .exclude(db_receivers_accounts=account)
+        .order_by()
+        .values_list("db_receivers_objects")
+        .annotate(unread=Count("id", distinct=True), first_unread=Min("id"))
+    )
+    results = {board_id: (unread, first) for board_id, unread, first in rows}
+    counts = {}
+    for board in boards:
+        unread, first_unread = results.get(board.id, (0, None))
+        counts[board.id] = unread
+        board.num_unread_cache[account] = unread
+        if first_unread:
+            set_watermark(account, board, first_unread - 1)
+        else:
+            index = board.post_index
+            set_watermark(account, board, index.get_id(index.count()))
+    return counts
+
+
+def mark_posts_read(accounts, posts):
+    """
+    Marks posts as read by each of the accounts with bulk inserts, skipping
+    any they've already read.
+
+        Args:
+            accounts: List of AccountDB objects reading the posts
+            posts: Iterable of Posts or post IDs
+
+        Returns:
+            A dict of account to the list of post IDs they hadn't read before.
+    """
+    from world.msgs.models import Post
+
+    ReadPost = Post.db_receivers_accounts.through
+    post_ids = [getattr(ob, "id", ob) for ob in posts]
+    if not accounts or not post_ids:
+        return {}
+    account_ids = [ob.id for ob in accounts]
+    already_read = set()
+    for start in range(0, len(post_ids), BATCH_SIZE):
+        already_read.update(
+            ReadPost.objects.filter(
+                accountdb_id__in=account_ids,
+                msg_id__in=post_ids[start : start + BATCH_SIZE],
+            ).values_list("accountdb_id", "msg_id")
+        )
+    newly_read = {}
+    rows = []
+    for account in accounts:
+        for post_id in post_ids:
+            if (account.id, post_id) in already_read:
+                continue
+            rows.append(ReadPost(accountdb_id=account.id, msg_id=post_id))
+            newly_read.setdefault(account, []).append(post_id)
+    ReadPost.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return newly_read
@@ -11,8 +11,10 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.urls import reverse
 from evennia.objects.objects import DefaultCharacter
 
+from server.utils.counters import COUNTERS
 from server.utils.exceptions import PayError
 from typeclasses.mixins import MsgMixins, ObjectMixins
+from typeclasses.presence import PRESENCE
 from typeclasses.wearable.mixins import UseEquipmentMixins
 from world.msgs.messagehandler import MessageHandler
 from world.msgs.languagehandler import LanguageHandler
@@ -108,6 +110,13 @@ class Character(
             final_desc += "\n\n" + "{w({n%s{w){n" % add
         return final_desc
 
+    def at_desc_change(self):
+        """Also discards our entry in the character export, which shows our desc"""
+        from web.character.exports import CHARACTER_EXPORT
+
+        super().at_desc_change()
+        CHARACTER_EXPORT.invalidate(self.id)
+
     @lazy_property
     def health_status(self):
         """
@@ -174,6 +183,7 @@ class Character(
                 self.msg("You've lost track of how to get to your destination.")
                 self.ndb.waypoint = None
                 self.ndb.traversed = []
+        PRESENCE.move_character(self)
         if self.ndb.following and self.ndb.following.location != self.location:
             self.stop_follow()
         if self.db.room_title:
@@ -748,93 +758,83 @@ class Character(
 
     def get_directions(self, room):
         """
-        Uses the ObjectDB manager and repeated related_set calls in order
-        to find the exit in the current room that directly points to it.
+        Finds the exit in the current room that starts the shortest route to
+        another room, using the room graph. Routes avoid rooms we've already
+        passed through on the way to a waypoint where they can. Without a
+        route, we give the rough heading from the rooms' map coordinates.
         """
+        from typeclasses.room_graph import ROOM_GRAPH
+
         loc = self.location
         if not loc:
             return
-        x_ori = loc.db.x_coord
-        y_ori = loc.db.y_coord
-        x_dest = room.db.x_coord
-        y_dest = room.db.y_coord
-        check_exits = []
-        try:
-            x = x_dest - x_ori
-            y = y_dest - y_ori
-            dest = ""
-            if y > 0:
-                dest += "north"
-            if y < 0:
-                dest += "south"
-            check_exits.append(dest)
-            if x > 0:
-                dest += "east"
-                check_exits.append("east")
-            if x < 0:
-                dest += "west"
-                check_exits.append("west")
-            if abs(x) > abs(y):
-                check_exits.reverse()
-            # inserts the NE/SE/SW/NW direction at 0 to be highest priority
-            check_exits.insert(0, dest)
-            for dirname in check_exits:
-                if loc.locations_set.filter(db_key__iexact=dirname).exclude(
-                    db_destination__in=self.ndb.traversed or []
-                ):
-                    return "{c" + dirname + "{n"
-            dest = (
-                "{c"
-                + dest
-                + "{n roughly. Please use '{w@map{n' to determine an exact route"
+        headings = self.get_headings(loc, room)
+        prefer = headings or []
+        ROOM_GRAPH.sync_room(loc)
+        traversed = set(self.ndb.traversed or []) - {room.id}
+        route = ROOM_GRAPH.find_path(loc.id, room.id, avoid=traversed, prefer=prefer)
+        if route is None and traversed:
+            route = ROOM_GRAPH.find_path(loc.id, room.id, prefer=prefer)
+        if route is None:
+            # the only way there is through a locked door
+            route = ROOM_GRAPH.find_path(
+                loc.id, room.id, prefer=prefer, allow_locked=True
             )
-        except (AttributeError, TypeError, ValueError):
+        if route:
+            # sync_room has just checked the names of the exits in our room
+            return "{c" + ROOM_GRAPH.exits[route[0]].key + "{n"
+        if headings is None:
             print("Error in using directions for rooms: %s, %s" % (loc.id, room.id))
             print(
                 "origin is (%s,%s), destination is (%s, %s)"
-                % (x_ori, y_ori, x_dest, y_dest)
+                % (loc.db.x_coord, loc.db.y_coord, room.db.x_coord, room.db.y_coord)
             )
             self.msg("Rooms not properly set up for @directions. Logging error.")
             return
-        # try to find it through traversal
-        base_query = "db_destination_id"
-        exit_name = []
-        iterations = 0
-        # anything beyond 10 squares becomes extremely lengthy
-        max_iter = 5
-        exit_ids = [ob.id for ob in loc.exits]
-        q_add = ""
-        from django.db.models import Q
+        return (
+            "{c"
+            + "".join(headings[:1])
+            + "{n roughly. Please use '{w@map{n' to determine an exact route"
+        )
 
-        exclude_ob = Q()
+    @staticmethod
+    def get_headings(loc, room):
+        """
+        Gets the compass directions from one room towards another by their map
+        coordinates, best first: the combined heading (such as northeast),
+        then north/south and east/west in order of which is further.
 
-        def get_new_exclude_ob():
-            """Helper function to build Q() objects to exclude"""
-            base_exclude_query = "db_tags__db_key"
-            other_exclude_query = {q_add + "db_destination_id": loc.id}
-            traversed_query = {
-                q_add + "db_destination_id__in": self.ndb.traversed or []
-            }
-            exclude_query = q_add + base_exclude_query
-            exclude_dict = {exclude_query: "secret"}
-            return Q(**exclude_dict) | Q(**other_exclude_query) | Q(**traversed_query)
-
-        while not exit_name and iterations < max_iter:
-            q_add = "db_destination__locations_set__" * iterations
-            query = q_add + base_query
-            filter_dict = {query: room.id}
-            exclude_ob |= get_new_exclude_ob()
-            q_ob = Q(Q(**filter_dict) & ~exclude_ob)
-            exit_name = (
-                loc.locations_set.distinct()
-                .filter(id__in=exit_ids)
-                .exclude(exclude_ob)
-                .filter(q_ob)
-            )
-            iterations += 1
-        if not exit_name:
-            return "{c" + dest + "{n"
-        return "{c" + str(exit_name[0]) + "{n"
+            Args:
+                loc: The room we're in
+                room: The room we want to reach
+
+            Returns:
+                A list of lowercase direction names, or None if the rooms'
+                coordinates aren't set.
+        """
+        try:
+            x = room.db.x_coord - loc.db.x_coord
+            y = room.db.y_coord - loc.db.y_coord
+        except (AttributeError, TypeError, ValueError):
+            return None
+        check_exits = []
+        dest = ""
+        if y > 0:
+            dest += "north"
+        if y < 0:
+            dest += "south"
+        check_exits.append(dest)
+        if x > 0:
+            dest += "east"
+            check_exits.append("east")
+        if x < 0:
+            dest += "west"
+            check_exits.append("west")
+        if abs(x) > abs(y):
+            check_exits.reverse()
+        # inserts the NE/SE/SW/NW direction at 0 to be highest priority
+        check_exits.insert(0, dest)
+        return [ob for ob in check_exits if ob]
 
     def at_pre_puppet(self, account, session=None, **kwargs):
         """
@@ -857,6 +857,7 @@ class Character(
         """
 
         super(Character, self).at_post_puppet()
+        PRESENCE.add_character(self)
         try:
             self.messages.messenger_notification(2, force=True)
         except (AttributeError, ValueError, TypeError):
@@ -883,6 +884,7 @@ class Character(
         :type session: Session
         """
         if not self.sessions.count():
+            COUNTERS.flush_object(self)
             # only remove this char from grid if no sessions control it anymore.
             if self.location:
 
@@ -894,6 +896,7 @@ class Character(
 
                 self.location.for_contents(message, exclude=[self], from_obj=self)
                 self.leave_grid()
+            PRESENCE.remove_character(self)
             place = self.sitting_at_place
             if place:
                 place.leave(self)
@@ -947,15 +950,21 @@ class Character(
     @property
     def posecount(self):
         try:
-            return self.roster.pose_count
+            return COUNTERS.get_field(self.roster, "pose_count")
         except AttributeError:
             return 0
 
     @posecount.setter
     def posecount(self, val):
         try:
-            self.roster.pose_count = val
-            self.roster.save()
+            COUNTERS.set_field(self.roster, "pose_count", val)
+        except AttributeError:
+            pass
+
+    def add_pose(self):
+        """Counts a pose towards our activity, saved with others in batches"""
+        try:
+            COUNTERS.add_to_field(self.roster, "pose_count")
         except AttributeError:
             pass
 
@@ -1262,7 +1271,7 @@ class Character(
             player = self.player_ob
         if not player:
             return False
-        if not player.db.hide_from_watch:
+        if not PRESENCE.is_hidden(player):
             return True
         if caller.check_permstring("builders"):
             return True
@@ -0,0 +1,85 @@
+"""
+How messages are shown to whoever receives them. A pose in a room is sent
+to everyone there with MsgMixins.msg, which used to read each recipient's
+pose break and color settings, check whether they were staff and what
+languages they knew, look up their account's tags for newlines and ASCII
+art, and build the regexes for coloring their name in quotes, for every
+message they were sent.
+
+DeliveryProfile holds all of that for a recipient, read once and kept in
+their ndb until one of those settings changes, when the command or handler
+changing it discards the profile with invalidate_delivery_profile. Profiles
+are also read again after PROFILE_LIFETIME, since permissions can change
+in ways that don't tell us, and when an object's key changes.
+"""
+from datetime import datetime, timedelta
+import re
+
+# how long a profile is used before its settings are read again
+PROFILE_LIFETIME = timedelta(minutes=10)
+
+
+class DeliveryProfile(object):
+    """A recipient's settings for how messages are shown to them"""
+
+    __slots__ = (
+        "key",
+        "built",
+        "posebreak",
+        "name_color",
+        "colored_name",
+        "name_mark",
+        "quote_sub",
+        "name_quote_sub",
+        "namex",
+        "is_builder",
+        "languages",
+        "player_ob",
+        "msg_sep",
+        "no_ascii",
+    )
+
+    def __init__(self, obj):
+        self.key = key = obj.key
+        self.built = datetime.now()
+        self.posebreak = bool(obj.db.posebreak)
+        # our name and the text inside quotes are colored in poses
+        self.name_color = obj.db.name_color
+        self.colored_name = None
+        if self.name_color:
+            self.colored_name = self.name_color + key + "{n"
+        self.name_mark = "%s{n" % key
+        quote_color = obj.db.pose_quote_color
+        self.quote_sub = self.name_quote_sub = self.namex = None
+        if quote_color:
+            self.quote_sub = r'%s"\1"{n' % quote_color
+            self.name_quote_sub = r'"\1%s%s\2"' % (key, quote_color)
+            # regex that contains our name inside quotes
+            self.namex = re.compile(r'"(.*?)%s{n(.*?)"' % key)
+        self.is_builder = obj.check_permstring("builders")
+        try:
+            self.languages = set(obj.languages.known_languages)
+        except AttributeError:
+            self.languages = None
+        # settings for messages are tags on our account
+        self.player_ob = getattr(obj, "player_ob", None) or obj
+        self.msg_sep = bool(self.player_ob.tags.get("newline_on_messages"))
+        self.no_ascii = bool(self.player_ob.tags.get("no_ascii"))
+
+    def is_current(self, obj):
+        """Whether the profile still holds for obj"""
+        return self.key == obj.key and datetime.now() - self.built < PROFILE_LIFETIME
+
+    def understands(self, lang):
+        """Whether we can read a message in a language"""
+        if self.is_builder:
+            return True
+        return self.languages is None or lang.lower() in self.languages
+
+
+def get_delivery_profile(obj):
+    """Gets the DeliveryProfile for obj, reading it again if it's stale"""
+    profile = obj.ndb.delivery_profile
+    if profile is None or not profile.is_current(obj):
+        profile = obj.ndb.delivery_profile = DeliveryProfile(obj)
+    return profile
@@ -12,6 +12,7 @@ from evennia.commands import command, cmdset
 from world.exploration.models import ShardhavenLayoutExit, ShardhavenObstacle, Monster
 from server.utils.arx_utils import commafy, a_or_an
 from commands.mixins import RewardRPToolUseMixin
+from typeclasses.room_graph import ROOM_GRAPH
 
 
 class Exit(LockMixins, ObjectMixins, DefaultExit):
@@ -332,7 +333,32 @@ class Exit(LockMixins, ObjectMixins, DefaultExit):
         reverse = self.reverse_exit
         if reverse:
             reverse.destination = new_room
+            ROOM_GRAPH.update_exit(reverse)
         self.location = new_room
+        ROOM_GRAPH.update_exit(self)
+
+    def at_object_creation(self):
+        """Adds the exit to the room graph once it's been dug or opened"""
+        super(Exit, self).at_object_creation()
+        ROOM_GRAPH.update_exit(self)
+
+    def at_after_move(self, source_location, **kwargs):
+        """Updates the room graph when an exit is moved"""
+        super(Exit, self).at_after_move(source_location, **kwargs)
+        ROOM_GRAPH.update_exit(self)
+
+    def at_object_delete(self):
+        """Removes the exit from the room graph"""
+        ROOM_GRAPH.remove_exit(self.id)
+        return super(Exit, self).at_object_delete()
+
+    def softdelete(self):
+        super(Exit, self).softdelete()
+        ROOM_GRAPH.remove_exit(self.id)
+
+    def undelete(self, move=True):
+        super(Exit, self).undelete(move=move)
+        ROOM_GRAPH.update_exit(self)
 
     def lock_exit(self, caller=None):
         """
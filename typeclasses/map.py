@@ -2,10 +2,12 @@
 Maps.
 """
 from typeclasses.objects import Object
+from typeclasses.room_graph import ROOM_GRAPH
 
 _CALLER_ICON = "{gXX{n"
 _BLANK_SQUARE = "  "
 _DEST_ICON = "{rXX{n"
+_ROUTE_ICON = "{y**{n"
 
 
 class Map(Object):
@@ -28,25 +30,65 @@ class Map(Object):
         self.locks.add("get:perm(Builders);delete:false()")
         self.at_init()
 
-    def get_icon(self, origin_room, x, y, destination=None):
-        room = self.db.rooms.get((x, y), None)
+    def get_icon(self, origin_room, x, y, destination=None, rooms=None, route=None):
+        """
+        Gets the icon for a square of the map.
+
+            Args:
+                origin_room: The room of whoever's looking at the map
+                x (int): The x coordinate of the square
+                y (int): The y coordinate of the square
+                destination: Optional room they're heading to
+                rooms (dict): Our rooms by coordinates, if already fetched
+                route (set): Coordinates of squares on the way to destination
+        """
+        if rooms is None:
+            rooms = self.db.rooms
+        room = rooms.get((x, y), None)
         if not room:
             return _BLANK_SQUARE
         if room == origin_room:
             return _CALLER_ICON
         if destination and destination.db.x_coord == x and destination.db.y_coord == y:
             return _DEST_ICON
+        if route and (x, y) in route:
+            return _ROUTE_ICON
         return room.db.map_icon or _BLANK_SQUARE
 
+    def get_route_squares(self, origin_room, destination):
+        """
+        Gets the coordinates of the squares of this map that the shortest
+        route from one room to another passes through.
+        """
+        if not origin_room or not destination:
+            return set()
+        ROOM_GRAPH.sync_room(origin_room)
+        route = ROOM_GRAPH.find_path(origin_room.id, destination.id)
+        if route is None:
+            route = ROOM_GRAPH.find_path(
+                origin_room.id, destination.id, allow_locked=True
+            )
+        if not route:
+            return set()
+        squares = set()
+        for room_id in ROOM_GRAPH.get_route_rooms(route):
+            coords = ROOM_GRAPH.coords.get(room_id)
+            if coords:
+                squares.add(coords)
+        return squares
+
     def draw_map(self, origin_room, destination=None):
         map = ""
+        rooms = self.db.rooms or {}
+        route = self.get_route_squares(origin_room, destination)
+        max_x, min_x = self.db.max_x, self.db.min_x
         for y in range(self.db.max_y, self.db.min_y - 1, -1):
             map += "\n"
-            for x in range(self.db.min_x, self.db.max_x + 1):
-                if x != self.db.min_x:
+            for x in range(min_x, max_x + 1):
+                if x != min_x:
                     map += "-"
                 # cap size of icon at 2 characters
-                icon = self.get_icon(origin_room, x, y, destination)
+                icon = self.get_icon(origin_room, x, y, destination, rooms, route)
                 # if icon is only one character, add a space
                 if len(icon) < 2:
                     icon += " "
@@ -66,3 +108,4 @@ class Map(Object):
             self.db.min_y = y
         self.db.rooms[(x, y)] = room
         room.db.map = self
+        ROOM_GRAPH.set_coords(room.id, x, y)
@@ -0,0 +1,63 @@
+"""
+The log of poses and messages an account receives, kept so that they can
+report another player to staff with what was said. The log used to be a list
+that grew for the whole session, and every message was checked against all
+of it to skip duplicates, so each line in a busy room took longer than the
+last.
+
+MessageLog keeps the most recent settings.MESSAGE_LOG_LENGTH messages in a
+deque, with a set of those messages to skip duplicates without searching,
+and drops the oldest message once it's full. On disconnect its messages are
+saved as the account's previous log, which holds no more than the cap.
+"""
+from collections import deque
+
+from django.conf import settings
+
+
+class MessageLog(object):
+    """The most recent messages received, without duplicates, oldest first"""
+
+    def __init__(self, entries=(), maxlen=None):
+        self.maxlen = maxlen or settings.MESSAGE_LOG_LENGTH
+        self.entries = deque(maxlen=self.maxlen)
+        self.seen = set()
+        for from_obj, text in entries:
+            self.add(from_obj, text)
+
+    def add(self, from_obj, text):
+        """
+        Logs a message if we don't have it already.
+
+            Args:
+                from_obj: Who sent the message
+                text (str): The message
+
+            Returns:
+                True if it was added, False if it's a duplicate.
+        """
+        entry = (from_obj, text)
+        if entry in self.seen:
+            return False
+        if len(self.entries) == self.maxlen:
+            self.seen.discard(self.entries.popleft())
+        self.entries.append(entry)
+        self.seen.add(entry)
+        return True
+
+    def clear(self):
+        self.entries.clear()
+        self.seen.clear()
+
+    def to_list(self):
+        """The messages as a list of (sender, text) tuples, for saving"""
+        return list(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, entry):
+        return entry in self.seen
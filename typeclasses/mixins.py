@@ -5,12 +5,14 @@ from datetime import datetime
 from evennia.utils.utils import lazy_property
 from evennia.utils.ansi import parse_ansi
 
+from typeclasses.delivery import get_delivery_profile
 from typeclasses.exceptions import InvalidTargetError
+from typeclasses.room_graph import ROOM_GRAPH
 from world.conditions.triggerhandler import TriggerHandler
 from world.crafting.craft_data_handlers import CraftDataHandler
 from world.crafting.junk_handlers import RefundMaterialsJunkHandler
-from world.templates.models import Template
 from world.templates.mixins import TemplateMixins
+from world.templates.renderer import TEMPLATE_RENDERER
 
 
 class DescMixins(object):
@@ -75,7 +77,7 @@ class DescMixins(object):
         if self.db.general_desc:
             # general desc is our fallback
             self.db.general_desc = val
-        self.ndb.cached_template_desc = None
+        self.at_desc_change()
 
     def __temp_desc_get(self):
         """
@@ -92,7 +94,7 @@ class DescMixins(object):
             self.db.raw_desc = self.db.desc
         if not self.db.general_desc:
             self.db.desc = self.db.desc
-        self.ndb.cached_template_desc = None
+        self.at_desc_change()
         self.db.desc = val
 
     def __temp_desc_del(self):
@@ -105,7 +107,7 @@ class DescMixins(object):
         if not self.db.general_desc:
             self.db.general_desc = self.db.desc
         self.db.desc = ""
-        self.ndb.cached_template_desc = None
+        self.at_desc_change()
 
     temp_desc = property(__temp_desc_get, __temp_desc_set, __temp_desc_del)
 
@@ -122,10 +124,14 @@ class DescMixins(object):
         """
         self.db.general_desc = val
         self.db.raw_desc = val
-        self.ndb.cached_template_desc = None
+        self.at_desc_change()
 
     perm_desc = property(__perm_desc_get, __perm_desc_set)
 
+    def at_desc_change(self):
+        """Called when any of our descs are set, to discard what was built from them"""
+        self.ndb.cached_template_desc = None
+
     @property
     def used_capacity(self):
         """
@@ -563,15 +569,16 @@ class AppearanceMixins(BaseObjectMixins, TemplateMixins):
                 string += "\n\n%s{n\n" % desc
             else:
                 string += "\n%s{n" % desc
+        elif strip_ansi:
+            # rendered for this looker alone, since the cache has our colors
+            string += "\n%s{n" % TEMPLATE_RENDERER.render(
+                self, desc or "", persist=False
+            )
         else:  # for crafted objects, respect formatting
-            string += "\n%s{n" % desc
-
             if self.ndb.cached_template_desc:
                 string = self.ndb.cached_template_desc
             else:
-                templates = Template.objects.in_list(self.find_template_ids(string))
-                if templates.exists():
-                    string = self.replace_template_values(string, templates)
+                string += "\n%s{n" % TEMPLATE_RENDERER.render(self, desc or "")
                 self.ndb.cached_template_desc = string
 
         if contents and show_contents:
@@ -765,12 +772,6 @@ RE_COLOR = re.compile(r'"(.*?)"')
 
 # noinspection PyUnresolvedReferences
 class MsgMixins(object):
-    @lazy_property
-    def namex(self):
-        # regex that contains our name inside quotes
-        name = self.key
-        return re.compile(r'"(.*?)%s{n(.*?)"' % name)
-
     def msg(self, text=None, from_obj=None, session=None, options=None, **kwargs):
         """
         :type self: ObjectDB
@@ -805,36 +806,26 @@ class MsgMixins(object):
                 import traceback
 
                 traceback.print_exc()
+        profile = get_delivery_profile(self)
         lang = options.get("language", None)
         msg_content = options.get("msg_content", None)
-        if lang and msg_content:
-            try:
-                if (
-                    not self.check_permstring("builders")
-                    and lang.lower() not in self.languages.known_languages
-                ):
-                    text = text.replace(
-                        msg_content,
-                        "<Something in a language that you don't understand>.",
-                    )
-            except AttributeError:
-                pass
+        if lang and msg_content and not profile.understands(lang):
+            text = text.replace(
+                msg_content,
+                "<Something in a language that you don't understand>.",
+            )
         if options.get("is_pose", False):
-            if self.db.posebreak:
+            if profile.posebreak:
                 text = "\n" + text
-            name_color = self.db.name_color
-            if name_color:
-                text = text.replace(self.key, name_color + self.key + "{n")
-            quote_color = self.db.pose_quote_color
+            if profile.colored_name:
+                text = text.replace(self.key, profile.colored_name)
             # colorize people's quotes with the given text
-            if quote_color:
-                text = RE_COLOR.sub(r'%s"\1"{n' % quote_color, text)
-                if name_color:
+            if profile.quote_sub:
+                text = RE_COLOR.sub(profile.quote_sub, text)
+                if profile.colored_name:
                     # counts the instances of name replacement inside quotes and recolorizes
-                    for _ in range(0, text.count("%s{n" % self.key)):
-                        text = self.namex.sub(
-                            r'"\1%s%s\2"' % (self.key, quote_color), text
-                        )
+                    for _ in range(0, text.count(profile.name_mark)):
+                        text = profile.namex.sub(profile.name_quote_sub, text)
             if self.ndb.pose_history is None:
                 self.ndb.pose_history = []
             if from_obj == self:
@@ -857,23 +848,11 @@ class MsgMixins(object):
                 text = text[1:]
             text = "{w<" + self.magic_word + "> |n" + text
             if options.get("is_pose"):
-                if self.db.posebreak:
+                if profile.posebreak:
                     text = "\n" + text
-        try:
-            if self.char_ob:
-                msg_sep = self.tags.get("newline_on_messages")
-                player_ob = self
-            else:
-                msg_sep = self.player_ob.tags.get("newline_on_messages")
-                player_ob = self.player_ob
-        except AttributeError:
-            msg_sep = None
-            player_ob = self
-        try:
-            if msg_sep:
-                text += "\n"
-        except (TypeError, ValueError):
-            pass
+        player_ob = profile.player_ob
+        if profile.msg_sep:
+            text += "\n"
         try:
             if from_obj and (
                 options.get("is_pose", False) or options.get("log_msg", False)
@@ -890,13 +869,24 @@ class MsgMixins(object):
                     player_ob.log_message(from_obj, text)
         except AttributeError:
             pass
-        text = self.strip_ascii_from_tags(text)
+        text = self.strip_ascii_from_tags(text, profile)
         super(MsgMixins, self).msg(text, from_obj, session, options, **kwargs)
 
-    def strip_ascii_from_tags(self, text):
+    def invalidate_delivery_profile(self):
+        """
+        Discards the settings we're sent messages with, for us and our
+        account or character, after one of them has changed.
+        """
+        for obj in (self, self.player_ob, self.char_ob):
+            if obj:
+                obj.ndb.delivery_profile = None
+
+    def strip_ascii_from_tags(self, text, profile=None):
         """Removes ascii within tags for formatting."""
-        player_ob = self.player_ob or self
-        if "no_ascii" in player_ob.tags.all():
+        if "ascii>" not in text.lower():
+            return text
+        profile = profile or get_delivery_profile(self)
+        if profile.no_ascii:
             text = RE_ASCII.sub("", text)
             text = RE_ALT_ASCII.sub(r"\1", text)
         else:
@@ -944,6 +934,8 @@ class LockMixins(object):
                 caller.msg("%s is already locked." % self)
             return
         self.item_data.is_locked = True
+        if self.destination:
+            ROOM_GRAPH.set_locked(self.id, True)
         msg = "%s is now locked." % self.key
         if caller:
             caller.msg(msg)
@@ -976,6 +968,8 @@ class LockMixins(object):
                 caller.msg("%s is already unlocked." % self)
             return
         self.item_data.is_locked = False
+        if self.destination:
+            ROOM_GRAPH.set_locked(self.id, False)
         msg = "%s is now unlocked." % self.key
         if caller:
             caller.msg(msg)
@@ -0,0 +1,181 @@
+"""
+Who's online and where. who, +where and +hangouts used to look everyone up
+each time they were run: +where queried every active character to find the
+rooms they were in, then checked each character's visibility and their
+account's settings one by one, and who deduplicated accounts by scanning a
+list of those it had already shown for every session.
+
+PresenceIndex keeps the characters being puppeted by the room they're in,
+and the flags that who and +where show for each online account: AFK, looking
+for RP, hidden from watch and staff. Logging in and out, puppeting, moving
+and changing those settings update it, so the commands read it without
+queries. Fealty is read from the character's sheet each time, since it can
+change while they're online. Anything that moves a character without
+its at_after_move hook is caught since we check where characters are
+before listing rooms or the characters in them. PRESENCE is the shared
+instance, which is built from the connected sessions and the characters with
+an account puppeting them the first time it's used.
+"""
+from collections import defaultdict
+
+
+class AccountPresence(object):
+    """The flags of an online account"""
+
+    __slots__ = ("account", "afk", "lrp", "hidden", "staff")
+
+    def __init__(self, account):
+        self.account = account
+        self.afk = bool(account.db.afk)
+        self.lrp = bool(account.db.lookingforrp)
+        self.hidden = bool(account.db.hide_from_watch)
+        self.staff = bool(account.is_staff)
+
+    @property
+    def fealty(self):
+        """The fealty of the account's character, or '---' if they have none"""
+        char = self.account.char_ob
+        if char and char.item_data.fealty:
+            return str(char.item_data.fealty)
+        return "---"
+
+
+class PresenceIndex(object):
+    """Online accounts and the rooms of puppeted characters"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Empties the index, which will be rebuilt from sessions on its next use"""
+        self.built = False
+        # account ID to AccountPresence
+        self.accounts = {}
+        # character ID to the puppeted character
+        self.characters = {}
+        # room ID to the IDs of the puppeted characters in it
+        self.rooms = defaultdict(set)
+        # character ID to the ID of the room we have them in
+        self.locations = {}
+
+    def ensure_built(self):
+        """Builds the index from the connected sessions if we haven't yet"""
+        if not self.built:
+            self.rebuild()
+
+    def rebuild(self):
+        """Records every logged in account and puppeted character"""
+        from evennia.objects.models import ObjectDB
+        from evennia.server.sessionhandler import SESSIONS
+
+        self.clear()
+        self.built = True
+        for session in SESSIONS.get_sessions():
+            account = session.get_account() if session.logged_in else None
+            if account and account.id not in self.accounts:
+                self.update_account(account)
+        for character in ObjectDB.objects.filter(
+            db_account__isnull=False, db_location__isnull=False
+        ):
+            if getattr(character, "is_character", False):
+                self.add_character(character)
+
+    # ---- keeping the index up to date -----------------------------------
+
+    def update_account(self, account):
+        """Records an account's flags after they log in or change a setting"""
+        if self.built and account.id:
+            self.accounts[account.id] = AccountPresence(account)
+
+    def remove_account(self, account):
+        """Removes an account that's logged out"""
+        self.accounts.pop(account.id, None)
+
+    def add_character(self, character):
+        """Records a character being puppeted"""
+        if not self.built:
+            return
+        self.characters[character.id] = character
+        self._place(character)
+        account = character.account
+        if account and account.sessions.count():
+            self.update_account(account)
+
+    def move_character(self, character):
+        """Records a puppeted character moving"""
+        if character.id in self.characters:
+            self._place(character)
+
+    def remove_character(self, character):
+        """Removes a character who's no longer puppeted"""
+        self.characters.pop(character.id, None)
+        self._unplace(character.id)
+
+    def _place(self, character):
+        self._unplace(character.id)
+        if character.db_location_id:
+            self.rooms[character.db_location_id].add(character.id)
+            self.locations[character.id] = character.db_location_id
+
+    def _unplace(self, character_id):
+        room_id = self.locations.pop(character_id, None)
+        if room_id in self.rooms:
+            self.rooms[room_id].discard(character_id)
+            if not self.rooms[room_id]:
+                del self.rooms[room_id]
+
+    # ---- reading it -----------------------------------------------------
+
+    def get_account(self, account):
+        """Gets an account's AccountPresence, reading their flags if they're offline"""
+        self.ensure_built()
+        presence = self.accounts.get(account.id)
+        if presence:
+            return presence
+        presence = AccountPresence(account)
+        if account.sessions.count():
+            self.accounts[account.id] = presence
+        return presence
+
+    def get_online_accounts(self):
+        """Gets the AccountPresence of everyone online, ordered by name"""
+        self.ensure_built()
+        return sorted(self.accounts.values(), key=lambda ob: ob.account.key.lower())
+
+    def get_characters(self, room_id):
+        """Gets the puppeted characters in a room, ordered by name"""
+        self.ensure_built()
+        characters = [
+            self.characters[ob]
+            for ob in self.rooms.get(room_id, ())
+            if self.characters[ob].db_location_id == room_id
+            and self.characters[ob].account
+        ]
+        return sorted(characters, key=lambda ob: ob.name)
+
+    def get_visible_characters(self, room_id, looker):
+        """Gets the puppeted characters in a room that looker can see"""
+        return [ob for ob in self.get_characters(room_id) if ob.access(looker, "view")]
+
+    def get_occupied_rooms(self):
+        """Gets the rooms with puppeted characters in them, ordered by key"""
+        self.ensure_built()
+        rooms = {}
+        for character in list(self.characters.values()):
+            # catch anyone moved without their at_after_move hook being called
+            if self.locations.get(character.id) != character.db_location_id:
+                self._place(character)
+            if character.location:
+                rooms[character.db_location_id] = character.location
+        return sorted(rooms.values(), key=lambda ob: ob.db_key)
+
+    def is_hidden(self, account):
+        """Whether an account is hidden from watch"""
+        return self.get_account(account).hidden
+
+    def is_lrp(self, account):
+        """Whether an account is looking for RP"""
+        return self.get_account(account).lrp
+
+
+PRESENCE = PresenceIndex()
@@ -0,0 +1,284 @@
+"""
+A graph of the grid's rooms and exits for finding routes. @directions and
+waypoints used to look for a route with queries chaining
+db_destination__locations_set__ up to five exits deep, which was very slow
+and gave up on anything further away.
+
+RoomGraph keeps every exit as a directed edge between rooms, along with
+whether it's secret or locked, and the x/y coordinates that rooms are given
+for maps, so routes are found with a breadth-first search in memory. Exits
+update the graph as they're created, moved, relocated, locked or deleted, as
+do rooms when they're deleted or added to a map, and adding or removing the
+'secret' tag of an exit updates it through the tags' m2m signal. Routes
+don't use secret exits, and only use locked ones when there's no other way.
+In case of changes that happen outside of our hooks, it's rebuilt once a
+day, and the exits of the room a route starts from are checked every time.
+ROOM_GRAPH is the shared instance.
+"""
+from collections import defaultdict, deque
+
+from django.db.models import signals
+from evennia.objects.models import ObjectDB
+from evennia.typeclasses.tags import Tag
+
+from server.utils.periodic import PeriodicallyRebuilt
+
+
+class ExitEdge(object):
+    """What the graph knows about a single exit"""
+
+    __slots__ = ("id", "key", "location_id", "destination_id", "secret", "locked")
+
+    def __init__(
+        self, exit_id, key, location_id, destination_id, secret=False, locked=False
+    ):
+        self.id = exit_id
+        self.key = key
+        self.location_id = location_id
+        self.destination_id = destination_id
+        self.secret = secret
+        self.locked = locked
+
+
+class RoomGraph(PeriodicallyRebuilt):
+    """Exits between rooms, by ID, with room coordinates"""
+
+    def clear(self):
+        """Empties the graph, which will be rebuilt on the next lookup"""
+        super().clear()
+        self.exits = {}
+        # room ID to the IDs of the exits in it
+        self.exits_from = defaultdict(set)
+        # room ID to its (x, y) coordinates on a map
+        self.coords = {}
+
+    def rebuild(self):
+        """Loads every exit, its flags, and the coordinates of every room"""
+        from evennia.typeclasses.attributes import Attribute
+        from evennia_extensions.object_extensions.models import Dimensions
+
+        self.clear()
+        exits = ObjectDB.objects.filter(
+            db_destination__isnull=False, db_location__isnull=False
+        )
+        secret = set(
+            exits.filter(db_tags__db_key="secret").values_list("id", flat=True)
+        )
+        locked = set(
+            Dimensions.objects.filter(
+                is_locked=True, objectdb__db_destination__isnull=False
+            ).values_list("objectdb_id", flat=True)
+        )
+        for exit_id, key, location_id, destination_id in exits.values_list(
+            "id", "db_key", "db_location_id", "db_destination_id"
+        ):
+            self._add_edge(
+                ExitEdge(
+                    exit_id,
+                    key,
+                    location_id,
+                    destination_id,
+                    exit_id in secret,
+                    exit_id in locked,
+                )
+            )
+        coords = defaultdict(dict)
+        for room_id, name, value in Attribute.objects.filter(
+            db_key__in=("x_coord", "y_coord"), objectdb__isnull=False
+        ).values_list("objectdb__id", "db_key", "db_value"):
+            coords[room_id][name] = value
+        for room_id, values in coords.items():
+            self.set_coords(room_id, values.get("x_coord"), values.get("y_coord"))
+        self.mark_built()
+
+    # ---- keeping the graph up to date -----------------------------------
+
+    def _add_edge(self, edge):
+        self.exits[edge.id] = edge
+        self.exits_from[edge.location_id].add(edge.id)
+
+    def update_exit(self, exit_obj, locked=None):
+        """
+        Adds an exit or updates where it is and where it leads, after it's
+        created, moved or relocated.
+
+            Args:
+                exit_obj: The Exit
+                locked (bool): Whether it's locked, or None to keep what we had
+        """
+        if not self.last_built:
+            return
+        old = self.remove_exit(exit_obj.id)
+        if not exit_obj.db_location_id or not exit_obj.db_destination_id:
+            return
+        if locked is None:
+            locked = old.locked if old else False
+        self._add_edge(
+            ExitEdge(
+                exit_obj.id,
+                exit_obj.db_key,
+                exit_obj.db_location_id,
+                exit_obj.db_destination_id,
+                bool(exit_obj.tags.get("secret")),
+                locked,
+            )
+        )
+
+    def remove_exit(self, exit_id):
+        """Removes a deleted exit, returning what we had for it"""
+        edge = self.exits.pop(exit_id, None)
+        if edge:
+            self.exits_from[edge.location_id].discard(exit_id)
+        return edge
+
+    def remove_room(self, room_id):
+        """Removes a deleted room and every exit into or out of it"""
+        for exit_id in list(self.exits_from.pop(room_id, set())):
+            self.remove_exit(exit_id)
+        entrances = [
+            edge.id for edge in self.exits.values() if edge.destination_id == room_id
+        ]
+        for exit_id in entrances:
+            self.remove_exit(exit_id)
+        self.coords.pop(room_id, None)
+
+    def set_locked(self, exit_id, locked=True):
+        """Records an exit being locked or unlocked"""
+        edge = self.exits.get(exit_id)
+        if edge:
+            edge.locked = locked
+
+    def set_secret(self, exit_id, secret=True):
+        """Records an exit being tagged secret or having the tag removed"""
+        edge = self.exits.get(exit_id)
+        if edge:
+            edge.secret = secret
+
+    def set_coords(self, room_id, x, y):
+        """Records the coordinates of a room on a map"""
+        try:
+            self.coords[room_id] = (int(x), int(y))
+        except (TypeError, ValueError):
+            self.coords.pop(room_id, None)
+
+    def sync_room(self, room):
+        """Checks the exits in a room against the graph, fixing any that differ"""
+        self.ensure_built()
+        current = set()
+        for exit_obj in room.exits:
+            current.add(exit_obj.id)
+            edge = self.exits.get(exit_obj.id)
+            if (
+                not edge
+                or edge.key != exit_obj.db_key
+                or edge.destination_id != exit_obj.db_destination_id
+                or edge.location_id != exit_obj.db_location_id
+                or edge.secret != bool(exit_obj.tags.get("secret"))
+                or edge.locked != bool(exit_obj.item_data.is_locked)
+            ):
+                self.update_exit(exit_obj, locked=bool(exit_obj.item_data.is_locked))
+        for exit_id in self.exits_from.get(room.id, set()) - current:
+            self.remove_exit(exit_id)
+
+    # ---- finding routes -------------------------------------------------
+
+    def find_path(
+        self,
+        origin_id,
+        destination_id,
+        avoid=(),
+        prefer=(),
+        allow_secret=False,
+        allow_locked=False,
+    ):
+        """
+        Finds the shortest route between two rooms with a breadth-first search.
+
+            Args:
+                origin_id (int): The ID of the room we start in
+                destination_id (int): The ID of the room we want to reach
+                avoid: IDs of rooms the route mustn't pass through
+                prefer: Exit names, lowercase, to try first out of the origin
+                    when there's more than one shortest route
+                allow_secret (bool): Whether the route may use secret exits
+                allow_locked (bool): Whether the route may use locked exits
+
+            Returns:
+                A list of exit IDs to take in order, which is empty if we're
+                already there, or None if there's no route.
+        """
+        self.ensure_built()
+        if origin_id == destination_id:
+            return []
+        ranks = {name: rank for rank, name in enumerate(prefer)}
+        first_exits = sorted(
+            self.exits_from.get(origin_id, set()),
+            key=lambda ob: (ranks.get(self.exits[ob].key.lower(), len(ranks)), ob),
+        )
+        # room ID to the exit we reached it through
+        came_by = {origin_id: None}
+        blocked = set(avoid)
+        queue = deque([(origin_id, first_exits)])
+        while queue:
+            room_id, exit_ids = queue.popleft()
+            for exit_id in exit_ids:
+                edge = self.exits[exit_id]
+                next_id = edge.destination_id
+                if next_id in came_by or next_id in blocked:
+                    continue
+                if edge.secret and not allow_secret:
+                    continue
+                if edge.locked and not allow_locked:
+                    continue
+                came_by[next_id] = exit_id
+                if next_id == destination_id:
+                    return self._get_route(came_by, destination_id)
+                queue.append((next_id, sorted(self.exits_from.get(next_id, set()))))
+        return None
+
+    def _get_route(self, came_by, destination_id):
+        route = []
+        room_id = destination_id
+        while came_by[room_id] is not None:
+            exit_id = came_by[room_id]
+            route.append(exit_id)
+            room_id = self.exits[exit_id].location_id
+        route.reverse()
+        return route
+
+    def get_route_rooms(self, route):
+        """Gets the IDs of the rooms a route passes through, ending at its destination"""
+        return [self.exits[exit_id].destination_id for exit_id in route]
+
+
+ROOM_GRAPH = RoomGraph()
+
+
+def update_secret_exits(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Updates exits in the graph when their 'secret' tag is added or removed,
+    including the tags an exit is created with, which are added after its
+    at_object_creation.
+    """
+    if reverse or action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if instance.id not in ROOM_GRAPH.exits:
+        return
+    if action == "post_clear":
+        ROOM_GRAPH.set_secret(instance.id, False)
+        return
+    is_secret_tag = Tag.objects.filter(
+        id__in=pk_set,
+        db_key="secret",
+        db_category__isnull=True,
+        db_tagtype__isnull=True,
+    ).exists()
+    if is_secret_tag:
+        ROOM_GRAPH.set_secret(instance.id, action == "post_add")
+
+
+signals.m2m_changed.connect(
+    update_secret_exits,
+    sender=ObjectDB.db_tags.through,
+    dispatch_uid="update_secret_exits",
+)
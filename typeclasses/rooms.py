@@ -78,6 +78,7 @@ from evennia.objects.models import ObjectDB
 from commands.base import ArxCommand
 from typeclasses.scripts import gametime
 from typeclasses.mixins import ObjectMixins
+from typeclasses.room_graph import ROOM_GRAPH
 from server.utils.arx_utils import list_to_string
 from world.magic.mixins import MagicMixins
 from world.msgs.messagehandler import MessageHandler
@@ -127,6 +128,11 @@ class ArxRoom(ObjectMixins, ExtendedRoom, MagicMixins):
         for entrance in self.entrances:
             entrance.undelete(move)
 
+    def at_object_delete(self):
+        """Removes the room and every exit into or out of it from the room graph"""
+        ROOM_GRAPH.remove_room(self.id)
+        return super(ArxRoom, self).at_object_delete()
+
     @lazy_property
     def messages(self):
         return MessageHandler(self)
@@ -379,9 +385,10 @@ class ArxRoom(ObjectMixins, ExtendedRoom, MagicMixins):
         # if we have an event at this location, log messages
         if eventid:
             from evennia.scripts.models import ScriptDB
+            from typeclasses.scripts.event_manager import get_event_manager
 
             try:
-                event_script = ScriptDB.objects.get(db_key="Event Manager")
+                event_script = get_event_manager()
                 ooc = options.get("ooc_note", False)
                 if gm_only or ooc:
                     event_script.add_gmnote(eventid, message)
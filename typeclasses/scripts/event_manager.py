@@ -1,6 +1,13 @@
 """
 Script to handle timing for events in the game.
+
+Every pose in a room with an event is logged through the Event Manager, so
+the script keeps what it needs for that in memory: the events being logged,
+who has attended them, and the lines waiting to be written. Log lines are
+buffered and written to their files in batches, either a few seconds after
+they arrive or when an event finishes or the server reloads or shuts down.
 """
+from collections import defaultdict
 
 from django.conf import settings
 from typeclasses.scripts.scripts import Script
@@ -13,15 +20,35 @@ from server.utils.arx_utils import time_from_now, time_now
 
 LOGPATH = settings.LOG_DIR + "/rpevents/"
 GMPATH = LOGPATH + "gm_logs/"
+# seconds we wait to batch up log lines before writing them
+LOG_FLUSH_DELAY = 5
+# number of buffered lines that will make us write immediately
+MAX_BUFFERED_LINES = 200
+
+_EVENT_MANAGER = None
+
+
+def get_event_manager():
+    """
+    Returns the Event Manager script, using the handle it registered when it
+    started rather than querying for it on every call.
+
+        Raises:
+            ScriptDB.DoesNotExist if the script hasn't been created.
+    """
+    global _EVENT_MANAGER
+    if _EVENT_MANAGER is None:
+        from evennia.scripts.models import ScriptDB
+
+        _EVENT_MANAGER = ScriptDB.objects.get(db_key="Event Manager")
+    return _EVENT_MANAGER
 
 
 def delayed_start(event_id):
     # noinspection PyBroadException
     try:
         event = RPEvent.objects.get(id=event_id)
-        from evennia.scripts.models import ScriptDB
-
-        script = ScriptDB.objects.get(db_key="Event Manager")
+        script = get_event_manager()
         if event.id in script.db.cancelled:
             script.db.cancelled.remove(event.id)
             return
@@ -53,6 +80,107 @@ class EventManager(Script):
         self.db.pending_start = {}
         self.db.cancelled = []
 
+    def at_start(self, **kwargs):
+        """Registers us as the Event Manager handle that everything logs through"""
+        global _EVENT_MANAGER
+        super(EventManager, self).at_start(**kwargs)
+        _EVENT_MANAGER = self
+
+    def at_stop(self):
+        """Writes anything still buffered and clears our handle"""
+        global _EVENT_MANAGER
+        self.save_pending_activity()
+        self.flush_logs()
+        super(EventManager, self).at_stop()
+        if _EVENT_MANAGER is self:
+            _EVENT_MANAGER = None
+
+    def at_server_reload(self):
+        """Writes anything still buffered before the reload"""
+        self.save_pending_activity()
+        self.flush_logs()
+
+    def at_server_shutdown(self):
+        """Writes anything still buffered before the shutdown"""
+        self.save_pending_activity()
+        self.flush_logs()
+
+    @property
+    def pending_logs(self):
+        """Dict of log file path to the lines waiting to be written to it"""
+        if self.ndb.pending_logs is None:
+            self.ndb.pending_logs = defaultdict(list)
+        return self.ndb.pending_logs
+
+    @property
+    def recent_activity(self):
+        """Set of IDs of events that have had a message since our last repeat"""
+        if self.ndb.recent_activity is None:
+            self.ndb.recent_activity = set()
+        return self.ndb.recent_activity
+
+    @property
+    def attendance(self):
+        """Dict of event ID to the set of IDs of dompcs who attended it"""
+        if self.ndb.attendance is None:
+            self.ndb.attendance = {}
+        return self.ndb.attendance
+
+    def get_event(self, eventid):
+        """Gets an event by ID, holding onto it for the next message"""
+        if self.ndb.events is None:
+            self.ndb.events = {}
+        if eventid not in self.ndb.events:
+            self.ndb.events[eventid] = RPEvent.objects.get(id=eventid)
+        return self.ndb.events[eventid]
+
+    def forget_event(self, eventid):
+        """Drops everything we were holding in memory for an event"""
+        if self.ndb.events:
+            self.ndb.events.pop(eventid, None)
+        self.attendance.pop(eventid, None)
+        self.recent_activity.discard(eventid)
+
+    def save_pending_activity(self):
+        """Resets the idle timers of events that have had messages since our last repeat"""
+        if not self.recent_activity:
+            return
+        idles = self.db.idle_events
+        for eventid in self.recent_activity:
+            if eventid in idles:
+                idles[eventid] = 0
+        self.recent_activity.clear()
+
+    def buffer_log(self, path, msg):
+        """Adds a line to be written to a log, scheduling a write if needed"""
+        pending = self.pending_logs
+        pending[path].append(msg)
+        if sum(len(lines) for lines in pending.values()) >= MAX_BUFFERED_LINES:
+            self.flush_logs()
+        elif not (self.ndb.flush_call and self.ndb.flush_call.active()):
+            self.ndb.flush_call = reactor.callLater(LOG_FLUSH_DELAY, self.flush_logs)
+
+    def flush_logs(self, paths=None):
+        """
+        Writes buffered lines to their log files, opening each file once.
+
+            Args:
+                paths: If given, only the logs for these paths are written.
+        """
+        pending = self.pending_logs
+        for path in list(paths or pending.keys()):
+            lines = pending.pop(path, None)
+            if not lines:
+                continue
+            # noinspection PyBroadException
+            try:
+                with open(path, "a+") as log:
+                    log.write("".join(lines))
+            except Exception:
+                traceback.print_exc()
+        if not pending and self.ndb.flush_call and self.ndb.flush_call.active():
+            self.ndb.flush_call.cancel()
+
     def at_repeat(self):
         """
         Called every 5 minutes to update the timers. If we find an upcoming event
@@ -60,9 +188,10 @@ class EventManager(Script):
         then another announcement if it's starting under 10 minutes. If under 5
         minutes, we schedule it to start.
         """
+        self.save_pending_activity()
         idles = self.db.idle_events
         actives = self.db.active_events
-        for eventid, counter in idles.items():
+        for eventid, counter in list(idles.items()):
             # if the event has been idle for an hour, close it down
             if counter >= 12:
                 # noinspection PyBroadException
@@ -209,6 +338,8 @@ class EventManager(Script):
             self.db.active_events.remove(event.id)
         if event.id in self.db.idle_events:
             del self.db.idle_events[event.id]
+        self.flush_logs([self.get_log_path(event.id), self.get_gmlog_path(event.id)])
+        self.forget_event(event.id)
         self.do_awards(event)
         # noinspection PyBroadException
         self.delete_event_post(event)
@@ -222,25 +353,26 @@ class EventManager(Script):
             new_location.start_event_logging(event)
 
     def add_msg(self, eventid, msg, sender=None):
-        # reset idle timer for event
-        self.db.idle_events[eventid] = 0
-        event = RPEvent.objects.get(id=eventid)
+        # reset idle timer for event on our next repeat
+        self.recent_activity.add(eventid)
+        event = self.get_event(eventid)
         msg = parse_ansi(msg, strip_ansi=True)
         msg = "\n" + msg + "\n"
-        with open(self.get_log_path(eventid), "a+") as log:
-            log.write(msg)
+        self.buffer_log(self.get_log_path(eventid), msg)
         try:
             dompc = sender.player.Dominion
-            if dompc not in event.attended:
-                event.record_attendance(dompc)
         except AttributeError:
-            pass
+            return
+        if eventid not in self.attendance:
+            self.attendance[eventid] = set(ob.id for ob in event.attended)
+        if dompc and dompc.id not in self.attendance[eventid]:
+            event.record_attendance(dompc)
+            self.attendance[eventid].add(dompc.id)
 
     def add_gmnote(self, eventid, msg):
         msg = parse_ansi(msg, strip_ansi=True)
         msg = "\n" + msg + "\n"
-        with open(self.get_gmlog_path(eventid), "a+") as log:
-            log.write(msg)
+        self.buffer_log(self.get_gmlog_path(eventid), msg)
 
     def add_gemit(self, msg):
         msg = parse_ansi(msg, strip_ansi=True)
@@ -277,6 +409,7 @@ class EventManager(Script):
             self.db.cancelled.append(event.id)
             del self.db.pending_start[event.id]
         self.delete_event_post(event)
+        self.forget_event(event.id)
         event.delete()
 
     def reschedule_event(self, event):
@@ -68,6 +68,7 @@ class GameTime(Script):
         times = list(self.intervals)
         times.append(tdict)
         self.attributes.add("intervals", times)
+        CLOCK.invalidate()
 
         from evennia.utils import logger
 
@@ -171,6 +172,7 @@ class GameTime(Script):
                 runtime_marks = self.runtime_marks
                 runtime_marks.append({"runtime": self.runtime, "realtime": time.time()})
                 self.attributes.add("runtime_marks", runtime_marks)
+        CLOCK.invalidate()
 
     def at_server_shutdown(self):
         """
@@ -203,6 +205,91 @@ def get_script():
         return create_script(GameTime)
 
 
+class GameClock(object):
+    """
+    An in-memory copy of the GameTime script's interval marks, so that game
+    time can be worked out arithmetically without fetching the script. It
+    also remembers the current season and time of day along with the span of
+    game time they're good for, so most calls to get_time_and_season only
+    compare two numbers. The GameTime script invalidates us whenever it marks
+    a new interval or restarts.
+    """
+
+    def __init__(self):
+        self._intervals = None
+        self._runtime_marks = None
+        self._season = None
+
+    def invalidate(self):
+        """Forgets our marks so they're reloaded from the script on next use"""
+        self._intervals = None
+        self._runtime_marks = None
+        self._season = None
+
+    def load(self):
+        """Copies the marks from the GameTime script"""
+        script = get_script()
+        self._intervals = list(script.intervals)
+        self._runtime_marks = list(script.runtime_marks)
+
+    @property
+    def intervals(self):
+        """The runtime/gametime marker pairs."""
+        if self._intervals is None:
+            self.load()
+        return self._intervals
+
+    @property
+    def runtime_marks(self):
+        """The runtime/realtime marker pairs."""
+        if self._runtime_marks is None:
+            self.load()
+        return self._runtime_marks
+
+    @property
+    def last_mark(self):
+        """The last runtime / gametime / multiplier marker, returned in that order."""
+        if len(self.intervals) == 0:
+            return 0, 0, 2.0
+        tdict = self.intervals[-1]
+        return tdict["run"], tdict["game"], tdict["multiplier"]
+
+    @staticmethod
+    def runtime():
+        """How long we've been running, total, since our first run, minus downtimes."""
+        return SERVER_RUNTIME + time.time() - SERVER_START
+
+    @staticmethod
+    def uptime():
+        """How long we've been running since our last restart."""
+        return time.time() - SERVER_START
+
+    def gametime(self):
+        """The game time, in seconds since the in-game epoch"""
+        run, game, multi = self.last_mark
+        return game + ((self.runtime() - run) * multi)
+
+    def time_and_season(self):
+        """Returns the current (season, timeslot), recalculating only at a boundary"""
+        game_time = int(self.gametime())
+        if self._season:
+            start, end, result = self._season
+            if start <= game_time < end:
+                return result
+        result = get_time_and_season(game_time)
+        season_start = game_time - game_time % SEASON_LENGTH
+        timeslot_start = game_time - game_time % TIMESLOT_LENGTH
+        self._season = (
+            max(season_start, timeslot_start),
+            min(season_start + SEASON_LENGTH, timeslot_start + TIMESLOT_LENGTH),
+            result,
+        )
+        return result
+
+
+CLOCK = GameClock()
+
+
 # Legacy definitions
 
 
@@ -237,8 +324,7 @@ def runtime(format=False):
     day, hour, min.
     :param format: Whether to parse into elements.
     """
-    script = get_script()
-    run_time = script.runtime
+    run_time = CLOCK.runtime()
     if format:
         return _format(run_time, YEAR, MONTH, WEEK, DAY, HOUR, MIN)
     return run_time
@@ -250,8 +336,7 @@ def uptime(format=False):
     is true, splits it into year, month, week, day, hour, min.
     :param format: Whether to parse into elements.
     """
-    script = get_script()
-    up_time = script.uptime
+    up_time = CLOCK.uptime()
     if format:
         return _format(up_time, YEAR, MONTH, WEEK, DAY, HOUR, MIN)
     return up_time
@@ -265,8 +350,7 @@ def gametime(game_time=None, format=False):
     :param format: Whether to parse into elements.
     """
     if not game_time:
-        script = get_script()
-        game_time = script.gametime
+        game_time = CLOCK.gametime()
     if format:
         return _format(game_time, YEAR, MONTH, WEEK, DAY, HOUR, MIN)
     return game_time
@@ -276,8 +360,7 @@ def time_factor():
     """
     Returns the current IC time multiplier.
     """
-    script = get_script()
-    _, _, multiplier = script.last_mark
+    _, _, multiplier = CLOCK.last_mark
     return multiplier
 
 
@@ -294,8 +377,7 @@ def time_intervals():
     """
     Return all our historical time-intervals
     """
-    script = get_script()
-    return script.intervals
+    return CLOCK.intervals
 
 
 def runtime_to_gametime(runtime, format=False):
@@ -312,8 +394,6 @@ def runtime_to_gametime(runtime, format=False):
     timediff = runtime - last_runtime
     game_time = last_gametime + (timediff * last_timescale)
 
-    current_game_time = get_script().gametime
-
     if format:
         return _format(game_time, YEAR, MONTH, WEEK, DAY, HOUR, MIN)
     return game_time
@@ -334,15 +414,14 @@ def closest_journal(realtime_secs):
 
 
 def realtime_to_gametime(realtime_secs, format=False):
-    script = get_script()
-    runtime_marks = script.runtime_marks
+    runtime_marks = CLOCK.runtime_marks
 
     # This is not accurate, but it's the best we can do for defaults
-    last_realtime = time.time() - script.runtime
+    last_realtime = time.time() - CLOCK.runtime()
     last_runtime = 0
 
     # Try to find better default
-    for mark in reversed(script.intervals):
+    for mark in reversed(CLOCK.intervals):
         if mark["real"] < realtime_secs:
             last_runtime = mark["run"]
             last_realtime = mark["real"]
@@ -381,12 +460,21 @@ MONTHS_PER_YEAR = 12
 SEASONAL_BOUNDARIES = (3 / 12.0, 6 / 12.0, 9 / 12.0)
 HOURS_PER_DAY = 24
 DAY_BOUNDARIES = (0, 6 / 24.0, 12 / 24.0, 18 / 24.0)
+# game seconds between changes of season and of time of day, from the boundaries above
+SEASON_LENGTH = 3 * MONTH
+TIMESLOT_LENGTH = 6 * HOUR
 
 
-def get_time_and_season():
-    # get the current time as parts of year and parts of day
+def get_time_and_season(game_time=None):
+    """
+    Returns the (season, timeslot) for a game time. If no game time is given,
+    the current one is looked up from the clock's schedule.
+    """
+    if game_time is None:
+        return CLOCK.time_and_season()
+    # get the time as parts of year and parts of day
     # returns a tuple (years,months,weeks,days,hours,minutes,sec)
-    current_time = gametime(format=True)
+    current_time = _format(game_time, YEAR, MONTH, WEEK, DAY, HOUR, MIN)
     month, hour = current_time[1], current_time[4]
     season = float(month) / MONTHS_PER_YEAR
     timeslot = float(hour) / HOURS_PER_DAY
@@ -1,9 +1,17 @@
 """
 Tests for scripts.
 """
+import os
+import tempfile
+
+from mock import patch
+
+from django.test import TestCase
 from evennia import create_script
 from server.utils.test_utils import ArxCommandTest
 from world.dominion.models import AccountTransaction, LIFESTYLES
+from typeclasses.scripts import gametime
+from typeclasses.scripts.event_manager import EventManager, get_event_manager
 from typeclasses.scripts.weekly_events import WeeklyEvents
 
 
@@ -103,3 +111,64 @@ class TestWeeklyEventScript(ArxCommandTest):
         self.assertEqual(self.assetowner5.vault, pl5)  # Same because tran2 failed
         self.assert_tran_success(tran3, pl2 - tran1.weekly_amount, receiver_vault=None)
         self.assert_tran_success(tran4, pl4, pl3 + tran1.weekly_amount)
+
+    def test_dominion_events_decay_and_timings(self):
+        "Tests the batched prestige decay and that each economy phase is timed."
+        from world.dominion.economy import WeeklyEconomy
+
+        self.assetowner2.fame = 101
+        self.assetowner2.save()
+        self.assetowner3.fame = -3
+        self.assetowner3.save()
+        economy = WeeklyEconomy(1)
+        economy.run([self.assetowner2])
+        self.assetowner2.refresh_from_db()
+        self.assetowner3.refresh_from_db()
+        self.assertEqual(self.assetowner2.fame, 51)
+        self.assertEqual(self.assetowner3.fame, -2)
+        self.assertEqual(
+            list(economy.timings.keys()),
+            ["prestige", "prefetch", "adjustments", "save"],
+        )
+
+
+class TestEventManager(ArxCommandTest):
+    @patch("typeclasses.scripts.event_manager.reactor")
+    def test_buffered_event_log(self, mock_reactor):
+        script = create_script(typeclass=EventManager, key="Event Manager")
+        self.assertEqual(get_event_manager(), script)
+        log_dir = tempfile.mkdtemp()
+        path = os.path.join(log_dir, "gm_event_log_1.txt")
+        with patch.object(EventManager, "get_gmlog_path", return_value=path):
+            script.add_gmnote(1, "First note")
+            script.add_gmnote(1, "Second note")
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(mock_reactor.callLater.call_count, 1)
+        script.at_server_reload()
+        with open(path) as log:
+            self.assertEqual(log.read(), "\nFirst note\n\nSecond note\n")
+        self.assertFalse(script.pending_logs)
+
+
+class TestGameClock(TestCase):
+    def setUp(self):
+        self.clock = gametime.GameClock()
+        self.clock._intervals = [
+            {"run": 0, "game": gametime.MONTH * 3, "multiplier": 2, "real": 0}
+        ]
+        self.clock._runtime_marks = []
+
+    @patch.object(gametime.GameClock, "runtime", return_value=gametime.HOUR * 3)
+    def test_gametime_from_marks(self, mock_runtime):
+        self.assertEqual(self.clock.gametime(), gametime.MONTH * 3 + gametime.HOUR * 6)
+        self.assertEqual(self.clock.last_mark[2], 2)
+
+    @patch.object(gametime.GameClock, "runtime")
+    def test_time_and_season_schedule(self, mock_runtime):
+        mock_runtime.return_value = gametime.HOUR * 3 - 1
+        self.assertEqual(self.clock.time_and_season(), ("spring", "night"))
+        self.assertEqual(self.clock._season[1], gametime.MONTH * 3 + gametime.HOUR * 6)
+        mock_runtime.return_value = gametime.HOUR * 3
+        self.assertEqual(self.clock.time_and_season(), ("spring", "morning"))
+        self.clock.invalidate()
+        self.assertIsNone(self.clock._season)
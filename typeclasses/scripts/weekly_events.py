@@ -8,13 +8,15 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q, F
+from django.db.models import Q
 
 
 from evennia.objects.models import ObjectDB
 from evennia.utils.evtable import EvTable
 
-from world.dominion.models import AssetOwner, Member, AccountTransaction
+from world.dominion.economy import WeeklyEconomy
+from world.dominion.models import AssetOwner, Member
+from world.dominion.prestige_rankings import get_leaderboard, ACTIVE_ROSTERS
 from world.dominion.domain.models import Army, Orders
 from world.dominion.plots.models import ActionRequirement
 from world.msgs.models import Inform
@@ -23,6 +25,8 @@ from typeclasses.accounts import Account
 from typeclasses.scripts.scripts import Script
 from typeclasses.scripts.script_mixins import RunDateMixin
 from server.utils.arx_utils import inform_staff, cache_safe_update
+from server.utils.counters import COUNTERS
+from web.character.clue_index import CLUE_INDEX
 from web.character.models import Investigation, RosterEntry
 
 
@@ -153,6 +157,8 @@ class WeeklyEvents(RunDateMixin, Script):
         """
         # schedule next weekly update for one week from now
         self.db.run_date += timedelta(days=7)
+        # save pending pose and journal counts before we tally them
+        COUNTERS.flush()
         # initialize temporary dictionaries we used for aggregating values
         self.initialize_temp_dicts()
         # processing for each player
@@ -179,21 +185,16 @@ class WeeklyEvents(RunDateMixin, Script):
 
     def do_dominion_events(self):
         """Does all the dominion weekly events"""
-        for owner in AssetOwner.objects.all():
-            owner.prestige_decay()
-
-        for owner in AssetOwner.objects.filter(
-            Q(organization_owner__isnull=False)
-            | (
-                Q(player__player__roster__roster__name="Active")
-                & Q(player__player__roster__frozen=False)
-            )
-        ).distinct():
-            try:
-                owner.do_weekly_adjustment(self.db.week, self.inform_creator)
-            except Exception as err:
-                traceback.print_exc()
-                print("Error in %s's weekly adjustment: %s" % (owner, err))
+        economy = WeeklyEconomy(self.db.week, self.inform_creator)
+        economy.run(
+            AssetOwner.objects.filter(
+                Q(organization_owner__isnull=False)
+                | (
+                    Q(player__player__roster__roster__name="Active")
+                    & Q(player__player__roster__frozen=False)
+                )
+            ).distinct()
+        )
         # resets the weekly record of work command
         cache_safe_update(
             Member.objects.filter(deguilded=False),
@@ -201,10 +202,8 @@ class WeeklyEvents(RunDateMixin, Script):
             investment_this_week=0,
         )
         # decrement timer of limited transactions, remove transactions that are over
-        AccountTransaction.objects.filter(repetitions_left__gt=0).update(
-            repetitions_left=F("repetitions_left") - 1
-        )
-        AccountTransaction.objects.filter(repetitions_left=0).delete()
+        with economy.timed("transactions"):
+            economy.decrement_transactions()
         for army in Army.objects.filter(orders__week=self.db.week):
             try:
                 army.execute_orders(self.db.week)
@@ -213,10 +212,19 @@ class WeeklyEvents(RunDateMixin, Script):
                 print("Error in %s's army orders: %s" % (army, err))
         old_orders = Orders.objects.filter(complete=True, week__lt=self.db.week - 4)
         old_orders.delete()
-        for requirement in ActionRequirement.objects.filter(weekly_total__gt=0):
-            requirement.weekly_total = 0
-            requirement.save()
-        inform_staff("Dominion weekly events processed for week %s." % self.db.week)
+        # evaluate ids first, since cache_safe_update re-runs the query after updating
+        requirement_ids = list(
+            ActionRequirement.objects.filter(weekly_total__gt=0).values_list(
+                "id", flat=True
+            )
+        )
+        cache_safe_update(
+            ActionRequirement.objects.filter(id__in=requirement_ids), weekly_total=0
+        )
+        inform_staff(
+            "Dominion weekly events processed for week %s. (%s)"
+            % (self.db.week, economy.display_timings())
+        )
 
     @staticmethod
     def reset_action_points():
@@ -239,6 +247,8 @@ class WeeklyEvents(RunDateMixin, Script):
 
     def do_investigations(self):
         """Does all the investigation events"""
+        # start the week with a fresh clue index
+        CLUE_INDEX.clear()
         for investigation in Investigation.objects.filter(
             active=True, ongoing=True, character__roster__name="Active"
         ):
@@ -665,18 +675,12 @@ class WeeklyEvents(RunDateMixin, Script):
                 border="cells",
                 width=78,
             )
-            rank_order = list(
-                AssetOwner.objects.filter(
-                    player__player__roster__roster__name="Active"
-                ).distinct()
-            )
-            rank_order = sorted(rank_order, key=lambda x: x.prestige, reverse=True)
+            leaderboard = get_leaderboard(ACTIVE_ROSTERS)
             for tup in sorted_changes:
                 # get our prestige ranking compared to others
                 owner = tup[0]
-                try:
-                    rank = rank_order.index(owner) + 1
-                except ValueError:
+                rank = leaderboard.rank(owner)
+                if rank is None:
                     # they rostered mid-week or whatever, skip them
                     continue
                 # get the amount that our prestige has changed. add + for positive
@@ -0,0 +1,186 @@
+"""
+What a character has equipped, for checks and combat. get_total_modifier
+used to find what we were wearing and wielding by checking every object we
+carried, and then ran a query to sum the RollModifiers of those objects, our
+location and ourselves for every roll, while armor, armor_resilience and
+armor_penalties each checked our contents again and read the recipe and
+quality of everything we wore.
+
+Loadout is a snapshot of what a character wears and wields and the armor
+values of those items, kept in their ndb. Wearing, removing, wielding or
+sheathing an item discards the snapshot of whoever holds it, and a snapshot
+is rebuilt if the character's contents have changed since it was made, so
+moving an item in or out is noticed. The armor values of the items are
+read when the snapshot is made, so a change to an item's recipe or quality
+while it's worn shows when it's next put on.
+
+ModifierIndex keeps the RollModifiers of objects by check type, read for all
+the objects we don't have yet at once, and forgets an object's modifiers
+when one of them is saved or deleted. MODIFIER_INDEX is the shared instance.
+"""
+from django.db.models import signals
+
+from world.conditions.models import RollModifier
+
+
+class ModifierIndex(object):
+    """The RollModifiers of objects, by check type"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Empties the index, which is read again as objects are looked up"""
+        # object ID to a dict of check type to a list of
+        # (user_tag, target_tag, stat, skill, ability, value) tuples
+        self.modifiers = {}
+
+    def get_many(self, obj_ids):
+        """Gets the modifiers of objects, reading those we don't have together"""
+        missing = [ob for ob in obj_ids if ob not in self.modifiers]
+        if missing:
+            for obj_id in missing:
+                self.modifiers[obj_id] = {}
+            rows = RollModifier.objects.filter(object_id__in=missing).values_list(
+                "object_id",
+                "check",
+                "user_tag",
+                "target_tag",
+                "stat",
+                "skill",
+                "ability",
+                "value",
+            )
+            for obj_id, check, *row in rows:
+                self.modifiers[obj_id].setdefault(check, []).append(tuple(row))
+        return [self.modifiers[ob] for ob in obj_ids]
+
+    def get_total(
+        self,
+        obj_ids,
+        check_types,
+        user_tags,
+        target_tags,
+        stat_list,
+        skill_list,
+        ability_list,
+    ):
+        """
+        Sums the modifiers of objects that apply to a roll.
+
+            Args:
+                obj_ids: IDs of the objects whose modifiers count
+                check_types (list): The check types that apply
+                user_tags (list): Modifier tags of whoever is rolling
+                target_tags (list): Modifier tags of the target
+                stat_list (list): Stats used in the roll
+                skill_list (list): Skills used in the roll
+                ability_list (list): Abilities used in the roll
+
+            Returns:
+                The total value of the modifiers that match.
+        """
+        user_tags = set(user_tags)
+        target_tags = set(target_tags)
+        stats, skills, abilities = set(stat_list), set(skill_list), set(ability_list)
+        total = 0
+        for by_check in self.get_many(set(obj_ids)):
+            if not by_check:
+                continue
+            for check in check_types:
+                for user_tag, target_tag, stat, skill, ability, value in by_check.get(
+                    check, ()
+                ):
+                    if (
+                        user_tag in user_tags
+                        and target_tag in target_tags
+                        and stat in stats
+                        and skill in skills
+                        and ability in abilities
+                    ):
+                        total += value
+        return total
+
+    def invalidate(self, obj_id):
+        """Forgets an object's modifiers, which are read again when needed"""
+        self.modifiers.pop(obj_id, None)
+
+
+MODIFIER_INDEX = ModifierIndex()
+
+
+def get_contents_ids(obj):
+    return tuple(ob.id for ob in obj.contents)
+
+
+class Loadout(object):
+    """What a character wears and wields, and the armor it gives them"""
+
+    __slots__ = (
+        "contents_ids",
+        "worn",
+        "wielded",
+        "armor",
+        "armor_resilience",
+        "armor_penalties",
+        "modifier_ids",
+    )
+
+    def __init__(self, char):
+        self.contents_ids = get_contents_ids(char)
+        self.worn = char.worn
+        self.wielded = char.wielded
+        self.armor = 0
+        self.armor_resilience = 0
+        self.armor_penalties = 0
+        for ob in self.worn:
+            try:
+                self.armor += ob.armor or 0
+            except AttributeError:
+                pass
+            self.armor_resilience += ob.item_data.armor_resilience
+            try:
+                self.armor_penalties += ob.item_data.armor_penalty
+            except (AttributeError, ValueError, TypeError):
+                pass
+        # the objects whose modifiers count for our rolls, besides our location
+        self.modifier_ids = [ob.id for ob in self.worn] + [char.id]
+        if self.wielded:
+            self.modifier_ids.append(self.wielded[0].id)
+
+    @property
+    def weapon(self):
+        return self.wielded[0] if self.wielded else None
+
+    def is_current(self, char):
+        """Whether the snapshot still holds for char"""
+        return self.contents_ids == get_contents_ids(char)
+
+
+def get_loadout(char):
+    """Gets the Loadout of char, making it again if it's stale"""
+    loadout = char.ndb.loadout
+    if loadout is None or not loadout.is_current(char):
+        loadout = char.ndb.loadout = Loadout(char)
+    return loadout
+
+
+def invalidate_loadout(obj):
+    """Discards the Loadout of obj, if it's something that has one"""
+    if obj is not None:
+        obj.ndb.loadout = None
+
+
+def invalidate_modifiers(sender, instance, **kwargs):
+    """Forgets the modifiers of an object when one of them changes"""
+    MODIFIER_INDEX.invalidate(instance.object_id)
+
+
+signals.post_save.connect(
+    invalidate_modifiers, sender=RollModifier, dispatch_uid="invalidate_modifiers"
+)
+signals.post_delete.connect(
+    invalidate_modifiers,
+    sender=RollModifier,
+    dispatch_uid="invalidate_modifiers_on_delete",
+)
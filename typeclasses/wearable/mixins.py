@@ -89,40 +89,38 @@ class UseEquipmentMixins(object):
         ability_list=None,
     ):
         """Gets all modifiers from their location and worn/wielded objects."""
-        from django.db.models import Sum
+        from typeclasses.wearable.loadout import MODIFIER_INDEX
         from world.conditions.models import RollModifier
 
         user_tags = self.modifier_tags or []
         user_tags.append("")
-        # get modifiers from worn stuff we have and our location, if any
-        all_objects = list(self.worn)
+        # modifiers from worn stuff we have, ourselves, our weapon and our location
+        obj_ids = list(self.loadout.modifier_ids)
         if self.location:
-            all_objects.append(self.location)
-        all_objects.append(self)
-        if self.weapon:
-            all_objects.append(self.weapon)
-        all_objects = [ob.id for ob in all_objects]
+            obj_ids.append(self.location.id)
         check_types = RollModifier.get_check_type_list(check_type)
-        return (
-            RollModifier.objects.filter(
-                object_id__in=all_objects or [],
-                check__in=check_types or [],
-                user_tag__in=user_tags or [],
-                target_tag__in=target_tags or [],
-                stat__in=stat_list or [],
-                skill__in=skill_list or [],
-                ability__in=ability_list or [],
-            ).aggregate(Sum("value"))["value__sum"]
-            or 0
+        return MODIFIER_INDEX.get_total(
+            obj_ids,
+            check_types or [],
+            user_tags,
+            target_tags or [],
+            stat_list or [],
+            skill_list or [],
+            ability_list or [],
         )
 
+    @property
+    def loadout(self):
+        """A snapshot of what we wear and wield, made again when it changes"""
+        from typeclasses.wearable.loadout import get_loadout
+
+        return get_loadout(self)
+
     @property
     def armor_resilience(self):
         """Determines how hard it is to penetrate our armor"""
         value = self.db.armor_resilience or 15
-        for ob in self.worn:
-            value += ob.item_data.armor_resilience
-        return int(value)
+        return int(value + self.loadout.armor_resilience)
 
     @property
     def armor(self):
@@ -130,14 +128,7 @@ class UseEquipmentMixins(object):
         Returns armor value of all items the character is wearing plus any
         armor in their attributes.
         """
-        armor = self.traits.armor_class
-        for ob in self.worn:
-            try:
-                ob_armor = ob.armor or 0
-            except AttributeError:
-                ob_armor = 0
-            armor += ob_armor
-        return int(round(armor))
+        return int(round(self.traits.armor_class + self.loadout.armor))
 
     @armor.setter
     def armor(self, value):
@@ -145,13 +136,7 @@ class UseEquipmentMixins(object):
 
     @property
     def armor_penalties(self):
-        penalty = 0
-        for ob in self.worn:
-            try:
-                penalty += ob.item_data.armor_penalty
-            except (AttributeError, ValueError, TypeError):
-                pass
-        return penalty
+        return self.loadout.armor_penalties
 
     def get_fakeweapon(self):
         return self.db.fakeweapon
@@ -186,10 +171,7 @@ class UseEquipmentMixins(object):
 
     @property
     def weapon(self):
-        try:
-            return self.wielded[0]
-        except IndexError:
-            return None
+        return self.loadout.weapon
 
     @property
     def weapons_hidden(self):
@@ -201,3 +201,33 @@ class EquipmentCommandTests(TestEquipmentMixins, ArxCommandTest):
             cmdstring="remove",
         )
         self.assertTrue(self.mask1.is_worn)
+
+    def test_loadout(self):
+        from world.conditions.models import RollModifier
+
+        self.top1.item_data.recipe = 1
+        self.top1.item_data.crafted_by = self.char1
+        self.top1.location = self.char2
+        self.top1.add_modifier(5, RollModifier.ANY)
+        self.room1.add_modifier(2, RollModifier.ANY_COMBAT)
+        self.assertEqual(self.char2.get_total_modifier(RollModifier.ATTACK), 2)
+        self.assertEqual(self.char2.armor_penalties, 0)
+        self.top1.wear(self.char2)
+        self.assertEqual(self.char2.armor, 2)
+        self.assertEqual(
+            self.char2.armor_resilience, int(15 + self.top1.item_data.armor_resilience)
+        )
+        self.assertEqual(self.char2.armor_penalties, self.top1.item_data.armor_penalty)
+        self.assertEqual(self.char2.get_total_modifier(RollModifier.ATTACK), 7)
+        # editing a modifier is seen without changing what we wear
+        self.top1.add_modifier(3, RollModifier.ANY)
+        self.assertEqual(self.char2.get_total_modifier(RollModifier.ATTACK), 5)
+        self.assertEqual(self.char2.get_total_modifier(RollModifier.STEALTH), 3)
+        self.knife1.wield(self.char2)
+        self.assertEqual(self.char2.weapon, self.knife1)
+        self.top1.remove(self.char2)
+        self.assertEqual(self.char2.armor, 0)
+        self.assertEqual(self.char2.get_total_modifier(RollModifier.ATTACK), 2)
+        # moving a wielded weapon away is noticed too
+        self.knife1.location = self.room1
+        self.assertEqual(self.char2.weapon, None)
@@ -190,7 +190,10 @@ class Wearable(FashionableMixins, Object):
     @is_worn.setter
     def is_worn(self, bull):
         """Bool luvs u"""
+        from typeclasses.wearable.loadout import invalidate_loadout
+
         self.item_data.currently_worn = bull
+        invalidate_loadout(self.location)
 
     @property
     def is_equipped(self):
@@ -234,7 +234,10 @@ class Wieldable(Wearable):
 
     @is_wielded.setter
     def is_wielded(self, bull):
+        from typeclasses.wearable.loadout import invalidate_loadout
+
         self.item_data.currently_wielded = bull
+        invalidate_loadout(self.location)
 
     @property
     def is_equipped(self):
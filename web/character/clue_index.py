@@ -0,0 +1,255 @@
+"""
+An index for choosing which clue an investigation finds. Picking a clue used
+to mean building a queryset that excluded everything the character had
+discovered, chaining a join for every search tag, annotating discovery counts,
+and for clues found through a revelation, another query per candidate to
+count the tags it shared with the source clue. The weekly investigation pass
+did that for every active investigation.
+
+The ClueIndex keeps the tags and revelations of every clue as postings (which
+clues have each tag or belong to each revelation), each clue's discovery
+count, and the set of clues each character has discovered, so candidates are
+found with set operations and picked in memory. Clues, their tags and
+revelations, and discoveries update the index as they change, and it's
+rebuilt from scratch once a day and at the start of each weekly pass in case
+anything slipped past us.
+"""
+from collections import defaultdict
+from server.utils.periodic import PeriodicallyRebuilt
+from server.utils.picker import WeightedPicker
+
+
+class ClueEntry(object):
+    """What the index knows about a single clue"""
+
+    __slots__ = ("id", "investigable", "tag_ids", "revelation_ids", "discoveries")
+
+    def __init__(self, clue_id, investigable):
+        self.id = clue_id
+        self.investigable = investigable
+        self.tag_ids = set()
+        self.revelation_ids = set()
+        self.discoveries = 0
+
+
+class ClueIndex(PeriodicallyRebuilt):
+    """Postings of clues by search tag and revelation, with discovery counts"""
+
+    def clear(self):
+        """Discards the index, which will be rebuilt on its next use"""
+        super().clear()
+        self.clues = {}
+        self.tag_postings = defaultdict(set)
+        self.revelation_postings = defaultdict(set)
+        self.investigable = set()
+        # RosterEntry ID to the set of clue IDs they've discovered, loaded as needed
+        self.discovered = {}
+
+    def rebuild(self):
+        """Loads every clue's flags, tags, revelations and discovery count"""
+        from django.db.models import Count
+        from web.character.models import Clue, ClueForRevelation
+
+        self.clear()
+        for clue_id, name, allowed, discoveries in Clue.objects.annotate(
+            cnt=Count("discoveries")
+        ).values_list("id", "name", "allow_investigation", "cnt"):
+            entry = self._add_entry(clue_id, name, allowed)
+            entry.discoveries = discoveries
+        for clue_id, tag_id in Clue.search_tags.through.objects.values_list(
+            "clue_id", "searchtag_id"
+        ):
+            self._add_posting(clue_id, tag_id, self.tag_postings, "tag_ids")
+        for clue_id, revelation_id in ClueForRevelation.objects.values_list(
+            "clue_id", "revelation_id"
+        ):
+            self._add_posting(
+                clue_id, revelation_id, self.revelation_postings, "revelation_ids"
+            )
+        self.mark_built()
+
+    @staticmethod
+    def is_investigable(name, allow_investigation):
+        """Whether a clue can be found by investigations targeting tags"""
+        return allow_investigation and "placeholder" not in (name or "").lower()
+
+    def _add_entry(self, clue_id, name, allow_investigation):
+        investigable = self.is_investigable(name, allow_investigation)
+        entry = ClueEntry(clue_id, investigable)
+        self.clues[clue_id] = entry
+        if investigable:
+            self.investigable.add(clue_id)
+        return entry
+
+    def _add_posting(self, clue_id, key, postings, attr):
+        entry = self.clues.get(clue_id)
+        if entry:
+            getattr(entry, attr).add(key)
+            postings[key].add(clue_id)
+
+    def _remove_posting(self, clue_id, key, postings, attr):
+        entry = self.clues.get(clue_id)
+        if entry:
+            getattr(entry, attr).discard(key)
+        postings[key].discard(clue_id)
+
+    def get_discovered(self, roster_id):
+        """Gets the set of clue IDs that a character has discovered"""
+        if roster_id not in self.discovered:
+            from web.character.models import ClueDiscovery
+
+            self.discovered[roster_id] = set(
+                ClueDiscovery.objects.filter(character_id=roster_id).values_list(
+                    "clue_id", flat=True
+                )
+            )
+        return self.discovered[roster_id]
+
+    # Updates as clues and discoveries change
+
+    def update_clue(self, clue):
+        """Updates a clue's flags after it's saved, adding it if it's new"""
+        if not self.last_built:
+            return
+        entry = self.clues.get(clue.id)
+        investigable = self.is_investigable(clue.name, clue.allow_investigation)
+        if not entry:
+            self._add_entry(clue.id, clue.name, clue.allow_investigation)
+            return
+        entry.investigable = investigable
+        if investigable:
+            self.investigable.add(clue.id)
+        else:
+            self.investigable.discard(clue.id)
+
+    def remove_clue(self, clue_id):
+        """Removes a deleted clue from the index"""
+        entry = self.clues.pop(clue_id, None)
+        if not entry:
+            return
+        self.investigable.discard(clue_id)
+        for tag_id in entry.tag_ids:
+            self.tag_postings[tag_id].discard(clue_id)
+        for revelation_id in entry.revelation_ids:
+            self.revelation_postings[revelation_id].discard(clue_id)
+        for discovered in self.discovered.values():
+            discovered.discard(clue_id)
+
+    def update_tags(self, clue_id, tag_ids, added=True):
+        """Adds or removes search tags from a clue"""
+        for tag_id in tag_ids:
+            if added:
+                self._add_posting(clue_id, tag_id, self.tag_postings, "tag_ids")
+            else:
+                self._remove_posting(clue_id, tag_id, self.tag_postings, "tag_ids")
+
+    def clear_tags(self, clue_id):
+        """Removes every search tag from a clue"""
+        entry = self.clues.get(clue_id)
+        if entry:
+            self.update_tags(clue_id, list(entry.tag_ids), added=False)
+
+    def update_revelation(self, clue_id, revelation_id, added=True):
+        """Records a clue being added to or removed from a revelation"""
+        if added:
+            self._add_posting(
+                clue_id, revelation_id, self.revelation_postings, "revelation_ids"
+            )
+        else:
+            self._remove_posting(
+                clue_id, revelation_id, self.revelation_postings, "revelation_ids"
+            )
+
+    def add_discovery(self, clue_id, roster_id):
+        """Records a character discovering a clue"""
+        if roster_id in self.discovered:
+            if clue_id in self.discovered[roster_id]:
+                return
+            self.discovered[roster_id].add(clue_id)
+        entry = self.clues.get(clue_id)
+        if entry:
+            entry.discoveries += 1
+
+    def remove_discovery(self, clue_id, roster_id):
+        """Records a character's discovery of a clue being deleted"""
+        if roster_id in self.discovered:
+            self.discovered[roster_id].discard(clue_id)
+        entry = self.clues.get(clue_id)
+        if entry and entry.discoveries:
+            entry.discoveries -= 1
+
+    # Choosing clues
+
+    def pick(self, candidates, get_weight=None):
+        """
+        Picks one of the candidate clue IDs, weighted by how often each has been
+        discovered unless given another weighting.
+
+            Args:
+                candidates: Iterable of clue IDs
+                get_weight: Optional callable taking a ClueEntry and returning its weight
+
+            Returns:
+                A Clue, or None if there were no candidates.
+        """
+        from web.character.models import Clue
+
+        get_weight = get_weight or (lambda entry: entry.discoveries)
+        picker = WeightedPicker()
+        for clue_id in sorted(candidates):
+            picker.add_option(clue_id, get_weight(self.clues[clue_id]))
+        clue_id = picker.pick()
+        if clue_id is None:
+            return None
+        try:
+            return Clue.objects.get(id=clue_id)
+        except Clue.DoesNotExist:
+            self.remove_clue(clue_id)
+            return self.pick(set(candidates) - {clue_id}, get_weight)
+
+    def get_tagged(self, tag_ids):
+        """Gets the IDs of clues that have any of the tags"""
+        tagged = set()
+        for tag_id in tag_ids:
+            tagged |= self.tag_postings.get(tag_id, set())
+        return tagged
+
+    def get_random_clue(self, roster, search_tags, omit_tags=None, source_clue=None):
+        """
+        Chooses a clue the character hasn't discovered, from those that can be
+        investigated. Given a source clue, we prefer clues from the same
+        revelations, weighted by discoveries plus the tags they share with the
+        source, then fall back to any clue sharing a tag with it. Otherwise
+        the clue must have every search tag and none of the omitted ones.
+        """
+        self.ensure_built()
+        candidates = self.investigable - self.get_discovered(roster.id)
+        if source_clue:
+            source = self.clues.get(source_clue.id)
+            if not source:
+                return None
+            by_revelation = set()
+            for revelation_id in source.revelation_ids:
+                by_revelation |= self.revelation_postings.get(revelation_id, set())
+            by_revelation &= candidates
+            if by_revelation:
+                return self.pick(
+                    by_revelation,
+                    lambda entry: entry.discoveries
+                    + len(entry.tag_ids & source.tag_ids),
+                )
+            candidates &= self.get_tagged(source.tag_ids)
+        else:
+            for tag in search_tags:
+                candidates &= self.tag_postings.get(tag.id, set())
+            candidates -= self.get_tagged(ob.id for ob in omit_tags or [])
+        return self.pick(candidates)
+
+    def get_clue_for_tags(self, roster, tag_ids):
+        """Chooses any clue the character hasn't discovered with one of the tags"""
+        self.ensure_built()
+        candidates = self.get_tagged(tag_ids) - self.get_discovered(roster.id)
+        return self.pick(candidates)
+
+
+CLUE_INDEX = ClueIndex()
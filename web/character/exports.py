@@ -0,0 +1,180 @@
+"""
+The JSON export of active and available characters for our API, used by
+the wiki. See server.utils.json_export for how exports are paged, streamed
+and cached. CHARACTER_EXPORT is the shared instance, which hears about
+changes to roster entries, character sheets and their values from signals,
+and is told by Character.at_desc_change when a desc is set. Since a change
+to anyone's parents or spouses can change the cousins, uncles and aunts of
+many characters, family changes discard every fragment.
+"""
+from django.db.models import Q, signals
+
+from evennia_extensions.character_extensions.models import (
+    CharacterSheet,
+    CharacterSheetValue,
+)
+from evennia_extensions.character_extensions.roster_projection import (
+    get_character_rows,
+)
+from server.utils.json_export import JsonExport
+from typeclasses.characters import Character
+from web.character.models import Photo, RosterEntry
+from world.dominion.genealogy import GENEALOGY
+from world.dominion.models import PlayerOrNpc
+
+# the family relations we show for each character
+RELATIONS = ("parents", "siblings", "uncles_aunts", "cousins")
+
+
+def parse_name(relation):
+    """Helper function for outputting string display of character name"""
+    if relation.player:
+        char_ob = relation.player.char_ob
+        return "%s %s" % (char_ob.key, char_ob.item_data.family)
+    else:
+        return str(relation)
+
+
+class CharacterExport(JsonExport):
+    """Active and available characters, oldest first"""
+
+    def get_queryset(self, request):
+        return Character.objects.filter(
+            Q(roster__roster__name="Active") | Q(roster__roster__name="Available")
+        )
+
+    def prefetch(self, queryset):
+        """Fetches accounts and roster entries with the characters"""
+        return queryset.select_related(
+            "db_account__Dominion", "roster__roster", "roster__profile_picture"
+        )
+
+    def serialize_many(self, chars):
+        """Gets the dicts of characters, fetching all their relatives together"""
+        families = {}
+        for char in chars:
+            try:
+                dom_id = char.player_ob.Dominion.id
+            except AttributeError:
+                continue
+            families[char.id] = GENEALOGY.family_ids(dom_id, RELATIONS)
+        relative_ids = set()
+        for family in families.values():
+            for ids in family.values():
+                relative_ids |= ids
+        relatives = (
+            PlayerOrNpc.objects.select_related(
+                "player__roster__character__charactersheet"
+            ).in_bulk(relative_ids)
+            if relative_ids
+            else {}
+        )
+        return [
+            self.serialize(row, families.get(row.id), relatives)
+            for row in get_character_rows(chars)
+        ]
+
+    @staticmethod
+    def get_relations(family, relatives):
+        """helper function for getting dict of character's relationships"""
+        if family is None:
+            return {}
+        try:
+            return {
+                relation: [
+                    parse_name(relatives[ob]) for ob in sorted(ids) if ob in relatives
+                ]
+                for relation, ids in family.items()
+            }
+        except AttributeError:
+            return {}
+
+    def serialize(self, row, family=None, relatives=None):
+        """
+        Helper function for getting dict of all relevant character information
+
+            Args:
+                row (CharacterRow): The character's item_data
+                family (dict): The IDs of their relatives, by relation
+                relatives (dict): PlayerOrNpcs by ID
+        """
+        char = row.character
+        character = {}
+        if char.player_ob.is_staff or char.db.npc:
+            return character
+        character = {
+            "name": row.key,
+            "social_rank": row.social_rank,
+            "fealty": str(row.fealty),
+            "house": row.family,
+            "relations": self.get_relations(family, relatives or {}),
+            "gender": row.gender,
+            "age": row.age,
+            "religion": char.db.religion,
+            "vocation": row.vocation,
+            "height": row.height,
+            "hair_color": row.hair_color,
+            "eye_color": row.eye_color,
+            "skintone": row.skin_tone,
+            "description": char.perm_desc,
+            "personality": row.personality,
+            "background": row.background,
+            "status": row.roster_name,
+            "longname": row.longname,
+        }
+        try:
+            if char.portrait:
+                character["image"] = char.portrait.image.url
+        except (Photo.DoesNotExist, AttributeError):
+            pass
+        return character
+
+
+CHARACTER_EXPORT = CharacterExport()
+
+
+def invalidate_roster_entry(sender, instance, **kwargs):
+    """Discards the export of a character whose roster entry changed"""
+    CHARACTER_EXPORT.invalidate(instance.character_id)
+
+
+def invalidate_character_sheet(sender, instance, **kwargs):
+    """Discards the export of a character whose sheet changed"""
+    CHARACTER_EXPORT.invalidate(instance.objectdb_id)
+
+
+def invalidate_character_sheet_value(sender, instance, **kwargs):
+    """Discards the export of a character whose hair color, height and so on changed"""
+    CHARACTER_EXPORT.invalidate(instance.character_sheet_id)
+
+
+def clear_families(sender, action="post_delete", **kwargs):
+    """Discards every fragment when someone's parents or spouses change"""
+    if action in ("post_add", "post_remove", "post_clear", "post_delete"):
+        CHARACTER_EXPORT.clear()
+
+
+signals.post_save.connect(
+    invalidate_roster_entry, sender=RosterEntry, dispatch_uid="invalidate_roster_entry"
+)
+signals.post_delete.connect(
+    invalidate_roster_entry, sender=RosterEntry, dispatch_uid="invalidate_roster_entry"
+)
+signals.post_save.connect(
+    invalidate_character_sheet,
+    sender=CharacterSheet,
+    dispatch_uid="invalidate_character_sheet",
+)
+for signal in (signals.post_save, signals.post_delete):
+    signal.connect(
+        invalidate_character_sheet_value,
+        sender=CharacterSheetValue,
+        dispatch_uid="invalidate_character_sheet_value",
+    )
+for through in (PlayerOrNpc.parents.through, PlayerOrNpc.spouses.through):
+    signals.m2m_changed.connect(
+        clear_families, sender=through, dispatch_uid="clear_families"
+    )
+signals.post_delete.connect(
+    clear_families, sender=PlayerOrNpc, dispatch_uid="clear_families"
+)
@@ -21,9 +21,9 @@ from cloudinary.models import CloudinaryField
 from evennia.locks.lockhandler import LockHandler
 from evennia.utils.idmapper.models import SharedMemoryModel
 
+from web.character.clue_index import CLUE_INDEX
 from web.character.managers import ArxRosterManager, AccountHistoryManager
 from server.utils.arx_utils import CachedProperty
-from server.utils.picker import WeightedPicker
 from world.stats_and_skills import do_dice_check
 
 
@@ -1259,6 +1259,7 @@ class Clue(SharedMemoryModel):
     def save(self, *args, **kwargs):
         """Save and then update all investigations that point to us"""
         super(Clue, self).save(*args, **kwargs)
+        CLUE_INDEX.update_clue(self)
         ongoing = self.investigation_set.filter(ongoing=True)
         if ongoing:
             value = self.get_completion_value()
@@ -1268,6 +1269,12 @@ class Clue(SharedMemoryModel):
                     investigation.completion_value = value
                     investigation.save()
 
+    def delete(self, *args, **kwargs):
+        """Deletes the clue and removes it from the clue index"""
+        clue_id = self.id
+        super(Clue, self).delete(*args, **kwargs)
+        CLUE_INDEX.remove_clue(clue_id)
+
 
 class CluePlotInvolvement(SharedMemoryModel):
     """How a clue is related to a plot"""
@@ -1632,7 +1639,10 @@ class ClueDiscovery(SharedMemoryModel):
         return RosterEntry.objects.filter(clues__in=spoiled)
 
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         super(ClueDiscovery, self).save(*args, **kwargs)
+        if adding:
+            CLUE_INDEX.add_discovery(self.clue_id, self.character_id)
         if (
             self.clue
             and self.clue.tangible_object
@@ -1641,6 +1651,11 @@ class ClueDiscovery(SharedMemoryModel):
         ):
             self.clue.tangible_object.messages.build_secretslist()
 
+    def delete(self, *args, **kwargs):
+        """Deletes the discovery and removes it from the clue index"""
+        CLUE_INDEX.remove_discovery(self.clue_id, self.character_id)
+        super(ClueDiscovery, self).delete(*args, **kwargs)
+
 
 class ClueForRevelation(SharedMemoryModel):
     """Through model that shows which clues are required for a revelation"""
@@ -1665,6 +1680,16 @@ class ClueForRevelation(SharedMemoryModel):
     def __str__(self):
         return "Clue %s used for %s" % (self.clue, self.revelation)
 
+    def save(self, *args, **kwargs):
+        """Saves and adds the clue to the revelation in the clue index"""
+        super(ClueForRevelation, self).save(*args, **kwargs)
+        CLUE_INDEX.update_revelation(self.clue_id, self.revelation_id)
+
+    def delete(self, *args, **kwargs):
+        """Deletes and removes the clue from the revelation in the clue index"""
+        CLUE_INDEX.update_revelation(self.clue_id, self.revelation_id, added=False)
+        super(ClueForRevelation, self).delete(*args, **kwargs)
+
 
 class InvestigationAssistant(SharedMemoryModel):
     """Someone who is helping an investigation out. Note that char is an ObjectDB, not RosterEntry."""
@@ -2124,16 +2149,8 @@ class Investigation(AbstractPlayerAllocations):
             search = SearchTag.objects.filter(
                 reduce(lambda x, y: x | Q(name__icontains=y), names, Q())
             )
-            clues = (
-                Clue.objects.exclude(characters=self.character)
-                .filter(search_tags__in=search)
-                .annotate(cnt=Count("discoveries"))
-            )
-            if clues:
-                picker = WeightedPicker()
-                for clue in clues:
-                    picker.add_option(clue, clue.cnt)
-                return picker.pick()
+            tag_ids = search.values_list("id", flat=True)
+            return CLUE_INDEX.get_clue_for_tags(self.character, tag_ids)
         else:
             return get_random_clue(
                 self.character,
@@ -2285,36 +2302,44 @@ class TheoryPermissions(SharedMemoryModel):
 
 def get_random_clue(roster, search_tags, omit_tags=None, source_clue=None):
     """
-    Finds a target clue based on our topic and our investigation history.
-    We'll choose the lowest rating out of 3 random choices.
+    Finds a target clue based on our topic and our investigation history,
+    chosen from the clue index.
+
+    Args:
+        roster: RosterEntry of the character investigating
+        search_tags: SearchTags that the clue must all have
+        omit_tags: SearchTags that the clue must not have
+        source_clue: A clue whose revelations and tags we look for instead
+
+    Returns:
+        A Clue the character hasn't discovered, or None.
     """
-    exact = Clue.objects.filter(
-        Q(allow_investigation=True) & ~Q(characters=roster)
-    ).exclude(name__icontains="placeholder")
-    if source_clue:
-        by_revelation = exact.filter(
-            revelations__in=source_clue.revelations.all()
-        ).annotate(cnt=Count("discoveries"))
-        tags = source_clue.search_tags.all()
-        if by_revelation:
-            tag_ids = [ob.id for ob in tags]
-            picker = WeightedPicker()
-            for clue in by_revelation:
-                tag_matches = clue.search_tags.filter(id__in=tag_ids).count()
-                picker.add_option(clue, clue.cnt + tag_matches)
-            return picker.pick()
-        exact = exact.filter(search_tags__in=source_clue.search_tags.all())
-    else:
-        exact = reduce(lambda x, y: x.filter(search_tags=y), search_tags, exact)
-        if omit_tags:
-            exclude_query = reduce(lambda x, y: x | Q(search_tags=y), omit_tags, Q())
-            exact = exact.exclude(exclude_query)
-    if exact:
-        picker = WeightedPicker()
-        exact = exact.annotate(cnt=Count("discoveries"))
-        for clue in exact:
-            picker.add_option(clue, clue.cnt)
-        return picker.pick()
+    return CLUE_INDEX.get_random_clue(
+        roster, search_tags, omit_tags=omit_tags, source_clue=source_clue
+    )
+
+
+def update_clue_search_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keeps the clue index in step as search tags are added to or removed from clues"""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    added = action == "post_add"
+    if not reverse:
+        if action == "pre_clear":
+            CLUE_INDEX.clear_tags(instance.id)
+        else:
+            CLUE_INDEX.update_tags(instance.id, pk_set, added)
+        return
+    # instance is a SearchTag, and pk_set holds clue IDs
+    if action == "pre_clear":
+        pk_set = list(CLUE_INDEX.tag_postings.get(instance.id, set()))
+    for clue_id in pk_set:
+        CLUE_INDEX.update_tags(clue_id, [instance.id], added)
+
+
+models.signals.m2m_changed.connect(
+    update_clue_search_tags, sender=Clue.search_tags.through
+)
 
 
 class Flashback(SharedMemoryModel):
@@ -2566,7 +2591,7 @@ class Flashback(SharedMemoryModel):
             inv.save()
         poster_msg = ""
         if poster:
-            poster.character.messages.num_flashbacks += 1
+            poster.character.messages.add_flashback()
             poster_msg = " by %s" % poster
         self.inform_all_but(
             poster, "New post%s on '%s' (flashback #%s)!" % (poster_msg, self, self.id)
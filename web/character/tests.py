@@ -1,6 +1,8 @@
 """
 Tests for the Character app. Mostly this will be investigations/clue stuff.
 """
+import json
+
 from mock import Mock, patch
 
 from django.test import Client
@@ -117,6 +119,47 @@ class InvestigationTests(ArxCommandTest):
         )
         self.call_cmd("222", ("No clue found by this ID: 222."))
 
+    def test_clue_index(self):
+        from web.character.clue_index import CLUE_INDEX
+
+        def get_postings():
+            return (
+                {key: val for key, val in CLUE_INDEX.tag_postings.items() if val},
+                {
+                    key: val
+                    for key, val in CLUE_INDEX.revelation_postings.items()
+                    if val
+                },
+                set(CLUE_INDEX.investigable),
+                {key: val.discoveries for key, val in CLUE_INDEX.clues.items()},
+            )
+
+        tag = SearchTag.objects.create(name="foo")
+        self.clue2.allow_investigation = True
+        self.clue2.save()
+        self.assertIsNone(CLUE_INDEX.get_random_clue(self.roster_entry, [tag]))
+        self.clue2.search_tags.add(tag)
+        self.assertEqual(
+            CLUE_INDEX.get_random_clue(self.roster_entry, [tag]), self.clue2
+        )
+        self.assertIsNone(
+            CLUE_INDEX.get_random_clue(self.roster_entry, [], omit_tags=[tag])
+        )
+        # clue2 is found through the revelation it shares with our clue
+        self.assertEqual(
+            CLUE_INDEX.get_random_clue(self.roster_entry, [], source_clue=self.clue),
+            self.clue2,
+        )
+        self.roster_entry.clue_discoveries.create(clue=self.clue2)
+        self.assertIsNone(CLUE_INDEX.get_random_clue(self.roster_entry, [tag]))
+        self.assertEqual(
+            CLUE_INDEX.get_clue_for_tags(self.roster_entry2, [tag.id]), self.clue2
+        )
+        self.assertEqual(CLUE_INDEX.clues[self.clue2.id].discoveries, 1)
+        incremental = get_postings()
+        CLUE_INDEX.rebuild()
+        self.assertEqual(get_postings(), incremental)
+
     def test_cmd_helpinvestigate(self):
         inv1 = self.roster_entry2.investigations.create()
         self.setup_cmd(investigation.CmdAssistInvestigation, self.char1)
@@ -491,6 +534,90 @@ class ViewTests(ArxTest):
         self.assertEqual(response.context["show_hidden"], True)
         self.client.logout()
 
+    def test_roster_list(self):
+        self.char2.item_data.concept = "Tester"
+        response = self.client.get(reverse("character:active_roster"))
+        self.assertEqual(response.status_code, 200)
+        rows = response.context["object_list"]
+        self.assertEqual([row.key for row in rows], ["Char", "Char2"])
+        self.assertEqual(rows[1].concept, "Tester")
+        self.assertEqual(rows[1].social_rank, self.char2.item_data.social_rank)
+        self.assertEqual(rows[1].roster_name, "Active")
+
+    def test_character_list_api(self):
+        url = reverse("character:character_list")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([ob["name"] for ob in data], ["Char", "Char2"])
+        # nothing's changed, so a client with the ETag gets a 304
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        # a page at a time, with a Link to the next page
+        response = self.client.get(url, {"limit": 1})
+        self.assertEqual(
+            [ob["name"] for ob in json.loads(b"".join(response.streaming_content))],
+            ["Char"],
+        )
+        next_url = response["Link"].split(">")[0][1:]
+        response = self.client.get(next_url)
+        self.assertEqual(
+            [ob["name"] for ob in json.loads(b"".join(response.streaming_content))],
+            ["Char2"],
+        )
+        self.assertFalse(response.has_header("Link"))
+        self.assertEqual(self.client.get(url, {"after": "bad"}).status_code, 400)
+
+    def test_character_list_api_sees_changes(self):
+        from evennia_extensions.character_extensions.models import (
+            Characteristic,
+            CharacteristicValue,
+        )
+
+        url = reverse("character:character_list")
+
+        def get_char2(etag):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(b"".join(response.streaming_content))
+            return response["ETag"], [ob for ob in data if ob["name"] == "Char2"][0]
+
+        etag, char2 = get_char2("")
+        self.char2.perm_desc = "A new desc."
+        etag, char2 = get_char2(etag)
+        self.assertEqual(char2["description"], "A new desc.")
+        characteristic, _ = Characteristic.objects.get_or_create(name="hair_color")
+        CharacteristicValue.objects.get_or_create(
+            characteristic=characteristic, value="red"
+        )
+        self.char2.item_data.hair_color = "red"
+        etag, char2 = get_char2(etag)
+        self.assertEqual(char2["hair_color"], "red")
+        self.dompc2.parents.add(self.dompc)
+        etag, char2 = get_char2(etag)
+        self.assertEqual(len(char2["relations"]["parents"]), 1)
+
+    def test_json_export_fragment_limit(self):
+        from evennia.objects.models import ObjectDB
+        from server.utils.json_export import JsonExport
+
+        class IdExport(JsonExport):
+            MAX_FRAGMENTS = 3
+
+            def serialize(self, obj):
+                return {"id": obj.id}
+
+        export = IdExport()
+        queryset = ObjectDB.objects.all()
+        ids = list(queryset.order_by("id").values_list("id", flat=True))
+        self.assertGreater(len(ids), 4)
+        export.get_fragments(queryset, ids[:3])
+        # two of these are cached, and the others fill the cache past its limit
+        chunk = [(None, obj_id) for obj_id in ids[1:5]]
+        data = json.loads("".join(export.stream(queryset, [chunk])))
+        self.assertEqual([ob["id"] for ob in data], ids[1:5])
+        self.assertEqual(sorted(export.fragments), ids[1:5])
+
     def test_view_flashbacks(self):
         response = self.client.get(
             reverse("character:list_flashbacks", kwargs={"object_id": self.char2.id})
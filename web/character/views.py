@@ -21,6 +21,9 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import ListView, DetailView, CreateView
 from evennia.objects.models import ObjectDB
 from evennia.utils.ansi import strip_ansi
+from evennia_extensions.character_extensions.roster_projection import (
+    get_character_rows,
+)
 
 from collections import OrderedDict
 
@@ -31,6 +34,7 @@ from typeclasses.characters import Character
 from world.dominion.models import Organization
 from world.dominion.plots.models import PlotAction, ActionSubmissionError
 
+from web.character.exports import CHARACTER_EXPORT
 from web.character.forms import (
     PhotoForm,
     PhotoDirectForm,
@@ -165,87 +169,9 @@ def journals(request, object_id):
     )
 
 
-API_CACHE = None
-
-
 def character_list(request):
     """View for API call from wikia"""
-
-    def get_relations(char):
-        """helper function for getting dict of character's relationships"""
-
-        def parse_name(relation):
-            """Helper function for outputting string display of character name"""
-            if relation.player:
-                char_ob = relation.player.char_ob
-                return "%s %s" % (char_ob.key, char_ob.item_data.family)
-            else:
-                return str(relation)
-
-        try:
-            dom = char.player_ob.Dominion
-            parents = []
-            uncles_aunts = []
-            for parent in dom.all_parents:
-                parents.append(parent)
-                for sibling in parent.siblings:
-                    uncles_aunts.append(sibling)
-                    for spouse in sibling.spouses.all():
-                        uncles_aunts.append(spouse)
-
-            unc_or_aunts = set(uncles_aunts)
-            relations = {
-                "parents": [parse_name(ob) for ob in parents],
-                "siblings": list(parse_name(ob) for ob in dom.siblings),
-                "uncles_aunts": list(parse_name(ob) for ob in unc_or_aunts),
-                "cousins": list(parse_name(ob) for ob in dom.cousins),
-            }
-            return relations
-        except AttributeError:
-            return {}
-
-    def get_dict(char):
-        """Helper function for getting dict of all relevant character information"""
-        character = {}
-        if char.player_ob.is_staff or char.db.npc:
-            return character
-        character = {
-            "name": char.key,
-            "social_rank": char.item_data.social_rank,
-            "fealty": str(char.item_data.fealty),
-            "house": char.item_data.family,
-            "relations": get_relations(char),
-            "gender": char.item_data.gender,
-            "age": char.item_data.age,
-            "religion": char.db.religion,
-            "vocation": char.item_data.vocation,
-            "height": char.item_data.height,
-            "hair_color": char.item_data.hair_color,
-            "eye_color": char.item_data.eye_color,
-            "skintone": char.item_data.skin_tone,
-            "description": char.perm_desc,
-            "personality": char.item_data.personality,
-            "background": char.item_data.background,
-            "status": char.roster.roster.name,
-            "longname": char.item_data.longname,
-        }
-        try:
-            if char.portrait:
-                character["image"] = char.portrait.image.url
-        except (Photo.DoesNotExist, AttributeError):
-            pass
-        return character
-
-    global API_CACHE
-    if not API_CACHE:
-        ret = map(
-            get_dict,
-            Character.objects.filter(
-                Q(roster__roster__name="Active") | Q(roster__roster__name="Available")
-            ),
-        )
-        API_CACHE = json.dumps(list(ret))
-    return HttpResponse(API_CACHE, content_type="application/json")
+    return CHARACTER_EXPORT.get_response(request)
 
 
 class RosterListView(ListView):
@@ -278,6 +204,8 @@ class RosterListView(ListView):
             traceback.print_exc()
         context["show_hidden"] = show_hidden
         context["roster_name"] = self.roster_name
+        # the item_data of the characters on this page, fetched together
+        context["object_list"] = get_character_rows(context["object_list"])
         context["page_title"] = "%s Roster" % self.roster_name
         return context
 
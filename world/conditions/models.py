@@ -24,6 +24,7 @@ from world.conditions.constants import (
 )
 from world.conditions.exceptions import TreatmentTooRecentError, TreatmentAltConflict
 from world.conditions.managers import HealthStatusQuerySet, TreatmentAttemptQuerySet
+from world.dominion.prestige_rankings import get_leaderboard, ACTIVE_ROSTERS
 from server.utils.arx_utils import CachedProperty
 from world.stat_checks.constants import (
     RECOVERY_CHECK,
@@ -318,15 +319,7 @@ class EffectTrigger(SharedMemoryModel):
             except AttributeError:
                 triggered = False
             else:
-                rank = None
-                try:
-                    rank = self._cached_prestige_rankings.index(owner)
-                except (AttributeError, ValueError):
-                    self.cache_prestige_rankings()
-                    try:
-                        rank = self._cached_prestige_rankings.index(owner)
-                    except ValueError:
-                        pass
+                rank = get_leaderboard(ACTIVE_ROSTERS).index(owner)
                 if rank is None or self.max_value < rank or rank < self.min_value:
                     triggered = False
         elif self.conditional_check == self.PRESTIGE_VALUE:
@@ -376,18 +369,6 @@ class EffectTrigger(SharedMemoryModel):
             return self.do_trigger_results(target)
         return False
 
-    @classmethod
-    def cache_prestige_rankings(cls):
-        """Creates a list of all the active Characters ranked by their prestige order. caches it in the class."""
-        from world.dominion.models import AssetOwner
-
-        qs = list(
-            AssetOwner.objects.filter(player__player__roster__roster__name="Active")
-        )
-        cls._cached_prestige_rankings = sorted(
-            qs, key=lambda x: x.prestige, reverse=True
-        )
-
     def do_trigger_results(self, target):
         """
         Process the results of a successful trigger
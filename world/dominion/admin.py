@@ -929,6 +929,15 @@ class OrdersAdmin(DomAdmin):
         "target_character",
     )
     list_filter = ("complete",)
+    readonly_fields = ("battle_forecast",)
+
+    @staticmethod
+    def battle_forecast(obj):
+        """Outcomes of the battle against the target domain, fought 100 times"""
+        forecast = obj.forecast_battle() if obj.pk else None
+        if not forecast:
+            return "No battle"
+        return forecast.display()
 
 
 class RegionFilter(admin.SimpleListFilter):
@@ -6,12 +6,30 @@ to solve. We'll try for a more realistic approach in that units will
 rarely fight until one side is completely annihilated - in general, units
 will fight until they rout, and will often lose quite a few troops who
 desert during the retreat, while others are killed in retreating.
+
+Each Battle rolls its dice from its own Random, which its units share, so a
+battle given the same seed is fought the same way every time. Rounds are
+fought in a loop rather than by each round calling the next, and the battle
+log is only formatted when something is listening to it.
+
+simulate_battle fights a battle many times over as a SimulatedBattle, which
+copies the stats of units fetched once rather than fetching them for every
+battle, and doesn't save any losses or send reports. The BattleForecast it
+returns gives how often each side won, and how long the battles lasted and
+how many troops each side lost, for staff to preview the orders of armies.
 """
+from collections import Counter
+import copy
+import logging
+import operator
+import random
+import statistics
+import traceback
+
 from django.conf import settings
 from world.dominion.combat_grid import CombatGrid
 from world.dominion.reports import BattleReport
-import operator
-import traceback
+from world.dominion.unit_types import get_unit_stats
 from server.utils.arx_utils import setup_log
 
 
@@ -22,9 +40,21 @@ DEFENDER_FRONT = (0, 5, 0)
 DEFENDER_BACK = (0, 6, 0)
 
 
-def get_combat(unit_obj, grid):
-    unit = unit_obj.stats
-    unit.grid = grid
+# simulated battles are fought quietly
+SIMULATION_LOG = logging.getLogger("world.dominion.battle.simulation")
+SIMULATION_LOG.addHandler(logging.NullHandler())
+SIMULATION_LOG.propagate = False
+SIMULATION_LOG.setLevel(logging.WARNING)
+
+
+def get_combat(unit_obj, grid, rng=None):
+    """
+    Gets fresh stats for a unit to fight with, rather than the stats cached
+    on the unit, which would carry their damage from one battle to the next.
+    """
+    unit = get_unit_stats(unit_obj, grid)
+    if rng:
+        unit.rng = rng
     return unit
 
 
@@ -81,6 +111,8 @@ class UnitFormation(Formation):
         self.routed_units = []
         # units storming enemy castle
         self.storming_units = []
+        # our active units by value, sorted whenever the enemy acquires targets
+        self.ranged_targets = None
         self.log = battle.log
         self.add_units(units)
         self._castle = None
@@ -105,7 +137,7 @@ class UnitFormation(Formation):
     def add_unit(self, unit):
         unit.formation = self
         unit.log = self.log
-        if unit.ranged:
+        if unit.range:
             self.back_rank.append(unit)
             self.grid.add_actor(unit, self.back_pos)
         else:
@@ -113,9 +145,14 @@ class UnitFormation(Formation):
             self.grid.add_actor(unit, self.front_pos)
 
     def get_targs_for_units(self, enemy_formation):
+        enemy_formation.sort_targets()
         for unit in self:
             unit.acquire_target(enemy_formation)
 
+    def sort_targets(self):
+        """Sorts our active units once for every ranged attacker to choose from"""
+        self.ranged_targets = self.sort_ranks(self.front_rank + self.back_rank)
+
     def get_target_from_formation_for_attacker(self, attacker):
         """
         We acquire a target if one exists. If the attacker is ranged,
@@ -155,8 +192,9 @@ class UnitFormation(Formation):
         #    units_at_pos.sort(key=operator.attrgetter('value'))
         #    units_at_pos[0]
         if attacker.range:
-            all_units = self.sort_ranks(self.front_rank + self.back_rank)
-            return all_units[0]
+            if self.ranged_targets is None:
+                self.sort_targets()
+            return self.ranged_targets[0]
         if self.front_rank:
             return self.front_rank[0]
         if self.back_rank:
@@ -205,7 +243,7 @@ class UnitFormation(Formation):
             unit.rally_check()
         rallied = [unit for unit in self.routed_units if not unit.routed]
         for unit in rallied:
-            self.routed_units.remove(rallied)
+            self.routed_units.remove(unit)
             self.add_unit(unit)
 
     def cleanup(self):
@@ -300,8 +338,12 @@ class Battle(object):
         pc_def=None,
         atk_domain=None,
         def_domain=None,
+        seed=None,
     ):
-        self.log = setup_log(settings.BATTLE_LOG)
+        self.log = self.get_log()
+        self.rng = random.Random(seed)
+        self.grid = CombatGrid()
+        self.castle = None
         self.week = week
         self.armies_atk = []
         self.armies_def = []
@@ -315,13 +357,19 @@ class Battle(object):
         self.formation_def = None
         self.domain_atk = atk_domain
         self.domain_def = def_domain
-        self.log.info("Attacker: %s\tDefender: %s" % (self.domain_atk, self.domain_def))
+        self.log.info("Attacker: %s\tDefender: %s", self.domain_atk, self.domain_def)
         for army in armies_atk:
             self.add_army(attacker=army)
         for army in armies_def:
             self.add_army(defender=army)
-        self.grid = CombatGrid()
-        self.castle = None
+
+    @staticmethod
+    def get_log():
+        return setup_log(settings.BATTLE_LOG)
+
+    def get_units(self, army):
+        """Gets the stats of an army's units to fight with"""
+        return [get_combat(unit, self.grid, self.rng) for unit in army.units.all()]
 
     def get_name(self, attacker=True):
         armyname = None
@@ -350,11 +398,15 @@ class Battle(object):
     def_name = property(get_def_name)
 
     def get_atk_units(self):
+        if self.formation_atk is None:
+            return set()
         return self.formation_atk.all_units
 
     atk_units = property(get_atk_units)
 
     def get_def_units(self):
+        if self.formation_def is None:
+            return set()
         return self.formation_def.all_units
 
     def_units = property(get_def_units)
@@ -367,14 +419,14 @@ class Battle(object):
         """
         if attacker:
             self.armies_atk.append(attacker)
-            units = [get_combat(unit, self.grid) for unit in attacker.units.all()]
+            units = self.get_units(attacker)
             if not self.formation_atk:
                 self.formation_atk = UnitFormation(
                     units, self, ATTACKER_FRONT, ATTACKER_BACK
                 )
                 self.formation_atk.name = "Attacker"
                 self.log.info(
-                    "Attacker created with %s units." % str(len(self.formation_atk))
+                    "Attacker created with %s units.", len(self.formation_atk)
                 )
             else:
                 self.formation_atk.add_units(units)
@@ -383,24 +435,27 @@ class Battle(object):
             # if the defender Army model has a castle, we add it to the Battle
             if not self.castle and defender.castle:
                 self.castle = defender.castle
-            units = [get_combat(unit, self.grid) for unit in defender.units.all()]
+            units = self.get_units(defender)
             if not self.formation_def:
                 self.formation_def = UnitFormation(
                     units, self, DEFENDER_FRONT, DEFENDER_BACK
                 )
                 self.formation_def.name = "Defender"
                 self.log.info(
-                    "Defender created with %s units." % str(len(self.formation_def))
+                    "Defender created with %s units.", len(self.formation_def)
                 )
             else:
                 self.formation_def.add_units(units)
             # if we got a castle earlier from defender, add it to the formation
             if self.castle and not self.formation_def.castle:
                 self.formation_def.castle = self.castle
-                self.log.info("Castle added: %s" % str(self.castle))
+                self.log.info("Castle added: %s", self.castle)
 
     def begin_combat(self):
-        self.pre_round()
+        while not self.ending:
+            self.pre_round()
+            if not self.ending:
+                self.combat_round()
         return self.result
 
     def pre_round(self):
@@ -412,7 +467,7 @@ class Battle(object):
         with the combat round.
         """
         self.rounds += 1
-        self.log.info("Round %s" % self.rounds)
+        self.log.info("Round %s", self.rounds)
         if self.rounds > 30:
             self.end_combat()
             return
@@ -425,7 +480,6 @@ class Battle(object):
         # for defenders: try to rally units who are routing then get targs
         self.formation_def.check_rally()
         self.formation_def.get_targs_for_units(self.formation_atk)
-        self.combat_round()
 
     def check_victory(self):
         """
@@ -436,12 +490,12 @@ class Battle(object):
         if not self.formation_atk and self.formation_def:
             self.result = Battle.DEF_WIN
             self.victor = self.def_name
-            self.log.info("Victor declared: %s" % str(self.victor))
+            self.log.info("Victor declared: %s", self.victor)
             return True
         if self.formation_atk and not self.formation_def:
             self.result = Battle.ATK_WIN
             self.victor = self.atk_name
-            self.log.info("Victor declared: %s" % str(self.victor))
+            self.log.info("Victor declared: %s", self.victor)
             return True
         if not self.formation_atk and not self.formation_def:
             self.log.info("Both formations empty. Ending combat with no victor.")
@@ -454,9 +508,6 @@ class Battle(object):
             return
         self.movement_phase()
         self.melee_phase()
-        if self.ending:
-            return
-        self.pre_round()
 
     def ranged_phase(self):
         self.formation_atk.ranged_attacks()
@@ -508,3 +559,118 @@ class Battle(object):
                         "ERROR: Could not generate BattleReport for defender."
                     )
         self.ending = True
+
+
+class SimulatedBattle(Battle):
+    """
+    A battle fought with copies of units' stats, which doesn't save its
+    losses or report its result.
+    """
+
+    def __init__(self, prototypes, *args, **kwargs):
+        # the fresh stats of each army's units, by army ID
+        self.prototypes = prototypes
+        super(SimulatedBattle, self).__init__(*args, **kwargs)
+
+    @staticmethod
+    def get_log():
+        return SIMULATION_LOG
+
+    def get_units(self, army):
+        units = []
+        for prototype in self.prototypes[army.id]:
+            unit = copy.copy(prototype)
+            unit.grid = self.grid
+            unit.rng = self.rng
+            units.append(unit)
+        return units
+
+    def end_combat(self):
+        self.ending = True
+
+
+class BattleForecast(object):
+    """The outcomes of a battle fought many times over"""
+
+    def __init__(self):
+        self.results = Counter()
+        self.rounds = []
+        self.atk_losses = []
+        self.def_losses = []
+
+    @property
+    def trials(self):
+        return len(self.rounds)
+
+    def add_battle(self, battle):
+        """Records the outcome of a battle"""
+        self.results[battle.result] += 1
+        self.rounds.append(battle.rounds)
+        self.atk_losses.append(sum(unit.losses for unit in battle.atk_units))
+        self.def_losses.append(sum(unit.losses for unit in battle.def_units))
+
+    def chance(self, result):
+        """The percentage of battles that ended with a result"""
+        if not self.trials:
+            return 0
+        return 100 * self.results[result] // self.trials
+
+    @staticmethod
+    def display_spread(values):
+        if not values:
+            return "0"
+        return "%s (%s-%s)" % (statistics.median_low(values), min(values), max(values))
+
+    def display(self):
+        return (
+            "Attacker wins %s%%, Defender wins %s%%, no victor %s%% of %s battles. "
+            "Rounds: %s. Attacker losses: %s. Defender losses: %s."
+            % (
+                self.chance(Battle.ATK_WIN),
+                self.chance(Battle.DEF_WIN),
+                self.chance(None),
+                self.trials,
+                self.display_spread(self.rounds),
+                self.display_spread(self.atk_losses),
+                self.display_spread(self.def_losses),
+            )
+        )
+
+
+def simulate_battle(armies_atk, armies_def, trials=100, seed=None, **kwargs):
+    """
+    Fights a battle many times over without saving anything.
+
+        Args:
+            armies_atk (list): The attacking Armies
+            armies_def (list): The defending Armies
+            trials (int): How many times to fight the battle
+            seed: Seed for the dice, so that forecasts can be repeated
+            **kwargs: Other arguments for the Battles, like atk_domain
+
+        Returns:
+            A BattleForecast of the results.
+    """
+    armies_atk = list(armies_atk)
+    armies_def = list(armies_def)
+    prototypes = {
+        army.id: [
+            get_unit_stats(unit)
+            for unit in army.units.select_related("commander", "origin")
+        ]
+        for army in armies_atk + armies_def
+    }
+    rng = random.Random(seed)
+    forecast = BattleForecast()
+    for _ in range(trials):
+        battle = SimulatedBattle(
+            prototypes,
+            armies_atk,
+            armies_def,
+            week=0,
+            seed=rng.getrandbits(32),
+            **kwargs
+        )
+        battle.begin_combat()
+        forecast.add_battle(battle)
+    return forecast
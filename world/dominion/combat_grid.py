@@ -6,18 +6,18 @@ import traceback
 
 class CombatGrid(object):
     def __init__(self):
-        # dictionary of 3-tuple of coords to list of actors
-        self.actors = {(0, 0, 0): []}
+        # dictionary of 3-tuple of coords to set of actors
+        self.actors = {(0, 0, 0): set()}
         # set of squares that provide cover
         self.cover = {}
 
     def move_actor(self, actor, newpos):
         old = actor.position
-        self.actors[old].remove(actor)
-        self.addactor(actor, newpos)
+        self.actors.get(old, set()).discard(actor)
+        self.add_actor(actor, newpos)
 
     def get_actors(self, x=0, y=0, z=0):
-        return self.actors.get((x, y, z), [])
+        return self.actors.get((x, y, z), set())
 
     def check_cover(self, x=0, y=0, z=0):
         return self.cover.get((x, y, z), None)
@@ -32,9 +32,7 @@ class CombatGrid(object):
             newpos = actor.position
         else:
             actor.position = newpos
-        if not self.actors.get(newpos, None):
-            self.actors[newpos] = []
-        self.actors[newpos].append(actor)
+        self.actors.setdefault(newpos, set()).add(actor)
 
     # to do - AE effects from radius, etc
 
@@ -114,14 +112,16 @@ class PositionActor(object):
         self.move_toward_position(targ, x, y, z, max_dist)
 
     def move_toward_position(self, targ, x=0, y=0, z=0, max_dist=10):
+        """
+        Moves up to max_dist toward a position. targ is the actor at that
+        position, if any, and is only kept for the sake of old callers.
+        """
         dist = self.check_distance_to_position(x, y, z)
         if dist < max_dist:
-            z = self.z_pos
-            if self.flying:
-                z = targ.z_pos
-            self.move(x=targ.x_pos, y=targ.y_pos, z=z)
+            if not self.flying:
+                z = self.z_pos
+            self.move(x=x, y=y, z=z)
             return
-        x, y, z = targ.position
         new_x = self.get_coord(self.x_pos, x, max_dist)
         new_y = self.get_coord(self.y_pos, y, max_dist)
         new_z = self.z_pos
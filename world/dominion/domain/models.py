@@ -6,7 +6,7 @@ from django.core.exceptions import ObjectDoesNotExist
 
 from server.utils.arx_utils import CachedPropertiesMixin, CachedProperty
 from world.dominion import unit_types, unit_constants
-from world.dominion.battle import Battle
+from world.dominion.battle import Battle, simulate_battle
 
 import traceback
 
@@ -493,7 +493,7 @@ class Army(SharedMemoryModel):
             if tdomain and tdomain.ruler and tdomain.ruler.castellan:
                 defpc = tdomain.ruler.castellan
             battle = Battle(
-                armies_atk=self,
+                armies_atk=[self],
                 armies_def=e_armies,
                 week=week,
                 pc_atk=atkpc,
@@ -755,6 +755,33 @@ class Orders(SharedMemoryModel):
             "%s %s" % (ob.quantity, ob.type) for ob in self.army.units.all()
         )
 
+    def forecast_battle(self, trials=100, seed=None):
+        """
+        Fights the battle our army would have with the armies of our target
+        domain many times over, without saving anything.
+
+            Args:
+                trials (int): How many times to fight the battle
+                seed: Seed for the dice, so that forecasts can be repeated
+
+            Returns:
+                A BattleForecast, or None if there's no army or target domain.
+        """
+        domain = self.target_domain
+        if not self.army or not domain:
+            return None
+        defenders = domain.armies.all()
+        if domain.land:
+            defenders = defenders.filter(land_id=domain.land.id)
+        return simulate_battle(
+            [self.army],
+            defenders,
+            trials,
+            seed,
+            atk_domain=self.army.domain,
+            def_domain=domain,
+        )
+
 
 class UnitTypeInfo(models.Model):
     """Abstract base class with information about military units"""
@@ -0,0 +1,240 @@
+"""
+The weekly Dominion economy pass. Rather than having each AssetOwner walk its
+own holdings, agents, incomes and debts with separate queries and saving itself
+a few times along the way, WeeklyEconomy gathers everything it needs for a
+batch of owners up front, adjusts vaults in memory, and then writes all the
+changed vaults back at the end.
+
+Since our models are SharedMemoryModels, the AssetOwner instances that the
+engine adjusts are the same instances that domains, armies and lifestyle
+payments see, so any of those that save an owner mid-pass simply save the
+in-memory balance we've been accumulating.
+"""
+import time
+import traceback
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import F
+
+from world.dominion.domain.models import Domain
+from world.dominion.models import (
+    AssetOwner,
+    Agent,
+    AccountTransaction,
+    PRESTIGE_DECAY_AMOUNT,
+)
+from world.dominion.prestige_graph import PRESTIGE_GRAPH
+from world.dominion.reports import WeeklyReport
+
+# number of rows django will write per UPDATE statement in bulk_update
+BULK_BATCH_SIZE = 500
+
+
+class WeeklyEconomy(object):
+    """
+    Processes the weekly economy for a set of AssetOwners. Call decay_prestige
+    for the prestige decay of every owner, then process with the owners that
+    should receive their weekly income. Time spent in each phase is recorded
+    in self.timings.
+    """
+
+    def __init__(self, week, inform_creator=None):
+        self.week = week
+        self.inform_creator = inform_creator
+        self.timings = OrderedDict()
+        self.holdings = defaultdict(list)
+        self.agent_costs = defaultdict(int)
+        self.incomes = defaultdict(list)
+        self.debts = defaultdict(list)
+        # AssetOwners whose vaults we've changed without saving, by id
+        self.changed_vaults = {}
+
+    @contextmanager
+    def timed(self, phase):
+        """Records how long the wrapped block took under the name of the phase"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.timings[phase] = self.timings.get(phase, 0) + time.time() - start
+
+    def run(self, owners):
+        """
+        Runs the full weekly pass: decays prestige for everyone, then does the
+        weekly income for the given owners.
+
+            Args:
+                owners: queryset or list of AssetOwners to adjust
+
+            Returns:
+                A dict of AssetOwner ID to the amount their vault changed.
+        """
+        self.decay_prestige()
+        return self.process(owners)
+
+    def decay_prestige(self, owners=None):
+        """
+        Decreases the fame of every AssetOwner for the week in a single pass,
+        rather than saving each of them individually.
+        """
+        with self.timed("prestige"):
+            if owners is None:
+                owners = AssetOwner.objects.all()
+            changed = []
+            for owner in owners:
+                decay = int(owner.fame * PRESTIGE_DECAY_AMOUNT)
+                if decay:
+                    owner.fame -= decay
+                    changed.append(owner)
+            with transaction.atomic():
+                AssetOwner.objects.bulk_update(
+                    changed, ["fame"], batch_size=BULK_BATCH_SIZE
+                )
+            for owner in changed:
+                owner.clear_cached_properties()
+            # everyone's prestige has shifted, so it's recomputed on next use
+            PRESTIGE_GRAPH.clear()
+
+    def process(self, owners):
+        """
+        Does the weekly adjustment of income for each owner, generating their
+        WeeklyReport just as if they had each been processed individually.
+
+            Args:
+                owners: queryset or list of AssetOwners to adjust
+
+            Returns:
+                A dict of AssetOwner ID to the amount their vault changed.
+        """
+        owners = list(owners)
+        with self.timed("prefetch"):
+            self.prefetch(owners)
+        results = {}
+        with self.timed("adjustments"):
+            for owner in owners:
+                try:
+                    results[owner.id] = self.adjust_owner(owner)
+                except Exception as err:
+                    traceback.print_exc()
+                    print("Error in %s's weekly adjustment: %s" % (owner, err))
+        with self.timed("save"):
+            self.save_vaults()
+        return results
+
+    def prefetch(self, owners):
+        """Loads the holdings, agents and transactions for all our owners in bulk"""
+        ids = [ob.id for ob in owners]
+        for domain in Domain.objects.filter(ruler__house_id__in=ids).select_related(
+            "ruler"
+        ):
+            self.holdings[domain.ruler.house_id].append(domain)
+        for agent in Agent.objects.filter(owner_id__in=ids):
+            self.agent_costs[agent.owner_id] += agent.cost
+        transactions = AccountTransaction.objects.filter(do_weekly=True).select_related(
+            "sender__player",
+            "sender__organization_owner",
+            "receiver__player",
+            "receiver__organization_owner",
+        )
+        for income in transactions.filter(receiver_id__in=ids).order_by("id"):
+            self.incomes[income.receiver_id].append(income)
+        for debt in transactions.filter(
+            sender_id__in=ids, receiver__isnull=True
+        ).order_by("id"):
+            self.debts[debt.sender_id].append(debt)
+
+    def adjust_owner(self, owner):
+        """
+        Adjusts the vault of a single owner from their holdings, agents and
+        transactions, sending them their WeeklyReport.
+
+            Args:
+                owner (AssetOwner): The owner being adjusted
+
+            Returns:
+                The amount their vault changed.
+        """
+        amount = 0
+        report = None
+        npc = True
+        inform_target = owner.inform_target
+        if inform_target and inform_target.can_receive_informs:
+            report = WeeklyReport(inform_target, self.week, self.inform_creator)
+            npc = False
+        for domain in self.holdings[owner.id]:
+            amount += domain.do_weekly_adjustment(self.week, report, npc)
+        amount -= self.agent_costs[owner.id]
+        for income in self.incomes[owner.id]:
+            amount += self.process_payment(income, report)
+        if owner.organization_owner:
+            # record organization's income
+            amount += owner.organization_owner.amount
+        # debts that won't be processed by someone else's income, since they have no receiver
+        for debt in self.debts[owner.id]:
+            amount -= debt.amount
+        self.adjust_vault(owner, amount)
+        player = owner.player
+        if (
+            player
+            and player.player
+            and hasattr(player.player, "roster")
+            and player.player.roster.roster.name == "Active"
+        ):
+            player.pay_lifestyle(report)
+        if report:
+            report.record_income(owner.vault, amount)
+            report.send_report()
+        return amount
+
+    def process_payment(self, income, report=None):
+        """
+        Pays an income from its sender's in-memory vault, the batched equivalent
+        of AccountTransaction.process_payment.
+
+            Returns:
+                The amount paid, or 0 if the sender couldn't afford it.
+        """
+        sender = income.sender
+        if not sender:
+            return income.weekly_amount
+        if sender.vault >= income.weekly_amount:
+            if report:
+                report.add_payment(income)
+            self.adjust_vault(sender, -income.weekly_amount)
+            return income.weekly_amount
+        if report:
+            report.payment_fail(income)
+        return 0
+
+    def adjust_vault(self, owner, amount):
+        """Changes an owner's vault in memory, to be written in save_vaults"""
+        owner.vault += amount
+        self.changed_vaults[owner.id] = owner
+
+    def save_vaults(self):
+        """Writes every vault we've changed back to the database in one transaction"""
+        changed = list(self.changed_vaults.values())
+        with transaction.atomic():
+            AssetOwner.objects.bulk_update(
+                changed, ["vault"], batch_size=BULK_BATCH_SIZE
+            )
+        for owner in changed:
+            owner.clear_cached_properties()
+        self.changed_vaults = {}
+
+    @staticmethod
+    def decrement_transactions():
+        """Counts down limited transactions and removes those that are finished"""
+        with transaction.atomic():
+            AccountTransaction.objects.filter(repetitions_left__gt=0).update(
+                repetitions_left=F("repetitions_left") - 1
+            )
+            AccountTransaction.objects.filter(repetitions_left=0).delete()
+
+    def display_timings(self):
+        """Returns a string of how long each phase took"""
+        return ", ".join(
+            "%s: %.2fs" % (phase, seconds) for phase, seconds in self.timings.items()
+        )
@@ -0,0 +1,209 @@
+"""
+Charts of who owes fealty to whom. The fealty chart views used to walk down
+the vassals of the Crown one at a time, with queries for each vassal's house
+and its living members, and ran graphviz over the result inside the request
+whenever they were asked to regenerate it.
+
+FealtyChart reads every ruler with their liege and house, and the rank 1
+members of every house that has living members, in two queries, and builds
+the tree of vassals in memory. The graph is only rendered with graphviz
+again when its source has changed, and that happens in the background when
+the chart is more than REFRESH_INTERVAL old or staff ask for it, so
+requests are served the last chart we rendered. FEALTY_CHARTS holds the
+chart of player houses and the full chart with NPC houses.
+"""
+import hashlib
+import os.path
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+from graphviz import Graph
+
+from world.dominion.domain.models import Ruler
+from world.dominion.models import Member
+
+# the organization at the top of every chart
+CROWN_ID = 145
+
+NODE_COLORS = {
+    "Ruling Prince": "lightblue",
+    "Prince": "lightblue",
+    "Archduke": "lightblue",
+    "Ruling Duke": "purple",
+    "Duke": "purple",
+    "Ruling Marquis": "red",
+    "Marquis": "red",
+    "Marquis, Count of the March": "red",
+    "Margrave": "red",
+    "Lord of the March": "red",
+    "Truespeaker": "red",
+    "Ruling Count": "yellow",
+    "Count of the March": "yellow",
+    "Count": "yellow",
+    "Ruling Baron": "green",
+    "Baron": "green",
+}
+
+
+class HouseNode(object):
+    """A ruling house in the chart"""
+
+    __slots__ = ("ruler_id", "org_id", "org_name", "title", "leader", "has_members")
+
+    def __init__(self, ruler_id, org_id, org_name, title):
+        self.ruler_id = ruler_id
+        self.org_id = org_id
+        self.org_name = org_name
+        self.title = title
+        # the name of their first living rank 1 member
+        self.leader = None
+        self.has_members = False
+
+    @property
+    def name(self):
+        if self.leader:
+            return self.org_name + "\n(" + self.leader.title() + ")"
+        return self.org_name
+
+
+class FealtyChart(object):
+    """A chart of the vassals below the Crown, rendered as a png"""
+
+    REFRESH_INTERVAL = timedelta(minutes=30)
+
+    def __init__(self, filename, include_npcs=False):
+        self.filename = filename
+        self.include_npcs = include_npcs
+        self.source_hash = None
+        self.last_refreshed = None
+        self.refreshing = False
+
+    @property
+    def path(self):
+        return self.filename + ".png"
+
+    @property
+    def is_stale(self):
+        """Whether it's time to check for changes to fealties"""
+        return (
+            not self.last_refreshed
+            or datetime.now() - self.last_refreshed >= self.REFRESH_INTERVAL
+        )
+
+    @staticmethod
+    def get_houses():
+        """
+        Gets every ruler's house, with the names of the rank 1 members of
+        those with living members.
+
+            Returns:
+                A dict of ruler ID to HouseNode, and a dict of liege ruler ID
+                to the IDs of their vassals.
+        """
+        houses = {}
+        vassals = defaultdict(list)
+        by_org = {}
+        for ruler_id, liege_id, org_id, name, title in Ruler.objects.filter(
+            house__organization_owner__isnull=False
+        ).values_list(
+            "id",
+            "liege_id",
+            "house__organization_owner_id",
+            "house__organization_owner__name",
+            "house__organization_owner__rank_1_male",
+        ):
+            houses[ruler_id] = HouseNode(ruler_id, org_id, name, title)
+            by_org[org_id] = houses[ruler_id]
+            if liege_id:
+                vassals[liege_id].append(ruler_id)
+        # living members are those in the active or available rosters who aren't deguilded
+        members = (
+            Member.objects.filter(organization_id__in=list(by_org), deguilded=False)
+            .filter(
+                Q(player__player__roster__roster__name="Active")
+                | Q(player__player__roster__roster__name="Available")
+            )
+            .order_by("id")
+            .values_list("organization_id", "rank", "player__player__username")
+        )
+        for org_id, rank, username in members:
+            house = by_org[org_id]
+            if rank == 1 and not house.leader:
+                house.leader = username
+            house.has_members = True
+        return houses, vassals
+
+    def get_source(self):
+        """Builds the graph of vassals and gets its graphviz source"""
+        graph = Graph(
+            "fealties",
+            format="png",
+            engine="dot",
+            graph_attr=(
+                ("overlap", "prism"),
+                ("spline", "true"),
+                ("concentrate", "true"),
+            ),
+        )
+        houses, vassals = self.get_houses()
+        crown = [ob for ob in houses.values() if ob.org_id == CROWN_ID]
+        if not crown:
+            return None
+        visited = set()
+        stack = [crown[0]]
+        while stack:
+            liege = stack.pop()
+            if liege.ruler_id in visited:
+                continue
+            visited.add(liege.ruler_id)
+            for vassal in (houses[ob] for ob in vassals.get(liege.ruler_id, [])):
+                if not vassal.has_members and not self.include_npcs:
+                    continue
+                node_color = NODE_COLORS.get(vassal.title)
+                if node_color:
+                    graph.node(vassal.name, style="filled", color=node_color)
+                graph.edge(liege.name, vassal.name)
+                stack.append(vassal)
+        return graph
+
+    def render(self):
+        """Renders the chart if the graph has changed since we last did"""
+        graph = self.get_source()
+        self.last_refreshed = datetime.now()
+        if graph is None:
+            return
+        source_hash = hashlib.md5(graph.source.encode("utf-8")).hexdigest()
+        if source_hash != self.source_hash or not os.path.exists(self.path):
+            graph.render(self.filename, cleanup=True)
+            self.source_hash = source_hash
+
+    def render_in_background(self):
+        """Renders the chart in a thread, if we aren't already"""
+        from evennia.utils.utils import run_async
+
+        if self.refreshing:
+            return
+
+        def finished(*args, **kwargs):
+            self.refreshing = False
+
+        self.refreshing = True
+        run_async(self.render, at_return=finished, at_err=finished)
+
+    def get_chart(self, regenerate=False):
+        """
+        Gets the path of the chart to serve, rendering it now if there isn't
+        one, or in the background if it's stale or we were asked to.
+        """
+        if not os.path.exists(self.path):
+            self.render()
+        elif regenerate or self.is_stale:
+            self.render_in_background()
+        return self.path
+
+
+FEALTY_CHARTS = {
+    False: FealtyChart("world/dominion/fealty/fealty_graph", include_npcs=False),
+    True: FealtyChart("world/dominion/fealty/fealty_graph_full", include_npcs=True),
+}
@@ -0,0 +1,275 @@
+"""
+Family relationships between PlayerOrNpcs. Someone's parents are their parents
+plus their parents' spouses, and grandparents, cousins and the like follow from
+there, which as queries meant six-way OR'd joins through parents, children and
+spouses for every relation, with more queries per parent, sibling and child to
+show a family tree.
+
+GenealogyGraph loads the parent and spouse tables once as adjacency sets and
+answers every family relation by walking them in memory, matching the queries
+they replace. Changes to anyone's parents, children or spouses update the
+graph as they're made, and since a family tree rarely changes behind our
+back, a daily rebuild is enough to catch the ones made outside of them.
+GENEALOGY is the shared instance used by PlayerOrNpc.
+"""
+from collections import defaultdict
+
+from server.utils.periodic import PeriodicallyRebuilt
+
+# the relations shown in a family tree, in the order we display them
+FAMILY_RELATIONS = (
+    ("greatgrandparents", "Greatgrandparents"),
+    ("grandparents", "Grandparents"),
+    ("parents", "Parents"),
+    ("uncles_aunts", "Uncles/Aunts"),
+    ("spouses", "Spouses"),
+    ("siblings", "Siblings"),
+    ("children", "Children"),
+    ("nephews_nieces", "Nephews/Nieces"),
+    ("cousins", "Cousins"),
+    ("second_cousins", "Second Cousins"),
+    ("grandchildren", "Grandchildren"),
+)
+
+
+class GenealogyGraph(PeriodicallyRebuilt):
+    """Parents, children and spouses of every PlayerOrNpc, by ID"""
+
+    def clear(self):
+        """Empties the graph, which will be rebuilt on the next lookup"""
+        super().clear()
+        self.parent_ids = defaultdict(set)
+        self.child_ids = defaultdict(set)
+        self.spouse_ids = defaultdict(set)
+
+    def rebuild(self):
+        """Loads every parent and spouse edge"""
+        from world.dominion.models import PlayerOrNpc
+
+        self.clear()
+        for child_id, parent_id in PlayerOrNpc.parents.through.objects.values_list(
+            "from_playerornpc_id", "to_playerornpc_id"
+        ):
+            self.add_parent(child_id, parent_id)
+        for first_id, second_id in PlayerOrNpc.spouses.through.objects.values_list(
+            "from_playerornpc_id", "to_playerornpc_id"
+        ):
+            self.add_spouse(first_id, second_id)
+        self.mark_built()
+
+    # ---- keeping the graph up to date -----------------------------------
+
+    def add_parent(self, child_id, parent_id):
+        """Records parent_id as a parent of child_id"""
+        self.parent_ids[child_id].add(parent_id)
+        self.child_ids[parent_id].add(child_id)
+
+    def remove_parent(self, child_id, parent_id):
+        """Records parent_id no longer being a parent of child_id"""
+        self.parent_ids[child_id].discard(parent_id)
+        self.child_ids[parent_id].discard(child_id)
+
+    def add_spouse(self, first_id, second_id):
+        """Records two people being married"""
+        self.spouse_ids[first_id].add(second_id)
+        self.spouse_ids[second_id].add(first_id)
+
+    def remove_spouse(self, first_id, second_id):
+        """Records two people no longer being married"""
+        self.spouse_ids[first_id].discard(second_id)
+        self.spouse_ids[second_id].discard(first_id)
+
+    def remove_person(self, person_id):
+        """Removes someone who's been deleted, along with all their edges"""
+        for parent_id in self.parent_ids.pop(person_id, set()):
+            self.child_ids[parent_id].discard(person_id)
+        for child_id in self.child_ids.pop(person_id, set()):
+            self.parent_ids[child_id].discard(person_id)
+        for spouse_id in self.spouse_ids.pop(person_id, set()):
+            self.spouse_ids[spouse_id].discard(person_id)
+
+    # ---- walking the graph ----------------------------------------------
+
+    @staticmethod
+    def _step(ids, edges):
+        """Everyone one edge away from any of ids"""
+        found = set()
+        for person_id in ids:
+            found |= edges.get(person_id, set())
+        return found
+
+    def _parents_of(self, ids):
+        return self._step(ids, self.parent_ids)
+
+    def _children_of(self, ids):
+        return self._step(ids, self.child_ids)
+
+    def _spouses_of(self, ids):
+        return self._step(ids, self.spouse_ids)
+
+    def _all_parents_of(self, ids):
+        """Parents of any of ids, and their parents' spouses"""
+        parents = self._parents_of(ids)
+        return parents | self._spouses_of(parents)
+
+    def parents(self, person_id):
+        """IDs of someone's parents"""
+        self.ensure_built()
+        return set(self.parent_ids.get(person_id, set()))
+
+    def children(self, person_id):
+        """IDs of someone's children"""
+        self.ensure_built()
+        return set(self.child_ids.get(person_id, set()))
+
+    def spouses(self, person_id):
+        """IDs of someone's spouses"""
+        self.ensure_built()
+        return set(self.spouse_ids.get(person_id, set()))
+
+    def all_parents(self, person_id):
+        """IDs of someone's parents and their parents' spouses"""
+        self.ensure_built()
+        return self._all_parents_of([person_id])
+
+    def siblings(self, person_id):
+        """IDs of the other children of anyone in all_parents"""
+        self.ensure_built()
+        return self._children_of(self.all_parents(person_id)) - {person_id}
+
+    def grandparents(self, person_id):
+        """
+        IDs of the parents (and their spouses) of someone's parents, their
+        parents' spouses, and their spouses' parents.
+        """
+        self.ensure_built()
+        parents = self._all_parents_of([person_id])
+        parents |= self._parents_of(self._spouses_of([person_id]))
+        return self._all_parents_of(parents)
+
+    def greatgrandparents(self, person_id):
+        """IDs of the parents, and their spouses, of someone's grandparents"""
+        return self._all_parents_of(self.grandparents(person_id))
+
+    def _excluded_relatives(self, person_id):
+        """Someone, their siblings and their spouses, who aren't their cousins"""
+        return {person_id} | self.siblings(person_id) | self.spouses(person_id)
+
+    def cousins(self, person_id):
+        """
+        IDs of the grandchildren of someone's grandparents, through either a
+        grandparent's spouse or a grandparent's child's spouse, other than
+        themselves, their siblings and their spouses.
+        """
+        grandparents = self.grandparents(person_id)
+        children = self._children_of(grandparents)
+        grandchildren = self._children_of(children)
+        grandchildren |= self._children_of(
+            self._children_of(self._spouses_of(grandparents))
+        )
+        grandchildren |= self._children_of(self._spouses_of(children))
+        return grandchildren - self._excluded_relatives(person_id)
+
+    def second_cousins(self, person_id):
+        """
+        IDs of the great grandchildren of someone's great grandparents, through
+        a spouse at any generation above them, other than themselves, their
+        cousins, their siblings and their spouses.
+        """
+        ggparents = self.greatgrandparents(person_id)
+        children = self._children_of(ggparents)
+        grandchildren = self._children_of(children)
+        found = self._children_of(grandchildren)
+        found |= self._children_of(
+            self._children_of(self._children_of(self._spouses_of(ggparents)))
+        )
+        found |= self._children_of(self._children_of(self._spouses_of(children)))
+        found |= self._children_of(self._spouses_of(grandchildren))
+        excluded = self._excluded_relatives(person_id) | self.cousins(person_id)
+        return found - excluded
+
+    def uncles_aunts(self, person_id):
+        """IDs of the siblings of someone's parents, and the siblings' spouses"""
+        found = set()
+        for parent_id in self.all_parents(person_id):
+            siblings = self.siblings(parent_id)
+            found |= siblings | self._spouses_of(siblings)
+        return found
+
+    def nephews_nieces(self, person_id):
+        """IDs of the children of someone's siblings, and of their spouses' siblings"""
+        siblings = self.siblings(person_id)
+        for spouse_id in self.spouses(person_id):
+            siblings |= self.siblings(spouse_id)
+        return self._children_of(siblings)
+
+    def grandchildren(self, person_id):
+        """IDs of someone's children's children"""
+        self.ensure_built()
+        return self._children_of(self._children_of([person_id]))
+
+    def family_tree_grandparents(self, person_id):
+        """
+        IDs of the parents, and their spouses, of someone's parents. Unlike
+        grandparents, a family tree doesn't show our spouses' grandparents.
+        """
+        return self._all_parents_of(self.all_parents(person_id))
+
+    def family_ids(self, person_id, relations=None):
+        """
+        Gets the IDs of everyone in someone's family tree.
+
+            Args:
+                person_id (int): The ID of a PlayerOrNpc
+                relations: Optional list of the relations in FAMILY_RELATIONS we want
+
+            Returns:
+                A dict of each relation to a set of IDs.
+        """
+        self.ensure_built()
+        getters = {
+            "greatgrandparents": self.greatgrandparents,
+            "grandparents": self.family_tree_grandparents,
+            "parents": self.all_parents,
+            "uncles_aunts": self.uncles_aunts,
+            "spouses": self.spouses,
+            "siblings": self.siblings,
+            "children": self.children,
+            "nephews_nieces": self.nephews_nieces,
+            "cousins": self.cousins,
+            "second_cousins": self.second_cousins,
+            "grandchildren": self.grandchildren,
+        }
+        if relations is None:
+            relations = [relation for relation, _ in FAMILY_RELATIONS]
+        return {relation: getters[relation](person_id) for relation in relations}
+
+    def get_family(self, person_id, relations=None, queryset=None):
+        """
+        Gets everyone in someone's family tree, fetched in a single query.
+
+            Args:
+                person_id (int): The ID of a PlayerOrNpc
+                relations: Optional list of the relations in FAMILY_RELATIONS we want
+                queryset: Optional PlayerOrNpc queryset to fetch them from, such
+                    as one that select_related's their players
+
+            Returns:
+                A dict of each relation to a list of PlayerOrNpcs ordered by ID.
+        """
+        from world.dominion.models import PlayerOrNpc
+
+        family = self.family_ids(person_id, relations)
+        all_ids = set()
+        for ids in family.values():
+            all_ids |= ids
+        if queryset is None:
+            queryset = PlayerOrNpc.objects.all()
+        found = queryset.in_bulk(all_ids) if all_ids else {}
+        return {
+            relation: [found[ob] for ob in sorted(ids) if ob in found]
+            for relation, ids in family.items()
+        }
+
+
+GENEALOGY = GenealogyGraph()
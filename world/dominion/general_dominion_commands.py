@@ -44,6 +44,7 @@ from world.dominion.domain.models import (
     Minister,
 )
 
+from world.dominion.prestige_graph import PRESTIGE_GRAPH
 from world.dominion.unit_types import type_from_str
 from world.stats_and_skills import do_dice_check
 
@@ -3084,6 +3085,7 @@ class CmdPatronage(ArxPlayerCommand):
                     caller.msg("They are not one of your proteges.")
                     return
                 dompc.proteges.remove(tdompc)
+                PRESTIGE_GRAPH.refresh_player(dompc)
                 caller.msg("{c%s {wis no longer one of your proteges.{n" % char)
                 player.msg(
                     "{c%s {wis no longer your patron.{n" % caller.key.capitalize()
@@ -0,0 +1,388 @@
+"""
+Rendering the map of Arvum. The map view used to query the domains of each
+Land in turn, drawing every label as five separate passes of text to give it
+an outline, and redrew and re-encoded the whole map whenever it was asked
+to regenerate it, inside the request.
+
+MapRenderer reads every Land and every domain ruled by a player's house in
+two queries, and works out what's drawn where: a dot and label for each
+domain, plus the terrain label and grid of each Land for the staff overlay.
+The map is split into tiles of one grid square, each with a hash of
+everything drawn on it, and only tiles whose hash changed are drawn again
+before the map is put back together and encoded. The map and the links of
+its image map are refreshed in the background when they're more than
+REFRESH_INTERVAL old or when staff ask for it, so requests are served
+whatever we rendered last. MAP_RENDERER is the shared instance.
+"""
+import hashlib
+import io
+import os.path
+from collections import defaultdict
+from datetime import datetime, timedelta
+from math import trunc
+
+from django.urls import reverse
+from PIL import Image, ImageDraw, ImageFont
+
+from world.dominion.domain.models import Domain
+from world.dominion.models import Land
+
+GRID_SIZE = 100
+SUBGRID = 10
+BASE_MAP = "world/dominion/map/arxmap_resized.jpg"
+GENERATED_MAP = "world/dominion/map/arxmap_generated.png"
+FONT = "world/dominion/map/Amaranth-Regular.otf"
+# the width of the map as it's shown on the page
+DISPLAY_WIDTH = 1280.0
+
+TERRAIN_NAMES = {
+    Land.COAST: "Coastal",
+    Land.DESERT: "Desert",
+    Land.GRASSLAND: "Grassland",
+    Land.HILL: "Hills",
+    Land.MOUNTAIN: "Mountains",
+    Land.OCEAN: "Ocean",
+    Land.PLAINS: "Plains",
+    Land.SNOW: "Snow",
+    Land.TUNDRA: "Tundra",
+    Land.FOREST: "Forest",
+    Land.JUNGLE: "Jungle",
+    Land.MARSH: "Marsh",
+    Land.ARCHIPELAGO: "Archipelago",
+    Land.FLOOD_PLAINS: "Flood Plains",
+    Land.ICE: "Ice",
+    Land.LAKES: "Lakes",
+    Land.OASIS: "Oasis",
+}
+
+
+class MapLabel(object):
+    """Text drawn on the map with a white outline"""
+
+    __slots__ = ("x", "y", "text", "font_size", "bbox")
+
+    def __init__(self, x, y, text, font_size, bbox):
+        self.x = x
+        self.y = y
+        self.text = text
+        self.font_size = font_size
+        self.bbox = bbox
+
+    def get_key(self):
+        return "label", self.x, self.y, self.text, self.font_size
+
+    def draw(self, draw, offset_x, offset_y, fonts):
+        draw.text(
+            (self.x - offset_x, self.y - offset_y),
+            self.text,
+            font=fonts[self.font_size],
+            fill="black",
+            stroke_width=1,
+            stroke_fill="white",
+        )
+
+
+class MapDot(object):
+    """The dot marking a domain"""
+
+    __slots__ = ("x", "y", "bbox")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.bbox = (x, y, x + SUBGRID, y + SUBGRID)
+
+    def get_key(self):
+        return "dot", self.x, self.y
+
+    def draw(self, draw, offset_x, offset_y, fonts):
+        x, y = self.x - offset_x, self.y - offset_y
+        draw.ellipse([(x, y), (x + SUBGRID, y + SUBGRID)], "#000000")
+
+
+class RenderedMap(object):
+    """An encoded map image and its hash, for serving"""
+
+    __slots__ = ("data", "etag", "rendered")
+
+    def __init__(self, data):
+        self.data = data
+        self.etag = '"%s"' % hashlib.md5(data).hexdigest()
+        self.rendered = datetime.now()
+
+
+class MapRenderer(object):
+    """Renders the map from tiles, keeping each tile until what's on it changes"""
+
+    REFRESH_INTERVAL = timedelta(minutes=30)
+
+    def __init__(self):
+        self.base = None
+        self.fonts = {}
+        self.clear()
+
+    def clear(self):
+        """Discards every tile and rendered map"""
+        # (overlay, tile x, tile y) to (hash, Image)
+        self.tiles = {}
+        # overlay to RenderedMap
+        self.rendered = {}
+        self.links = None
+        self.size = None
+        # overlay to when we last checked the map for changes
+        self.last_refreshed = {}
+        self.refreshing = set()
+
+    def is_stale(self, overlay=False):
+        """Whether it's time to check for changes to the map"""
+        last_refreshed = self.last_refreshed.get(overlay)
+        return (
+            not last_refreshed
+            or datetime.now() - last_refreshed >= self.REFRESH_INTERVAL
+        )
+
+    def load_base(self):
+        """Loads the base map image and fonts the first time they're needed"""
+        if self.base is None:
+            self.base = Image.open(BASE_MAP)
+            self.base.load()
+            self.fonts = {
+                14: ImageFont.truetype(FONT, 14),
+                24: ImageFont.truetype(FONT, 24),
+            }
+        return self.base
+
+    # ---- reading the map ------------------------------------------------
+
+    @staticmethod
+    def get_map_data():
+        """
+        Gets every Land and the domains on them ruled by a player's house.
+
+            Returns:
+                A list of Lands, and a dict of Land ID to a list of Domains.
+        """
+        lands = list(Land.objects.select_related("region"))
+        domains = defaultdict(list)
+        for domain in (
+            Domain.objects.filter(
+                location__land__isnull=False,
+                ruler__house__organization_owner__members__player__player__isnull=False,
+            )
+            .select_related("location", "ruler__house__organization_owner")
+            .distinct()
+            .order_by("id")
+        ):
+            domains[domain.location.land_id].append(domain)
+        return lands, domains
+
+    @staticmethod
+    def get_origins(lands):
+        """Gets a function for where a Land's grid square starts on the map"""
+        min_x = min([0] + [land.x_coord for land in lands])
+        min_y = min([0] + [land.y_coord for land in lands])
+        max_y = max([0] + [land.y_coord for land in lands])
+        total_height = max_y - min_y
+
+        def get_origin(land):
+            return (
+                (land.x_coord - min_x) * GRID_SIZE,
+                (total_height - (land.y_coord - min_y)) * GRID_SIZE,
+            )
+
+        return get_origin
+
+    def make_label(self, draw, x, y, text, font_size):
+        """Makes a label, measuring the space it takes up with its outline"""
+        left, top, right, bottom = draw.textbbox(
+            (x, y), text, font=self.fonts[font_size], stroke_width=1
+        )
+        return MapLabel(x, y, text, font_size, (left, top, right + 1, bottom + 1))
+
+    def get_drawables(self, lands, domains, overlay):
+        """Gets everything drawn on the map, in the order it's drawn"""
+        measure = ImageDraw.Draw(Image.new("L", (1, 1)))
+        get_origin = self.get_origins(lands)
+        drawables = []
+        for land in lands:
+            x1, y1 = get_origin(land)
+            if overlay:
+                text = "%s (%d,%d)\n%s" % (
+                    TERRAIN_NAMES.get(land.terrain, ""),
+                    land.x_coord,
+                    land.y_coord,
+                    land.region.name if land.region else "",
+                )
+                drawables.append(self.make_label(measure, x1 + 10, y1 + 60, text, 14))
+            for domain in domains.get(land.id, []):
+                circle_x = x1 + (SUBGRID * domain.location.x_coord)
+                circle_y = y1 + (SUBGRID * domain.location.y_coord)
+                drawables.append(MapDot(circle_x, circle_y))
+                drawables.append(
+                    self.make_label(
+                        measure,
+                        circle_x + SUBGRID + 6,
+                        circle_y - 4,
+                        domain.name,
+                        24,
+                    )
+                )
+        return drawables
+
+    def get_links(self, lands, domains):
+        """Gets the areas of the image map that link to each domain's ruling org"""
+        base = self.load_base()
+        ratio = DISPLAY_WIDTH / base.size[0]
+        measure = ImageDraw.Draw(Image.new("L", (1, 1)))
+        get_origin = self.get_origins(lands)
+        links = []
+        for land in lands:
+            x1, y1 = get_origin(land)
+            for domain in domains.get(land.id, []):
+                domain_x = x1 + (SUBGRID * domain.location.x_coord)
+                domain_y = y1 + ((SUBGRID * domain.location.y_coord) - 4)
+                left, top, right, bottom = measure.textbbox(
+                    (0, 0), domain.name, font=self.fonts[24]
+                )
+                org = domain.ruler.house.organization_owner
+                links.append(
+                    {
+                        "x1": trunc(domain_x * ratio),
+                        "y1": trunc(domain_y * ratio),
+                        "x2": trunc((domain_x + right + 10) * ratio),
+                        "y2": trunc((domain_y + bottom) * ratio),
+                        "url": reverse(
+                            "help_topics:display_org", kwargs={"object_id": org.id}
+                        ),
+                        "title": org.name,
+                    }
+                )
+        return links
+
+    # ---- rendering ------------------------------------------------------
+
+    def get_tile_contents(self, drawables):
+        """Gets what's drawn on each tile, by the tile's grid position"""
+        width, height = self.base.size
+        contents = defaultdict(list)
+        for drawable in drawables:
+            left, top, right, bottom = drawable.bbox
+            for tile_x in range(
+                max(left, 0) // GRID_SIZE, min(right, width - 1) // GRID_SIZE + 1
+            ):
+                for tile_y in range(
+                    max(top, 0) // GRID_SIZE, min(bottom, height - 1) // GRID_SIZE + 1
+                ):
+                    contents[(tile_x, tile_y)].append(drawable)
+        return contents
+
+    def render_tile(self, tile_x, tile_y, drawables, overlay):
+        """Draws a single tile of the map"""
+        width, height = self.base.size
+        left, top = tile_x * GRID_SIZE, tile_y * GRID_SIZE
+        box = (left, top, min(left + GRID_SIZE, width), min(top + GRID_SIZE, height))
+        tile = self.base.crop(box)
+        draw = ImageDraw.Draw(tile)
+        if overlay:
+            for offset in range(0, GRID_SIZE, SUBGRID):
+                draw.line([(offset, 0), (offset, GRID_SIZE)], fill="#8a8a8a")
+                draw.line([(0, offset), (GRID_SIZE, offset)], fill="#8a8a8a")
+            draw.rectangle([(0, 0), (GRID_SIZE, GRID_SIZE)], outline="#ffffff")
+        for drawable in drawables:
+            drawable.draw(draw, left, top, self.fonts)
+        return tile
+
+    def render(self, overlay=False):
+        """
+        Checks the map for changes, draws the tiles that changed, and encodes
+        the map.
+
+            Args:
+                overlay (bool): Whether to render the staff overlay of land
+                    names and grid
+
+            Returns:
+                The RenderedMap.
+        """
+        base = self.load_base()
+        lands, domains = self.get_map_data()
+        contents = self.get_tile_contents(self.get_drawables(lands, domains, overlay))
+        width, height = base.size
+        mapimage = Image.new(base.mode, base.size)
+        changed = False
+        for tile_x in range(0, (width + GRID_SIZE - 1) // GRID_SIZE):
+            for tile_y in range(0, (height + GRID_SIZE - 1) // GRID_SIZE):
+                drawables = contents.get((tile_x, tile_y), [])
+                tile_hash = hashlib.md5(
+                    repr([ob.get_key() for ob in drawables]).encode("utf-8")
+                ).hexdigest()
+                key = (overlay, tile_x, tile_y)
+                cached = self.tiles.get(key)
+                if not cached or cached[0] != tile_hash:
+                    cached = (
+                        tile_hash,
+                        self.render_tile(tile_x, tile_y, drawables, overlay),
+                    )
+                    self.tiles[key] = cached
+                    changed = True
+                mapimage.paste(cached[1], (tile_x * GRID_SIZE, tile_y * GRID_SIZE))
+        if changed or overlay not in self.rendered:
+            output = io.BytesIO()
+            mapimage.save(output, "PNG")
+            self.rendered[overlay] = RenderedMap(output.getvalue())
+            if not overlay:
+                with open(GENERATED_MAP, "wb") as generated:
+                    generated.write(self.rendered[overlay].data)
+        if not overlay:
+            self.links = self.get_links(lands, domains)
+            self.size = (
+                trunc(DISPLAY_WIDTH),
+                trunc(height * DISPLAY_WIDTH / width),
+            )
+        self.last_refreshed[overlay] = datetime.now()
+        return self.rendered[overlay]
+
+    def render_in_background(self, overlay=False):
+        """Renders the map in a thread, if we aren't already"""
+        from evennia.utils.utils import run_async
+
+        if overlay in self.refreshing:
+            return
+
+        def finished(*args, **kwargs):
+            self.refreshing.discard(overlay)
+
+        self.refreshing.add(overlay)
+        run_async(self.render, overlay, at_return=finished, at_err=finished)
+
+    # ---- what the views use ---------------------------------------------
+
+    def get_map(self, overlay=False, regenerate=False):
+        """
+        Gets the map to serve. If we have one we serve it, rendering it
+        again in the background if it's stale or we were asked to.
+        Otherwise we use the map from before the server last restarted while
+        we render a new one, or render it now if there isn't one.
+        """
+        rendered = self.rendered.get(overlay)
+        if not rendered and not overlay and os.path.exists(GENERATED_MAP):
+            with open(GENERATED_MAP, "rb") as generated:
+                rendered = RenderedMap(generated.read())
+            self.rendered[overlay] = rendered
+            regenerate = True
+        if not rendered:
+            return self.render(overlay)
+        if regenerate or self.is_stale(overlay):
+            self.render_in_background(overlay)
+        return rendered
+
+    def get_links_and_size(self, regenerate=False):
+        """Gets the image map's links and the map's display size"""
+        if self.links is None:
+            self.render()
+        elif regenerate or self.is_stale():
+            self.render_in_background()
+        return self.links, self.size
+
+
+MAP_RENDERER = MapRenderer()
@@ -60,7 +60,7 @@ from evennia.utils.idmapper.models import SharedMemoryModel
 from evennia.locks.lockhandler import LockHandler
 from evennia.utils import create
 from django.db import models
-from django.db.models import Q, Count, F, Sum, Case, When
+from django.db.models import Q, Count
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.urls import reverse
@@ -68,10 +68,12 @@ from django.urls import reverse
 import typeclasses.npcs.constants
 from typeclasses.mixins import InformMixin
 from world.dominion.domain.models import LAND_SIZE, LAND_COORDS
-from world.dominion.reports import WeeklyReport
 from world.dominion.agenthandler import AgentHandler
 from world.dominion.managers import OrganizationManager, LandManager, RPEventQuerySet
 from world.dominion.plots.models import Plot, PlotAction, PCPlotInvolvement
+from world.dominion.genealogy import GENEALOGY, FAMILY_RELATIONS
+from world.dominion.prestige_graph import PRESTIGE_GRAPH
+from world.dominion.prestige_rankings import get_leaderboard, NOTABLE_ROSTERS
 from world.stats_and_skills import do_dice_check
 from server.utils.arx_utils import (
     get_week,
@@ -155,185 +157,55 @@ class PlayerOrNpc(SharedMemoryModel):
             name += "(RIP)"
         return name
 
+    def save(self, *args, **kwargs):
+        """Saves changes and updates prestige if our patron changed"""
+        super(PlayerOrNpc, self).save(*args, **kwargs)
+        PRESTIGE_GRAPH.refresh_patron(self)
+
     @property
     def player_ob(self):
         return self.player
 
     def _get_siblings(self):
-        return PlayerOrNpc.objects.filter(
-            Q(parents__in=self.all_parents) & ~Q(id=self.id)
-        ).distinct()
+        return PlayerOrNpc.objects.filter(id__in=GENEALOGY.siblings(self.id))
 
     def _parents_and_spouses(self):
-        return PlayerOrNpc.objects.filter(
-            Q(children__id=self.id) | Q(spouses__children__id=self.id)
-        ).distinct()
+        return PlayerOrNpc.objects.filter(id__in=GENEALOGY.all_parents(self.id))
 
     all_parents = property(_parents_and_spouses)
 
     @property
     def grandparents(self):
         """Returns queryset of our grandparents"""
-        return PlayerOrNpc.objects.filter(
-            Q(children__children=self)
-            | Q(spouses__children__children=self)
-            | Q(children__spouses__children=self)
-            | Q(spouses__children__children__spouses=self)
-            | Q(children__children__spouses=self)
-            | Q(spouses__children__spouses__children=self)
-        ).distinct()
+        return PlayerOrNpc.objects.filter(id__in=GENEALOGY.grandparents(self.id))
 
     @property
     def greatgrandparents(self):
         """Returns queryset of our great grandparents"""
-        return PlayerOrNpc.objects.filter(
-            Q(children__in=self.grandparents)
-            | Q(spouses__children__in=self.grandparents)
-        ).distinct()
+        return PlayerOrNpc.objects.filter(id__in=GENEALOGY.greatgrandparents(self.id))
 
     @property
     def second_cousins(self):
         """Returns queryset of our second cousins"""
-        return PlayerOrNpc.objects.filter(
-            ~Q(id=self.id)
-            & ~Q(id__in=self.cousins)
-            & ~Q(id__in=self.siblings)
-            & ~Q(id__in=self.spouses.all())
-            & (
-                Q(parents__parents__parents__in=self.greatgrandparents)
-                | Q(parents__parents__parents__spouses__in=self.greatgrandparents)
-                | Q(parents__parents__spouses__parents__in=self.greatgrandparents)
-                | Q(parents__spouses__parents__parents__in=self.greatgrandparents)
-            )
-        ).distinct()
+        return PlayerOrNpc.objects.filter(id__in=GENEALOGY.second_cousins(self.id))
 
     def _get_cousins(self):
-        return PlayerOrNpc.objects.filter(
-            (
-                Q(parents__parents__in=self.grandparents)
-                | Q(parents__parents__spouses__in=self.grandparents)
-                | Q(parents__spouses__parents__in=self.grandparents)
-            )
-            & ~Q(id=self.id)
-            & ~Q(id__in=self.siblings)
-            & ~Q(id__in=self.spouses.all())
-        ).distinct()
+        return PlayerOrNpc.objects.filter(id__in=GENEALOGY.cousins(self.id))
 
     cousins = property(_get_cousins)
     siblings = property(_get_siblings)
 
     def display_immediate_family(self):
         """
-        Creates lists of our family relationships and converts the lists to sets
-        to remove duplicates. At the very end, convert each one to a string with
-        join. Then return all these strings added together.
+        Gets each of our family relationships from the genealogy graph and
+        converts each one to a string with join. Then return all these strings
+        added together.
         """
-        ggparents = self.greatgrandparents
-        grandparents = []
-        parents = self.all_parents
-        unc_or_aunts = []
-        for parent in parents:
-            grandparents += list(parent.all_parents)
-            for sibling in parent.siblings:
-                unc_or_aunts.append(sibling)
-                for spouse in sibling.spouses.all():
-                    unc_or_aunts.append(spouse)
-        spouses = self.spouses.all()
-        siblings = self.siblings
-        neph_or_nieces = []
-        for sib in siblings:
-            neph_or_nieces += list(sib.children.all())
-        for spouse in self.spouses.all():
-            for sib in spouse.siblings:
-                neph_or_nieces += list(sib.children.all())
-        children = self.children.all()
-        grandchildren = []
-        for child in children:
-            grandchildren += list(child.children.all())
-        cousins = self.cousins
-        second_cousins = self.second_cousins
-        # convert lists to sets that remove duplicates
-        unc_or_aunts = set(unc_or_aunts)
-        grandparents = set(grandparents)
-        neph_or_nieces = set(neph_or_nieces)
-        grandchildren = set(grandchildren)
-        # convert to strings
-        if ggparents:
-            ggparents = "{wGreatgrandparents{n: %s\n" % (
-                ", ".join(str(ggparent) for ggparent in ggparents)
-            )
-        else:
-            ggparents = ""
-        if grandparents:
-            grandparents = "{wGrandparents{n: %s\n" % (
-                ", ".join(str(gparent) for gparent in grandparents)
-            )
-        else:
-            grandparents = ""
-        if parents:
-            parents = "{wParents{n: %s\n" % (
-                ", ".join(str(parent) for parent in parents)
-            )
-        else:
-            parents = ""
-        if spouses:
-            spouses = "{wSpouses{n: %s\n" % (
-                ", ".join(str(spouse) for spouse in spouses)
-            )
-        else:
-            spouses = ""
-        if unc_or_aunts:
-            unc_or_aunts = "{wUncles/Aunts{n: %s\n" % (
-                ", ".join(str(unc) for unc in unc_or_aunts)
-            )
-        else:
-            unc_or_aunts = ""
-        if siblings:
-            siblings = "{wSiblings{n: %s\n" % (", ".join(str(sib) for sib in siblings))
-        else:
-            siblings = ""
-        if neph_or_nieces:
-            neph_or_nieces = "{wNephews/Nieces{n: %s\n" % (
-                ", ".join(str(neph) for neph in neph_or_nieces)
-            )
-        else:
-            neph_or_nieces = ""
-        if children:
-            children = "{wChildren{n: %s\n" % (
-                ", ".join(str(child) for child in children)
-            )
-        else:
-            children = ""
-        if grandchildren:
-            grandchildren = "{wGrandchildren{n: %s\n" % (
-                ", ".join(str(gchild) for gchild in grandchildren)
-            )
-        else:
-            grandchildren = ""
-        if cousins:
-            cousins = "{wCousins{n: %s\n" % (
-                ", ".join(str(cousin) for cousin in cousins)
-            )
-        else:
-            cousins = ""
-        if second_cousins:
-            second_cousins = "{wSecond Cousins{n: %s\n" % (
-                ", ".join(str(seco) for seco in second_cousins)
-            )
-        else:
-            second_cousins = ""
-        return (
-            ggparents
-            + grandparents
-            + parents
-            + unc_or_aunts
-            + spouses
-            + siblings
-            + children
-            + neph_or_nieces
-            + cousins
-            + second_cousins
-            + grandchildren
+        family = GENEALOGY.get_family(self.id)
+        return "".join(
+            "{w%s{n: %s\n" % (label, ", ".join(str(ob) for ob in family[relation]))
+            for relation, label in FAMILY_RELATIONS
+            if family[relation]
         )
 
     def msg(self, *args, **kwargs):
@@ -931,157 +803,34 @@ class AssetOwner(CachedPropertiesMixin, SharedMemoryModel):
     min_resources_for_inform = models.PositiveIntegerField(default=0)
     min_materials_for_inform = models.PositiveIntegerField(default=0)
 
-    _AVERAGE_PRESTIGE = {"last_check": None, "last_value": 0}
-    _AVERAGE_FAME = {"last_check": None, "last_value": 0}
-    _AVERAGE_LEGEND = {"last_check": None, "last_value": 0}
-    _MEDIAN_PRESTIGE = {"last_check": None, "last_value": 0}
-    _MEDIAN_FAME = {"last_check": None, "last_value": 0}
-    _MEDIAN_LEGEND = {"last_check": None, "last_value": 0}
-
     @classproperty
     def AVERAGE_PRESTIGE(cls):
-        last_check = cls._AVERAGE_PRESTIGE["last_check"]
-        now = datetime.now()
-        if not last_check or (now - last_check).days >= 1:
-            cls._AVERAGE_PRESTIGE["last_check"] = now
-            assets = list(
-                AssetOwner.objects.filter(
-                    player__player__roster__roster__name__in=(
-                        "Active",
-                        "Gone",
-                        "Available",
-                    )
-                )
-            )
-            assets = sorted(assets, key=lambda x: x.prestige, reverse=True)
-            total = 0
-            for asset in assets:
-                total += asset.prestige
-            total = total / len(assets)
-            cls._AVERAGE_PRESTIGE["last_value"] = total
-
-        return cls._AVERAGE_PRESTIGE["last_value"]
+        return get_leaderboard(NOTABLE_ROSTERS).average("prestige")
 
     @classproperty
     def MEDIAN_PRESTIGE(cls):
-        last_check = cls._MEDIAN_PRESTIGE["last_check"]
-        now = datetime.now()
-        if not last_check or (now - last_check).days >= 1:
-            cls._MEDIAN_PRESTIGE["last_check"] = now
-            assets = list(
-                AssetOwner.objects.filter(
-                    player__player__roster__roster__name__in=(
-                        "Active",
-                        "Gone",
-                        "Available",
-                    )
-                )
-            )
-            assets = sorted(assets, key=lambda x: x.prestige, reverse=True)
-
-            median = assets[len(assets) // 2].prestige
-
-            cls._MEDIAN_PRESTIGE["last_value"] = median
-
-        return cls._MEDIAN_PRESTIGE["last_value"]
+        return get_leaderboard(NOTABLE_ROSTERS).median("prestige")
 
     @classproperty
     def AVERAGE_FAME(cls):
-        last_check = cls._AVERAGE_FAME["last_check"]
-        now = datetime.now()
-        if not last_check or (now - last_check).days >= 1:
-            cls._AVERAGE_FAME["last_check"] = now
-            assets = list(
-                AssetOwner.objects.filter(
-                    player__player__roster__roster__name__in=(
-                        "Active",
-                        "Gone",
-                        "Available",
-                    )
-                ).order_by("-fame")
-            )
-            total = 0
-            for asset in assets:
-                total += asset.fame
-            total = total / len(assets)
-            cls._AVERAGE_FAME["last_value"] = total
-
-        return cls._AVERAGE_FAME["last_value"]
+        return get_leaderboard(NOTABLE_ROSTERS).average("fame")
 
     @classproperty
     def MEDIAN_FAME(cls):
-        last_check = cls._MEDIAN_FAME["last_check"]
-        now = datetime.now()
-        if not last_check or (now - last_check).days >= 1:
-            cls._MEDIAN_FAME["last_check"] = now
-            assets = list(
-                AssetOwner.objects.filter(
-                    player__player__roster__roster__name__in=(
-                        "Active",
-                        "Gone",
-                        "Available",
-                    )
-                )
-            )
-            assets = sorted(assets, key=lambda x: x.prestige, reverse=True)
-
-            median = assets[len(assets) / 2].fame
-
-            cls._MEDIAN_FAME["last_value"] = median
-
-        return cls._MEDIAN_FAME["last_value"]
+        return get_leaderboard(NOTABLE_ROSTERS).median("fame")
 
     @classproperty
     def AVERAGE_LEGEND(cls):
-        last_check = cls._AVERAGE_LEGEND["last_check"]
-        now = datetime.now()
-        if not last_check or (now - last_check).days >= 1:
-            cls._AVERAGE_LEGEND["last_check"] = now
-            assets = list(
-                AssetOwner.objects.filter(
-                    player__player__roster__roster__name__in=(
-                        "Active",
-                        "Gone",
-                        "Available",
-                    )
-                )
-            )
-            assets = sorted(assets, key=lambda x: x.total_legend, reverse=True)
-            total = 0
-            for asset in assets:
-                total += asset.total_legend
-            total = total / len(assets)
-            cls._AVERAGE_LEGEND["last_value"] = total
-
-        return cls._AVERAGE_LEGEND["last_value"]
+        return get_leaderboard(NOTABLE_ROSTERS).average("legend")
 
     @classproperty
     def MEDIAN_LEGEND(cls):
-        last_check = cls._MEDIAN_LEGEND["last_check"]
-        now = datetime.now()
-        if not last_check or (now - last_check).days >= 1:
-            cls._MEDIAN_LEGEND["last_check"] = now
-            assets = list(
-                AssetOwner.objects.filter(
-                    player__player__roster__roster__name__in=(
-                        "Active",
-                        "Gone",
-                        "Available",
-                    )
-                )
-            )
-            assets = sorted(assets, key=lambda x: x.prestige, reverse=True)
-
-            median = assets[len(assets) / 2].total_legend
-
-            cls._MEDIAN_LEGEND["last_value"] = median
-
-        return cls._MEDIAN_LEGEND["last_value"]
+        return get_leaderboard(NOTABLE_ROSTERS).median("legend")
 
-    @CachedProperty
+    @property
     def prestige(self):
         """Our prestige used for different mods. aggregate of fame, legend, and grandeur"""
-        return self.fame + self.total_legend + self.grandeur + self.propriety
+        return PRESTIGE_GRAPH.get_node(self).prestige
 
     def descriptor_for_value_adjustment(
         self,
@@ -1139,44 +888,10 @@ class AssetOwner(CachedPropertiesMixin, SharedMemoryModel):
             include_reason=include_reason,
         )
 
-    @CachedProperty
+    @property
     def propriety(self):
-        """A modifier to our fame based on tags we have"""
-        percentage = max(sum(ob.percentage for ob in self.proprieties.all()), -100)
-        base = self.fame + self.total_legend
-        # if we have negative fame, then positive propriety mods lessens that, while neg mods makes it worse
-        if base < 0:
-            percentage *= -1
-        value = int(base * percentage / 100.0)
-        if self.player:
-            # It's not possible to use F expressions on datetime fields so we'll check a range of dates
-            now = datetime.now()
-            last_week = now - timedelta(days=7)
-            two_weeks = now - timedelta(days=14)
-            three_weeks = now - timedelta(days=21)
-            four_weeks = now - timedelta(days=28)
-            # number of weeks since the favor was set, + 1, cap at a month ago
-            num_weeks = Case(
-                When(date_gossip_set__isnull=True, then=1),
-                When(date_gossip_set__lte=four_weeks, then=5),
-                When(date_gossip_set__lte=three_weeks, then=4),
-                When(date_gossip_set__lte=two_weeks, then=3),
-                When(date_gossip_set__lte=last_week, then=2),
-                default=1,
-            )
-            # the base prestige they get from each org, then modified by their favor value
-            org_prestige = (
-                F("organization__assets__fame") + F("organization__assets__legend")
-            ) / (20 * F("num_weeks"))
-            val = org_prestige * F("favor")
-            favor = (
-                self.player.reputations.filter(Q(favor__gt=0) | Q(favor__lt=0))
-                .annotate(num_weeks=num_weeks)
-                .annotate(val=val)
-                .aggregate(sum=Sum("val"))
-            )["sum"] or 0
-            value += favor
-        return value
+        """A modifier to our fame based on tags we have and our favor with orgs"""
+        return PRESTIGE_GRAPH.get_node(self).propriety
 
     @CachedProperty
     def honor(self):
@@ -1226,63 +941,12 @@ class AssetOwner(CachedPropertiesMixin, SharedMemoryModel):
     @property
     def grandeur(self):
         """Value used for prestige that represents prestige from external sources"""
-        if self.organization_owner:
-            return self.get_grandeur_from_members()
-        val = 0
-        val += self.get_grandeur_from_patron()
-        val += self.get_grandeur_from_proteges()
-        val += self.get_grandeur_from_orgs()
-        return val
+        return PRESTIGE_GRAPH.get_node(self).grandeur
 
     @property
     def base_grandeur(self):
         """The amount we contribute to other people when they're totalling up grandeur"""
-        return int(self.fame / 10.0 + self.total_legend / 10.0 + self.propriety / 10.0)
-
-    def get_grandeur_from_patron(self):
-        """Gets our grandeur value from our patron, if we have one"""
-        try:
-            return self.player.patron.assets.base_grandeur
-        except AttributeError:
-            return 0
-
-    def get_grandeur_from_proteges(self):
-        """Gets grandeur value from each of our proteges, if any"""
-        base = 0
-        for protege in self.player.proteges.all():
-            base += protege.assets.base_grandeur
-        return base
-
-    def get_grandeur_from_orgs(self):
-        """Gets grandeur value from orgs we're a member of."""
-        base = 0
-        memberships = list(
-            self.player.memberships.filter(
-                deguilded=False, secret=False, organization__secret=False
-            ).distinct()
-        )
-        too_many_org_penalty = max(len(memberships) * 0.5, 1.0)
-        for member in memberships:
-            rank_divisor = max(member.rank, 1)
-            grandeur = member.organization.assets.base_grandeur / rank_divisor
-            grandeur /= too_many_org_penalty
-            base += grandeur
-        return int(base)
-
-    def get_grandeur_from_members(self):
-        """Gets grandeur for an org from its members"""
-        base = 0
-        members = list(self.organization_owner.active_members)
-        ranks = 0
-        for member in members:
-            rank_divisor = max(member.rank, 1)
-            grandeur = member.player.assets.base_grandeur / rank_divisor
-            base += grandeur
-            ranks += 11 - member.rank
-        too_many_members_mod = max(ranks / 200.0, 0.01)
-        base /= too_many_members_mod
-        sign = -1 if base < 0 else 1
-        return min(abs(int(base)), abs(self.fame + self.legend) * 2) * sign
+        return PRESTIGE_GRAPH.get_node(self).base_grandeur
 
     # noinspection PyMethodMayBeStatic
     def store_prestige_record(
@@ -1425,43 +1089,14 @@ class AssetOwner(CachedPropertiesMixin, SharedMemoryModel):
             Returns:
                 The amount our vault changed.
         """
-        amount = 0
-        report = None
-        npc = True
-        inform_target = self.inform_target
-        org = self.organization_owner
-        if inform_target and inform_target.can_receive_informs:
-            report = WeeklyReport(inform_target, week, inform_creator)
-            npc = False
-        if hasattr(self, "estate"):
-            for domain in self.estate.holdings.all():
-                amount += domain.do_weekly_adjustment(week, report, npc)
-        for agent in self.agents.all():
-            amount -= agent.cost
-        # WeeklyTransactions
-        for income in self.incomes.filter(do_weekly=True):
-            amount += income.process_payment(report)
-            # income.post_repeat()
-        if org:
-            # record organization's income
-            amount += self.organization_owner.amount
-
-        # debts that won't be processed by someone else's income, since they have no receiver
-        for debt in self.debts.filter(receiver__isnull=True, do_weekly=True):
-            amount -= debt.amount
-        self.vault += amount
-        self.save()
-        if (
-            self.player
-            and self.player.player
-            and hasattr(self.player.player, "roster")
-            and self.player.player.roster.roster.name == "Active"
-        ):
-            self.player.pay_lifestyle(report)
-        if report:
-            report.record_income(self.vault, amount)
-            report.send_report()
-        return amount
+        from world.dominion.economy import WeeklyEconomy
+
+        return WeeklyEconomy(week, inform_creator).process([self]).get(self.id, 0)
+
+    def save(self, *args, **kwargs):
+        """Saves changes and recomputes prestige if our fame or legend changed"""
+        super(AssetOwner, self).save(*args, **kwargs)
+        PRESTIGE_GRAPH.refresh_owner(self)
 
     def display(self):
         """Returns formatted string display of this AssetOwner"""
@@ -1525,6 +1160,7 @@ class Propriety(SharedMemoryModel):
         if self.pk:
             for owner in self.owners.all():
                 owner.clear_cached_properties()
+                PRESTIGE_GRAPH.refresh_owner(owner, proprieties=True)
 
 
 class Honorific(SharedMemoryModel):
@@ -1544,12 +1180,16 @@ class Honorific(SharedMemoryModel):
         """Clears cache in owner when saved"""
         super(Honorific, self).save(*args, **kwargs)
         self.owner.clear_cached_properties()
+        PRESTIGE_GRAPH.refresh_owner(self.owner, honor=True)
 
     def delete(self, *args, **kwargs):
         """Clears cache in owner when deleted"""
-        if self.owner:
-            self.owner.clear_cached_properties()
+        owner = self.owner
+        if owner:
+            owner.clear_cached_properties()
         super(Honorific, self).delete(*args, **kwargs)
+        if owner:
+            PRESTIGE_GRAPH.refresh_owner(owner, honor=True)
 
 
 class PraiseOrCondemn(SharedMemoryModel):
@@ -2066,6 +1706,8 @@ class Reputation(SharedMemoryModel):
             self.player.assets.clear_cached_properties()
         except (AttributeError, ValueError, TypeError):
             pass
+        if self.player:
+            PRESTIGE_GRAPH.refresh_player(self.player)
 
     @property
     def propriety_amount(self):
@@ -2589,6 +2231,7 @@ class Organization(InformMixin, SharedMemoryModel):
             self.assets.clear_cached_properties()
         except (AttributeError, ValueError, TypeError):
             pass
+        PRESTIGE_GRAPH.refresh_organization(self)
         # make sure that any cached AP modifiers based on Org fealties are invalidated
         from web.character.models import RosterEntry
 
@@ -3211,6 +2854,16 @@ class Member(SharedMemoryModel):
     def __repr__(self):
         return "<Member %s (#%s)>" % (self.player, self.id)
 
+    def save(self, *args, **kwargs):
+        """Saves changes and updates prestige if our standing in the org changed"""
+        super(Member, self).save(*args, **kwargs)
+        PRESTIGE_GRAPH.refresh_membership(self)
+
+    def delete(self, *args, **kwargs):
+        """Deletes us and updates prestige for the org and player"""
+        super(Member, self).delete(*args, **kwargs)
+        PRESTIGE_GRAPH.refresh_membership(self, deleted=True)
+
     def fake_delete(self):
         """
         Alternative to deleting this object. That way we can just readd them if they
@@ -4655,3 +4308,38 @@ class Landmark(SharedMemoryModel):
 
     def __str__(self):
         return "<Landmark #%d: %s>" % (self.id, self.name)
+
+
+def update_genealogy(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keeps the genealogy graph in step as parents, children and spouses change"""
+    if action in ("pre_clear", "post_clear"):
+        # we don't know who was removed, so it's rebuilt on the next lookup
+        GENEALOGY.clear()
+        return
+    if action not in ("post_add", "post_remove") or not GENEALOGY.last_built:
+        return
+    added = action == "post_add"
+    for other_id in pk_set:
+        if sender is PlayerOrNpc.spouses.through:
+            if added:
+                GENEALOGY.add_spouse(instance.id, other_id)
+            else:
+                GENEALOGY.remove_spouse(instance.id, other_id)
+            continue
+        child_id, parent_id = (
+            (other_id, instance.id) if reverse else (instance.id, other_id)
+        )
+        if added:
+            GENEALOGY.add_parent(child_id, parent_id)
+        else:
+            GENEALOGY.remove_parent(child_id, parent_id)
+
+
+def remove_from_genealogy(sender, instance, **kwargs):
+    """Removes a deleted PlayerOrNpc and their family ties from the genealogy graph"""
+    GENEALOGY.remove_person(instance.id)
+
+
+models.signals.m2m_changed.connect(update_genealogy, sender=PlayerOrNpc.parents.through)
+models.signals.m2m_changed.connect(update_genealogy, sender=PlayerOrNpc.spouses.through)
+models.signals.post_delete.connect(remove_from_genealogy, sender=PlayerOrNpc)
@@ -0,0 +1,494 @@
+"""
+The prestige of an AssetOwner is the sum of their fame, legend, propriety and
+grandeur, and grandeur is drawn from their neighbours: a character's patron,
+their proteges and the organizations they belong to, or an organization's
+active members. Working that out owner-by-owner means a chain of queries for
+every hop, so instead PrestigeGraph loads every owner and every patronage,
+membership and favor edge in a handful of queries, computes prestige for
+everyone in a single pass, and then recomputes only the nodes affected by a
+change when fame, legend, honor, membership, patronage or favor is updated.
+Edges are kept in both directions, so the neighbours of a node are looked up
+rather than found by scanning every edge.
+
+PRESTIGE_GRAPH is the shared instance used by AssetOwner. Rebuilding it
+each day is what picks up roster changes and the weekly aging of favor,
+neither of which sends us a signal.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db.models import Sum
+
+from server.utils.periodic import PeriodicallyRebuilt
+from world.dominion.prestige_rankings import update_rankings, clear_rankings
+
+
+def _truncated_div(numerator, denominator):
+    """Integer division that truncates towards zero, as the database does"""
+    quotient = abs(numerator) // abs(denominator)
+    if (numerator < 0) != (denominator < 0):
+        return -quotient
+    return quotient
+
+
+def get_favor_weeks(date_gossip_set, now=None):
+    """
+    The number of weeks since favor was set, plus one, capped at five. This
+    divides how much of an org's prestige the favor is worth.
+    """
+    if not date_gossip_set:
+        return 1
+    now = now or datetime.now()
+    for weeks in (4, 3, 2, 1):
+        if date_gossip_set <= now - timedelta(days=7 * weeks):
+            return weeks + 1
+    return 1
+
+
+class PrestigeNode(object):
+    """The raw values and computed prestige for a single AssetOwner"""
+
+    __slots__ = (
+        "owner_id",
+        "player_id",
+        "org_id",
+        "fame",
+        "legend",
+        "honor",
+        "propriety_percentage",
+        "propriety",
+        "base_grandeur",
+        "grandeur",
+        "prestige",
+    )
+
+    def __init__(self, owner_id, player_id=None, org_id=None, fame=0, legend=0):
+        self.owner_id = owner_id
+        self.player_id = player_id
+        self.org_id = org_id
+        self.fame = fame
+        self.legend = legend
+        self.honor = 0
+        self.propriety_percentage = 0
+        self.propriety = 0
+        self.base_grandeur = 0
+        self.grandeur = 0
+        self.prestige = 0
+
+    @property
+    def total_legend(self):
+        """Sum of legend and honor"""
+        return self.legend + self.honor
+
+
+class PrestigeGraph(PeriodicallyRebuilt):
+    """
+    Owners, patronage, memberships and favor for every AssetOwner, with the
+    prestige values computed from them.
+    """
+
+    def clear(self):
+        """Empties the graph, which will be rebuilt on the next lookup"""
+        super().clear()
+        self.nodes = {}
+        self.owner_by_player = {}
+        self.owner_by_org = {}
+        # player id to their patron's player id, and the reverse
+        self.patrons = {}
+        self.proteges = defaultdict(set)
+        # player id to {org id: rank} for memberships that add to a player's grandeur,
+        # and org id to the players with those memberships
+        self.memberships = defaultdict(dict)
+        self.counted_members = defaultdict(set)
+        # org id to {player id: rank} for active members that add to an org's grandeur,
+        # and player id to the orgs they're an active member of
+        self.active_members = defaultdict(dict)
+        self.active_orgs = defaultdict(set)
+        # player id to {org id: (favor, date_gossip_set)}, and org id to favored players
+        self.favor = defaultdict(dict)
+        self.favored_by = defaultdict(set)
+        clear_rankings()
+
+    # ---- building the graph -------------------------------------------
+
+    def rebuild(self):
+        """Loads every owner and edge in bulk and computes everyone's prestige"""
+        from world.dominion.models import (
+            AssetOwner,
+            Honorific,
+            Propriety,
+            PlayerOrNpc,
+            Member,
+            Reputation,
+        )
+
+        self.clear()
+        for owner_id, player_id, org_id, fame, legend in AssetOwner.objects.values_list(
+            "id", "player_id", "organization_owner_id", "fame", "legend"
+        ):
+            self._add_node(PrestigeNode(owner_id, player_id, org_id, fame, legend))
+        for row in Honorific.objects.values("owner_id").annotate(total=Sum("amount")):
+            if row["owner_id"] in self.nodes:
+                self.nodes[row["owner_id"]].honor = row["total"] or 0
+        for owner_id, percentage in Propriety.owners.through.objects.values_list(
+            "assetowner_id", "propriety__percentage"
+        ):
+            if owner_id in self.nodes:
+                self.nodes[owner_id].propriety_percentage += percentage
+        for player_id, patron_id in PlayerOrNpc.objects.filter(
+            patron__isnull=False
+        ).values_list("id", "patron_id"):
+            self._set_patron(player_id, patron_id)
+        for player_id, org_id, rank in (
+            Member.objects.filter(
+                deguilded=False, secret=False, organization__secret=False
+            )
+            .values_list("player_id", "organization_id", "rank")
+            .distinct()
+        ):
+            self._set_membership(player_id, org_id, rank)
+        for player_id, org_id, rank in (
+            Member.objects.filter(
+                deguilded=False, player__player__roster__roster__name="Active"
+            )
+            .values_list("player_id", "organization_id", "rank")
+            .distinct()
+        ):
+            self._set_active_member(player_id, org_id, rank)
+        for player_id, org_id, favor, date_set in Reputation.objects.exclude(
+            favor=0
+        ).values_list("player_id", "organization_id", "favor", "date_gossip_set"):
+            self._set_favor(player_id, org_id, favor, date_set)
+        for node in self.nodes.values():
+            self._compute_base(node)
+        for node in self.nodes.values():
+            self._compute_prestige(node)
+        self.mark_built()
+
+    def _add_node(self, node):
+        self.nodes[node.owner_id] = node
+        if node.player_id:
+            self.owner_by_player[node.player_id] = node.owner_id
+        if node.org_id:
+            self.owner_by_org[node.org_id] = node.owner_id
+
+    def _set_patron(self, player_id, patron_id):
+        old_patron = self.patrons.pop(player_id, None)
+        if old_patron:
+            self.proteges[old_patron].discard(player_id)
+        if patron_id:
+            self.patrons[player_id] = patron_id
+            self.proteges[patron_id].add(player_id)
+
+    def _set_membership(self, player_id, org_id, rank):
+        self.memberships[player_id][org_id] = rank
+        self.counted_members[org_id].add(player_id)
+
+    def _remove_membership(self, player_id, org_id):
+        self.memberships[player_id].pop(org_id, None)
+        self.counted_members[org_id].discard(player_id)
+
+    def _set_active_member(self, player_id, org_id, rank):
+        self.active_members[org_id][player_id] = rank
+        self.active_orgs[player_id].add(org_id)
+
+    def _remove_active_member(self, player_id, org_id):
+        self.active_members[org_id].pop(player_id, None)
+        self.active_orgs[player_id].discard(org_id)
+
+    def _set_favor(self, player_id, org_id, favor, date_gossip_set):
+        self.favor[player_id][org_id] = (favor, date_gossip_set)
+        self.favored_by[org_id].add(player_id)
+
+    # ---- computing values ---------------------------------------------
+
+    def _node_for_player(self, player_id):
+        return self.nodes.get(self.owner_by_player.get(player_id))
+
+    def _node_for_org(self, org_id):
+        return self.nodes.get(self.owner_by_org.get(org_id))
+
+    def _compute_base(self, node):
+        """Computes the values of a node that don't depend on its neighbours"""
+        percentage = max(node.propriety_percentage, -100)
+        base = node.fame + node.total_legend
+        # if we have negative fame, then positive propriety mods lessens that, while neg mods makes it worse
+        if base < 0:
+            percentage *= -1
+        value = int(base * percentage / 100.0)
+        if node.player_id:
+            now = datetime.now()
+            for org_id, (favor, date_set) in self.favor[node.player_id].items():
+                org_node = self._node_for_org(org_id)
+                if not org_node:
+                    continue
+                org_prestige = _truncated_div(
+                    org_node.fame + org_node.legend,
+                    20 * get_favor_weeks(date_set, now),
+                )
+                value += org_prestige * favor
+        node.propriety = value
+        node.base_grandeur = int(
+            node.fame / 10.0 + node.total_legend / 10.0 + node.propriety / 10.0
+        )
+
+    def _compute_prestige(self, node):
+        """Computes grandeur and prestige for a node from its neighbours"""
+        if node.org_id:
+            node.grandeur = self._get_grandeur_from_members(node)
+        else:
+            node.grandeur = (
+                self._get_grandeur_from_patron(node)
+                + self._get_grandeur_from_proteges(node)
+                + self._get_grandeur_from_orgs(node)
+            )
+        node.prestige = node.fame + node.total_legend + node.grandeur + node.propriety
+
+    def _get_grandeur_from_patron(self, node):
+        patron = self._node_for_player(self.patrons.get(node.player_id))
+        return patron.base_grandeur if patron else 0
+
+    def _get_grandeur_from_proteges(self, node):
+        base = 0
+        for protege_id in self.proteges[node.player_id]:
+            protege = self._node_for_player(protege_id)
+            if protege:
+                base += protege.base_grandeur
+        return base
+
+    def _get_grandeur_from_orgs(self, node):
+        base = 0
+        memberships = self.memberships[node.player_id]
+        too_many_org_penalty = max(len(memberships) * 0.5, 1.0)
+        for org_id, rank in memberships.items():
+            org = self._node_for_org(org_id)
+            if not org:
+                continue
+            grandeur = org.base_grandeur / max(rank, 1)
+            grandeur /= too_many_org_penalty
+            base += grandeur
+        return int(base)
+
+    def _get_grandeur_from_members(self, node):
+        base = 0
+        ranks = 0
+        for player_id, rank in self.active_members[node.org_id].items():
+            member = self._node_for_player(player_id)
+            if member:
+                base += member.base_grandeur / max(rank, 1)
+            ranks += 11 - rank
+        too_many_members_mod = max(ranks / 200.0, 0.01)
+        base /= too_many_members_mod
+        sign = -1 if base < 0 else 1
+        return min(abs(int(base)), abs(node.fame + node.legend) * 2) * sign
+
+    def _get_neighbours(self, node):
+        """Gets the owner IDs whose grandeur depends upon this node"""
+        player_ids, org_ids = set(), set()
+        if node.player_id:
+            if node.player_id in self.patrons:
+                player_ids.add(self.patrons[node.player_id])
+            player_ids.update(self.proteges[node.player_id])
+            org_ids.update(self.active_orgs[node.player_id])
+        if node.org_id:
+            player_ids.update(self.counted_members[node.org_id])
+        owner_ids = {self.owner_by_player.get(ob) for ob in player_ids}
+        owner_ids |= {self.owner_by_org.get(ob) for ob in org_ids}
+        owner_ids.discard(None)
+        return owner_ids
+
+    def _recompute(self, owner_ids):
+        """
+        Recomputes the given nodes, everyone whose propriety comes from their
+        favor with them, and the neighbours of both, then updates rankings.
+        """
+        changed = set(owner_id for owner_id in owner_ids if owner_id in self.nodes)
+        for owner_id in list(changed):
+            node = self.nodes[owner_id]
+            if node.org_id:
+                changed.update(
+                    self.owner_by_player[player_id]
+                    for player_id in self.favored_by[node.org_id]
+                    if player_id in self.owner_by_player
+                )
+        dirty = set(changed)
+        for owner_id in changed:
+            node = self.nodes[owner_id]
+            self._compute_base(node)
+            dirty |= self._get_neighbours(node)
+        for owner_id in dirty:
+            self._compute_prestige(self.nodes[owner_id])
+        update_rankings(dirty)
+        return dirty
+
+    # ---- lookups and updates ------------------------------------------
+
+    def get_node(self, owner):
+        """
+        Gets the node for an AssetOwner, adding them to the graph if they were
+        created since it was built.
+        """
+        self.ensure_built()
+        node = self.nodes.get(owner.id)
+        if node is None:
+            node = self.add_owner(owner)
+        return node
+
+    def add_owner(self, owner):
+        """Loads a single owner and their edges into the graph"""
+        node = PrestigeNode(
+            owner.id,
+            owner.player_id,
+            owner.organization_owner_id,
+            owner.fame,
+            owner.legend,
+        )
+        node.honor = owner.honor
+        node.propriety_percentage = sum(ob.percentage for ob in owner.proprieties.all())
+        self._add_node(node)
+        if node.player_id:
+            self._load_player_edges(node.player_id)
+        if node.org_id:
+            self._load_org_edges(node.org_id)
+        self._recompute([node.owner_id])
+        return node
+
+    def refresh_owner(self, owner, honor=False, proprieties=False):
+        """
+        Called when an AssetOwner is saved. If their fame or legend changed,
+        or we're told their honorifics or proprieties did, we recompute them
+        and anyone affected by them.
+        """
+        if not self.last_built:
+            return
+        node = self.nodes.get(owner.id)
+        if node is None:
+            self.add_owner(owner)
+            return
+        changed = node.fame != owner.fame or node.legend != owner.legend
+        node.fame, node.legend = owner.fame, owner.legend
+        if honor:
+            node.honor = owner.honor
+            changed = True
+        if proprieties:
+            node.propriety_percentage = sum(
+                ob.percentage for ob in owner.proprieties.all()
+            )
+            changed = True
+        if changed:
+            self._recompute([node.owner_id])
+
+    def refresh_player(self, player):
+        """
+        Reloads the patronage, membership and favor edges of a PlayerOrNpc
+        after they've changed, recomputing everyone on either end.
+        """
+        if not self.last_built:
+            return
+        affected = self._get_player_edge_owners(player.id)
+        self._load_player_edges(player.id)
+        affected |= self._get_player_edge_owners(player.id)
+        affected.add(self.owner_by_player.get(player.id))
+        affected.discard(None)
+        self._recompute(affected)
+
+    def refresh_patron(self, player):
+        """Called when a PlayerOrNpc is saved, in case their patron changed"""
+        if self.last_built and self.patrons.get(player.id) != player.patron_id:
+            self.refresh_player(player)
+
+    def refresh_membership(self, member, deleted=False):
+        """Called when a Member is saved or deleted, in case their standing changed"""
+        if not self.last_built:
+            return
+        org_id, player_id = member.organization_id, member.player_id
+        counted = not (
+            deleted or member.deguilded or member.secret or member.organization.secret
+        )
+        active = not (deleted or member.deguilded)
+        if self.memberships[player_id].get(org_id) != (
+            member.rank if counted else None
+        ) or self.active_members[org_id].get(player_id) != (
+            member.rank if active else None
+        ):
+            self.refresh_player(member.player)
+
+    def refresh_organization(self, org):
+        """Reloads the membership edges of an organization after they've changed"""
+        if not self.last_built:
+            return
+        affected = {self.owner_by_org.get(org.id)}
+        affected |= {self.owner_by_player.get(ob) for ob in self.active_members[org.id]}
+        self._load_org_edges(org.id)
+        affected |= {self.owner_by_player.get(ob) for ob in self.active_members[org.id]}
+        affected.discard(None)
+        self._recompute(affected)
+
+    def _get_player_edge_owners(self, player_id):
+        player_ids = set(self.proteges[player_id])
+        if player_id in self.patrons:
+            player_ids.add(self.patrons[player_id])
+        owner_ids = {self.owner_by_player.get(ob) for ob in player_ids}
+        owner_ids |= {
+            self.owner_by_org.get(ob)
+            for ob in set(self.memberships[player_id]) | set(self.favor[player_id])
+        }
+        owner_ids |= {self.owner_by_org.get(ob) for ob in self.active_orgs[player_id]}
+        return owner_ids
+
+    def _load_player_edges(self, player_id):
+        from world.dominion.models import PlayerOrNpc, Member, Reputation
+
+        patron_id = (
+            PlayerOrNpc.objects.filter(id=player_id)
+            .values_list("patron_id", flat=True)
+            .first()
+        )
+        self._set_patron(player_id, patron_id)
+        for protege_id in list(self.proteges[player_id]):
+            self._set_patron(protege_id, None)
+        for protege_id in PlayerOrNpc.objects.filter(patron_id=player_id).values_list(
+            "id", flat=True
+        ):
+            self._set_patron(protege_id, player_id)
+        members = Member.objects.filter(player_id=player_id, deguilded=False)
+        for org_id in list(self.memberships[player_id]):
+            self._remove_membership(player_id, org_id)
+        for org_id, rank in members.filter(
+            secret=False, organization__secret=False
+        ).values_list("organization_id", "rank"):
+            self._set_membership(player_id, org_id, rank)
+        for org_id in list(self.active_orgs[player_id]):
+            self._remove_active_member(player_id, org_id)
+        for org_id, rank in members.filter(
+            player__player__roster__roster__name="Active"
+        ).values_list("organization_id", "rank"):
+            self._set_active_member(player_id, org_id, rank)
+        for org_id in self.favor.pop(player_id, {}):
+            self.favored_by[org_id].discard(player_id)
+        for org_id, favor, date_set in (
+            Reputation.objects.filter(player_id=player_id)
+            .exclude(favor=0)
+            .values_list("organization_id", "favor", "date_gossip_set")
+        ):
+            self._set_favor(player_id, org_id, favor, date_set)
+
+    def _load_org_edges(self, org_id):
+        from world.dominion.models import Member
+
+        members = Member.objects.filter(organization_id=org_id, deguilded=False)
+        for player_id in list(self.counted_members[org_id]):
+            self._remove_membership(player_id, org_id)
+        for player_id, rank in members.filter(
+            secret=False, organization__secret=False
+        ).values_list("player_id", "rank"):
+            self._set_membership(player_id, org_id, rank)
+        for player_id in list(self.active_members[org_id]):
+            self._remove_active_member(player_id, org_id)
+        for player_id, rank in members.filter(
+            player__player__roster__roster__name="Active"
+        ).values_list("player_id", "rank"):
+            self._set_active_member(player_id, org_id, rank)
+
+
+PRESTIGE_GRAPH = PrestigeGraph()
@@ -0,0 +1,187 @@
+"""
+Prestige rankings for AssetOwners. Working out where someone stands used to
+mean loading every rostered AssetOwner and sorting them by their prestige. A
+PrestigeLeaderboard keeps a sorted index of the prestige values from the
+PrestigeGraph, adjusted in place whenever the graph recomputes an owner, so
+rank, percentile, median and average lookups never touch the roster. Since
+only owners already on a board are adjusted, each board reloads its roster
+when it's rebuilt.
+"""
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from server.utils.periodic import PeriodicallyRebuilt
+
+ACTIVE_ROSTERS = ("Active",)
+NOTABLE_ROSTERS = ("Active", "Gone", "Available")
+
+RankEntry = namedtuple("RankEntry", ["prestige", "fame", "legend"])
+
+
+class PrestigeLeaderboard(PeriodicallyRebuilt):
+    """
+    A sorted index of the prestige of every AssetOwner whose character is in
+    one of our rosters. Entries are kept as (-prestige, owner_id) keys so the
+    index is in descending order of prestige, and totals for each value are
+    kept as we go so averages don't need another pass.
+    """
+
+    def __init__(self, roster_names):
+        self.roster_names = tuple(roster_names)
+        super().__init__()
+
+    def __len__(self):
+        self.ensure_built()
+        return len(self._keys)
+
+    def __contains__(self, owner):
+        self.ensure_built()
+        return getattr(owner, "id", owner) in self._entries
+
+    def get_queryset(self):
+        """The AssetOwners that belong on this leaderboard"""
+        from world.dominion.models import AssetOwner
+
+        return AssetOwner.objects.filter(
+            player__player__roster__roster__name__in=self.roster_names
+        ).distinct()
+
+    def rebuild(self):
+        """Indexes the prestige of every owner for our rosters"""
+        from world.dominion.prestige_graph import PRESTIGE_GRAPH
+
+        # build the graph first, since building it clears every leaderboard
+        PRESTIGE_GRAPH.ensure_built()
+        self.clear()
+        for owner in self.get_queryset():
+            self._insert(owner.id, self.get_values(PRESTIGE_GRAPH.get_node(owner)))
+        self.mark_built()
+
+    def clear(self):
+        """Empties the board, which will be rebuilt on the next lookup"""
+        super().clear()
+        self._keys = []
+        self._entries = {}
+        self._totals = {field: 0 for field in RankEntry._fields}
+
+    @staticmethod
+    def get_values(node):
+        """Gets the values we track from an owner's PrestigeNode"""
+        return RankEntry(node.prestige, node.fame, node.total_legend)
+
+    def update(self, owner_id):
+        """
+        Re-indexes an owner after their prestige changed. Owners who aren't on
+        the board are ignored until the next rebuild, when their roster is
+        checked again.
+        """
+        from world.dominion.prestige_graph import PRESTIGE_GRAPH
+
+        node = PRESTIGE_GRAPH.nodes.get(owner_id)
+        if self.last_built and owner_id in self._entries and node:
+            self.set_values(owner_id, self.get_values(node))
+
+    def set_values(self, owner_id, values):
+        """Replaces the values for an owner in the index"""
+        self.remove(owner_id)
+        self._insert(owner_id, values)
+
+    def remove(self, owner_id):
+        """Removes an owner from the index, if they're present"""
+        entry = self._entries.pop(owner_id, None)
+        if entry is None:
+            return
+        key = (-entry.prestige, owner_id)
+        del self._keys[bisect_left(self._keys, key)]
+        for field in RankEntry._fields:
+            self._totals[field] -= getattr(entry, field)
+
+    def _insert(self, owner_id, values):
+        values = RankEntry(*values)
+        self._entries[owner_id] = values
+        insort(self._keys, (-values.prestige, owner_id))
+        for field in RankEntry._fields:
+            self._totals[field] += getattr(values, field)
+
+    def index(self, owner):
+        """
+        Gets the 0-based position of an owner on the board.
+
+            Args:
+                owner: An AssetOwner or its ID
+
+            Returns:
+                The index, or None if the owner isn't on the board.
+        """
+        self.ensure_built()
+        owner_id = getattr(owner, "id", owner)
+        entry = self._entries.get(owner_id)
+        if entry is None:
+            return None
+        return bisect_left(self._keys, (-entry.prestige, owner_id))
+
+    def rank(self, owner):
+        """Gets the 1-based rank of an owner, or None if they're not on the board"""
+        index = self.index(owner)
+        if index is None:
+            return None
+        return index + 1
+
+    def percentile(self, owner):
+        """Gets the percentage of the board that an owner outranks, or None"""
+        index = self.index(owner)
+        if index is None:
+            return None
+        return 100.0 * (len(self._keys) - index - 1) / len(self._keys)
+
+    def owner_id_at(self, index):
+        """Gets the ID of the owner at a 0-based position on the board"""
+        self.ensure_built()
+        return self._keys[index][1]
+
+    def ranked_ids(self, limit=None):
+        """Gets owner IDs in descending order of prestige"""
+        self.ensure_built()
+        keys = self._keys if limit is None else self._keys[:limit]
+        return [key[1] for key in keys]
+
+    def median(self, field="prestige"):
+        """
+        Gets a value from the owner in the middle of the prestige rankings. Note
+        that median fame and legend are those of the median prestige owner.
+        """
+        self.ensure_built()
+        if not self._keys:
+            return 0
+        return getattr(self._entries[self.owner_id_at(len(self._keys) // 2)], field)
+
+    def average(self, field="prestige"):
+        """Gets the average of a value across the board"""
+        self.ensure_built()
+        if not self._keys:
+            return 0
+        return self._totals[field] / len(self._keys)
+
+
+_LEADERBOARDS = {}
+
+
+def get_leaderboard(roster_names=ACTIVE_ROSTERS):
+    """Gets the shared leaderboard for the given rosters, creating it if needed"""
+    roster_names = tuple(roster_names)
+    if roster_names not in _LEADERBOARDS:
+        _LEADERBOARDS[roster_names] = PrestigeLeaderboard(roster_names)
+    return _LEADERBOARDS[roster_names]
+
+
+def update_rankings(owner_ids):
+    """Re-indexes owners on every leaderboard after their prestige changed"""
+    for leaderboard in _LEADERBOARDS.values():
+        for owner_id in owner_ids:
+            leaderboard.update(owner_id)
+
+
+def clear_rankings():
+    """Clears every leaderboard, such as after a prestige change for everyone"""
+    for leaderboard in _LEADERBOARDS.values():
+        leaderboard.clear()
@@ -1,7 +1,9 @@
 """
 Tests for dominion stuff. Crisis commands, etc.
 """
+from datetime import datetime
 from unittest.mock import patch, Mock
+from django.test import TestCase
 from django.urls import reverse
 
 from server.utils.test_utils import ArxCommandTest, TestTicketMixins
@@ -18,11 +20,19 @@ from web.character.models import (
     SearchTag,
 )
 from world.crafting.models import CraftingMaterialType
+from world.dominion.genealogy import GENEALOGY
 from world.dominion.models import (
+    AssetOwner,
+    PlayerOrNpc,
     RPEvent,
     Organization,
     ClueForOrg,
 )
+from world.dominion.prestige_rankings import (
+    PrestigeLeaderboard,
+    RankEntry,
+    get_leaderboard,
+)
 from world.dominion.plots.models import (
     Plot,
     PlotAction,
@@ -822,3 +832,233 @@ class TestDominionViews(ArxCommandTest):
         self.client.login(username="TestAccount", password="testpassword")
         resp = self.client.get(reverse(self.url_name))
         self.assertEqual(200, resp.status_code)
+
+
+class TestPrestigeLeaderboard(TestCase):
+    def setUp(self):
+        self.board = PrestigeLeaderboard(("Active",))
+        self.board.mark_built()
+        for owner_id, prestige in ((1, 50), (2, 300), (3, 10), (4, 120)):
+            self.board.set_values(owner_id, RankEntry(prestige, prestige * 2, 1))
+
+    def test_rank_and_percentile(self):
+        self.assertEqual(self.board.ranked_ids(), [2, 4, 1, 3])
+        self.assertEqual(self.board.rank(4), 2)
+        self.assertEqual(self.board.index(3), 3)
+        self.assertEqual(self.board.percentile(2), 75.0)
+        self.assertIsNone(self.board.rank(5))
+
+    def test_median_and_average(self):
+        self.assertEqual(self.board.median(), 50)
+        self.assertEqual(self.board.median("fame"), 100)
+        self.assertEqual(self.board.average(), 120)
+        self.assertEqual(self.board.average("legend"), 1)
+
+    def test_update_values(self):
+        self.board.set_values(3, RankEntry(1000, 0, 0))
+        self.assertEqual(self.board.rank(3), 1)
+        self.assertEqual(self.board.average(), 367.5)
+        self.board.remove(3)
+        self.assertEqual(len(self.board), 3)
+        self.assertEqual(self.board.ranked_ids(), [2, 4, 1])
+
+
+class TestPrestigeGraph(ArxCommandTest):
+    def test_prestige_from_patronage(self):
+        self.assetowner.fame = 1000
+        self.assetowner.save()
+        self.assetowner2.fame = 500
+        self.assetowner2.save()
+        self.dompc2.patron = self.dompc
+        self.dompc2.save()
+        self.assertEqual(self.assetowner2.grandeur, 100)
+        self.assertEqual(self.assetowner.grandeur, 50)
+        self.assertEqual(self.assetowner.prestige, 1050)
+        self.assertEqual(get_leaderboard().rank(self.assetowner2), 2)
+        # only the patron and protege need to be recomputed
+        self.assetowner2.adjust_prestige(2000)
+        self.assertEqual(self.assetowner.grandeur, 250)
+        self.assertEqual(self.assetowner.prestige, 1250)
+        self.assertEqual(get_leaderboard().rank(self.assetowner2), 1)
+        self.dompc2.patron = None
+        self.dompc2.save()
+        self.assertEqual(self.assetowner.prestige, 1000)
+
+    def test_membership_neighbours(self):
+        from world.dominion.prestige_graph import PRESTIGE_GRAPH
+
+        org = Organization.objects.create(name="Grandees")
+        org_owner = AssetOwner.objects.create(organization_owner=org, fame=1000)
+        member = org.members.create(player=self.dompc, rank=1)
+        org_node = PRESTIGE_GRAPH.get_node(org_owner)
+        player_node = PRESTIGE_GRAPH.get_node(self.assetowner)
+        self.assertEqual(PRESTIGE_GRAPH._get_neighbours(org_node), {self.assetowner.id})
+        self.assertEqual(PRESTIGE_GRAPH._get_neighbours(player_node), {org_owner.id})
+        self.assertEqual(self.assetowner.grandeur, 100)
+        member.deguilded = True
+        member.save()
+        self.assertEqual(PRESTIGE_GRAPH._get_neighbours(org_node), set())
+        self.assertEqual(PRESTIGE_GRAPH._get_neighbours(player_node), set())
+        self.assertEqual(self.assetowner.grandeur, 0)
+
+
+class TestGenealogy(ArxCommandTest):
+    def test_family_relations(self):
+        def npc(name, *parents):
+            person = PlayerOrNpc.objects.create(npc_name=name)
+            person.parents.add(*parents)
+            return person
+
+        greatgrandparent = npc("Greatgrandparent")
+        grandparent = npc("Grandparent", greatgrandparent)
+        grandparent.spouses.add(npc("Grandparent Spouse"))
+        parent = npc("Parent", grandparent)
+        uncle = npc("Uncle", grandparent)
+        uncle.spouses.create(npc_name="Aunt")
+        cousin = npc("Cousin", uncle)
+        great_uncle = npc("Great Uncle", greatgrandparent)
+        second_cousin = npc("Second Cousin", npc("First Cousin Once", great_uncle))
+        self.dompc.parents.add(parent)
+        sibling = npc("Sibling", parent)
+        npc("Nephew", sibling)
+        self.dompc.children.add(npc("Grandchild", npc("Child")))
+        self.assertEqual(
+            self.dompc.display_immediate_family(),
+            "{wGreatgrandparents{n: Greatgrandparent\n"
+            "{wGrandparents{n: Grandparent, Grandparent Spouse\n"
+            "{wParents{n: Parent\n"
+            "{wUncles/Aunts{n: Uncle, Aunt\n"
+            "{wSiblings{n: Sibling\n"
+            "{wChildren{n: Child\n"
+            "{wNephews/Nieces{n: Nephew\n"
+            "{wCousins{n: Cousin\n"
+            "{wSecond Cousins{n: Second Cousin\n"
+            "{wGrandchildren{n: Grandchild\n",
+        )
+        # a rebuilt graph agrees with the one updated as we went
+        family = GENEALOGY.family_ids(self.dompc.id)
+        GENEALOGY.clear()
+        self.assertEqual(GENEALOGY.family_ids(self.dompc.id), family)
+        self.assertEqual(
+            set(second_cousin.second_cousins), {self.dompc, sibling, cousin}
+        )
+        uncle.children.remove(cousin)
+        self.assertEqual(list(self.dompc.cousins), [])
+        uncle.delete()
+        self.assertEqual(GENEALOGY.children(grandparent.id), {parent.id})
+
+
+class TestFealtyChart(ArxCommandTest):
+    def test_vassals(self):
+        from world.dominion.domain.models import Ruler
+        from world.dominion.fealty_chart import CROWN_ID, FealtyChart
+
+        def house(name, liege=None, **kwargs):
+            org = Organization.objects.create(name=name, **kwargs)
+            owner = AssetOwner.objects.create(organization_owner=org)
+            return org, Ruler.objects.create(house=owner, liege=liege)
+
+        _, crown_ruler = house("Crown", id=CROWN_ID)
+        vassal, vassal_ruler = house("Vassal House", crown_ruler, rank_1_male="Duke")
+        vassal.members.create(player=self.dompc, rank=1)
+        house("Npc House", vassal_ruler)
+        source = FealtyChart("unused").get_source().source
+        self.assertIn("Vassal House\n(Testaccount)", source)
+        self.assertIn("purple", source)
+        self.assertNotIn("Npc House", source)
+        source = FealtyChart("unused", include_npcs=True).get_source().source
+        self.assertIn("Npc House", source)
+
+
+class TestMapRenderer(ArxCommandTest):
+    def test_render_tiles(self):
+        import io
+        import os.path
+        import tempfile
+        from PIL import Image, ImageDraw
+        from world.dominion.domain.models import Domain, Ruler
+        from world.dominion.map_render import MapRenderer
+        from world.dominion.models import Land, MapLocation, Region
+
+        def domain(name, land, x, y):
+            loc = MapLocation.objects.create(land=land, x_coord=x, y_coord=y)
+            return Domain.objects.create(name=name, location=loc, ruler=ruler)
+
+        def render_whole():
+            # the map drawn in one pass over the whole image, without tiles
+            image = renderer.base.copy()
+            draw = ImageDraw.Draw(image)
+            lands, domains = renderer.get_map_data()
+            for drawable in renderer.get_drawables(lands, domains, False):
+                drawable.draw(draw, 0, 0, renderer.fonts)
+            return image.tobytes()
+
+        # don't overwrite the generated map the server serves after a restart
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        generated_map = patch(
+            "world.dominion.map_render.GENERATED_MAP",
+            os.path.join(tempdir.name, "generated.png"),
+        )
+        generated_map.start()
+        self.addCleanup(generated_map.stop)
+        org = Organization.objects.create(name="Map House")
+        org.members.create(player=self.dompc)
+        ruler = Ruler.objects.create(
+            house=AssetOwner.objects.create(organization_owner=org)
+        )
+        region = Region.objects.create(name="Mapped")
+        first = Land.objects.create(name="West", region=region, x_coord=0)
+        second = Land.objects.create(name="East", region=region, x_coord=2)
+        domain("Alpha", first, 2, 2)
+        # its dot and label stay inside the tile at (2, 0)
+        changed = domain("Bo", second, 5, 2)
+        renderer = MapRenderer()
+        renderer.load_base()
+        renderer.base = Image.new("RGB", (500, 300), "#c8b48c")
+        with patch.object(
+            renderer, "render_tile", wraps=renderer.render_tile
+        ) as render_tile:
+            rendered = renderer.render()
+            self.assertEqual(render_tile.call_count, 15)
+            self.assertEqual(
+                Image.open(io.BytesIO(rendered.data)).tobytes(), render_whole()
+            )
+            render_tile.reset_mock()
+            self.assertEqual(renderer.render().etag, rendered.etag)
+            render_tile.assert_not_called()
+            changed.name = "Bi"
+            changed.save()
+            updated = renderer.render()
+            self.assertEqual([ob[0][:2] for ob in render_tile.call_args_list], [(2, 0)])
+        self.assertNotEqual(updated.etag, rendered.etag)
+        self.assertEqual(Image.open(io.BytesIO(updated.data)).tobytes(), render_whole())
+        self.assertEqual(
+            [ob["title"] for ob in renderer.links], ["Map House", "Map House"]
+        )
+
+
+class TestBattleForecast(ArxCommandTest):
+    def test_simulate_battle(self):
+        from world.dominion import unit_constants
+        from world.dominion.battle import Battle, simulate_battle
+        from world.dominion.domain.models import Army
+
+        attackers = Army.objects.create(name="Attackers")
+        attackers.units.create(unit_type=unit_constants.INFANTRY, quantity=200)
+        attackers.units.create(unit_type=unit_constants.ARCHERS, quantity=50)
+        defenders = Army.objects.create(name="Defenders")
+        defenders.units.create(unit_type=unit_constants.PIKE, quantity=100)
+        forecast = simulate_battle([attackers], [defenders], trials=20, seed=3)
+        self.assertEqual(forecast.trials, 20)
+        self.assertEqual(sum(forecast.results.values()), 20)
+        self.assertTrue(all(0 < ob <= 31 for ob in forecast.rounds))
+        self.assertIn("Attacker wins", forecast.display())
+        again = simulate_battle([attackers], [defenders], trials=20, seed=3)
+        self.assertEqual(forecast.display(), again.display())
+        # nothing is saved from a forecast
+        self.assertEqual(sorted(ob.quantity for ob in attackers.units.all()), [50, 200])
+        self.assertEqual(defenders.units.get().quantity, 100)
+        # an attacker without opposition wins every time
+        alone = simulate_battle([attackers], [], trials=5, seed=3)
+        self.assertEqual(alone.chance(Battle.ATK_WIN), 100)
@@ -4,8 +4,8 @@ Unit types:
 All the stats for different kinds of military units are defined here and
 will be used at runtime.
 """
+import random
 import traceback
-from random import randint
 
 from world.dominion.combat_grid import PositionActor
 from world.dominion import unit_constants
@@ -142,6 +142,8 @@ class UnitStats(PositionActor):
     # how much more damage we take from things like dragon fire, spells, catapults, etc
     structure_damage_multiplier = 1
     xp_cost_multiplier = 1
+    # where our rolls come from. A Battle gives its units its own seeded Random
+    rng = random
 
     def __init__(self, dbobj, grid):
         super(UnitStats, self).__init__(grid)
@@ -248,7 +250,7 @@ class UnitStats(PositionActor):
         defense *= def_mult
         # usually this will be 0. multi_defense is for dragons, mages, etc
         defense += target.multi_defense * self.quantity
-        def_roll = randint(0, defense)
+        def_roll = self.rng.randint(0, defense)
         if target.commander:
             def_roll += def_roll * target.commander.warfare
         if target.castle:
@@ -257,7 +259,7 @@ class UnitStats(PositionActor):
         attack += atk * self.level
         attack += atk * self.equipment
         # have a floor of half our attack
-        atk_roll = randint(attack / 2, attack)
+        atk_roll = self.rng.randint(attack // 2, attack)
         if self.commander:
             atk_roll += atk_roll * self.commander.warfare
         damage = atk_roll - def_roll
@@ -265,8 +267,12 @@ class UnitStats(PositionActor):
             damage = 0
         target.damage += damage
         self.log.info(
-            "%s attacked %s. Atk roll: %s Def roll: %s\nDamage:%s"
-            % (str(self), str(target), atk_roll, def_roll, damage)
+            "%s attacked %s. Atk roll: %s Def roll: %s\nDamage:%s",
+            self,
+            target,
+            atk_roll,
+            def_roll,
+            damage,
         )
 
     def ranged_attack(self):
@@ -295,13 +301,13 @@ class UnitStats(PositionActor):
         elif self.storm_targ_pos:
             try:
                 x, y, z = self.storm_targ_pos
-                self.move_toward_position(x, y, z, self.movement)
+                self.move_toward_position(None, x, y, z, self.movement)
             except (TypeError, ValueError):
                 print(
                     "ERROR when attempting to move toward castle. storm_targ_pos: %s"
                     % str(self.storm_targ_pos)
                 )
-        self.log.info("%s has moved. Now at pos: %s" % (self, str(self.position)))
+        self.log.info("%s has moved. Now at pos: %s", self, self.position)
 
     def cleanup(self):
         """
@@ -314,14 +320,14 @@ class UnitStats(PositionActor):
         hp += self.hp * self.level
         hp += self.hp * self.equipment
         if self.damage >= hp:
-            losses = self.damage / hp
+            losses = self.damage // hp
             # save remainder
             self.losses += losses
             self.quantity -= losses
             if self.quantity <= 0:
                 self.quantity = 0
                 self.destroyed = True
-                self.log.info("%s has been destroyed." % (str(self)))
+                self.log.info("%s has been destroyed.", self)
                 return
             self.damage %= hp
             self.rout_check()
@@ -342,7 +348,7 @@ class UnitStats(PositionActor):
         difficulty -= 5 * self.level
         if self.commander:
             difficulty -= 5 * self.commander.warfare
-        if randint(1, 100) < difficulty:
+        if self.rng.randint(1, 100) < difficulty:
             self.routed = True
 
     def rally_check(self):
@@ -358,10 +364,10 @@ class UnitStats(PositionActor):
             level = self.commander.warfare
         # a level 0 or no commander just means roll is unmodified
         level += 1
-        roll = randint(1, 100)
+        roll = self.rng.randint(1, 100)
         roll *= level
         roll += 10 * self.level
-        self.log.info("%s has routed and rolled %s to rally." % (str(self), roll))
+        self.log.info("%s has routed and rolled %s to rally.", self, roll)
         if roll >= 100:
             self.routed = False
 
@@ -2,8 +2,7 @@
 Views related to the Dominion app
 """
 from django.views.generic import ListView, DetailView, CreateView
-from world.dominion.models import RPEvent, AssignedTask, Land, Organization
-from world.dominion.domain.models import Domain
+from world.dominion.models import RPEvent, AssignedTask
 from world.dominion.plots.models import Plot
 from world.dominion.forms import RPEventCommentForm, RPEventCreateForm
 from world.dominion.view_utils import EventHTMLCalendar
@@ -17,9 +16,10 @@ from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils.safestring import mark_safe
 from server.utils.view_mixins import LimitPageMixin
-from PIL import Image, ImageDraw, ImageFont
-from graphviz import Graph
-from math import trunc
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from world.dominion.fealty_chart import FEALTY_CHARTS
+from world.dominion.map_render import MAP_RENDERER
 import os.path
 import datetime
 import calendar
@@ -286,281 +286,60 @@ def event_comment(request, pk):
     return HttpResponseRedirect(reverse("dominion:display_event", args=(pk,)))
 
 
-GRID_SIZE = 100
-SUBGRID = 10
+# how long browsers may keep the map and fealty charts before checking again
+IMAGE_MAX_AGE = 600
+
+
+def serve_image(request, data, etag=None, last_modified=None):
+    """Serves a png, or a 304 if the client's copy is still good"""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(data, content_type="image/png")
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, max_age=IMAGE_MAX_AGE)
+    return response
 
 
 def map_image(request):
     """
-    Generates a graphical map from the Land and Domain entries, omitting all NPC domains for now.
-    You can pass a 'bw_grid=1' option to generate a black and white printable grid, and 'subgrid=1'
-    to generate a gray 10x10 grid within each of the grid squares. Presently only available to
-    logged-in staff.
+    Serves the graphical map rendered from the Land and Domain entries, omitting all NPC domains
+    for now. Logged-in users can pass 'overlay=1' to see each land's terrain and coordinates over a
+    grid, and 'regenerate=1' to have the map checked for changes right away.
 
     :param request: The HTTP request
     :return: The Django view response, in this case an image/png blob.
     """
-
-    def draw_font_outline(draw, x_coordinate, y_coordinate, font_used, text):
-        """Draws outline"""
-        # This is awful
-        draw.text((x_coordinate - 1, y_coordinate), text, font=font_used, fill="white")
-        draw.text((x_coordinate + 1, y_coordinate), text, font=font_used, fill="white")
-        draw.text((x_coordinate, y_coordinate - 1), text, font=font_used, fill="white")
-        draw.text((x_coordinate, y_coordinate + 1), text, font=font_used, fill="white")
-        draw.text((x_coordinate, y_coordinate), text, font=font_used, fill="black")
-
-    TERRAIN_NAMES = {
-        Land.COAST: "Coastal",
-        Land.DESERT: "Desert",
-        Land.GRASSLAND: "Grassland",
-        Land.HILL: "Hills",
-        Land.MOUNTAIN: "Mountains",
-        Land.OCEAN: "Ocean",
-        Land.PLAINS: "Plains",
-        Land.SNOW: "Snow",
-        Land.TUNDRA: "Tundra",
-        Land.FOREST: "Forest",
-        Land.JUNGLE: "Jungle",
-        Land.MARSH: "Marsh",
-        Land.ARCHIPELAGO: "Archipelago",
-        Land.FLOOD_PLAINS: "Flood Plains",
-        Land.ICE: "Ice",
-        Land.LAKES: "Lakes",
-        Land.OASIS: "Oasis",
-    }
-
     regen = False
-    overlay = None
+    overlay = False
 
     if request.user.is_authenticated:
-        overlay = request.GET.get("overlay")
-        regen = request.GET.get("regenerate")
-
-    response = HttpResponse(content_type="image/png")
-
-    if not os.path.exists("world/dominion/map/arxmap_generated.png"):
-        regen = True
-
-    if not regen and not overlay:
-        mapimage = Image.open("world/dominion/map/arxmap_generated.png")
-        mapimage.save(response, "PNG")
-        return response
-
-    min_x = 0
-    min_y = 0
-    max_x = 0
-    max_y = 0
-
-    lands = Land.objects.all()
-
-    # This might be better done with annotations?
-    for land in lands:
-        min_x = min(min_x, land.x_coord)
-        min_y = min(min_y, land.y_coord)
-        max_x = max(max_x, land.x_coord)
-        max_y = max(max_y, land.y_coord)
-
-    total_height = max_y - min_y
-
-    mapimage = Image.open("world/dominion/map/arxmap_resized.jpg")
-    mapdraw = ImageDraw.Draw(mapimage)
-
-    font = ImageFont.truetype("world/dominion/map/Amaranth-Regular.otf", 14)
-    domain_font = ImageFont.truetype("world/dominion/map/Amaranth-Regular.otf", 24)
-
-    if overlay:
-        for xloop in range(0, mapimage.size[0] / GRID_SIZE):
-            for yloop in range(0, mapimage.size[1] / GRID_SIZE):
-                x1 = xloop * GRID_SIZE
-                y1 = yloop * GRID_SIZE
-                x2 = x1 + GRID_SIZE
-                y2 = y1 + GRID_SIZE
+        overlay = bool(request.GET.get("overlay"))
+        regen = bool(request.GET.get("regenerate"))
 
-                for x in range(0, GRID_SIZE / SUBGRID):
-                    for y in range(0, GRID_SIZE / SUBGRID):
-                        subx = x1 + (SUBGRID * x)
-                        suby = y1 + (SUBGRID * y)
-                        mapdraw.rectangle(
-                            [(subx, suby), (subx + SUBGRID, suby + SUBGRID)],
-                            outline="#8a8a8a",
-                        )
-
-                mapdraw.rectangle([(x1, y1), (x2, y2)], outline="#ffffff")
-
-    try:
-        for land in lands:
-            x1 = (land.x_coord - min_x) * GRID_SIZE
-            y1 = (total_height - (land.y_coord - min_y)) * GRID_SIZE
-
-            if overlay:
-                text_x = x1 + 10
-                text_y = y1 + 60
-
-                maptext = "%s (%d,%d)\n%s" % (
-                    TERRAIN_NAMES[land.terrain],
-                    land.x_coord,
-                    land.y_coord,
-                    land.region.name,
-                )
-                draw_font_outline(mapdraw, text_x, text_y, font, maptext)
-
-            domains = (
-                Domain.objects.filter(location__land=land)
-                .filter(
-                    ruler__house__organization_owner__members__player__player__isnull=False
-                )
-                .distinct()
-            )
-
-            if domains:
-                for domain in domains:
-                    circle_x = x1 + (SUBGRID * domain.location.x_coord)
-                    circle_y = y1 + (SUBGRID * domain.location.y_coord)
-
-                    mapdraw.ellipse(
-                        [
-                            (circle_x, circle_y),
-                            (circle_x + SUBGRID, circle_y + SUBGRID),
-                        ],
-                        "#000000",
-                    )
-
-                    label_x = circle_x + SUBGRID + 6
-                    label_y = circle_y - 4
-                    draw_font_outline(
-                        mapdraw, label_x, label_y, domain_font, domain.name
-                    )
-
-    except Exception as exc:
-        print(str(exc))
-
-    # Delete our drawing tool and commit the image
-    del mapdraw
-
-    if not overlay:
-        mapimage.save("world/dominion/map/arxmap_generated.png", "PNG")
-    mapimage.save(response, "PNG")
-    return response
+    rendered = MAP_RENDERER.get_map(overlay=overlay, regenerate=regen)
+    return serve_image(request, rendered.data, etag=rendered.etag)
 
 
 def map_wrapper(request):
-    """Gets the map, whether an existing pre-generated version, or generates a new one."""
+    """Gets the page for the map, with an image map of links to each domain's ruling house."""
     regen = False
 
     if request.user.is_authenticated:
         regen = request.GET.get("regenerate")
 
-    if not os.path.exists("world/dominion/map/arxmap_generated.png"):
-        regen = True
-
-    if not os.path.exists("world/dominion/map/arxmap_imagemap.html"):
-        regen = True
-
-    if not os.path.exists("world/dominion/map/arxmap_imagesize.cfg"):
-        regen = True
-
-    if not regen:
-        imagestats_file = open("world/dominion/map/arxmap_imagesize.cfg")
-        if imagestats_file:
-            img_width = int(imagestats_file.readline())
-            img_height = int(imagestats_file.readline())
-            imagestats_file.close()
-
-        imagemap_file = open("world/dominion/map/arxmap_imagemap.html", "r")
-        imagemap_html = ""
-        if imagemap_file:
-            imagemap_html = imagemap_file.read()
-            imagemap_file.close()
-
-        context = {
-            "page_title": "Map of Arvum",
-            "img_width": img_width,
-            "img_height": img_height,
-            "imagemap_html": imagemap_html,
-        }
-        return render(request, "dominion/map_pregen.html", context)
-
-    map_links = []
-    mapimage = Image.open("world/dominion/map/arxmap_resized.jpg")
-
-    ratio = 1280.0 / mapimage.size[0]
-    img_width = trunc(mapimage.size[0] * ratio)
-    img_height = trunc(mapimage.size[1] * ratio)
-
     try:
-        lands = Land.objects.all()
-
-        min_x = 0
-        min_y = 0
-        max_x = 0
-        max_y = 0
-
-        # This might be better done with annotations?
-        for land in lands:
-            min_x = min(min_x, land.x_coord)
-            min_y = min(min_y, land.y_coord)
-            max_x = max(max_x, land.x_coord)
-            max_y = max(max_y, land.y_coord)
-
-        total_height = max_y - min_y
-
-        ratio = 1280.0 / mapimage.size[0]
-        img_width = trunc(mapimage.size[0] * ratio)
-        img_height = trunc(mapimage.size[1] * ratio)
-
-        domain_font = ImageFont.truetype("world/dominion/map/Amaranth-Regular.otf", 24)
-
-        for land in lands:
-            x1 = (land.x_coord - min_x) * GRID_SIZE
-            y1 = (total_height - (land.y_coord - min_y)) * GRID_SIZE
-
-            domains = (
-                Domain.objects.filter(location__land=land)
-                .filter(
-                    ruler__house__organization_owner__members__player__player__isnull=False
-                )
-                .distinct()
-            )
-
-            if domains:
-                for domain in domains:
-                    domain_x = x1 + (SUBGRID * domain.location.x_coord)
-                    domain_y = y1 + ((SUBGRID * domain.location.y_coord) - 4)
-
-                    font_size = domain_font.getsize(domain.name)
-                    domain_x2 = domain_x + font_size[0] + 10
-                    domain_y2 = domain_y + font_size[1]
-
-                    org = domain.ruler.house.organization_owner
-                    org_url = reverse(
-                        "help_topics:display_org", kwargs={"object_id": org.id}
-                    )
-
-                    map_data = {
-                        "x1": trunc(domain_x * ratio),
-                        "y1": trunc(domain_y * ratio),
-                        "x2": trunc(domain_x2 * ratio),
-                        "y2": trunc(domain_y2 * ratio),
-                        "url": org_url,
-                        "title": org.name,
-                    }
-                    map_links.append(map_data)
-
+        map_links, (img_width, img_height) = MAP_RENDERER.get_links_and_size(
+            regenerate=bool(regen)
+        )
     except Exception as exc:
         print(str(exc))
         raise Http404
 
     context = {"imagemap_links": map_links}
     imagemap_html = render_to_string("dominion/map_wrapper.html", context)
-    imagemap_file = open("world/dominion/map/arxmap_imagemap.html", "w")
-    imagemap_file.write(imagemap_html)
-    imagemap_file.close()
-
-    imagestats_file = open("world/dominion/map/arxmap_imagesize.cfg", "w")
-    imagestats_file.write("%d\n" % img_width)
-    imagestats_file.write("%d\n" % img_height)
-    imagestats_file.close()
 
     context = {
         "img_width": img_width,
@@ -572,104 +351,27 @@ def map_wrapper(request):
     return render(request, "dominion/map_pregen.html", context)
 
 
-def generate_fealty_chart(request, filename, include_npcs=False):
-
-    node_colors = {
-        "Ruling Prince": "lightblue",
-        "Prince": "lightblue",
-        "Archduke": "lightblue",
-        "Ruling Duke": "purple",
-        "Duke": "purple",
-        "Ruling Marquis": "red",
-        "Marquis": "red",
-        "Marquis, Count of the March": "red",
-        "Margrave": "red",
-        "Lord of the March": "red",
-        "Truespeaker": "red",
-        "Ruling Count": "yellow",
-        "Count of the March": "yellow",
-        "Count": "yellow",
-        "Ruling Baron": "green",
-        "Baron": "green",
-    }
-
-    def add_vassals(G, org):
-        if not org:
-            print("Something has gone horribly wrong!")
-        else:
-            org_name = org.name
-            org_rank_1 = org.living_members.filter(rank=1).first()
-            if org_rank_1 is not None:
-                org_name = org_name + "\n(" + org_rank_1.player.player.key.title() + ")"
-
-            for vassal in org.assets.estate.vassals.all():
-                is_npc = (
-                    vassal.house.organization_owner.living_members.all().count() == 0
-                )
-                if vassal.house and (not is_npc or include_npcs):
-                    node_color = node_colors.get(
-                        vassal.house.organization_owner.rank_1_male, None
-                    )
-                    name = vassal.house.organization_owner.name
-
-                    rank_1 = vassal.house.organization_owner.living_members.filter(
-                        rank=1
-                    ).first()
-                    if rank_1 is not None:
-                        name = name + "\n(" + rank_1.player.player.key.title() + ")"
-
-                    if node_color:
-                        G.node(name, style="filled", color=node_color)
-                    G.edge(org_name, name)
-                    add_vassals(G, vassal.house.organization_owner)
-
+def generate_fealty_chart(request, include_npcs=False):
+    """Serves a fealty chart, which is rendered in the background when stale"""
     regen = False
 
     if request.user.is_authenticated:
         regen = request.GET.get("regenerate")
 
-    if not os.path.exists(filename + ".png"):
-        regen = True
-
-    if not regen:
-        response = HttpResponse(content_type="image/png")
-        fealtyimage = Image.open(filename + ".png")
-        fealtyimage.save(response, "PNG")
-        return response
-
     try:
-        G = Graph(
-            "fealties",
-            format="png",
-            engine="dot",
-            graph_attr=(
-                ("overlap", "prism"),
-                ("spline", "true"),
-                ("concentrate", "true"),
-            ),
-        )
-        crown = Organization.objects.get(id=145)
-        add_vassals(G, crown)
-
-        G.render(filename, cleanup=True)
-
-        response = HttpResponse(content_type="image/png")
-        fealtyimage = Image.open(filename + ".png")
-        fealtyimage.save(response, "PNG")
-        return response
-
+        path = FEALTY_CHARTS[include_npcs].get_chart(regenerate=bool(regen))
+        with open(path, "rb") as chart:
+            data = chart.read()
+        last_modified = int(os.path.getmtime(path))
     except Exception as e:
         print(e)
         raise Http404
+    return serve_image(request, data, last_modified=last_modified)
 
 
 def fealty_chart(request):
-    return generate_fealty_chart(
-        request, "world/dominion/fealty/fealty_graph", include_npcs=False
-    )
+    return generate_fealty_chart(request, include_npcs=False)
 
 
 def fealty_chart_full(request):
-    return generate_fealty_chart(
-        request, "world/dominion/fealty/fealty_graph_full", include_npcs=True
-    )
+    return generate_fealty_chart(request, include_npcs=True)
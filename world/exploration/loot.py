@@ -2,11 +2,22 @@ import random
 
 from evennia.utils import create
 from server.utils.arx_utils import a_or_an
-from server.utils.picker import WeightedPicker
+from server.utils.picker import AliasPicker, WeightedPicker
 from typeclasses.bauble import Bauble
 from typeclasses.wearable.wieldable import Wieldable
 from world.exploration.models import GeneratedLootFragment
 
+# quality levels of ancient loot
+QUALITY_PICKER = AliasPicker([(4, 25), (5, 45), (6, 30), (7, 10), (8, 3), (9, 1)])
+
+# materials of ancient weapons, by how difficult the shardhaven is
+MATERIAL_PICKERS = (
+    AliasPicker([("steel", 30), ("rubicund", 50), ("diamondplate", 1)]),
+    AliasPicker([("steel", 10), ("rubicund", 40), ("diamondplate", 5)]),
+    AliasPicker([("rubicund", 30), ("diamondplate", 20), ("alaricite", 5)]),
+    AliasPicker([("rubicund", 10), ("diamondplate", 30), ("alaricite", 5)]),
+)
+
 
 class Trinket(Bauble):
     @property
@@ -42,11 +53,11 @@ class LootGenerator(object):
 
         align_picker = WeightedPicker()
         for alignment in haven.alignment_chances.all():
-            align_picker.add(alignment.alignment, alignment.weight)
+            align_picker.add_option(alignment.alignment, alignment.weight)
 
         affinity_picker = WeightedPicker()
         for affinity in haven.affinity_chances.all():
-            affinity_picker.add(affinity.affinity, affinity.weight)
+            affinity_picker.add_option(affinity.affinity, affinity.weight)
 
         alignment = align_picker.pick()
         affinity = affinity_picker.pick()
@@ -70,15 +81,7 @@ class LootGenerator(object):
             "\nAn ancient trinket, one that feels slightly warm to the touch.\n"
         )
 
-        quality_picker = WeightedPicker()
-        quality_picker.add_option(4, 25)
-        quality_picker.add_option(5, 45)
-        quality_picker.add_option(6, 30)
-        quality_picker.add_option(7, 10)
-        quality_picker.add_option(8, 3)
-        quality_picker.add_option(9, 1)
-
-        trinket.item_data.quality_level = quality_picker.pick()
+        trinket.item_data.quality_level = QUALITY_PICKER.pick()
         trinket.db.found_shardhaven = haven.name
 
         cls.set_alignment_and_affinity(haven, trinket)
@@ -130,25 +133,15 @@ class LootGenerator(object):
         if not wpn_type:
             wpn_type = random.choice(weapon_types)
 
-        picker = WeightedPicker()
-
         difficulty = haven.difficulty_rating
         if difficulty < 3:
-            picker.add_option("steel", 30)
-            picker.add_option("rubicund", 50)
-            picker.add_option("diamondplate", 1)
+            picker = MATERIAL_PICKERS[0]
         elif difficulty < 5:
-            picker.add_option("steel", 10)
-            picker.add_option("rubicund", 40)
-            picker.add_option("diamondplate", 5)
+            picker = MATERIAL_PICKERS[1]
         elif difficulty < 8:
-            picker.add_option("rubicund", 30)
-            picker.add_option("diamondplate", 20)
-            picker.add_option("alaricite", 5)
+            picker = MATERIAL_PICKERS[2]
         else:
-            picker.add_option("rubicund", 10)
-            picker.add_option("diamondplate", 30)
-            picker.add_option("alaricite", 5)
+            picker = MATERIAL_PICKERS[3]
 
         material = picker.pick()
 
@@ -192,15 +185,7 @@ class LootGenerator(object):
 
         weapon.db.desc = desc
 
-        quality_picker = WeightedPicker()
-        quality_picker.add_option(4, 25)
-        quality_picker.add_option(5, 45)
-        quality_picker.add_option(6, 30)
-        quality_picker.add_option(7, 10)
-        quality_picker.add_option(8, 3)
-        quality_picker.add_option(9, 1)
-
-        weapon.item_data.quality_level = quality_picker.pick()
+        weapon.item_data.quality_level = QUALITY_PICKER.pick()
         weapon.db.found_shardhaven = haven.name
         weapon.item_data.recipe = LootGenerator.get_weapon_recipe(
             material, wpn_type=wpn_type
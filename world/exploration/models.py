@@ -8,9 +8,12 @@ from django.db import models
 from world.exploration import builder
 from server.utils.arx_utils import inform_staff
 import random
-from server.utils.picker import WeightedPicker
+from server.utils.picker import PickerCache, WeightedPicker
 import datetime
 
+# pickers for loot fragments of each type and the materials each monster drops
+LOOT_PICKERS = PickerCache()
+
 
 class Monster(SharedMemoryModel):
 
@@ -144,6 +147,17 @@ class Monster(SharedMemoryModel):
         result.location = location
         return result
 
+    @property
+    def drop_picker(self):
+        """A cached picker of the alchemical and crafting materials we drop"""
+
+        def get_drops():
+            drops = list(self.drops.select_related("material"))
+            drops.extend(self.crafting_drops.select_related("material"))
+            return [(drop, drop.weight) for drop in drops]
+
+        return LOOT_PICKERS.get(("drops", self.id), get_drops)
+
     def handle_loot_drop(self, obj, location):
         if location is None:
             return
@@ -164,13 +178,13 @@ class Monster(SharedMemoryModel):
             if self.weight_weapon > 0:
                 picker.add_option("weapon", self.weight_trinket)
 
-        for loot in self.drops.all():
-            picker.add_option(loot, loot.weight)
-
-        for crafting_loot in self.crafting_drops.all():
-            picker.add_option(crafting_loot, crafting_loot.weight)
+        drops = self.drop_picker
+        if drops:
+            picker.add_option(drops, drops.total)
 
         result = picker.pick()
+        if result is drops:
+            result = drops.pick()
 
         if result:
             final_loot = None
@@ -259,8 +273,18 @@ class GeneratedLootFragment(SharedMemoryModel):
     @classmethod
     def pick_random_fragment(cls, ftype):
 
-        results = cls.objects.filter(fragment_type=ftype)
-        return random.choice(results.all()).text
+        picker = LOOT_PICKERS.get(
+            ("fragment", ftype),
+            lambda: [
+                (text, 1)
+                for text in cls.objects.filter(fragment_type=ftype).values_list(
+                    "text", flat=True
+                )
+            ],
+        )
+        if not picker:
+            raise IndexError("No loot fragments of type %s." % ftype)
+        return picker.pick()
 
     @classmethod
     def generate_weapon_name(
@@ -1669,3 +1693,13 @@ class ShardhavenLayout(SharedMemoryModel):
         layout.save()
 
         return layout
+
+
+def clear_loot_pickers(sender, **kwargs):
+    """Discards the cached loot pickers when fragments or monster drops change"""
+    LOOT_PICKERS.clear()
+
+
+for _model in (GeneratedLootFragment, MonsterAlchemicalDrop, MonsterCraftingDrop):
+    models.signals.post_save.connect(clear_loot_pickers, sender=_model)
+    models.signals.post_delete.connect(clear_loot_pickers, sender=_model)
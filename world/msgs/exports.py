@@ -0,0 +1,107 @@
+"""
+The JSON export of white journals for our API, used by the wiki to sync
+journals. See server.utils.json_export for how exports are paged, streamed
+and cached. JOURNAL_EXPORT is the shared instance, which is told when a
+journal is written, and hears about journals being edited or deleted from
+signals.
+"""
+from django.db.models import signals
+from evennia.comms.models import Msg
+
+from server.utils.json_export import JsonExport
+from world.msgs.models import Journal
+
+# last names for those with no family, by fealty
+COMMONER_NAMES = {
+    "Velenosa": "Masque",
+    "Valardin": "Honor",
+    "Crownsworn": "Crown",
+    "Redrain": "Frost",
+    "Grayson": "Crucible",
+    "Thrax": "Waters",
+}
+
+
+def get_fullname(char):
+    """Auto-generate last names for people who don't have em. Poor bastards. Literally!"""
+    last = (
+        COMMONER_NAMES.get(str(char.item_data.fealty), "")
+        if char.item_data.family == "None"
+        else char.item_data.family
+    )
+    return "{0} {1}".format(char.key, last)
+
+
+class JournalExport(JsonExport):
+    """White journals, newest first"""
+
+    descending = True
+
+    def get_queryset(self, request):
+        """White journals, only those after 'timestamp' if it's given"""
+        import datetime
+
+        queryset = Journal.white_journals.all()
+        try:
+            timestamp = datetime.datetime.fromtimestamp(
+                float(request.GET.get("timestamp", 0))
+            )
+        except (AttributeError, ValueError, TypeError, OverflowError):
+            timestamp = None
+        if timestamp:
+            queryset = queryset.filter(db_date_created__gt=timestamp)
+        return queryset
+
+    def prefetch(self, queryset):
+        """Fetches senders, receivers and their character sheets with the journals"""
+        return queryset.prefetch_related(
+            "db_sender_accounts",
+            "db_sender_objects__charactersheet__fealty",
+            "db_sender_scripts",
+            "db_receivers_objects__charactersheet__fealty",
+        )
+
+    def serialize(self, entry):
+        """
+        Gets the dict for a journal.
+
+            Args:
+                entry (Journal): The journal
+
+            Returns:
+                dict to convert to json
+        """
+        from world.msgs.messagehandler import MessageHandler
+
+        try:
+            sender = entry.senders[0]
+        except IndexError:
+            sender = None
+        try:
+            target = entry.db_receivers_objects.all()[0]
+        except IndexError:
+            target = None
+        return {
+            "id": entry.id,
+            "sender": get_fullname(sender) if sender else "",
+            "target": get_fullname(target) if target else "",
+            "message": entry.db_message,
+            "ic_date": MessageHandler.get_date_from_header(entry),
+        }
+
+
+JOURNAL_EXPORT = JournalExport()
+
+
+def invalidate_journal(sender, instance, **kwargs):
+    """Discards the export of a journal that's been edited or deleted"""
+    JOURNAL_EXPORT.invalidate(instance.id)
+
+
+for model in (Msg, Journal):
+    signals.post_save.connect(
+        invalidate_journal, sender=model, dispatch_uid="invalidate_journal"
+    )
+    signals.post_delete.connect(
+        invalidate_journal, sender=model, dispatch_uid="invalidate_journal"
+    )
@@ -11,11 +11,11 @@ from world.msgs.managers import (
     WHITE_TAG,
     BLACK_TAG,
     RELATIONSHIP_TAG,
-    q_search_text_body,
     q_receiver_character_name,
 )
 
 from server.utils.arx_utils import get_date, create_arx_message
+from server.utils.counters import COUNTERS
 
 
 class JournalHandler(MsgHandlerBase):
@@ -118,6 +118,9 @@ class JournalHandler(MsgHandlerBase):
 
     def add_to_journals(self, msg, white=True):
         """adds message to our journal"""
+        from world.msgs.exports import JOURNAL_EXPORT
+
+        JOURNAL_EXPORT.invalidate(msg.id)
         if not white:
             msg.add_black_locks()
             if msg not in self.black_journal:
@@ -144,7 +147,7 @@ class JournalHandler(MsgHandlerBase):
         )
         msg = self.add_to_journals(msg, white)
         # journals made this week, for xp purposes
-        self.num_journals += 1
+        COUNTERS.add_to_attribute(self.obj, "num_journals")
         return msg
 
     def add_event_journal(self, event, msg, white=True, date=""):
@@ -175,21 +178,22 @@ class JournalHandler(MsgHandlerBase):
             relslist.insert(0, msg)
         rels[name] = relslist
         # number of relationship updates this week, for xp purposes
-        self.num_rel_updates += 1
+        COUNTERS.add_to_attribute(self.obj, "num_rel_updates")
         return msg
 
     def search_journal(self, text):
         """
-        Returns all matches for text in character's journal
+        Returns all matches for text in character's journal: entries that
+        contain the text, best match first, followed by any other entries
+        about a character by that name.
         """
-        Journal = lazy_import_from_str("Journal")
-        matches = (
-            Journal.white_journals.written_by(self.obj)
-            .filter(q_receiver_character_name(text) | q_search_text_body(text))
-            .distinct()
-        )
+        from world.msgs.search import MsgSearch
 
-        return list(matches)
+        Journal = lazy_import_from_str("Journal")
+        journals = Journal.white_journals.written_by(self.obj)
+        matches = MsgSearch(text, journals).results()
+        about = journals.filter(q_receiver_character_name(text)).distinct()
+        return matches + [ob for ob in about if ob not in matches]
 
     def size(self, white=True):
         if white:
@@ -199,19 +203,19 @@ class JournalHandler(MsgHandlerBase):
 
     @property
     def num_journals(self):
-        return self.obj.db.num_journals or 0
+        return COUNTERS.get_attribute(self.obj, "num_journals")
 
     @num_journals.setter
     def num_journals(self, val):
-        self.obj.db.num_journals = val
+        COUNTERS.set_attribute(self.obj, "num_journals", val)
 
     @property
     def num_rel_updates(self):
-        return self.obj.db.num_rel_updates or 0
+        return COUNTERS.get_attribute(self.obj, "num_rel_updates")
 
     @num_rel_updates.setter
     def num_rel_updates(self, val):
-        self.obj.db.num_rel_updates = val
+        COUNTERS.set_attribute(self.obj, "num_rel_updates", val)
 
     def convert_short_rel_to_long_rel(self, character, rel_key, white=True):
         """
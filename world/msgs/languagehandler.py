@@ -15,9 +15,11 @@ class LanguageHandler(object):
 
     def add_language(self, language):
         self.obj.tags.add(language, category="languages")
+        self.obj.ndb.delivery_profile = None
 
     def remove_language(self, language):
         self.obj.tags.remove(language, category="languages")
+        self.obj.ndb.delivery_profile = None
 
     @property
     def current_language(self):
@@ -0,0 +1,27 @@
+"""
+Builds the full-text search index for journals, messengers, board posts and
+rumors from scratch. Messages are indexed as they're saved, so this is only
+needed when the index is first created or if it's fallen out of step with
+the messages, such as after text was changed with a queryset update.
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index for in-game messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of messages to index per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        from world.msgs.models import Journal, Messenger, Post, Rumor
+        from world.msgs.search import rebuild_index
+
+        for proxy in (Journal, Messenger, Post, Rumor):
+            num = rebuild_index(proxy.objects.all(), options["batch_size"])
+            self.stdout.write("Indexed %s %s messages." % (num, proxy.__name__))
@@ -98,14 +98,17 @@ def q_receiver_character_name(name):
 
 def q_search_text_body(text_to_search_for):
     """
-    Gets a Q() object for Msgs that contain specified text.
+    Gets a Q() object for Msgs that contain specified text, using the full-text
+    search index in world.msgs.search.
     Args:
         text_to_search_for: Word/phrase to search Msg text bodies for
 
     Returns:
         Q() object for Msgs that contain the text to match.
     """
-    return Q(db_message__icontains=text_to_search_for)
+    from world.msgs.search import q_search_terms
+
+    return q_search_terms(text_to_search_for)
 
 
 def q_favorite_of_player(player):
@@ -11,6 +11,7 @@ semicolons.
 
 from world.msgs.handler_mixins import messengerhandler, journalhandler, msg_utils
 from web.character.models import Clue
+from server.utils.counters import COUNTERS
 
 
 class MessageHandler(messengerhandler.MessengerHandler, journalhandler.JournalHandler):
@@ -134,11 +135,15 @@ class MessageHandler(messengerhandler.MessengerHandler, journalhandler.JournalHa
     @property
     def num_flashbacks(self):
         """Flashbacks written by the player"""
-        return self.obj.db.num_flashbacks or 0
+        return COUNTERS.get_attribute(self.obj, "num_flashbacks")
 
     @num_flashbacks.setter
     def num_flashbacks(self, val):
-        self.obj.db.num_flashbacks = val
+        COUNTERS.set_attribute(self.obj, "num_flashbacks", val)
+
+    def add_flashback(self):
+        """Counts a flashback post towards our weekly journals"""
+        COUNTERS.add_to_attribute(self.obj, "num_flashbacks")
 
     @property
     def num_weekly_journals(self):
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comms", "0010_auto_20161206_1912"),
+        ("msgs", "0009_auto_20191228_1417"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=40)),
+                ("weight", models.PositiveSmallIntegerField(default=1)),
+                (
+                    "msg",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_terms",
+                        to="comms.Msg",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("term", "msg")},
+            },
+        ),
+    ]
@@ -364,3 +364,36 @@ class Post(MarkReadMixin, Msg):
         if not sender:
             sender = "No One"
         return sender
+
+
+class SearchTerm(models.Model):
+    """
+    An entry in the full-text search index for our Msg proxies: a term that
+    appears in a Msg's text, and how many times it appears there. The index is
+    maintained by world.msgs.search as messages are saved, and rows are
+    removed along with their Msg.
+    """
+
+    msg = models.ForeignKey(
+        "comms.Msg", related_name="search_terms", on_delete=models.CASCADE
+    )
+    term = models.CharField(max_length=40)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ("term", "msg")
+
+    def __str__(self):
+        return "%s (%s)" % (self.term, self.msg_id)
+
+
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Re-indexes the text of a message for searching after it's saved"""
+    from world.msgs.search import index_msg
+
+    if not raw:
+        index_msg(instance)
+
+
+for _proxy in (Journal, Messenger, Post, Rumor):
+    models.signals.post_save.connect(update_search_index, sender=_proxy)
@@ -0,0 +1,272 @@
+"""
+Full-text search for journals, messengers, board posts and rumors. Searching
+message text with db_message__icontains meant scanning every row of the Msg
+table, so instead we keep an inverted index of the terms in each message as
+SearchTerm rows: a term, the Msg it's in, and how often it appears there.
+
+Messages are indexed whenever one of our Msg proxies is saved with text that
+differs from what we last indexed for it, which covers create_arx_message and
+edits, and their terms are deleted along with them. The rebuild_search_index
+management command indexes everything from scratch.
+
+MsgSearch runs ranked multi-term queries against a queryset of messages, so
+callers filter by writer, receiver, journal type or board with the same
+managers and Q() objects used everywhere else.
+"""
+import math
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Q,
+    Sum,
+    When,
+)
+
+from evennia.utils.ansi import strip_ansi
+
+from world.msgs.managers import (
+    WHITE_TAG,
+    BLACK_TAG,
+    q_msgtag,
+    q_receiver_character,
+    q_sender_character,
+)
+from world.msgs.models import SearchTerm
+
+TERM_MIN_LENGTH = 2
+TERM_MAX_LENGTH = 40
+MAX_WEIGHT = 32767
+BATCH_SIZE = 500
+TERM_RE = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+STOP_WORDS = frozenset(
+    [
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "but",
+        "by",
+        "for",
+        "if",
+        "in",
+        "into",
+        "is",
+        "it",
+        "of",
+        "on",
+        "or",
+        "so",
+        "that",
+        "the",
+        "their",
+        "then",
+        "there",
+        "these",
+        "they",
+        "this",
+        "to",
+        "was",
+        "were",
+        "will",
+        "with",
+    ]
+)
+
+
+def get_terms(text):
+    """
+    Breaks text into the terms that we index.
+
+        Args:
+            text (str): Message text, which may have ansi markup
+
+        Returns:
+            A Counter of term to the number of times it appears.
+    """
+    terms = Counter()
+    for term in TERM_RE.findall(strip_ansi(text or "").lower()):
+        if term in STOP_WORDS or len(term) < TERM_MIN_LENGTH:
+            continue
+        terms[term[:TERM_MAX_LENGTH]] += 1
+    return terms
+
+
+def index_msg(msg, force=False):
+    """
+    Replaces the index entries for a message. Since our Msgs are shared memory
+    models, we remember the text we indexed on the instance and skip messages
+    whose text hasn't changed since, like the repeated saves while one is
+    being created.
+    """
+    text = msg.db_message or ""
+    if not force and getattr(msg, "_search_indexed_text", None) == text:
+        return
+    with transaction.atomic():
+        SearchTerm.objects.filter(msg_id=msg.id).delete()
+        SearchTerm.objects.bulk_create(
+            [
+                SearchTerm(msg_id=msg.id, term=term, weight=min(count, MAX_WEIGHT))
+                for term, count in get_terms(text).items()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    msg._search_indexed_text = text
+
+
+def rebuild_index(queryset, batch_size=BATCH_SIZE):
+    """
+    Indexes every message in the queryset from scratch, in batches.
+
+        Args:
+            queryset: Queryset of Msgs to index
+            batch_size (int): Number of messages to index per transaction
+
+        Returns:
+            The number of messages indexed.
+    """
+    ids = sorted(set(queryset.values_list("id", flat=True)))
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start : start + batch_size]
+        texts = dict(queryset.filter(id__in=batch_ids).values_list("id", "db_message"))
+        rows = []
+        for msg_id, text in texts.items():
+            rows.extend(
+                SearchTerm(msg_id=msg_id, term=term, weight=min(count, MAX_WEIGHT))
+                for term, count in get_terms(text).items()
+            )
+        with transaction.atomic():
+            SearchTerm.objects.filter(msg_id__in=batch_ids).delete()
+            SearchTerm.objects.bulk_create(rows, batch_size=batch_size)
+    return len(ids)
+
+
+def q_search_terms(text):
+    """
+    Gets a Q() object for Msgs whose text contains every term in text. If text
+    has nothing we'd index, such as only punctuation or very common words, we
+    fall back to matching it as a substring.
+    """
+    terms = list(get_terms(text))
+    if not terms:
+        return Q(db_message__icontains=text)
+    matches = (
+        SearchTerm.objects.filter(term__in=terms)
+        .values("msg_id")
+        .annotate(matched=Count("term"))
+        .filter(matched=len(terms))
+        .values("msg_id")
+    )
+    return Q(id__in=matches)
+
+
+class MsgSearch(object):
+    """
+    A ranked full-text search over a queryset of Msgs. Every term in the
+    search text must appear in a message for it to match, and matches are
+    ranked by how often the terms appear, with rarer terms counting for more.
+    Filters can be chained before getting results:
+
+        MsgSearch("masque ball", Journal.white_journals.all()).writer(char).results()
+    """
+
+    def __init__(self, text, queryset):
+        self.text = text
+        self.terms = list(get_terms(text))
+        self.queryset = queryset
+
+    def filter(self, *args, **kwargs):
+        """Narrows the messages we search"""
+        self.queryset = self.queryset.filter(*args, **kwargs)
+        return self
+
+    def writer(self, character):
+        """Only searches messages written by the character"""
+        return self.filter(q_sender_character(character))
+
+    def receiver(self, receiver):
+        """Only searches messages about or sent to the character"""
+        return self.filter(q_receiver_character(receiver))
+
+    def white(self, white=True):
+        """Only searches white journals, or black journals if white is False"""
+        return self.filter(q_msgtag(WHITE_TAG if white else BLACK_TAG))
+
+    def board(self, board):
+        """Only searches posts on the bulletin board"""
+        return self.receiver(board)
+
+    def get_term_rows(self):
+        """Index entries for our terms in the messages we're searching"""
+        return SearchTerm.objects.filter(
+            term__in=self.terms, msg__in=self.queryset.values("id")
+        )
+
+    def get_term_weights(self, rows):
+        """How much each term counts for, from how many messages it's in"""
+        frequencies = dict(
+            rows.order_by().values_list("term").annotate(frequency=Count("msg_id"))
+        )
+        most_frequent = max(frequencies.values()) if frequencies else 0
+        return {
+            term: math.log(1 + float(most_frequent) / frequency)
+            for term, frequency in frequencies.items()
+        }
+
+    def ranked_ids(self, limit=None):
+        """
+        Gets the IDs of matching messages, best match first.
+
+            Args:
+                limit (int): The most IDs to return
+
+            Returns:
+                A list of Msg IDs.
+        """
+        if not self.terms:
+            matches = self.queryset.filter(db_message__icontains=self.text)
+            ids = matches.order_by("-db_date_created").values_list("id", flat=True)
+            return list(ids[:limit] if limit else ids)
+        rows = self.get_term_rows()
+        weights = self.get_term_weights(rows)
+        if len(weights) < len(self.terms):
+            # some term isn't in any message we're searching
+            return []
+        score = Sum(
+            Case(
+                *[
+                    When(
+                        term=term,
+                        then=ExpressionWrapper(
+                            F("weight") * weight, output_field=FloatField()
+                        ),
+                    )
+                    for term, weight in weights.items()
+                ],
+                output_field=FloatField()
+            )
+        )
+        ranked = (
+            rows.order_by()
+            .values("msg_id")
+            .annotate(matched=Count("term"), score=score)
+            .filter(matched=len(self.terms))
+            .order_by("-score", "-msg_id")
+            .values_list("msg_id", flat=True)
+        )
+        return list(ranked[:limit] if limit else ranked)
+
+    def results(self, limit=None):
+        """Gets the matching messages, best match first"""
+        ids = self.ranked_ids(limit)
+        found = self.queryset.model.objects.in_bulk(ids)
+        return [found[msg_id] for msg_id in ids if msg_id in found]
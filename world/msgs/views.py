@@ -1,13 +1,11 @@
 """
 Views for msg app - Msg proxy models, boards, etc
 """
-from collections import defaultdict
-import json
 
 from django.urls import reverse
 from django.core.exceptions import PermissionDenied
 from django.db.models import Q
-from django.http import HttpResponseRedirect, HttpResponse, Http404
+from django.http import HttpResponseRedirect, Http404
 from django.shortcuts import render, get_object_or_404
 from django.views.generic import ListView
 from django.contrib.auth import get_user_model
@@ -24,7 +22,15 @@ from world.msgs.forms import (
 )
 from server.utils.view_mixins import LimitPageMixin
 from typeclasses.bulletin_board.bboard import BBoard, Post
+from typeclasses.bulletin_board.unread import (
+    get_readers,
+    get_unread_counts,
+    mark_posts_read,
+)
+from world.msgs.exports import JOURNAL_EXPORT
+from world.msgs.managers import q_search_text_body
 from world.msgs.models import Journal
+from world.msgs.search import MsgSearch
 
 
 # Create your views here.
@@ -68,7 +74,7 @@ class JournalListView(LimitPageMixin, ListView):
             queryset = queryset.exclude(receiver_filter)
         text = get.get("search_text", None)
         if text:
-            queryset = queryset.filter(db_message__icontains=text)
+            queryset = queryset.filter(q_search_text_body(text))
         if self.request.user and self.request.user.is_authenticated:
             favtag = "pid_%s_favorite" % self.request.user.id
             favorites = get.get("favorites", None)
@@ -168,77 +174,9 @@ class JournalListReadView(JournalListView):
         return self.search_filters(qs)
 
 
-API_CACHE = None
-
-
 def journal_list_json(request):
     """Return json list of journals for API request"""
-
-    def get_fullname(char):
-        """Auto-generate last names for people who don't have em. Poor bastards. Literally!"""
-        commoner_names = {
-            "Velenosa": "Masque",
-            "Valardin": "Honor",
-            "Crownsworn": "Crown",
-            "Redrain": "Frost",
-            "Grayson": "Crucible",
-            "Thrax": "Waters",
-        }
-        last = (
-            commoner_names.get(str(char.item_data.fealty), "")
-            if char.item_data.family == "None"
-            else char.item_data.family
-        )
-        return "{0} {1}".format(char.key, last)
-
-    def get_response(entry):
-        """
-        Helper function for getting json for each object
-        Args:
-            entry (Msg): Message object
-
-        Returns:
-            dict to convert to json
-        """
-        try:
-            sender = entry.senders[0]
-        except IndexError:
-            sender = None
-        try:
-            target = entry.db_receivers_objects.all()[0]
-        except IndexError:
-            target = None
-        from world.msgs.messagehandler import MessageHandler
-
-        ic_date = MessageHandler.get_date_from_header(entry)
-        return {
-            "id": entry.id,
-            "sender": get_fullname(sender) if sender else "",
-            "target": get_fullname(target) if target else "",
-            "message": entry.db_message,
-            "ic_date": ic_date,
-        }
-
-    try:
-        timestamp = request.GET.get("timestamp", 0)
-        import datetime
-
-        timestamp = datetime.datetime.fromtimestamp(float(timestamp))
-    except (AttributeError, ValueError, TypeError):
-        timestamp = None
-    global API_CACHE
-    if timestamp:
-        ret = map(
-            get_response,
-            Journal.white_journals.filter(db_date_created__gt=timestamp).order_by(
-                "-db_date_created"
-            ),
-        )
-        return HttpResponse(json.dumps(ret), content_type="application/json")
-    if not API_CACHE:  # cache the list of all of them
-        ret = map(get_response, Journal.white_journals.order_by("-db_date_created"))
-        API_CACHE = json.dumps(ret)
-    return HttpResponse(API_CACHE, content_type="application/json")
+    return JOURNAL_EXPORT.get_response(request)
 
 
 def board_list(request):
@@ -252,9 +190,9 @@ def board_list(request):
             last_date = last_post.db_date_created.strftime("%x")
 
         if request.user.is_authenticated:
-            unread = board.num_of_unread_posts(user, old=False)
+            unread = unread_counts[board.id]
         else:
-            unread = board.posts.count()
+            unread = board.post_index.count()
 
         return {
             "id": board.id,
@@ -300,6 +238,9 @@ def board_list(request):
             raise Http404
 
     raw_boards = get_boards(user)
+    unread_counts = {}
+    if request.user.is_authenticated:
+        unread_counts = get_unread_counts(user, raw_boards)
     boards = map(lambda board: map_board(board), raw_boards)
     if unread_only:
         boards = filter(lambda board: board["unread"] > 0, boards)
@@ -344,24 +285,19 @@ def posts_for_request_all(board):
 def posts_for_request_all_search(board, searchstring):
     """Get all posts from the board in reverse order"""
     current_posts = list(
-        board.get_all_posts(old=False).filter(db_message__icontains=searchstring)
+        board.get_all_posts(old=False).filter(q_search_text_body(searchstring))
     )[::-1]
     old_posts = list(
-        board.get_all_posts(old=True).filter(db_message__icontains=searchstring)
+        board.get_all_posts(old=True).filter(q_search_text_body(searchstring))
     )[::-1]
     return current_posts + old_posts
 
 
 def posts_for_request_all_search_global(user, searchstring):
-    """Get all posts from all boards for this user, containing the searchstring"""
+    """Get all posts from all boards for this user containing the searchstring, best match first"""
     boards = get_boards(user)
-    posts = list(
-        Post.objects.filter(db_receivers_objects__in=boards)
-        .filter(db_message__icontains=searchstring)
-        .distinct()
-        .order_by("-db_date_created")
-    )
-    return posts
+    posts = Post.objects.filter(db_receivers_objects__in=boards)
+    return MsgSearch(searchstring, posts).results()
 
 
 def post_list(request, board_id):
@@ -440,44 +376,26 @@ def post_list_global_search(request):
 def post_view_all(request, board_id):
     """View for seeing all posts at once. It'll mark them all read."""
 
-    def post_map(post_to_map, bulletin_board, read_posts_list):
+    def post_map(post_to_map, bulletin_board, unread_ids):
         """Returns dict of information about each individual post to add to context"""
         return {
             "id": post_to_map.id,
             "poster": bulletin_board.get_poster(post_to_map),
             "subject": ansi.strip_ansi(post_to_map.db_header),
             "date": post_to_map.db_date_created.strftime("%x"),
-            "unread": post_to_map not in read_posts_list,
+            "unread": post_to_map.id in unread_ids,
             "text": ansi.strip_ansi(post_to_map.db_message),
         }
 
     board = board_for_request(request, board_id)
     raw_posts = posts_for_request(board)
     if not request.user or not request.user.is_authenticated:
-        read_posts = []
+        unread_ids = set(post.id for post in raw_posts)
     else:
-        read_posts = list(Post.objects.all_read_by(request.user))
+        newly_read = board.mark_posts_read(request.user, raw_posts)
+        unread_ids = set(newly_read.get(request.user, []))
 
-    if request.user.is_authenticated:
-        alts = []
-        if request.user.db.bbaltread:
-            try:
-                alts = [ob.player for ob in request.user.roster.alts]
-            except AttributeError:
-                pass
-        accounts = [request.user]
-        accounts.extend(alts)
-        ReadPostModel = Post.db_receivers_accounts.through
-        bulk_list = []
-        for post in raw_posts:
-            if post not in read_posts:
-                for account in accounts:
-                    bulk_list.append(ReadPostModel(accountdb=account, msg=post))
-                    # They've read everything, clear out their unread cache count
-                    board.zero_unread_cache(account)
-        ReadPostModel.objects.bulk_create(bulk_list)
-
-    posts = map(lambda post_to_map: post_map(post_to_map, board, read_posts), raw_posts)
+    posts = map(lambda post_to_map: post_map(post_to_map, board, unread_ids), raw_posts)
     return render(
         request,
         "msgs/post_view_all.html",
@@ -502,26 +420,10 @@ def post_view_unread_board(request, board_id):
     unread_posts = []
 
     if request.user.is_authenticated:
-        unread_posts = Post.objects.all_unread_by(request.user).filter(
-            db_receivers_objects=board
+        unread_posts = list(
+            Post.objects.all_unread_by(request.user).filter(db_receivers_objects=board)
         )
-        alts = []
-        if request.user.db.bbaltread:
-            alts = [ob.player for ob in request.user.roster.alts]
-        accounts = [request.user]
-        accounts.extend(alts)
-        ReadPostModel = Post.db_receivers_accounts.through
-        bulk_list = []
-        read_by_alts = defaultdict(list)
-        for alt in alts:
-            read_by_alts[alt] = list(unread_posts.filter(db_receivers_accounts=alt))
-        for account in accounts:
-            for post in unread_posts:
-                if post not in read_by_alts[account]:
-                    bulk_list.append(ReadPostModel(accountdb=account, msg=post))
-            # They've read everything, clear out their unread cache count
-            board.zero_unread_cache(account)
-        ReadPostModel.objects.bulk_create(bulk_list)
+        board.mark_posts_read(request.user, unread_posts)
 
     posts = map(lambda post_to_map: post_map(post_to_map, board), unread_posts)
     return render(
@@ -548,41 +450,19 @@ def post_view_unread(request):
     raw_boards = get_boards(request.user)
 
     if request.user.is_authenticated:
-        alts = []
-        alt_unread_posts = []
-        unread_posts = (
+        unread_posts = list(
             Post.objects.all_unread_by(request.user)
             .filter(db_receivers_objects__in=raw_boards)
             .order_by("db_receivers_objects")
         )
-        if request.user.db.bbaltread:
-            try:
-                alts = [ob.player for ob in request.user.roster.alts]
-            except AttributeError:
-                pass
-            if alts:
-                alt_unread_posts = list(
-                    unread_posts.exclude(db_receivers_accounts__in=alts)
-                )
-        ReadPostModel = Post.db_receivers_accounts.through
-        bulk_list = []
-
-        mapped_posts = []
-
-        for unread_post in unread_posts:
-            mapped_posts.append(post_map(unread_post))
-            bulk_list.append(ReadPostModel(accountdb=request.user, msg=unread_post))
-            for alt in alts:
-                if unread_post in alt_unread_posts:
-                    bulk_list.append(ReadPostModel(accountdb=alt, msg=unread_post))
+        mapped_posts = [post_map(unread_post) for unread_post in unread_posts]
+        accounts = get_readers(request.user)
+        mark_posts_read(accounts, unread_posts)
 
         # They've read everything, clear out their unread cache count
-        accounts = [request.user] + alts
         for board in raw_boards:
             for account in accounts:
                 board.zero_unread_cache(account)
-
-        ReadPostModel.objects.bulk_create(bulk_list)
     else:
         mapped_posts = [
             post_map(post)
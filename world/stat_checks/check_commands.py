@@ -15,6 +15,8 @@ from world.stat_checks.check_maker import (
     BaseCheckMaker,
     PrivateCheckMaker,
     ContestedCheckMaker,
+    GroupCheckMaker,
+    PrivateGroupCheckMaker,
     SimpleRoll,
     SpoofRoll,
     RetainerRoll,
@@ -46,8 +48,8 @@ class CmdStatCheck(ArxCommand):
         @check/contest name1,name2,name3,etc=stat (+ skill) at <rating>
         @check/contest/here stat (+ skill) at <difficulty rating>
         @check/vs stat (+ skill) vs stat(+skill)=<target name>
-        @check/retainer <id/name>/<stat> [+ <skill>] at <difficulty rating>
-            [=<player1>,<player2>,etc.]
+        @check/retainer <id/name>[,<id/name>,etc.]/<stat> [+ <skill>] at
+            <difficulty rating>[=<player1>,<player2>,etc.]
         @check/consider [<check name>]=[<rank>]
         @check/view <check name>
 
@@ -57,6 +59,9 @@ class CmdStatCheck(ArxCommand):
     check/contest allows a GM to have everyone selected to make a check,
     listing the results in order of results. check/contest/here is 
     shorthand to check everyone in a room aside from the GM.
+
+    check/retainer may be given several of your retainers, separated by
+    commas, who will all make the check together.
     """
         ratings = ", ".join(str(ob) for ob in DifficultyRating.get_all_instances())
         return msg.format(difficulty_ratings=ratings)
@@ -99,33 +104,66 @@ class CmdStatCheck(ArxCommand):
     def do_retainer_check(self):
         syntax_error = "Usage: <id/name>/<stat> [+ <skill>] at <difficulty rating>"
 
-        # Get retainer ID/name
-        args, retainer = self._get_retainer_from_args(self.lhs, syntax_error)
+        # Get retainer IDs/names
+        args, retainers = self._get_retainers_from_args(self.lhs, syntax_error)
         stat, skill, rating = self.get_check_values_from_args(args, syntax_error)
 
-        if retainer.dbobj.location != self.caller.location:
-            raise self.error_class("Your retainer must be in the room with you.")
-
-        if not self.rhslist:
-            BaseCheckMaker.perform_check_for_character(
-                character=self.caller,
-                receivers=None,
+        for retainer in retainers:
+            if retainer.dbobj.location != self.caller.location:
+                raise self.error_class("Your retainer must be in the room with you.")
+
+        if len(retainers) > 1:
+            prefix = f"{self.caller} has called for a check of their retainers."
+            # one message for all of them, shared privately if they named anyone
+            check_maker = PrivateGroupCheckMaker if self.rhslist else GroupCheckMaker
+            check_maker.perform_group_check(
+                retainers,
+                self.caller,
+                prefix,
                 roll_class=RetainerRoll,
-                retainer=retainer,
-                stat=stat,
-                skill=skill,
-                rating=rating,
-            )
-        else:
-            PrivateCheckMaker.perform_check_for_character(
+                participant_kwarg="retainer",
                 character=self.caller,
-                receivers=self.rhslist,
-                roll_class=RetainerRoll,
-                retainer=retainer,
+                receivers=self.rhslist or None,
                 stat=stat,
                 skill=skill,
                 rating=rating,
             )
+            return
+        for retainer in retainers:
+            if not self.rhslist:
+                BaseCheckMaker.perform_check_for_character(
+                    character=self.caller,
+                    receivers=None,
+                    roll_class=RetainerRoll,
+                    retainer=retainer,
+                    stat=stat,
+                    skill=skill,
+                    rating=rating,
+                )
+            else:
+                PrivateCheckMaker.perform_check_for_character(
+                    character=self.caller,
+                    receivers=self.rhslist,
+                    roll_class=RetainerRoll,
+                    retainer=retainer,
+                    stat=stat,
+                    skill=skill,
+                    rating=rating,
+                )
+
+    def _get_retainers_from_args(self, args: str, syntax: str):
+        try:
+            retainer_ids, args = args.split("/")
+        except ValueError:
+            raise self.error_class(syntax)
+        retainers = []
+        for retainer_id in retainer_ids.split(","):
+            args, retainer = self._get_retainer_from_args(
+                f"{retainer_id.strip()}/{args}", syntax
+            )
+            if retainer not in retainers:
+                retainers.append(retainer)
+        return args, retainers
 
     def _get_retainer_from_args(self, args: str, syntax: str):
         try:
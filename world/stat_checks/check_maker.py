@@ -1,6 +1,9 @@
-from random import choice, randint
+from random import choice, randint, Random
 from functools import total_ordering
 
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import prefetch_related_objects
+
 from world.conditions.modifiers_handlers import ModifierHandler
 from world.stat_checks.models import (
     DifficultyRating,
@@ -22,6 +25,99 @@ def check_rolls_tied(roll1, roll2, tie_value=TIE_THRESHOLD):
     return abs(roll1.result_value - roll2.result_value) < tie_value
 
 
+def prefetch_roll_data(characters):
+    """
+    Reads the traits, wounds and knacks of characters who are about to roll
+    together, with a query for each table rather than for each character.
+    The handlers that rolls read from are built from what was fetched, which
+    is then discarded so it can't go stale on the cached characters.
+    """
+    from world.conditions.models import RollModifier
+
+    characters = list({ob.id: ob for ob in characters if ob}.values())
+    if not characters:
+        return
+    prefetch_related_objects(
+        characters, "trait_values__trait", "character_health_status"
+    )
+    statuses = []
+    for character in characters:
+        character.traits.setup_caches()
+        character._prefetched_objects_cache.pop("trait_values", None)
+        try:
+            statuses.append(character.character_health_status)
+        except (AttributeError, ObjectDoesNotExist):
+            pass
+    statuses = [ob for ob in statuses if "cached_wounds" not in ob.__dict__]
+    if statuses:
+        prefetch_related_objects(statuses, "wounds")
+        for status in statuses:
+            status.cached_wounds = list(status.wounds.all())
+            status._prefetched_objects_cache.pop("wounds", None)
+    handlers = [
+        ob.mods
+        for ob in characters
+        if hasattr(ob, "mods") and "knacks" not in ob.mods.__dict__
+    ]
+    if handlers:
+        knacks = {handler.obj.id: [] for handler in handlers}
+        for knack in RollModifier.objects.filter(
+            object_id__in=list(knacks), modifier_type=RollModifier.KNACK
+        ):
+            knacks[knack.object_id].append(knack)
+        for handler in handlers:
+            handler.knacks = knacks[handler.obj.id]
+
+
+def announce_privately(character, receivers, message):
+    """
+    Sends a private roll message to specific players as well as to all GMs
+    (player and staff) at the character's location.
+    """
+    # Notifiers will source nothing if character.location is None
+    # or if receivers is None.
+    # They will have empty receiver lists, and thus not do anything.
+
+    # SelfListNotifier will notify the caller if a player or
+    # player GM, and notify every player/player-GM on the list.
+    player_notifier = SelfListNotifier(
+        character,
+        receivers=receivers,
+        to_player=True,
+        to_gm=True,
+    )
+    # RoomNotifier will notify every staff member in the room
+    staff_notifier = RoomNotifier(
+        character,
+        room=character.location,
+        to_staff=True,
+    )
+
+    # Generate the receivers of the notifications.
+    player_notifier.generate()
+    staff_notifier.generate()
+
+    # Staff names get highlighted because they're fancy
+    staff_names = [f"|c{name}|n" for name in sorted(staff_notifier.receiver_names)]
+
+    # Build list of who is receiving this private roll.  Staff are last
+    receiver_names = sorted(player_notifier.receiver_names) + staff_names
+
+    # If only the caller is here to see it, only the caller will be
+    # listed for who saw it.
+    if receiver_names:
+        receiver_suffix = f"(Shared with: {', '.join(receiver_names)})"
+    else:
+        receiver_suffix = f"(Shared with: {character})"
+
+    # Now that we know who is getting it, build the private message string.
+    private_msg = f"|w[Private Roll]|n {message} {receiver_suffix}"
+
+    # Notify everyone of the roll result.
+    player_notifier.notify(private_msg, options={"roll": True})
+    staff_notifier.notify(private_msg, options={"roll": True})
+
+
 @total_ordering
 class SimpleRoll:
     def __init__(
@@ -32,6 +128,7 @@ class SimpleRoll:
         rating: DifficultyRating = None,
         receivers: list = None,
         tie_threshold: int = TIE_THRESHOLD,
+        rng: Random = None,
         **kwargs,
     ):
         self.character = character
@@ -46,6 +143,8 @@ class SimpleRoll:
         self.roll_result_object = None
         self.natural_roll_type = None
         self.tie_threshold = tie_threshold
+        # a Random to roll with, such as a seeded one shared by a group check
+        self.rng = rng
         self.roll_kwargs = kwargs
 
     def __lt__(self, other: "SimpleRoll"):
@@ -69,9 +168,19 @@ class SimpleRoll:
     def get_roll_value_for_rating(self):
         return self.rating.value
 
+    @property
+    def trait_holder(self):
+        """The object whose traits we roll, to prefetch for group checks"""
+        return self.character
+
+    def roll_die(self) -> int:
+        if self.rng:
+            return self.rng.randint(1, 100)
+        return randint(1, 100)
+
     def execute(self):
         """Does the actual roll"""
-        self.raw_roll = randint(1, 100)
+        self.raw_roll = self.roll_die()
         val = self.get_roll_value_for_traits()
         val += self.get_roll_value_for_knack()
         val -= self.get_roll_value_for_rating()
@@ -137,48 +246,7 @@ class SimpleRoll:
         Sends a private roll result message to specific players as well as
         to all GMs (player and staff) at that character's location.
         """
-        # Notifiers will source nothing if self.character.location is None
-        # or if self.receivers is None.
-        # They will have empty receiver lists, and thus not do anything.
-
-        # SelfListNotifier will notify the caller if a player or
-        # player GM, and notify every player/player-GM on the list.
-        player_notifier = SelfListNotifier(
-            self.character,
-            receivers=self.receivers,
-            to_player=True,
-            to_gm=True,
-        )
-        # RoomNotifier will notify every staff member in the room
-        staff_notifier = RoomNotifier(
-            self.character,
-            room=self.character.location,
-            to_staff=True,
-        )
-
-        # Generate the receivers of the notifications.
-        player_notifier.generate()
-        staff_notifier.generate()
-
-        # Staff names get highlighted because they're fancy
-        staff_names = [f"|c{name}|n" for name in sorted(staff_notifier.receiver_names)]
-
-        # Build list of who is receiving this private roll.  Staff are last
-        receiver_names = sorted(player_notifier.receiver_names) + staff_names
-
-        # If only the caller is here to see it, only the caller will be
-        # listed for who saw it.
-        if receiver_names:
-            receiver_suffix = f"(Shared with: {', '.join(receiver_names)})"
-        else:
-            receiver_suffix = f"(Shared with: {self.character})"
-
-        # Now that we know who is getting it, build the private message string.
-        private_msg = f"|w[Private Roll]|n {self.roll_message} {receiver_suffix}"
-
-        # Notify everyone of the roll result.
-        player_notifier.notify(private_msg, options={"roll": True})
-        staff_notifier.notify(private_msg, options={"roll": True})
+        announce_privately(self.character, self.receivers, self.roll_message)
 
     def get_roll_value_for_stat(self) -> int:
         """
@@ -289,6 +357,11 @@ class SpoofRoll(SimpleRoll):
         self.can_crit = kwargs.get("can_crit", False)
         self.is_flub = kwargs.get("is_flub", False)
 
+    @property
+    def trait_holder(self):
+        """Spoofed rolls use the values they're given rather than traits"""
+        return None
+
     def execute(self):
         stat_roll = self.get_roll_value_for_stat()
         skill_roll = self.get_roll_value_for_skill()
@@ -298,7 +371,7 @@ class SpoofRoll(SimpleRoll):
         if self.is_flub:
             self.raw_roll = 1
         else:
-            self.raw_roll = randint(1, 100)
+            self.raw_roll = self.roll_die()
 
         # Unlike SimpleRoll, SpoofRoll does not take knacks into account.
         # (NPCs generally don't have knacks)
@@ -314,7 +387,10 @@ class SpoofRoll(SimpleRoll):
         # at random for our resulting roll.
         if self.is_flub:
             fail_rolls = self._get_fail_rolls()
-            self.roll_result_object = choice(fail_rolls)
+            if self.rng:
+                self.roll_result_object = self.rng.choice(fail_rolls)
+            else:
+                self.roll_result_object = choice(fail_rolls)
         else:
             self.roll_result_object = RollResult.get_instance_for_roll(
                 self.result_value, natural_roll_type=self.natural_roll_type
@@ -425,9 +501,17 @@ class RetainerRoll(SimpleRoll):
         )
 
         self.retainer = retainer
+        self._trait_holder = None
+
+    @property
+    def trait_holder(self):
+        """The retainer's object, which Agent.dbobj looks up with a query"""
+        if self._trait_holder is None:
+            self._trait_holder = self.retainer.dbobj
+        return self._trait_holder
 
     def execute(self):
-        self.raw_roll = randint(1, 100)
+        self.raw_roll = self.roll_die()
 
         # Get retainer's roll values; they don't have knacks
         # so those are ignored here.
@@ -448,14 +532,14 @@ class RetainerRoll(SimpleRoll):
         if not self.stat:
             return 0
 
-        stat_val = self.retainer.dbobj.traits.get_stat_value(self.stat)
+        stat_val = self.trait_holder.traits.get_stat_value(self.stat)
         return StatWeight.get_weighted_value_for_stat(stat_val, not self.skill)
 
     def get_roll_value_for_skill(self) -> int:
         if not self.skill:
             return 0
 
-        skill_val = self.retainer.dbobj.traits.get_skill_value(self.skill)
+        skill_val = self.trait_holder.traits.get_skill_value(self.skill)
         return StatWeight.get_weighted_value_for_skill(skill_val)
 
     @property
@@ -593,31 +677,118 @@ class RollResults:
         return self.get_result_string()
 
 
-class ContestedCheckMaker:
+class GroupCheckMaker:
+    """
+    Makes the same check for a group at once, such as a GM checking everyone
+    in a room or a squad of retainers, and announces all of the results in
+    a single message. The traits, wounds and knacks of everyone rolling are
+    read together before any roll is made, and the rolls share one Random,
+    so passing a seed makes the whole group's results repeatable. Each roll
+    is made by the same roll_class as a check for one participant, so its
+    result is the same as that participant rolling alone with the same dice.
+    """
+
     roll_class = SimpleRoll
+    # the keyword of roll_class that each participant is passed as
+    participant_kwarg = "character"
 
-    def __init__(self, characters, caller, prefix_string="", roll_class=None, **kwargs):
-        self.characters = list(characters)
+    def __init__(
+        self,
+        participants,
+        caller,
+        prefix_string="",
+        roll_class=None,
+        seed=None,
+        participant_kwarg=None,
+        **kwargs,
+    ):
+        self.participants = list(participants)
         self.caller = caller
         self.kwargs = kwargs
         self.prefix_string = prefix_string
         if roll_class:
             self.roll_class = roll_class
+        if participant_kwarg:
+            self.participant_kwarg = participant_kwarg
+        # without a seed, rolls use the module's randint like a single check
+        self.rng = Random(seed) if seed is not None else None
+        self.rolls = []
+
+    @classmethod
+    def perform_group_check(cls, participants, caller, prefix_string="", **kwargs):
+        obj = cls(participants, caller, prefix_string, **kwargs)
+        obj.make_checks_and_announce()
+        return obj
+
+    def get_roll_kwargs(self, participant) -> dict:
+        kwargs = dict(self.kwargs)
+        kwargs[self.participant_kwarg] = participant
+        kwargs["rng"] = self.rng
+        return kwargs
+
+    def make_checks(self):
+        """Makes a roll for each participant, in the order they were given"""
+        self.rolls = [
+            self.roll_class(**self.get_roll_kwargs(participant))
+            for participant in self.participants
+        ]
+        prefetch_roll_data(roll.trait_holder for roll in self.rolls)
+        for roll in self.rolls:
+            roll.execute()
+        return self.rolls
+
+    def get_results_display(self) -> str:
+        return "\n".join(roll.roll_message for roll in self.rolls)
+
+    def get_message(self) -> str:
+        return f"{self.prefix_string}\n{self.get_results_display()}"
+
+    def announce(self):
+        self.caller.msg_location_or_contents(self.get_message(), options={"roll": True})
+
+    def make_checks_and_announce(self):
+        self.make_checks()
+        self.announce()
+
+
+class PrivateGroupCheckMaker(GroupCheckMaker):
+    """
+    A group check whose results are sent in one private message to the
+    caller, the players they named, and the GMs in the room.
+    """
+
+    def __init__(
+        self, participants, caller, prefix_string="", receivers=None, **kwargs
+    ):
+        super().__init__(
+            participants, caller, prefix_string, receivers=receivers, **kwargs
+        )
+        self.receivers = receivers or []
+
+    def announce(self):
+        announce_privately(self.caller, self.receivers, self.get_message())
+
+
+class ContestedCheckMaker(GroupCheckMaker):
+    """A group check where the results are ranked against one another"""
+
+    def __init__(self, characters, caller, prefix_string="", roll_class=None, **kwargs):
+        super().__init__(characters, caller, prefix_string, roll_class, **kwargs)
+
+    @property
+    def characters(self):
+        return self.participants
 
     @classmethod
     def perform_contested_check(cls, characters, caller, prefix_string, **kwargs):
         obj = cls(characters, caller, prefix_string, **kwargs)
         obj.perform_contested_check_and_announce()
 
+    def get_results_display(self) -> str:
+        return RollResults(self.rolls).rank_results_and_get_display()
+
     def perform_contested_check_and_announce(self):
-        rolls = []
-        for character in self.characters:
-            roll = self.roll_class(character=character, **self.kwargs)
-            roll.execute()
-            rolls.append(roll)
-        results = RollResults(rolls).rank_results_and_get_display()
-        roll_message = f"{self.prefix_string}\n{results}"
-        self.caller.msg_location_or_contents(roll_message, options={"roll": True})
+        self.make_checks_and_announce()
 
 
 class OpposingRolls:
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.forms import ValidationError
@@ -27,6 +29,12 @@ if TYPE_CHECKING:
     from typeclasses.characters import Character
 
 
+@lru_cache(maxsize=128)
+def get_compiled_template(template: str):
+    """Compiles a jinja2 template string, keeping it for the next roll using it"""
+    return Environment(loader=BaseLoader()).from_string(template)
+
+
 class DifficultyRating(NameIntegerLookupModel):
     """Lookup table for difficulty ratings for stat checks, mapping names
     to minimum values for that range.
@@ -142,30 +150,16 @@ class StatWeight(SharedMemoryModel):
         what does that modify rolls by? 3? 20? Over NINE THOUSAND? This gets our weights
         that are applicable and aggregates them.
         """
-        weights = sorted(cls.get_all_instances(), key=lambda x: x.level)
-        matches = [
-            ob for ob in weights if ob.stat_type == stat_type and ob.level <= level
-        ]
-        if require_matches and not matches:
-            raise StatWeight.DoesNotExist(
-                f"No match found for stat_type: {stat_type} level: {level}. "
-                f"Available cached instances: {cls.get_all_instances()}."
-            )
-        total = 0
-        for stat_weight in matches:
-            # determine how many times this stat_weight should apply
-            index = matches.index(stat_weight)
-            # if we're the last match in the stat weights that applies to this level:
-            if (index + 1) == len(matches):
-                # number of levels this weight affects is the difference between the PC's stat level and the level + 1
-                # e.g: if a stat_weight affects all stats 4 and higher, and the PC has a level of 5, they get 2*weight
-                num_levels = (level - stat_weight.level) + 1
-                total += num_levels * stat_weight.weight
-            else:  # get the number of times to apply between this and our next match
-                next_weight = matches[index + 1]
-                num_levels = next_weight.level - stat_weight.level
-                total += num_levels * stat_weight.weight
-
+        from world.stat_checks.rules_table import RULES_TABLE
+
+        total = RULES_TABLE.get_weighted_value(level, stat_type)
+        if total is None:
+            if require_matches:
+                raise StatWeight.DoesNotExist(
+                    f"No match found for stat_type: {stat_type} level: {level}. "
+                    f"Available cached instances: {cls.get_all_instances()}."
+                )
+            return 0
         return total
 
     def __str__(self):
@@ -253,22 +247,16 @@ class RollResult(NameIntegerLookupModel):
     def get_instance_for_roll(
         cls, roll: int, natural_roll_type: Union["NaturalRollType", None] = None
     ):
-        instances = sorted(cls.get_all_instances(), key=lambda x: x.value)
-        if not instances:
-            raise ValueError(
-                "No ResultMessage objects have yet been defined in the database."
-            )
+        from world.stat_checks.rules_table import RULES_TABLE
+
+        results = RULES_TABLE.get_results()
+        instances = results.items
         # get index of the result that most closely corresponds to our roll, then shift by result_shift if any
         # find highest result the roll is higher than, or return our lowest value
-        closest = max(
-            [ob for ob in instances if ob.value <= roll],
-            key=lambda x: x.value,
-            default=instances[0],
-        )
+        index = results.index_for(roll)
         # if we don't have a crit/botch, just return the closest result
         if not natural_roll_type:
-            return closest
-        index = instances.index(closest)
+            return instances[index]
         index += natural_roll_type.result_shift
         # this means they botched so badly they would have gotten below the worst botch. Press F to pay respects
         if index < 0:
@@ -280,7 +268,7 @@ class RollResult(NameIntegerLookupModel):
         return instances[index]
 
     def render(self, **data):
-        return Environment(loader=BaseLoader()).from_string(self.template).render(data)
+        return get_compiled_template(self.template).render(data)
 
 
 class DamageRating(NameIntegerLookupModel):
@@ -792,18 +780,10 @@ class CheckRank(NameIntegerLookupModel):
 
     @classmethod
     def get_base_rank_for_value(cls, value: int) -> "CheckRank":
-        instances = sorted(cls.get_all_instances(), key=lambda x: x.value)
-        if not instances:
-            raise ValueError(
-                "No CheckRank objects have yet been defined in the database."
-            )
+        from world.stat_checks.rules_table import RULES_TABLE
+
         # get highest rank that our value is over
-        closest = max(
-            [ob for ob in instances if ob.value <= value],
-            key=lambda x: x.value,
-            default=instances[0],
-        )
-        return closest
+        return RULES_TABLE.get_rank_for_value(value)
 
     @classmethod
     def get_chance_of_higher_rank(cls, value: int) -> int:
@@ -813,9 +793,10 @@ class CheckRank(NameIntegerLookupModel):
         progress = value - closest.value
         if progress <= 0:
             return 0
-        try:
-            next_value = cls.objects.get(id=closest.id + 1)
-        except cls.DoesNotExist:
+        from world.stat_checks.rules_table import RULES_TABLE
+
+        next_value = RULES_TABLE.get_rank_by_id(closest.id + 1)
+        if not next_value:
             return 0
         distance = next_value.value - closest.value
         # get their percentage chance of getting the next rank
@@ -827,10 +808,9 @@ class CheckRank(NameIntegerLookupModel):
         rank = cls.get_base_rank_for_value(value)
         chance = cls.get_chance_of_higher_rank(value)
         if randint(1, 100) <= chance:
-            try:
-                rank = cls.objects.get(id=rank.id + 1)
-            except cls.DoesNotExist:
-                pass
+            from world.stat_checks.rules_table import RULES_TABLE
+
+            rank = RULES_TABLE.get_rank_by_id(rank.id + 1) or rank
         return DifficultyTable.get_difficulty_for_rank_range(rank, target_rank)
 
 
@@ -855,19 +835,11 @@ class DifficultyTable(NameIntegerLookupModel):
         cls, roller_rank: "CheckRank", target_rank: "CheckRank"
     ) -> "DifficultyTable":
         # the higher the better for the roller
+        from world.stat_checks.rules_table import RULES_TABLE
+
         value = roller_rank.id - target_rank.id
-        instances = sorted(cls.get_all_instances(), key=lambda x: x.value)
-        if not instances:
-            raise ValueError(
-                "No DifficultyTable objects have yet been defined in the database."
-            )
         # get highest rank that our value is over
-        closest = max(
-            [ob for ob in instances if ob.value <= value],
-            key=lambda x: x.value,
-            default=instances[0],
-        )
-        return closest
+        return RULES_TABLE.get_difficulty_for_value(value)
 
     @CachedProperty
     def cached_ranges(self) -> List["DifficultyTableResultRange"]:
@@ -881,16 +853,10 @@ class DifficultyTable(NameIntegerLookupModel):
         }
 
     def get_result_for_roll(self) -> "RollResult":
+        from world.stat_checks.rules_table import RULES_TABLE
+
         roll = randint(1, 100)
-        instances = self.cached_ranges
-        if not instances:
-            raise ValueError(f"No results found for {self}.")
-        closest: DifficultyTableResultRange = max(
-            [ob for ob in instances if ob.value <= roll],
-            key=lambda x: x.value,
-            default=instances[0],
-        )
-        return closest.result
+        return RULES_TABLE.get_result_for_table(self, roll)
 
     def display_table_values(self):
         values = "\n".join(
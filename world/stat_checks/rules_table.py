@@ -0,0 +1,202 @@
+"""
+Lookup tables for the rules of stat checks. Every check added up the
+StatWeights for each of the roller's traits by sorting all the weights and
+walking those of the trait's type, found the roller's CheckRank, the
+DifficultyTable for their rank against the target's and the result of their
+roll with a pass over every instance, and looked up the next CheckRank with
+a query to see if they'd roll into it.
+
+RulesTable compiles those models into sorted lists when they're first
+needed: for each type of StatWeight, the levels where a weight starts along
+with the total of every level below it, and the minimum values of ranks,
+difficulty tables, roll results and the result ranges of each difficulty
+table. Each lookup is then a bisect of one of those lists. Saving or
+deleting any of those models, such as in the admin, discards the tables so
+they're compiled again on the next check. RULES_TABLE is the shared instance.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.db.models import signals
+
+from world.stat_checks.models import (
+    StatWeight,
+    CheckRank,
+    DifficultyTable,
+    DifficultyTableResultRange,
+    RollResult,
+)
+
+
+class ThresholdTable(object):
+    """Objects sorted by minimum values, to find the one a value reaches"""
+
+    def __init__(self, pairs):
+        pairs = sorted(pairs, key=lambda x: x[0])
+        self.values = [ob[0] for ob in pairs]
+        self.items = [ob[1] for ob in pairs]
+
+    def __len__(self):
+        return len(self.items)
+
+    def index_for(self, value):
+        """
+        The index of the item with the highest minimum that value reaches,
+        or of the lowest item if value is below all of them.
+        """
+        return max(bisect_right(self.values, value) - 1, 0)
+
+    def get(self, value):
+        return self.items[self.index_for(value)]
+
+
+class WeightTable(object):
+    """The StatWeights of one type, with the totals they add up to"""
+
+    def __init__(self, weights):
+        weights = sorted(weights, key=lambda x: x.level)
+        self.levels = [ob.level for ob in weights]
+        self.weights = [ob.weight for ob in weights]
+        # the total of every level below the level each weight starts at
+        self.totals = []
+        total = 0
+        for index, level in enumerate(self.levels):
+            if index:
+                total += (level - self.levels[index - 1]) * self.weights[index - 1]
+            self.totals.append(total)
+
+    def get_value(self, level):
+        """The total for a level, or None if no weight applies to it"""
+        index = bisect_right(self.levels, level) - 1
+        if index < 0:
+            return None
+        num_levels = (level - self.levels[index]) + 1
+        return self.totals[index] + num_levels * self.weights[index]
+
+
+class RulesTable(object):
+    """Compiled lookups for StatWeights, CheckRanks and DifficultyTables"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Discards the tables, which are compiled again on their next use"""
+        self.built = False
+        # stat_type to its WeightTable
+        self.weights = {}
+        self.ranks = None
+        # CheckRank ID to the rank
+        self.ranks_by_id = {}
+        self.difficulties = None
+        self.results = None
+        # DifficultyTable ID to a ThresholdTable of its RollResults
+        self.table_results = {}
+
+    def ensure_built(self):
+        """Compiles the tables, if we haven't yet"""
+        if self.built:
+            return
+        by_type = defaultdict(list)
+        for weight in StatWeight.get_all_instances():
+            by_type[weight.stat_type].append(weight)
+        self.weights = {
+            stat_type: WeightTable(weights) for stat_type, weights in by_type.items()
+        }
+        ranks = CheckRank.get_all_instances()
+        self.ranks = ThresholdTable((ob.value, ob) for ob in ranks)
+        self.ranks_by_id = {ob.id: ob for ob in ranks}
+        self.difficulties = ThresholdTable(
+            (ob.value, ob) for ob in DifficultyTable.get_all_instances()
+        )
+        results = RollResult.get_all_instances()
+        self.results = ThresholdTable((ob.value, ob) for ob in results)
+        results_by_id = {ob.id: ob for ob in results}
+        ranges = defaultdict(list)
+        rows = DifficultyTableResultRange.objects.values_list(
+            "difficulty_table_id", "result_id", "value"
+        )
+        for table_id, result_id, value in rows:
+            ranges[table_id].append((value, results_by_id[result_id]))
+        self.table_results = {
+            table_id: ThresholdTable(pairs) for table_id, pairs in ranges.items()
+        }
+        self.built = True
+
+    def get_weighted_value(self, level, stat_type):
+        """
+        The total StatWeights of stat_type add to a roll for a level, or None
+        if there are no weights of that type for the level.
+        """
+        self.ensure_built()
+        try:
+            return self.weights[stat_type].get_value(level)
+        except KeyError:
+            return None
+
+    def get_rank_for_value(self, value):
+        """The highest CheckRank value reaches, or the lowest if it reaches none"""
+        self.ensure_built()
+        if not self.ranks:
+            raise ValueError(
+                "No CheckRank objects have yet been defined in the database."
+            )
+        return self.ranks.get(value)
+
+    def get_rank_by_id(self, rank_id):
+        """The CheckRank numbered rank_id, or None if there isn't one"""
+        self.ensure_built()
+        return self.ranks_by_id.get(rank_id)
+
+    def get_difficulty_for_value(self, value):
+        """The DifficultyTable for the difference between two ranks"""
+        self.ensure_built()
+        if not self.difficulties:
+            raise ValueError(
+                "No DifficultyTable objects have yet been defined in the database."
+            )
+        return self.difficulties.get(value)
+
+    def get_results(self):
+        """RollResults by their minimum values"""
+        self.ensure_built()
+        if not self.results:
+            raise ValueError(
+                "No ResultMessage objects have yet been defined in the database."
+            )
+        return self.results
+
+    def get_result_for_table(self, table, roll):
+        """The RollResult a roll gets on a DifficultyTable"""
+        self.ensure_built()
+        try:
+            return self.table_results[table.id].get(roll)
+        except KeyError:
+            raise ValueError(f"No results found for {table}.")
+
+
+RULES_TABLE = RulesTable()
+
+
+def clear_rules_table(sender, **kwargs):
+    """Discards the compiled tables when one of the rules they're from changes"""
+    RULES_TABLE.clear()
+
+
+for rules_model in (
+    StatWeight,
+    CheckRank,
+    DifficultyTable,
+    DifficultyTableResultRange,
+    RollResult,
+):
+    signals.post_save.connect(
+        clear_rules_table,
+        sender=rules_model,
+        dispatch_uid=f"clear_rules_table_{rules_model.__name__}_save",
+    )
+    signals.post_delete.connect(
+        clear_rules_table,
+        sender=rules_model,
+        dispatch_uid=f"clear_rules_table_{rules_model.__name__}_delete",
+    )
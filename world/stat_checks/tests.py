@@ -1,8 +1,15 @@
 from unittest.mock import Mock, patch, PropertyMock
 
-from server.utils.test_utils import ArxCommandTest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from server.utils.test_utils import ArxCommandTest, ArxTest
 from world.stat_checks import check_commands
-from world.stat_checks.check_maker import SimpleRoll
+from world.stat_checks.check_maker import (
+    SimpleRoll,
+    GroupCheckMaker,
+    prefetch_roll_data,
+)
 from world.stat_checks.constants import DEATH_SAVE
 from world.stat_checks.models import (
     DifficultyRating,
@@ -11,6 +18,7 @@ from world.stat_checks.models import (
     StatWeight,
     StatCheckOutcome,
     DifficultyTable,
+    CheckRank,
 )
 from world.stat_checks.utils import get_check_by_name
 from world.traits.models import Trait
@@ -209,6 +217,57 @@ class TestCheckCommands(ArxCommandTest):
                     options=self.options,
                 )
 
+    def test_group_check_matches_single_rolls(self, mock_randint):
+        from random import Random
+
+        self.char2.traits.set_skill_value("melee", 3)
+        self.char2.mods.create_knack("test", "dex", "melee")
+        characters = [self.char1, self.char2]
+        kwargs = dict(stat="dex", skill="melee", rating=self.easy)
+        group = GroupCheckMaker(characters, self.char1, seed=5, **kwargs)
+        group.make_checks()
+        rng = Random(5)
+        for character, group_roll in zip(characters, group.rolls):
+            roll = SimpleRoll(character=character, rng=rng, **kwargs)
+            roll.execute()
+            self.assertEqual(roll.raw_roll, group_roll.raw_roll)
+            self.assertEqual(roll.result_value, group_roll.result_value)
+            self.assertEqual(roll.result_message, group_roll.result_message)
+        mock_randint.assert_not_called()
+        group.announce()
+        self.mock_announce.assert_called_once_with(
+            "\n" + "\n".join(roll.roll_message for roll in group.rolls),
+            options=self.options,
+        )
+        # reading traits, wounds and knacks takes the same queries however
+        # many are rolling
+        for num in range(3, 7):
+            self.add_character(num)
+        with CaptureQueriesContext(connection) as one_participant:
+            prefetch_roll_data([self.char3])
+        characters = [self.char4, self.char5, self.char6]
+        rolls = [SimpleRoll(character=ob, rng=rng, **kwargs) for ob in characters]
+        with self.assertNumQueries(len(one_participant.captured_queries)):
+            prefetch_roll_data(roll.trait_holder for roll in rolls)
+        # and the rolls use what was read rather than reading it again
+        with CaptureQueriesContext(connection) as executed:
+            for roll in rolls:
+                roll.execute()
+        roll_data_tables = (
+            "traits_charactertraitvalue",
+            "conditions_wound",
+            "conditions_characterhealthstatus",
+            '"modifier_type"',
+        )
+        self.assertEqual(
+            [
+                ob["sql"]
+                for ob in executed.captured_queries
+                if any(table in ob["sql"] for table in roll_data_tables)
+            ],
+            [],
+        )
+
     def test_stat_check_cmd_versus(self, mock_randint):
         mock_randint.return_value = 25
         self.call_cmd("/vs", "You must provide a target.")
@@ -388,6 +447,26 @@ class TestRetainerCheck(ArxCommandTest):
         result = f"[Private Roll] {self.char1}'s retainer ({self.retainer}) checks intellect and riddles at {self.normal}. {self.retainer} rolls marginal. (Shared with: Char2, Char)"
         self.call_cmd("/retainer 1/intellect + riddles at normal=char2", result)
 
+        # Several retainers roll together
+        self.char1.msg_location_or_contents = Mock()
+        self.call_cmd("/retainer 1,2/intellect + riddles at normal", "")
+        self.char1.msg_location_or_contents.assert_called_with(
+            f"{self.char1} has called for a check of their retainers.\n"
+            f"{self.char1}'s retainer ({self.retainer.pretty_name}|n) checks intellect and riddles at {self.normal}. {self.retainer.name} rolls marginal.\n"
+            f"{self.char1}'s retainer ({self.retainer2.pretty_name}|n) checks intellect and riddles at {self.normal}. {self.retainer2.name} rolls marginal.",
+            options=self.options,
+        )
+        del self.char1.msg_location_or_contents
+
+        # Several retainers rolling privately share one message
+        result = (
+            f"[Private Roll] {self.char1} has called for a check of their retainers.\n"
+            f"{self.char1}'s retainer ({self.retainer}) checks intellect and riddles at {self.normal}. {self.retainer} rolls marginal.\n"
+            f"{self.char1}'s retainer ({self.retainer2}) checks intellect and riddles at {self.normal}. {self.retainer2} rolls marginal. "
+            "(Shared with: Char2, Char)"
+        )
+        self.call_cmd("/retainer 1,2/intellect + riddles at normal=char2", result)
+
         # Crit roll
         mock_randint.return_value = 99
         result = f"{self.char1}'s retainer ({self.retainer}) checks intellect and riddles at {self.normal}. Crit! {self.retainer} rolls a critical!."
@@ -551,3 +630,35 @@ class TestSpoofCommands(ArxCommandTest):
         mock_choice.return_value = self.botch
         result = f"{self.char1} GM checks NPC's strength (5) and athletics (5) at {self.normal}. Botch! NPC rolls a botch!."
         self.call_cmd("/flub strength/5 + athletics/5 at normal=NPC", result)
+
+
+class TestRulesTable(ArxTest):
+    def setUp(self):
+        super().setUp()
+        StatWeight.objects.all().delete()
+        CheckRank.objects.all().delete()
+
+    def test_weighted_values(self):
+        StatWeight.objects.create(stat_type=StatWeight.STAT, weight=1, level=1)
+        StatWeight.objects.create(stat_type=StatWeight.STAT, weight=10, level=6)
+        self.assertEqual(StatWeight.get_weighted_value_for_type(0, StatWeight.STAT), 0)
+        self.assertEqual(StatWeight.get_weighted_value_for_type(3, StatWeight.STAT), 3)
+        self.assertEqual(StatWeight.get_weighted_value_for_type(7, StatWeight.STAT), 25)
+        with self.assertRaises(StatWeight.DoesNotExist):
+            StatWeight.get_health_value_for_stamina(3)
+        # editing a weight compiles the table again
+        StatWeight.objects.create(stat_type=StatWeight.STAT, weight=100, level=7)
+        self.assertEqual(
+            StatWeight.get_weighted_value_for_type(7, StatWeight.STAT), 115
+        )
+
+    def test_ranks(self):
+        with self.assertRaises(ValueError):
+            CheckRank.get_base_rank_for_value(10)
+        rank1 = CheckRank.objects.create(id=1, name="one", value=0, description="1")
+        rank2 = CheckRank.objects.create(id=2, name="two", value=50, description="2")
+        self.assertEqual(CheckRank.get_base_rank_for_value(-5), rank1)
+        self.assertEqual(CheckRank.get_base_rank_for_value(49), rank1)
+        self.assertEqual(CheckRank.get_base_rank_for_value(50), rank2)
+        self.assertEqual(CheckRank.get_chance_of_higher_rank(25), 50)
+        self.assertEqual(CheckRank.get_chance_of_higher_rank(60), 0)
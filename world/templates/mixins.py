@@ -17,13 +17,10 @@ class TemplateMixins(object):
         return re.findall(self.template_id_regex_obj, string)
 
     def replace_template_values(self, string, templates):
-        escape = lambda e: "".join("\\" + c if c in "\\" or c == "\\" else c for c in e)
-        work_string = string
-        for template in templates:
-            work_string = re.sub(
-                re.escape(template.markup()), escape(template.desc), work_string
-            )
-        return work_string
+        descs = {str(template.id): template.desc for template in templates}
+        return self.template_id_regex_obj.sub(
+            lambda match: descs.get(match.group(1), match.group(0)), string
+        )
 
     def can_apply_templates(self, caller, desc):
         template_ids = self.find_template_ids(desc)
@@ -59,11 +59,6 @@ class Template(SharedMemoryModel):
 
     objects = TemplateManager()
 
-    def save(self, *args, **kwargs):
-        super(Template, self).save(args, kwargs)
-        for obj in self.applied_to.all():
-            obj.ndb.cached_template_desc = None
-
     def __str__(self):
         return self.title
 
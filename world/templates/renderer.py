@@ -0,0 +1,202 @@
+"""
+Rendering the templates in descriptions. return_appearance used to look up
+the templates of a crafted object's desc with a query and replace each of
+them with a regex pass over the whole desc, and caching the result in the
+object's ndb didn't help for long, since the cache was lost on reload and
+editing a template reset the cache of every object it was applied to by
+loading them all.
+
+TemplateRenderer compiles a desc into the positions of its template markup,
+which is saved as an Attribute of the object along with a digest of the
+desc, so it only has to be found again when the desc changes. Rendering
+joins the text between markup with the descs of the templates in one pass,
+and the descs of templates are kept once they've been read. It also keeps
+which objects use each template, from Template.applied_to and the descs
+it renders, so when a template is saved only the cached renders of the
+objects using it are discarded. TEMPLATE_RENDERER is the shared instance.
+"""
+from collections import defaultdict
+import hashlib
+import re
+
+from django.db.models import signals
+
+from world.templates.models import Template
+
+# [[TEMPLATE_<id>]], capturing the id
+TEMPLATE_MARKUP = re.compile(r"\[\[TEMPLATE_(\d+)\]\]")
+
+
+def get_digest(desc):
+    return hashlib.md5(desc.encode("utf-8")).hexdigest()
+
+
+def compile_desc(desc):
+    """
+    Finds the template markup in a desc.
+
+        Args:
+            desc (str): The desc
+
+        Returns:
+            A list of (start, end, template ID) tuples for each markup, in
+            the order they appear.
+    """
+    return [
+        (match.start(), match.end(), int(match.group(1)))
+        for match in TEMPLATE_MARKUP.finditer(desc)
+    ]
+
+
+class TemplateRenderer(object):
+    """Renders templated descs, and knows which objects use each template"""
+
+    # the Attribute where an object's compiled desc is kept
+    attribute_key = "compiled_desc"
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Empties the renderer, which will be rebuilt on its next use"""
+        self.built = False
+        # template ID to its desc
+        self.descs = {}
+        # template ID to the IDs of the objects that use it
+        self.users = defaultdict(set)
+
+    def ensure_built(self):
+        """Reads which objects templates are applied to, if we haven't yet"""
+        if self.built:
+            return
+        through = Template.applied_to.through
+        for template_id, obj_id in through.objects.values_list(
+            "template_id", "objectdb_id"
+        ):
+            self.users[template_id].add(obj_id)
+        self.built = True
+
+    def add_users(self, template_ids, obj_ids):
+        """Records that objects use templates"""
+        self.ensure_built()
+        for template_id in template_ids:
+            self.users[template_id].update(obj_ids)
+
+    def get_compiled(self, obj, desc):
+        """
+        Gets the positions of template markup in an object's desc, from the
+        Attribute where we saved them unless the desc has changed since.
+        """
+        digest = get_digest(desc)
+        saved = obj.attributes.get(self.attribute_key)
+        if saved and saved[0] == digest:
+            return saved[1]
+        positions = compile_desc(desc)
+        obj.attributes.add(self.attribute_key, (digest, positions))
+        return positions
+
+    def get_descs(self, template_ids):
+        """Gets the descs of templates, reading those we don't have together"""
+        missing = [ob for ob in template_ids if ob not in self.descs]
+        if missing:
+            self.descs.update(
+                Template.objects.filter(id__in=missing).values_list("id", "desc")
+            )
+        return self.descs
+
+    def expand(self, desc, positions):
+        """
+        Replaces template markup with the descs of the templates. Markup for
+        templates that don't exist is left as it is.
+        """
+        if not positions:
+            return desc
+        descs = self.get_descs(set(ob[2] for ob in positions))
+        parts = []
+        last = 0
+        for start, end, template_id in positions:
+            parts.append(desc[last:start])
+            parts.append(descs.get(template_id, desc[start:end]))
+            last = end
+        parts.append(desc[last:])
+        return "".join(parts)
+
+    def render(self, obj, desc, persist=True):
+        """
+        Renders the templates in an object's desc.
+
+            Args:
+                obj: The object whose desc it is
+                desc (str): The desc to render
+                persist (bool): Whether to save the compiled desc. Passed
+                    False for variations of the desc, like those with ansi
+                    stripped, so they don't replace the saved one.
+
+            Returns:
+                The desc with the descs of its templates.
+        """
+        if "[[TEMPLATE_" not in desc:
+            return desc
+        if persist:
+            positions = self.get_compiled(obj, desc)
+        else:
+            positions = compile_desc(desc)
+        if positions:
+            self.add_users(set(ob[2] for ob in positions), [obj.id])
+        return self.expand(desc, positions)
+
+    def invalidate(self, template_id):
+        """
+        Forgets a template's desc, and discards the cached renders of the
+        objects in memory that use it.
+        """
+        from evennia.objects.models import ObjectDB
+
+        self.ensure_built()
+        self.descs.pop(template_id, None)
+        for obj_id in self.users.get(template_id, ()):
+            obj = ObjectDB.get_cached_instance(obj_id)
+            if obj:
+                obj.ndb.cached_template_desc = None
+
+    def remove(self, template_id):
+        """Forgets a template that's been deleted"""
+        self.invalidate(template_id)
+        self.users.pop(template_id, None)
+
+
+TEMPLATE_RENDERER = TemplateRenderer()
+
+
+def invalidate_template(sender, instance, **kwargs):
+    """Discards the renders of objects using a template that was saved"""
+    TEMPLATE_RENDERER.invalidate(instance.id)
+
+
+def remove_template(sender, instance, **kwargs):
+    """Forgets a template that was deleted"""
+    TEMPLATE_RENDERER.remove(instance.id)
+
+
+def update_template_users(sender, instance, action, reverse, pk_set, **kwargs):
+    """Records objects that templates are applied to"""
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        # templates were added to an object's template_set
+        TEMPLATE_RENDERER.add_users(pk_set, [instance.id])
+    else:
+        TEMPLATE_RENDERER.add_users([instance.id], pk_set)
+
+
+signals.post_save.connect(
+    invalidate_template, sender=Template, dispatch_uid="invalidate_template"
+)
+signals.post_delete.connect(
+    remove_template, sender=Template, dispatch_uid="remove_template"
+)
+signals.m2m_changed.connect(
+    update_template_users,
+    sender=Template.applied_to.through,
+    dispatch_uid="update_template_users",
+)
@@ -362,6 +362,35 @@ class TemplateTests(ArxCommandTest, TemplateMixins):
 
         self.assertEquals(Template.objects.filter(id=id).get(), other_template)
 
+    def test_render_templates(self):
+        from evennia.utils import create
+        from world.templates.renderer import TEMPLATE_RENDERER
+
+        typeclass = "typeclasses.readable.readable.Readable"
+        book1 = create.create_object(
+            typeclass=typeclass, key="book1", location=self.char1, home=self.char1
+        )
+        markup = self.c1_template.markup()
+        desc = "A cover with {}, and [[TEMPLATE_999]].".format(markup)
+        self.c1_template.applied_to.add(book1)
+        self.assertEqual(
+            TEMPLATE_RENDERER.render(book1, desc),
+            "A cover with {}, and [[TEMPLATE_999]].".format(self.c1_template.desc),
+        )
+        start = desc.index(markup)
+        self.assertEqual(
+            book1.attributes.get("compiled_desc")[1],
+            [(start, start + len(markup), self.c1_template.id)],
+        )
+        book1.ndb.cached_template_desc = "cached"
+        self.c1_template.desc = "A new desc"
+        self.c1_template.save()
+        self.assertIsNone(book1.ndb.cached_template_desc)
+        self.assertEqual(
+            TEMPLATE_RENDERER.render(book1, desc),
+            "A cover with A new desc, and [[TEMPLATE_999]].",
+        )
+
     def create_template_for(
         self,
         account,
@@ -1,6 +1,11 @@
 from evennia.typeclasses.models import SharedMemoryModel
 from django.db import models
 
+from server.utils.picker import PickerCache
+
+# pickers of emit text for each set of weather conditions, and of weathers for each season
+EMIT_PICKERS = PickerCache()
+
 
 class WeatherType(SharedMemoryModel):
 
@@ -60,3 +65,13 @@ class WeatherEmit(SharedMemoryModel):
     weight = models.PositiveIntegerField("Weight", default=10)
     text = models.TextField("Emit", blank=False, null=False)
     gm_notes = models.TextField("GM Notes", blank=True, null=True)
+
+
+def clear_emit_pickers(sender, **kwargs):
+    """Discards the cached emit pickers when weathers or their emits change"""
+    EMIT_PICKERS.clear()
+
+
+for _model in (WeatherType, WeatherEmit):
+    models.signals.post_save.connect(clear_emit_pickers, sender=_model)
+    models.signals.post_delete.connect(clear_emit_pickers, sender=_model)
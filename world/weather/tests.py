@@ -64,3 +64,24 @@ class TestWeatherCommands(ArxCommandTest):
         # Call choose_current_weather() and expect a WeatherSelectionError to be raised
         with self.assertRaises(utils.WeatherSelectionError):
             utils.choose_current_weather()
+
+    def test_pick_emit(self):
+        self.assertEqual(
+            utils.pick_emit(self.weather1, season="summer", time="night", intensity=5),
+            "Test1 weather happens.",
+        )
+        self.assertEqual(len(utils.EMIT_PICKERS.pickers), 1)
+        # a new emit makes us rebuild the picker
+        WeatherEmit.objects.create(
+            weather=self.weather1, text="Test3 weather happens.", weight=0
+        )
+        self.assertEqual(utils.EMIT_PICKERS.pickers, {})
+        self.emit1.weight = 0
+        self.emit1.save()
+        self.assertEqual(
+            utils.pick_emit(self.weather1, season="summer", time="night", intensity=5),
+            "Test3 weather happens.",
+        )
+        self.assertIsNone(
+            utils.pick_emit(self.weather1, season="summer", time="night", intensity=11)
+        )
@@ -2,13 +2,12 @@
 Utilities to make the weather system a little more friendly to write.
 """
 
-from world.weather.models import WeatherType, WeatherEmit
+from world.weather.models import WeatherType, WeatherEmit, EMIT_PICKERS
 from typeclasses.scripts import gametime
 from evennia.server.models import ServerConfig
 from evennia.server.sessionhandler import SESSION_HANDLER
 from evennia.utils import logger
 from random import randint
-from server.utils.picker import WeightedPicker
 
 
 def weather_emits(weathertype, season=None, time=None, intensity=5):
@@ -81,9 +80,19 @@ def pick_emit(weathertype, season=None, time=None, intensity=None):
     if intensity is None:
         intensity = ServerConfig.objects.conf("weather_intensity_current", default=5)
 
-    emits = weather_emits(weathertype, season=season, time=time, intensity=intensity)
+    if not season or not time:
+        current_season, current_time = gametime.get_time_and_season()
+        season = season or current_season
+        time = time or current_time
 
-    if emits.count() == 0:
+    picker = EMIT_PICKERS.get(
+        (weathertype.id, season.lower(), time.lower(), intensity),
+        lambda: weather_emits(
+            weathertype, season=season, time=time, intensity=intensity
+        ).values_list("text", "weight"),
+    )
+
+    if not picker:
         logger.log_err(
             "Weather: Unable to find any matching emits for {} intensity {} on a {} {}.".format(
                 weathertype.name, intensity, season, time
@@ -91,17 +100,7 @@ def pick_emit(weathertype, season=None, time=None, intensity=None):
         )
         return None
 
-    if emits.count() == 1:
-        return emits[0].text
-
-    picker = WeightedPicker()
-
-    for emit in emits:
-        picker.add_option(emit, emit.weight)
-
-    result = picker.pick()
-
-    return result.text
+    return picker.pick()
 
 
 def set_weather_type(value=1):
@@ -188,33 +187,36 @@ def emits_for_season(season="fall"):
     return qs
 
 
-def random_weather(season="fall"):
+def weather_weights(emits):
     """
-    Given a season, picks a weighted random weather type from the list
-    of valid weathers.
-    :param season: 'summer', 'autumn', 'winter', or 'spring'
-    :return: A WeatherType object with emits valid in the given season.
+    Given emits, returns the automated weathers they belong to and
+    the combined weight of each weather's emits.
+    :param emits: A QuerySet of WeatherEmit objects
+    :return: A list of (WeatherType ID, weight) tuples
     """
-    emits = emits_for_season(season)
-
     # Build a list of all weathers and the combined weight
     # of their valid emits
     weathers = {}
-    total_weight = 0
-    for emit in emits:
+    for emit in emits.select_related("weather"):
         if emit.weather.automated:
             weatherweight = (
                 weathers[emit.weather.id] if emit.weather.id in weathers else 0
             )
             weatherweight += emit.weight
             weathers[emit.weather.id] = weatherweight * emit.weather.multiplier
-            total_weight += emit.weight
+    return list(weathers.items())
 
-    # Create our picker list
-    picker = WeightedPicker()
-    for k, v in weathers.items():
-        picker.add_option(k, v)
 
+def random_weather(season="fall"):
+    """
+    Given a season, picks a weighted random weather type from the list
+    of valid weathers.
+    :param season: 'summer', 'autumn', 'winter', or 'spring'
+    :return: A WeatherType object with emits valid in the given season.
+    """
+    picker = EMIT_PICKERS.get(
+        ("weather", season), lambda: weather_weights(emits_for_season(season))
+    )
     result = picker.pick()
 
     weather = WeatherType.objects.get(pk=result)